@@ -1,6 +1,8 @@
 # backend/app/api/deps.py
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+import time
+from typing import Callable, Generator, Optional, Tuple
+from fastapi import Depends, Header, HTTPException, Request, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -9,37 +11,105 @@ from sqlalchemy.orm import Session
 from app import models, schemas, crud
 from app.core import security
 from app.core.config import settings
+from app.core.deadlines import Deadline, deadline_after
+from app.core.exceptions import ContentValidationError, ModelLoadError, QuotaExceeded, ServiceOverloaded
+from app.core.tracing import tracer
 from app.db.session import SessionLocal
+from app.services.load_shedding import PRIORITY_CLASSES, load_shedder
+from app.services.ml_service import ContentModerator, get_content_moderator_async
+from app.services.usage import usage_meter
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
+# WebSocket subprotocol a browser offers, followed by its token, to authenticate
+WS_TOKEN_SUBPROTOCOL = "bearer"
+
 def get_db() -> Generator:
+    # Spans the session's whole lifetime, so it ends only at dependency teardown
+    span = tracer.start_span("db.session")
     try:
         db = SessionLocal()
         yield db
     finally:
         db.close()
+        if span is not None:
+            span.end()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def token_payload(token: str) -> schemas.TokenPayload:
+    """The claims of a bearer token; raises HTTPException if it is invalid."""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = schemas.TokenPayload(**payload)
+        return schemas.TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+
+def user_from_token(db: Session, token: str) -> models.User:
+    """The user a bearer token was issued to; raises HTTPException if it is invalid."""
+    token_data = token_payload(token)
     user = crud.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    with tracer.span("auth") as span:
+        user = user_from_token(db, token)
+        if span is not None:
+            span.set(**{"enduser.id": user.id})
+        return user
+
+def websocket_token(websocket: WebSocket) -> Optional[str]:
+    """
+    The bearer token of a WebSocket handshake, or None.
+    
+    Browsers cannot set headers on WebSocket requests, so besides a bearer
+    header the token may be offered as a subprotocol right after
+    ``WS_TOKEN_SUBPROTOCOL`` (``new WebSocket(url, ["bearer", token])``).
+    Query parameters are not read: URLs end up in access logs.
+    """
+    scheme, _, value = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and value:
+        return value
+    subprotocols = websocket.scope.get("subprotocols") or []
+    if WS_TOKEN_SUBPROTOCOL in subprotocols:
+        position = subprotocols.index(WS_TOKEN_SUBPROTOCOL) + 1
+        if position < len(subprotocols):
+            return subprotocols[position]
+    return None
+
+async def get_websocket_user(websocket: WebSocket) -> Tuple[Optional[models.User], Optional[int]]:
+    """
+    The active user a WebSocket handshake authenticates as (or None), and when its token expires.
+    
+    The expiry is a Unix timestamp, or None if the token has none.
+    """
+    token = websocket_token(websocket)
+    if not token:
+        return None, None
+    
+    def lookup() -> Tuple[Optional[models.User], Optional[int]]:
+        db = SessionLocal()
+        try:
+            user = user_from_token(db, token)
+        except HTTPException:
+            return None, None
+        finally:
+            db.close()
+        if not crud.user.is_active(user):
+            return None, None
+        return user, token_payload(token).exp
+    
+    return await run_in_threadpool(lookup)
+
 def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -47,6 +117,19 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def check_quota(user: models.User) -> None:
+    """Raise QuotaExceeded if ``user`` has used up a quota (checked in memory, no query)."""
+    exceeded = usage_meter.exceeded(user.id)
+    if exceeded:
+        raise QuotaExceeded(f"Monthly usage quota exceeded for: {', '.join(exceeded)}")
+
+def get_metered_user(
+    current_user: models.User = Depends(get_current_active_user),
+) -> models.User:
+    """The active user, refused with a 429 once they have used up a usage quota."""
+    check_quota(current_user)
+    return current_user
+
 def get_current_active_superuser(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -54,4 +137,57 @@ def get_current_active_superuser(
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_moderator() -> ContentModerator:
+    """The shared moderator; models load on first use unless preloaded at startup."""
+    try:
+        return await get_content_moderator_async()
+    except Exception as e:
+        raise ModelLoadError(f"Content moderation service is not available: {e}")
+
+def admit(priority: str) -> None:
+    """Raise ServiceOverloaded if moderation work of class ``priority`` is being shed."""
+    if not load_shedder.admit(priority):
+        raise ServiceOverloaded(
+            f"Shedding {priority} moderation traffic, retry later",
+            retry_after=settings.SHED_RETRY_AFTER_SECONDS,
+        )
+
+def moderation_priority(default: str, check: bool = True) -> Callable[..., str]:
+    """
+    Dependency resolving a request's load shedding class.
+    
+    A ``priority`` claim in the bearer token (see ``app.commands.issue_token``)
+    overrides the route's ``default``. With ``check`` the request is also
+    admitted, or refused with a 503, before any moderation work starts;
+    routes that only sometimes moderate call ``admit()`` themselves.
+    """
+    def dependency(token: str = Depends(reusable_oauth2)) -> str:
+        claimed = token_payload(token).priority
+        priority = claimed if claimed in PRIORITY_CLASSES else default
+        if check:
+            admit(priority)
+        return priority
+    
+    return dependency
+
+def request_deadline(
+    request: Request,
+    x_request_timeout_ms: Optional[str] = Header(None),
+) -> Optional[Deadline]:
+    """
+    The request's deadline, from the ``X-Request-Timeout-Ms`` header.
+    
+    The header holds how many milliseconds the client will wait for the
+    response, counted from when the request arrived.
+    """
+    timeout_ms = None
+    if x_request_timeout_ms is not None:
+        try:
+            timeout_ms = float(x_request_timeout_ms)
+        except ValueError:
+            timeout_ms = -1.0
+        if not timeout_ms >= 0:
+            raise ContentValidationError("X-Request-Timeout-Ms must be a non-negative number")
+    return deadline_after(timeout_ms, getattr(request.state, "received_at", time.monotonic()))
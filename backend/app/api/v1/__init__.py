@@ -1,70 +1 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from typing import Optional, List
-from pydantic import BaseModel
-import logging
-
-from app.api.v1.endpoints import users, auth, content
-
-api_router = APIRouter()
-# router = APIRouter()
-logger = logging.getLogger(__name__)
-
-class ModerationRequest(BaseModel):
-    text: Optional[str] = None
-    content_type: str  # 'text' or 'image'
-
-class ModerationResult(BaseModel):
-    is_approved: bool
-    categories: List[str]
-    scores: dict
-    reason: Optional[str] = None
-
-@router.post("/moderate", response_model=ModerationResult)
-async def moderate_content(
-    request: ModerationRequest,
-    file: UploadFile = File(None)
-):
-    """
-    Moderate content (text or image) for inappropriate content.
-    
-    - **text**: Text content to moderate (if content_type is 'text')
-    - **content_type**: Type of content ('text' or 'image')
-    - **file**: Image file to moderate (if content_type is 'image')
-    """
-    try:
-        if request.content_type == 'text' and not request.text:
-            raise HTTPException(
-                status_code=400,
-                detail="Text content is required for text moderation"
-            )
-        
-        if request.content_type == 'image' and not file:
-            raise HTTPException(
-                status_code=400,
-                detail="Image file is required for image moderation"
-            )
-        
-        # TODO: Implement actual moderation logic
-        # This is a placeholder response
-        return {
-            "is_approved": True,
-            "categories": [],
-            "scores": {},
-            "reason": "Moderation not fully implemented yet"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error during content moderation: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing request: {str(e)}"
-        )
-
-# Import other API endpoints here
-from . import users, moderation, analytics, auth, content
-
-api_router.include_router(moderation.router, prefix="/moderation", tags=["moderation"])
-api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(content.router, prefix="/content", tags=["content"])
\ No newline at end of file
+from app.api.v1.api import api_router
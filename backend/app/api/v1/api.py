@@ -1,10 +1,16 @@
 # backend/app/api/v1/api.py
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import users, auth, content, moderate
+from app.api.v1.endpoints import users, auth, content, moderate, analytics, policy, review, models, usage, profiling
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(content.router, prefix="/content", tags=["content"])
-api_router.include_router(moderate.router, prefix="/moderate", tags=["moderation"])
\ No newline at end of file
+api_router.include_router(moderate.router, prefix="/moderate", tags=["moderation"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(policy.router, prefix="/policy", tags=["policy"])
+api_router.include_router(review.router, prefix="/review", tags=["review"])
+api_router.include_router(models.router, prefix="/models", tags=["models"])
+api_router.include_router(usage.router, prefix="/usage", tags=["usage"])
+api_router.include_router(profiling.router, prefix="/profiling", tags=["profiling"])
\ No newline at end of file
@@ -0,0 +1,98 @@
+# backend/app/api/v1/endpoints/analytics.py
+from datetime import datetime, timedelta
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.core.config import settings
+from app.services import analytics
+
+router = APIRouter()
+
+def _window_start(hours: int) -> datetime:
+    return analytics.hour_bucket(datetime.utcnow() - timedelta(hours=hours - 1))
+
+@router.get("/overview", response_model=schemas.AnalyticsOverview)
+def read_overview(
+    hours: int = Query(24, ge=1, le=settings.ANALYTICS_MAX_WINDOW_HOURS),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Moderation volume and violation rates per category and content type.
+
+    Served from hourly rollups, so cost depends on the window, not on the
+    amount of moderated content.
+    """
+    since = _window_start(hours)
+    return {
+        "since": since,
+        "hours": hours,
+        "total": analytics.get_total(
+            db, since=since, dimension=analytics.DIMENSION_TOTAL, key=analytics.TOTAL_KEY
+        ),
+        "categories": analytics.get_counts(db, since=since, dimension=analytics.DIMENSION_CATEGORY),
+        "content_types": analytics.get_counts(db, since=since, dimension=analytics.DIMENSION_CONTENT_TYPE),
+    }
+
+@router.get("/timeseries", response_model=schemas.Timeseries)
+def read_timeseries(
+    dimension: str = Query(analytics.DIMENSION_TOTAL),
+    key: str = Query(analytics.TOTAL_KEY),
+    hours: int = Query(24, ge=1, le=settings.ANALYTICS_MAX_WINDOW_HOURS),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Hourly moderation counts for one dimension value.
+
+    - **dimension**: "total", "category", "content_type" or "user"
+    - **key**: Value within the dimension ("all" for total)
+    """
+    if dimension not in analytics.DIMENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown dimension '{dimension}'. Allowed: {', '.join(analytics.DIMENSIONS)}",
+        )
+    since = _window_start(hours)
+    return {
+        "dimension": dimension,
+        "key": key,
+        "points": analytics.get_timeseries(db, since=since, dimension=dimension, key=key),
+    }
+
+@router.get("/users/me", response_model=schemas.UserAnalytics)
+def read_my_analytics(
+    hours: int = Query(24, ge=1, le=settings.ANALYTICS_MAX_WINDOW_HOURS),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Moderation counts for the current user's content.
+    """
+    return _user_analytics(db, user_id=current_user.id, hours=hours)
+
+@router.get("/users/{user_id}", response_model=schemas.UserAnalytics)
+def read_user_analytics(
+    user_id: int,
+    hours: int = Query(24, ge=1, le=settings.ANALYTICS_MAX_WINDOW_HOURS),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Moderation counts for a specific user's content.
+    """
+    return _user_analytics(db, user_id=user_id, hours=hours)
+
+def _user_analytics(db: Session, *, user_id: int, hours: int) -> dict:
+    since = _window_start(hours)
+    return {
+        "user_id": user_id,
+        "since": since,
+        "hours": hours,
+        "total": analytics.get_total(
+            db, since=since, dimension=analytics.DIMENSION_USER, key=str(user_id)
+        ),
+    }
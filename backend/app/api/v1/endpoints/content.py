@@ -1,11 +1,28 @@
 # backend/app/api/v1/endpoints/content.py
+import hashlib
+import json
+import time
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.background import add_background_task
 from app.core.config import settings
+from app.core.exceptions import ContentValidationError
+from app.core.responses import COMPACT_RESPONSES, JSON_MEDIA_TYPE, compact_response, negotiate
+from app.core.uploads import read_upload, upload_buffers
+from app.core.validators import validate_file_upload
+from app.services.bulk_moderation import moderate_contents, moderate_contents_in_background
+from app.services.embedding_store import embedding_index
+from app.services.load_shedding import BULK
+from app.services.ml_service import ContentModerator
+from app.services.moderation_recorder import moderation_recorder
+from app.services.policy import policy_engine
+from app.services.score_store import moderation_columns
+from app.services.storage import blob_key, storage_service
 
 router = APIRouter()
 
@@ -24,6 +41,147 @@ def create_content(
     )
     return content
 
+@router.post("/bulk", response_model=schemas.ContentBulkResult, responses=COMPACT_RESPONSES)
+async def create_contents_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    bulk_in: schemas.ContentBulkCreate,
+    background_tasks: BackgroundTasks,
+    accept: Optional[str] = Header(None),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    priority: str = Depends(deps.moderation_priority(BULK, check=False)),
+) -> Any:
+    """
+    Create many content items in one batched insert.
+    
+    - **items**: Content items to create (ids are returned in the same order)
+    - **moderation**: "none", "background" (moderate after responding) or
+      "inline" (moderate text items before responding)
+    
+    Inline results can be requested in the compact formats of
+    `/moderate/texts` through the Accept header. Requests that moderate
+    are in the "bulk" load shedding class and are refused with a 503
+    before anything is inserted while it is being shed.
+    """
+    if len(bulk_in.items) > settings.BULK_MAX_ITEMS:
+        raise ContentValidationError(
+            f"Bulk requests are limited to {settings.BULK_MAX_ITEMS} items"
+        )
+    if bulk_in.moderation != "none":
+        deps.check_quota(current_user)
+        deps.admit(priority)
+    
+    ids = await run_in_threadpool(
+        crud.content.create_multi_with_owner,
+        db, objs_in=bulk_in.items, owner_id=current_user.id
+    )
+    
+    # Only text items can be moderated from the request payload
+    to_moderate = [
+        (content_id, item.content)
+        for content_id, item in zip(ids, bulk_in.items)
+        if item.content_type == "text" and item.content
+    ]
+    
+    results = None
+    if bulk_in.moderation == "inline" and to_moderate:
+        by_id = await moderate_contents(
+            db, to_moderate, user_id=current_user.id, priority=priority
+        )
+        results = [by_id.get(content_id) for content_id in ids]
+    elif bulk_in.moderation == "background" and to_moderate:
+        add_background_task(
+            background_tasks, moderate_contents_in_background, to_moderate, current_user.id,
+            priority,
+        )
+    
+    payload = {
+        "ids": ids,
+        "count": len(ids),
+        "moderation": bulk_in.moderation,
+    }
+    media_type = negotiate(accept)
+    if results is not None and media_type != JSON_MEDIA_TYPE:
+        return compact_response(payload, results, media_type)
+    return {**payload, "results": results}
+
+@router.post("/upload", response_model=schemas.ContentUploadResult)
+async def upload_content(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(deps.get_metered_user),
+    moderator: ContentModerator = Depends(deps.get_moderator),
+) -> Any:
+    """
+    Upload an image, store it content-addressed and moderate it.
+    
+    The file is hashed while it is read. Bytes that are already stored are
+    not uploaded again, and their stored moderation result is reused instead
+    of running the model.
+    
+    - **file**: Image file (JPEG, PNG, GIF, or WebP)
+    """
+    validate_file_upload(file)
+    
+    hasher = hashlib.sha256()
+    async with upload_buffers.acquire() as buffer:
+        data = await read_upload(file, buffer, hasher=hasher)
+        sha256 = hasher.hexdigest()
+        blob, uploaded = await storage_service.store_blob(
+            db, data, sha256=sha256, content_type=file.content_type
+        )
+        
+        # The reference taken above belongs to the content row created below;
+        # if anything fails before that row exists, give it back
+        try:
+            start_time = time.perf_counter()
+            moderation_reused = blob.moderation_result is not None
+            if moderation_reused:
+                # Re-apply the current policy (and this uploader's overrides) to the stored scores
+                result = json.loads(blob.moderation_result)
+                result.update(policy_engine.evaluate(
+                    result["scores"], content_type="image", tenant=str(current_user.id)
+                ))
+            else:
+                result = await moderator.moderate_image(
+                    data, tenant=str(current_user.id), user_id=current_user.id
+                )
+                # Error results carry no scores and are not worth keeping
+                if result.get("scores"):
+                    await run_in_threadpool(
+                        crud.blob.set_moderation_result, db, sha256=sha256, result=result
+                    )
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            
+            columns = await run_in_threadpool(moderation_columns, db, result)
+            content = await run_in_threadpool(
+                crud.content.create_with_owner,
+                db,
+                obj_in=schemas.ContentCreate(content_type="image", file_path=blob_key(sha256)),
+                owner_id=current_user.id,
+                blob_sha256=sha256,
+                **columns,
+            )
+        except BaseException:
+            await run_in_threadpool(db.rollback)
+            await storage_service.release_blob(db, sha256)
+            raise
+    await moderation_recorder.record({
+        "content_type": "image",
+        "content_id": content.id,
+        "user_id": current_user.id,
+        "latency_ms": latency_ms,
+        "result": result,
+    })
+    
+    return {
+        "content": content,
+        "sha256": sha256,
+        "deduplicated": not uploaded,
+        "moderation_reused": moderation_reused,
+    }
+
 @router.get("/{content_id}", response_model=schemas.Content)
 def read_content(
     content_id: int,
@@ -40,6 +198,38 @@ def read_content(
         raise HTTPException(status_code=400, detail="Not enough permissions")
     return content
 
+@router.get("/{content_id}/similar", response_model=schemas.SimilarContent)
+def read_similar_content(
+    content_id: int,
+    k: int = Query(10, ge=1, le=settings.SIMILAR_MAX_RESULTS),
+    action: Optional[str] = Query(None, pattern="^(approve|review|reject)$"),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Stored text content most similar in meaning to a moderated item.
+    
+    - **k**: Items to return
+    - **action**: Only items whose current moderation action is this, e.g. "reject" for flagged posts
+    
+    Compares the embeddings kept from the moderation pass, so nothing is
+    run through a model. Content that was never moderated with the
+    embedding store enabled has none (404).
+    """
+    # Filtering and deleted content drop candidates, so search wider than k
+    found = embedding_index.similar(content_id, k * 4 if action else k + 8)
+    if found is None:
+        raise HTTPException(status_code=404, detail="No embedding stored for this content")
+    rows = crud.content.get_by_ids(
+        db, ids=[item_id for item_id, _ in found["results"]], moderation_action=action
+    )
+    items = [
+        {"content": rows[item_id], "similarity": similarity}
+        for item_id, similarity in found["results"]
+        if item_id in rows
+    ]
+    return {"content_id": content_id, "model": found["model"], "items": items[:k]}
+
 @router.get("", response_model=List[schemas.Content])
 def read_contents(
     skip: int = Query(0, ge=0),
@@ -87,7 +277,7 @@ def update_content(
     return content
 
 @router.delete("/{content_id}", response_model=schemas.Content)
-def delete_content(
+async def delete_content(
     *,
     db: Session = Depends(deps.get_db),
     content_id: int,
@@ -95,11 +285,20 @@ def delete_content(
 ) -> Any:
     """
     Delete content.
+    
+    Uploaded media is shared between identical uploads; the stored file is
+    only removed when the last content referencing it is deleted.
     """
-    content = crud.content.get(db=db, id=content_id)
+    content = await run_in_threadpool(crud.content.get, db=db, id=content_id)
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
-    if not crud.user.is_superuser(current_user) and (content.owner_id != current_user.id):
+    if not crud.user.is_superuser(current_user) and (content.user_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    content = crud.content.remove(db=db, id=content_id)
-    return content
\ No newline at end of file
+    # Only the server-set link is trusted: file_path is client-writable
+    if content.blob_sha256:
+        # The row goes in the same transaction that drops its blob reference
+        content = await run_in_threadpool(crud.content.remove, db=db, id=content_id, commit=False)
+        await storage_service.release_blob(db, content.blob_sha256)
+    else:
+        content = await run_in_threadpool(crud.content.remove, db=db, id=content_id)
+    return content
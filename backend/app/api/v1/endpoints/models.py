@@ -0,0 +1,72 @@
+# backend/app/api/v1/endpoints/models.py
+from typing import Any
+from fastapi import APIRouter, Depends, status
+
+from app import models, schemas
+from app.api import deps
+from app.services.ml_service import ContentModerator
+from app.services.model_registry import model_registry
+from app.services.model_rollout import model_rollout
+
+router = APIRouter()
+
+@router.get("", response_model=schemas.ModelStatus)
+def read_models(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    moderator: ContentModerator = Depends(deps.get_moderator),
+) -> Any:
+    """Loaded models, the latest swap or shadow operation per text model, and shadow results."""
+    return {
+        "registry": model_registry.stats(),
+        "text_models": {
+            key: {"model": pipeline.model_name, "leases": pipeline.leases}
+            for key, pipeline in moderator.text_pipelines.items()
+        },
+        **model_rollout.stats(moderator),
+    }
+
+@router.post("/{key}/swap", response_model=schemas.ModelOperation, status_code=status.HTTP_202_ACCEPTED)
+async def swap_model(
+    key: str,
+    request: schemas.ModelSwapRequest,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    moderator: ContentModerator = Depends(deps.get_moderator),
+) -> Any:
+    """
+    Replace a text model without downtime (in this worker process).
+    
+    - **key**: Text model registry key, e.g. "text"
+    - **source**: New model path or hub name; omitted, the configured model is reloaded
+    
+    The model loads and warms up in the background while the current one
+    keeps serving; poll `GET /models` for the operation's state.
+    """
+    return model_rollout.start_swap(moderator, key, request.source)
+
+@router.post("/{key}/shadow", response_model=schemas.ModelOperation, status_code=status.HTTP_202_ACCEPTED)
+async def start_shadow(
+    key: str,
+    request: schemas.ShadowStartRequest,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    moderator: ContentModerator = Depends(deps.get_moderator),
+) -> Any:
+    """
+    Score a sample of a text model's traffic with a candidate model.
+    
+    - **key**: Text model registry key whose traffic is sampled
+    - **source**: Candidate model path or hub name
+    - **sample_rate**: Fraction of texts also scored by the candidate
+    
+    Responses always come from the live model. Swapping to the same
+    source promotes the already loaded candidate.
+    """
+    return model_rollout.start_shadow(moderator, key, request.source, request.sample_rate)
+
+@router.delete("/{key}/shadow")
+async def stop_shadow(
+    key: str,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    moderator: ContentModerator = Depends(deps.get_moderator),
+) -> Any:
+    """Stop shadowing a text model and return the candidate's final comparison."""
+    return await model_rollout.stop_shadow(moderator, key)
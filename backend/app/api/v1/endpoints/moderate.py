@@ -1,111 +1,254 @@
 # backend/app/api/v1/endpoints/moderate.py
-import os
-import tempfile
+import time
 import logging
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Header, Request, WebSocket, status
 from typing import Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 
-from app.services.ml_service import ContentModerator
+from app.services.image_hashing import VERDICT_BAD, VERDICT_GOOD
+from app.services.load_shedding import BULK, STANDARD
+from app.services.ml_service import ContentModerator, get_content_moderator_async
+from app.services.moderation_stream import ModerationStream, stream_stats
+from app.services.moderation_recorder import moderation_recorder
+from app.core.config import settings
+from app.core.deadlines import Deadline, until_disconnected
+from app.core.responses import COMPACT_RESPONSES, FastJSONResponse, moderation_response, negotiate
+from app.core.uploads import read_upload, upload_buffers
 from app.core.validators import validate_file_upload, validate_text_content
-from app.core.exceptions import FileUploadError, ContentValidationError, ModelLoadError
+from app.core.exceptions import FileUploadError, ContentValidationError, ModelLoadError, RequestCancelled
 from app.api import deps
 from app import models
+from app.schemas.moderation import (
+    BatchModerationRequest,
+    BatchModerationResponse,
+    ModerationResponse,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize moderator (lazy loading would be better in production)
-try:
-    moderator = ContentModerator()
-except Exception as e:
-    logger.error(f"Failed to initialize ContentModerator: {e}")
-    moderator = None
-
 class ModerationRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000, description="Text content to moderate")
     content_type: Optional[str] = Field(default="text", description="Type of content")
+    content_id: Optional[int] = Field(default=None, description="Stored content the moderation log entry refers to")
 
-class ModerationResponse(BaseModel):
-    status: str
-    data: dict
-    timestamp: str
 
-@router.post("/text", response_model=ModerationResponse)
+@router.post("/text", response_model=ModerationResponse, responses=COMPACT_RESPONSES)
 async def moderate_text(
     request: ModerationRequest,
-    current_user: models.User = Depends(deps.get_current_active_user)
+    http_request: Request,
+    accept: Optional[str] = Header(None),
+    deadline: Optional[Deadline] = Depends(deps.request_deadline),
+    current_user: models.User = Depends(deps.get_metered_user),
+    priority: str = Depends(deps.moderation_priority(STANDARD)),
+    moderator: ContentModerator = Depends(deps.get_moderator)
 ):
     """
     Moderate text content for inappropriate content.
     
     - **text**: Text content to moderate (required)
     - **content_type**: Type of content (default: "text")
+    - **content_id**: Optional stored content the audit log entry refers to
+      (the content's own moderation result is not changed)
+    
+    Send `Accept: application/vnd.moderation.compact+json` (or
+    `application/msgpack`) for score arrays in a shared category order.
+    
+    Requests are in the "standard" load shedding class unless the token
+    carries a `priority` claim, and get a 503 with Retry-After while that
+    class is being shed.
+    
+    Send `X-Request-Timeout-Ms` with how long you will wait: if too little
+    of it is left for a model pass, the result is a "review" fallback
+    (`"fallback": "deadline"`) instead of a late answer. Work for clients
+    that disconnect is dropped before it reaches the model.
     """
     # Validate text content
     validate_text_content(request.text)
     
-    if not moderator:
-        raise ModelLoadError("Content moderation service is not available")
-    
     try:
-        result = await moderator.moderate_text(request.text)
-        return ModerationResponse(
-            status="success",
-            data=result,
-            timestamp=datetime.utcnow().isoformat()
-        )
+        start_time = time.perf_counter()
+        result = await until_disconnected(http_request, moderator.moderate_text(
+            request.text, request.content_type or "text", tenant=str(current_user.id),
+            priority=priority, deadline=deadline, user_id=current_user.id,
+        ))
+        await moderation_recorder.record({
+            "content_type": request.content_type or "text",
+            "content_id": request.content_id,
+            "user_id": current_user.id,
+            "is_superuser": current_user.is_superuser,
+            "latency_ms": (time.perf_counter() - start_time) * 1000,
+            "result": result,
+        })
+        return moderation_response([result], negotiate(accept), single=True)
+    except RequestCancelled:
+        raise
     except Exception as e:
         logger.error(f"Error in text moderation: {e}", exc_info=True)
         raise ModelLoadError(f"Error during text moderation: {str(e)}")
 
-@router.post("/image", response_model=ModerationResponse)
+@router.post("/texts", response_model=BatchModerationResponse, responses=COMPACT_RESPONSES)
+async def moderate_texts(
+    request: BatchModerationRequest,
+    http_request: Request,
+    accept: Optional[str] = Header(None),
+    deadline: Optional[Deadline] = Depends(deps.request_deadline),
+    current_user: models.User = Depends(deps.get_metered_user),
+    priority: str = Depends(deps.moderation_priority(BULK)),
+    moderator: ContentModerator = Depends(deps.get_moderator)
+):
+    """
+    Moderate a batch of texts in one request.
+    
+    - **texts**: Texts to moderate (results are returned in the same order)
+    - **content_type**: Type of content (default: "text")
+    
+    Supports the same compact formats as `/moderate/text`, which list the
+    categories once instead of once per result. Batches are in the "bulk"
+    load shedding class unless the token says otherwise. `X-Request-Timeout-Ms`
+    works as for `/moderate/text`, per text.
+    """
+    if len(request.texts) > settings.MODERATE_BATCH_MAX_TEXTS:
+        raise ContentValidationError(
+            f"Batch requests are limited to {settings.MODERATE_BATCH_MAX_TEXTS} texts"
+        )
+    for text in request.texts:
+        validate_text_content(text)
+    
+    content_type = request.content_type or "text"
+    try:
+        start_time = time.perf_counter()
+        results = await until_disconnected(http_request, moderator.moderate_texts(
+            request.texts, content_type, tenant=str(current_user.id),
+            priority=priority, deadline=deadline, user_id=current_user.id,
+        ))
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        for result in results:
+            await moderation_recorder.record({
+                "content_type": content_type,
+                "user_id": current_user.id,
+                "is_superuser": current_user.is_superuser,
+                "latency_ms": latency_ms,
+                "result": result,
+            })
+        return moderation_response(results, negotiate(accept))
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch text moderation: {e}", exc_info=True)
+        raise ModelLoadError(f"Error during batch text moderation: {str(e)}")
+
+@router.websocket("/stream")
+async def moderate_stream(websocket: WebSocket):
+    """
+    Moderate a stream of text messages over one WebSocket connection.
+    
+    The connection authenticates once, with a bearer header or, from
+    browsers, by offering the subprotocols ``["bearer", <token>]``; it is
+    closed with code 1008 once the token expires. Send ``{"id": ..., "text": ..., "content_type": ...}``
+    frames; each is answered with ``{"id": ..., "result": {...}}`` (or
+    ``{"id": ..., "error": ...}``) as soon as it is moderated. Messages are
+    in the "interactive" load shedding class; shed ones get an
+    ``"overloaded"`` error, and messages past the user's usage quota with
+    ``"quota_exceeded"``. A ``timeout_ms`` field sets a message's
+    deadline, like the ``X-Request-Timeout-Ms`` header.
+    """
+    user, expires_at = await deps.get_websocket_user(websocket)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        moderator = await get_content_moderator_async()
+    except Exception as e:
+        logger.error(f"Moderation stream unavailable: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    if not stream_stats.open():
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    try:
+        subprotocols = websocket.scope.get("subprotocols") or []
+        await websocket.accept(
+            subprotocol=deps.WS_TOKEN_SUBPROTOCOL if deps.WS_TOKEN_SUBPROTOCOL in subprotocols else None
+        )
+        await ModerationStream(websocket, moderator, user, expires_at=expires_at).run()
+    finally:
+        stream_stats.close()
+
+@router.post("/image", response_model=ModerationResponse, responses=COMPACT_RESPONSES)
 async def moderate_image(
+    http_request: Request,
     file: UploadFile = File(...),
-    current_user: models.User = Depends(deps.get_current_active_user)
+    content_id: Optional[int] = Form(None),
+    accept: Optional[str] = Header(None),
+    deadline: Optional[Deadline] = Depends(deps.request_deadline),
+    current_user: models.User = Depends(deps.get_metered_user),
+    priority: str = Depends(deps.moderation_priority(STANDARD)),
+    moderator: ContentModerator = Depends(deps.get_moderator)
 ):
     """
     Moderate image content for inappropriate content.
     
     - **file**: Image file to moderate (JPEG, PNG, GIF, or WebP)
+    - **content_id**: Optional stored content the audit log entry refers to
+      (the content's own moderation result is not changed)
+    
+    `X-Request-Timeout-Ms` works as for `/moderate/text`.
     """
     # Validate file upload
     validate_file_upload(file)
     
-    if not moderator:
-        raise ModelLoadError("Content moderation service is not available")
-    
-    file_path = None
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp_file:
-            file_path = tmp_file.name
-            content = await file.read()
-            tmp_file.write(content)
+        # Read the upload once into a pooled buffer and decode straight from it
+        async with upload_buffers.acquire() as buffer:
+            image_data = await read_upload(file, buffer)
+            start_time = time.perf_counter()
+            result = await until_disconnected(http_request, moderator.moderate_image(
+                image_data, tenant=str(current_user.id),
+                priority=priority, deadline=deadline, user_id=current_user.id,
+            ))
         
-        # Read file as bytes for moderation
-        with open(file_path, 'rb') as f:
-            image_bytes = f.read()
+        await moderation_recorder.record({
+            "content_type": "image",
+            "content_id": content_id,
+            "user_id": current_user.id,
+            "is_superuser": current_user.is_superuser,
+            "latency_ms": (time.perf_counter() - start_time) * 1000,
+            "result": result,
+        })
         
-        # Process the image
-        result = await moderator.moderate_image(image_bytes)
-        
-        return ModerationResponse(
-            status="success",
-            data=result,
-            timestamp=datetime.utcnow().isoformat()
-        )
+        return moderation_response([result], negotiate(accept), single=True)
         
-    except (FileUploadError, ModelLoadError):
+    except (FileUploadError, ModelLoadError, RequestCancelled):
         raise
     except Exception as e:
         logger.error(f"Error in image moderation: {e}", exc_info=True)
         raise ModelLoadError(f"Error during image moderation: {str(e)}")
-    finally:
-        # Clean up temporary file
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {file_path}: {e}")
\ No newline at end of file
+
+@router.post("/image/hashes")
+async def register_image_hash(
+    file: UploadFile = File(...),
+    verdict: str = Form(..., description="'bad' or 'good'"),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    moderator: ContentModerator = Depends(deps.get_moderator)
+):
+    """
+    Mark an image as known-bad or known-good so re-uploads skip the model.
+    
+    - **file**: Image file (JPEG, PNG, GIF, or WebP)
+    - **verdict**: "bad" or "good"
+    """
+    validate_file_upload(file)
+    if verdict not in (VERDICT_BAD, VERDICT_GOOD):
+        raise ContentValidationError(f"Verdict must be '{VERDICT_BAD}' or '{VERDICT_GOOD}'")
+    
+    async with upload_buffers.acquire() as buffer:
+        image_data = await read_upload(file, buffer)
+        data = await moderator.register_image(image_data, verdict)
+    
+    return FastJSONResponse({
+        "status": "success",
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
\ No newline at end of file
@@ -0,0 +1,63 @@
+# backend/app/api/v1/endpoints/policy.py
+from typing import Any
+from fastapi import APIRouter, Depends
+
+from app import models, schemas
+from app.api import deps
+from app.core.exceptions import PolicyError
+from app.services.policy import ACTIONS, PolicyEngine, policy_engine, score_matrix
+
+router = APIRouter()
+
+def _status() -> dict:
+    return {**policy_engine.stats(), "document": policy_engine.document}
+
+@router.get("", response_model=schemas.PolicyStatus)
+def read_policy(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """The live moderation policy and its reload status."""
+    policy_engine.maybe_reload()
+    return _status()
+
+@router.post("/reload", response_model=schemas.PolicyStatus)
+def reload_policy(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Re-read the policy file now instead of waiting for the change check.
+
+    An invalid file is rejected and the previous policy stays live.
+    """
+    policy_engine.maybe_reload(force=True)
+    if policy_engine.last_error:
+        raise PolicyError(policy_engine.last_error)
+    return _status()
+
+@router.post("/evaluate", response_model=schemas.PolicyEvaluateResult)
+def evaluate_policy(
+    request: schemas.PolicyEvaluateRequest,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Decide stored scores under the live or a candidate policy, without the model.
+
+    - **items**: Per-category scores, as stored in moderation results
+    - **content_type** / **tenant**: Which overrides apply
+    - **policy**: Optional candidate policy document; ``changed`` counts
+      items whose action differs from the live policy's
+    """
+    engine = policy_engine
+    if request.policy is not None:
+        engine = PolicyEngine(path=None)
+        engine.load_document(request.policy)
+    categories, matrix = score_matrix(request.items)
+    scope = {"content_type": request.content_type, "tenant": request.tenant}
+    actions = engine.evaluate_many(categories, matrix, **scope)
+    live = actions if engine is policy_engine else policy_engine.evaluate_many(categories, matrix, **scope)
+    return {
+        "version": engine.version,
+        "actions": [ACTIONS[action] for action in actions],
+        "counts": {name: int((actions == code).sum()) for code, name in enumerate(ACTIONS)},
+        "changed": int((actions != live).sum()),
+    }
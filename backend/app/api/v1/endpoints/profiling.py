@@ -0,0 +1,37 @@
+# backend/app/api/v1/endpoints/profiling.py
+from typing import Any
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app import models
+from app.api import deps
+from app.core.config import settings
+from app.services.profiling import profiler
+
+router = APIRouter()
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def run_profile(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1, le=1000),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Sample the stacks of every thread in this worker process for a while.
+    
+    - **seconds**: How long to sample
+    - **interval_ms**: Time between samples
+    
+    Returns folded stacks ("thread;module:function;... count" per line),
+    ready for flamegraph.pl, speedscope or inferno. Only the worker that
+    serves this request is profiled; run it while the slow traffic is
+    flowing. Responds 409 while another profile is running.
+    """
+    result = await profiler.profile_async(seconds, interval_ms)
+    return PlainTextResponse(
+        profiler.folded(result["stacks"]),
+        headers={
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Duration": f"{result['duration']:.3f}",
+        },
+    )
@@ -0,0 +1,68 @@
+# backend/app/api/v1/endpoints/review.py
+from typing import Any
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.core.config import settings
+
+router = APIRouter()
+
+@router.post("/claim", response_model=schemas.ReviewClaim)
+def claim_reviews(
+    limit: int = Query(10, ge=1, le=settings.REVIEW_MAX_CLAIM),
+    lease_seconds: int = Query(settings.REVIEW_LEASE_SECONDS, ge=10, le=3600),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Lease the highest-priority items in the review queue.
+    
+    Concurrent reviewers never receive the same item. Items not decided
+    before the lease expires go back to the queue.
+    
+    - **limit**: Items to claim
+    - **lease_seconds**: How long the items are held
+    """
+    items = crud.content.claim_for_review(
+        db, reviewer_id=current_user.id, limit=limit, lease_seconds=lease_seconds
+    )
+    return {
+        "items": items,
+        "lease_expires_at": items[0].review_lease_expires_at if items else None,
+    }
+
+@router.post("/decisions", response_model=schemas.ReviewResult)
+def record_decisions(
+    decisions_in: schemas.ReviewDecisions,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Approve or reject claimed items in one request.
+    
+    - **decisions**: Content id -> true to approve, false to reject
+    """
+    decided = crud.content.record_reviews(
+        db, reviewer_id=current_user.id, decisions=decisions_in.decisions
+    )
+    return {"ids": decided, "skipped": sorted(set(decisions_in.decisions) - set(decided))}
+
+@router.post("/release", response_model=schemas.ReviewResult)
+def release_reviews(
+    release_in: schemas.ReviewRelease,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """Return claimed items to the queue without deciding them."""
+    released = crud.content.release_reviews(db, reviewer_id=current_user.id, ids=release_in.ids)
+    return {"ids": released, "skipped": sorted(set(release_in.ids) - set(released))}
+
+@router.get("/stats", response_model=schemas.ReviewQueueStats)
+def read_review_stats(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """Queue depth, active claims and expired leases."""
+    return crud.content.review_queue_stats(db)
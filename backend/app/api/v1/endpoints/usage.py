@@ -0,0 +1,90 @@
+# backend/app/api/v1/endpoints/usage.py
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.services.usage import usage_meter
+
+router = APIRouter()
+
+def _user_usage(db: Session, user_id: int, days: int) -> dict:
+    return {
+        "user_id": user_id,
+        "period_start": usage_meter.current_period(),
+        "usage": usage_meter.usage(user_id),
+        "quota": usage_meter.quota(user_id),
+        "exceeded": usage_meter.exceeded(user_id),
+        "daily": usage_meter.daily(db, user_id, days) if days else [],
+    }
+
+@router.get("/me", response_model=schemas.UserUsage)
+def read_my_usage(
+    days: int = Query(30, ge=0, le=366),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Your moderation usage this month, your quota and a daily breakdown.
+    
+    - **days**: Days of daily usage to include (0 for none)
+    
+    Period totals come from the in-memory aggregates and include usage
+    not yet written to the usage table.
+    """
+    return _user_usage(db, current_user.id, days)
+
+@router.get("/users", response_model=List[schemas.UserUsage])
+def read_users_usage(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    This month's usage of every user with any, highest model time first.
+    
+    Served from the in-memory aggregates, without a query.
+    """
+    users = [
+        {
+            "user_id": user_id,
+            "period_start": usage_meter.current_period(),
+            "usage": usage_meter.usage(user_id),
+            "quota": usage_meter.quota(user_id),
+            "exceeded": usage_meter.exceeded(user_id),
+        }
+        for user_id in usage_meter.users()
+    ]
+    return sorted(users, key=lambda user: user["usage"]["model_seconds"], reverse=True)
+
+@router.get("/users/{user_id}", response_model=schemas.UserUsage)
+def read_user_usage(
+    user_id: int,
+    days: int = Query(30, ge=0, le=366),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    One user's usage this month, quota and daily breakdown.
+    """
+    return _user_usage(db, user_id, days)
+
+@router.put("/users/{user_id}/quota", response_model=schemas.UserUsage)
+def update_user_quota(
+    user_id: int,
+    quota_in: schemas.UsageQuota,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Set a user's monthly quotas.
+    
+    - **texts**, **tokens**, **images**, **model_seconds**: Limits; null
+      means no limit of the user's own (the configured default applies)
+    
+    Takes effect in this worker at once and in the others at their next
+    usage flush.
+    """
+    if crud.user.get(db, id=user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    usage_meter.set_quota(db, user_id, quota_in.model_dump())
+    return _user_usage(db, user_id, 0)
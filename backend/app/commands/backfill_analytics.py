@@ -0,0 +1,47 @@
+# backend/app/commands/backfill_analytics.py
+"""
+Rebuild moderation analytics rollups from the moderation log.
+
+Usage (from backend/):
+    python -m app.commands.backfill_analytics [--since 2024-01-01T00:00] [--chunk-size 5000]
+
+Rollups from ``--since`` onward (or all of them) are deleted and rebuilt.
+Run it while moderation traffic is paused, or limit ``--since`` to a closed
+window, since events recorded during the backfill are also rolled up live.
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.analytics import backfill_rollups
+
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild moderation analytics rollups.")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Only rebuild hours from this ISO timestamp onward (UTC)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=settings.ANALYTICS_BACKFILL_CHUNK_SIZE,
+        help="Moderation log rows read per chunk",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    db = SessionLocal()
+    try:
+        processed = backfill_rollups(db, since=args.since, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    logger.info(f"Backfill complete: {processed} moderation log rows processed")
+
+if __name__ == "__main__":
+    main()
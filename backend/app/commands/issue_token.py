@@ -0,0 +1,45 @@
+# backend/app/commands/issue_token.py
+"""
+Issue a long-lived access token for a service account.
+
+Usage (from backend/):
+    python -m app.commands.issue_token --email backfill@example.com [--priority bulk] [--days 30]
+
+``--priority`` puts all moderation requests made with the token in that
+load shedding class (interactive, standard or bulk), whatever the route's
+default is: e.g. a chat gateway gets an interactive token and backfill
+jobs a bulk one. The token is printed to stdout.
+"""
+import argparse
+from datetime import timedelta
+
+from app import crud
+from app.core import security
+from app.db.session import SessionLocal
+from app.services.load_shedding import PRIORITY_CLASSES
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Issue an access token for a service account.")
+    parser.add_argument("--email", required=True, help="Email of the (active) user the token is for")
+    parser.add_argument(
+        "--priority",
+        choices=PRIORITY_CLASSES,
+        default=None,
+        help="Load shedding class of the token's moderation traffic (default: per route)",
+    )
+    parser.add_argument("--days", type=float, default=30.0, help="Days until the token expires")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = crud.user.get_by_email(db, email=args.email)
+    finally:
+        db.close()
+    if user is None or not crud.user.is_active(user):
+        parser.error(f"No active user with email {args.email}")
+    print(security.create_access_token(
+        user.id, expires_delta=timedelta(days=args.days), priority=args.priority
+    ))
+
+if __name__ == "__main__":
+    main()
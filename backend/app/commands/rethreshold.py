@@ -0,0 +1,68 @@
+# backend/app/commands/rethreshold.py
+"""
+Re-decide stored content under a new moderation policy without re-running the models.
+
+Usage (from backend/):
+    python -m app.commands.rethreshold [--policy policy.json] [--content-type text]
+                                       [--chunk-size 50000] [--dry-run]
+    python -m app.commands.rethreshold --backfill-scores
+
+Decisions come from the raw float32 scores stored on each content row.
+``--policy`` evaluates a candidate policy file instead of the live one
+(MODERATION_POLICY_PATH); with ``--dry-run`` nothing is written and the
+printed transition counts show what the policy would change.
+``--backfill-scores`` first packs the JSON scores of rows moderated before
+raw scores were stored.
+"""
+import argparse
+import json
+import logging
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.policy import PolicyEngine, policy_engine
+from app.services.score_store import backfill_scores, rethreshold
+
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-apply moderation policy to stored scores.")
+    parser.add_argument("--policy", default=None, help="Policy file to apply (default: the live policy)")
+    parser.add_argument("--content-type", default=None, help="Only re-decide this content type")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=settings.RETHRESHOLD_CHUNK_SIZE,
+        help="Content rows read per chunk",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Count changes without writing them")
+    parser.add_argument(
+        "--backfill-scores", action="store_true", help="Pack JSON scores of older rows first"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    engine = policy_engine
+    if args.policy:
+        engine = PolicyEngine(path=None)
+        with open(args.policy, encoding="utf-8") as f:
+            engine.load_document(json.load(f))
+
+    db = SessionLocal()
+    try:
+        if args.backfill_scores:
+            backfilled = backfill_scores(db)
+            logger.info(f"Packed scores for {backfilled} content rows")
+        summary = rethreshold(
+            db,
+            engine=engine,
+            chunk_size=args.chunk_size,
+            content_type=args.content_type,
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # backend/app/core/config.py
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Dict, Optional, List
 from functools import lru_cache
 
 class Settings(BaseSettings):
@@ -25,9 +25,130 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: str = "content-moderation"
+    S3_ENDPOINT_URL: Optional[str] = None  # S3-compatible endpoint (e.g. MinIO); None for AWS
+    S3_MAX_POOL_CONNECTIONS: int = 32  # HTTP connections (and worker threads) to S3
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # Larger uploads go multipart (S3 minimum is 5MB)
+    S3_MULTIPART_CONCURRENCY: int = 4  # Parts in flight per upload
+    
+    # Object storage
+    STORAGE_BACKEND: str = "s3"  # s3 or local
+    STORAGE_LOCAL_ROOT: str = "./storage"  # Used by the local backend
+    STORAGE_LOCAL_BASE_URL: str = "/files"  # URL prefix for locally stored files
     
     # ML
     ML_MODEL_PATH: str = "./ml/models/content_moderation"
+    ML_BATCH_SIZE: int = 16  # Texts per forward pass
+    TEXT_LENGTH_BUCKETS: List[int] = [32, 64, 128, 256, 512]  # Token lengths text batches are padded to
+    TEXT_BATCH_WAIT_MS: float = 5.0  # Max wait for a text batch to fill
+    TEXT_TOKEN_CACHE_SIZE: int = 10000  # Texts whose token ids are cached
+    TEXT_MODEL_NAME: str = "facebook/bart-large-mnli"  # Used when ML_MODEL_PATH does not exist
+    TEXT_MULTILINGUAL_MODEL_NAME: str = "joeddav/xlm-roberta-large-xnli"  # Registry key "text-multilingual"
+    IMAGE_MODEL_NAME: str = "Falconsai/nsfw_image_detection"
+    IMAGE_SAFE_LABELS: List[str] = ["normal", "neutral", "safe", "drawings"]  # Not violation categories
+    IMAGE_BATCH_SIZE: int = 8  # Images per forward pass
+    IMAGE_BATCH_WAIT_MS: float = 10.0  # Max wait for a batch to fill
+    IMAGE_DECODE_WORKERS: int = 2  # Threads decoding/resizing uploads
+    INFERENCE_WORKERS: int = 2  # Threads running model forward passes
+    ML_PRELOAD: bool = True  # Load models in the background at startup, not on first request
+    
+    # Torch runtime (per server process)
+    SERVER_WORKERS: Optional[int] = None  # Server processes sharing this machine's CPUs (None: WEB_CONCURRENCY, else 1)
+    TORCH_NUM_THREADS: Optional[int] = None  # Intra-op threads (None: CPUs this process may use / SERVER_WORKERS)
+    TORCH_INTEROP_THREADS: Optional[int] = 1  # Inter-op threads (None: torch's default, one per core)
+    TORCH_INFERENCE_MODE: bool = True  # Run forward passes under torch.inference_mode() instead of no_grad()
+    TORCH_COMPILE: bool = False  # torch.compile() models (each length bucket compiles during warmup)
+    TORCH_COMPILE_MODE: str = "default"  # torch.compile mode, e.g. "reduce-overhead" or "max-autotune"
+    TORCH_BETTER_TRANSFORMER: bool = False  # Swap in BetterTransformer fused kernels (needs optimum)
+    TORCH_CUDA_ALLOC_CONF: Optional[str] = None  # PYTORCH_CUDA_ALLOC_CONF, e.g. "expandable_segments:True"
+    TORCH_CUDA_MEMORY_FRACTION: Optional[float] = None  # Share of GPU memory one process may allocate
+    
+    # Load shedding by priority class (interactive, standard, bulk)
+    LOAD_SHEDDING_ENABLED: bool = True
+    QUEUE_DELAY_TARGETS_MS: Dict[str, float] = {"interactive": 50.0, "standard": 250.0, "bulk": 2000.0}
+    QUEUE_DELAY_INTERVAL_MS: float = 500.0  # Window whose smallest queue delay is held to the target
+    SHED_RETRY_AFTER_SECONDS: int = 1  # Retry-After sent with 503s for shed requests
+    
+    # Usage metering and quotas per user
+    USAGE_METERING_ENABLED: bool = True
+    USAGE_COUNTER_SHARDS: int = 8  # Lock stripes of the in-memory counters
+    USAGE_FLUSH_INTERVAL: float = 10.0  # Seconds between usage table upserts (and quota refreshes)
+    USAGE_DEFAULT_QUOTAS: Dict[str, float] = {}  # Monthly limits for users without their own, e.g. {"texts": 100000}
+    
+    # Request deadlines (X-Request-Timeout-Ms header)
+    DEFAULT_REQUEST_TIMEOUT_MS: Optional[float] = None  # Deadline for requests without the header (None: none)
+    MAX_REQUEST_TIMEOUT_MS: float = 60000.0  # Longer client budgets are capped to this
+    MIN_MODEL_BUDGET_MS: float = 10.0  # Below this much time left, never start a model pass
+    
+    # Profiling and request tracing
+    PROFILER_MAX_SECONDS: float = 60.0  # Longest on-demand profile an admin can request
+    PROFILER_INTERVAL_MS: float = 5.0  # Default time between stack samples
+    TRACE_SAMPLE_RATE: float = 0.0  # Fraction of requests traced (0: only those honoring traceparent)
+    TRACE_HONOR_TRACEPARENT: bool = False  # Also trace requests whose W3C traceparent header is sampled
+    TRACE_EXPORT_PATH: Optional[str] = "traces.jsonl"  # JSON lines file spans are appended to (None: off)
+    
+    # Model rollout (hot swap and shadow evaluation)
+    MODEL_SWAP_DRAIN_WARN_SECONDS: float = 60.0  # Warn if a replaced model still has requests after this
+    SHADOW_SAMPLE_RATE: float = 0.05  # Default fraction of a model's texts also scored by its shadow
+    SHADOW_MAX_PENDING: int = 16  # Shadow batches queued before further samples are dropped
+    
+    # Language routing
+    LANGUAGE_ROUTING_ENABLED: bool = True
+    LANGUAGE_ID_MIN_CHARS: int = 20  # Shorter texts are not identified and use the default language
+    LANGUAGE_ID_MAX_CHARS: int = 300  # Only the start of longer texts is looked at
+    LANGUAGE_ID_MIN_CONFIDENCE: float = 0.9  # Less certain guesses count as undetermined
+    TEXT_LANGUAGE_ROUTES: Dict[str, str] = {"en": "text"}  # Language -> model registry key
+    TEXT_DEFAULT_LANGUAGE: str = "en"  # Assumed when the language is undetermined
+    TEXT_FALLBACK_ROUTE: str = "text"  # Registry key for other languages; "review" skips the models
+    LANGUAGE_ID_CORPUS_PATH: Optional[str] = None  # JSON {language: training text}; without it only non-Latin scripts are routed
+    
+    # Moderation policy
+    MODERATION_POLICY_PATH: Optional[str] = "./policy.json"  # Thresholds and rules (JSON); built-in default if missing
+    MODERATION_POLICY_RELOAD_INTERVAL: float = 5.0  # Seconds between checks for a changed policy file
+    MODERATION_DEFAULT_THRESHOLD: float = 0.7  # Category score above which content is rejected
+    RETHRESHOLD_CHUNK_SIZE: int = 50000  # Content rows re-decided per chunk
+    SCORE_BACKFILL_CHUNK_SIZE: int = 5000  # Rows whose JSON scores are packed per chunk
+    
+    # WebSocket moderation stream
+    WS_MAX_CONNECTIONS: int = 1000  # Open streams per process
+    WS_MAX_IN_FLIGHT: int = 64  # Messages moderated at once per connection before reads pause
+    WS_MESSAGES_PER_SECOND: float = 50.0  # Sustained per-connection message rate
+    WS_BURST: int = 100  # Messages a connection may send at once above that rate
+    WS_MAX_MESSAGE_CHARS: int = 10000
+    
+    # Human review queue
+    REVIEW_LEASE_SECONDS: int = 300  # A claim returns to the queue if not decided within this
+    REVIEW_MAX_CLAIM: int = 50  # Items one claim request may take
+    
+    # Image near-duplicate index
+    IMAGE_HASH_ENABLED: bool = True
+    IMAGE_HASH_MAX_DISTANCE: int = 6  # pHash bits that may differ
+    IMAGE_HASH_DHASH_MAX_DISTANCE: int = 10  # dHash bits that may differ (confirmation)
+    IMAGE_HASH_BAD_MIN_SCORE: float = 0.9  # Remember as known-bad at or above this score
+    IMAGE_HASH_GOOD_MAX_SCORE: float = 0.1  # Remember as known-good when every score is below this
+    IMAGE_HASH_MAX_LEARNED: int = 100000  # Hashes learned from model scores; oldest are evicted beyond this
+    IMAGE_HASH_LEARNED_TTL_SECONDS: float = 30 * 24 * 3600.0  # Learned hashes expire this long after moderation
+    
+    # Text near-duplicate index (MinHash/LSH)
+    TEXT_DEDUP_ENABLED: bool = True
+    TEXT_DEDUP_THRESHOLD: float = 0.8  # Estimated Jaccard similarity to inherit a verdict
+    TEXT_DEDUP_NUM_PERM: int = 128  # MinHash permutations
+    TEXT_DEDUP_BANDS: int = 16  # LSH bands (must divide TEXT_DEDUP_NUM_PERM)
+    TEXT_DEDUP_SHINGLE_SIZE: int = 5  # Characters per shingle
+    TEXT_DEDUP_MIN_CHARS: int = 40  # Shorter texts always go to the model
+    TEXT_DEDUP_MAX_ENTRIES: int = 100000  # Oldest entries are evicted beyond this
+    TEXT_DEDUP_TTL_SECONDS: float = 3600.0  # Entries expire this long after moderation
+    TEXT_DEDUP_CAMPAIGN_SIZE: int = 10  # Flag as a campaign after this many matches (0 disables)
+    
+    # Embedding store and similarity search over moderated text content
+    EMBEDDINGS_ENABLED: bool = True  # Keep the pooled encoder embedding of moderated content
+    EMBEDDING_DIR: str = "./embeddings"  # One append-only float16 file per text model
+    EMBEDDING_EXACT_MAX_ROWS: int = 4096  # Up to this many vectors, searches compare them all
+    EMBEDDING_IVF_PROBES: int = 8  # Clusters scanned per search once the index is clustered
+    EMBEDDING_IVF_TRAIN_SAMPLE: int = 20000  # Vectors the k-means clusters are trained on
+    SIMILAR_MAX_RESULTS: int = 100  # Largest k of a similarity search
+    
+    # Health checks
+    HEALTH_DB_CHECK_TTL: float = 5.0  # Seconds a database check result is reused by probes
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
@@ -36,6 +157,23 @@ class Settings(BaseSettings):
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read per step while streaming an upload
+    UPLOAD_BUFFER_POOL_SIZE: int = 4  # Upload buffers kept around for reuse
+    
+    # Bulk ingestion
+    BULK_MAX_ITEMS: int = 5000
+    BULK_MODERATION_BATCH_SIZE: int = 256  # Rows moderated and written back per chunk
+    MODERATE_BATCH_MAX_TEXTS: int = 256  # Texts accepted by one /moderate/texts request
+    
+    # Moderation audit log (write-behind)
+    MODERATION_LOG_BUFFER_SIZE: int = 10000  # Max events held in memory
+    MODERATION_LOG_BATCH_SIZE: int = 500  # Flush as soon as this many are buffered
+    MODERATION_LOG_FLUSH_INTERVAL: float = 1.0  # seconds
+    MODERATION_LOG_OVERFLOW_POLICY: str = "drop_oldest"  # drop_oldest, drop_newest or block
+    
+    # Analytics
+    ANALYTICS_MAX_WINDOW_HOURS: int = 24 * 90  # 90 days
+    ANALYTICS_BACKFILL_CHUNK_SIZE: int = 5000  # Log rows read per backfill chunk
     
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
@@ -0,0 +1,105 @@
+# backend/app/core/deadlines.py
+import asyncio
+import contextlib
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.exceptions import RequestCancelled
+
+class Deadline:
+    """
+    The point (``time.monotonic()``) after which nobody waits for a result.
+
+    Clients send their remaining budget in the ``X-Request-Timeout-Ms``
+    header, relative to when the request arrived, so client and server
+    clocks never need to agree.
+    """
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, timeout_ms: float, start: Optional[float] = None) -> "Deadline":
+        return cls((time.monotonic() if start is None else start) + max(0.0, timeout_ms) / 1000)
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires_at - time.monotonic()
+
+    def fits(self, seconds: float) -> bool:
+        """Whether work taking ``seconds`` would finish in time."""
+        return time.monotonic() + seconds < self.expires_at
+
+class DeadlineStats:
+    """Work skipped, or done for nobody, because of deadlines and disconnects."""
+
+    def __init__(self):
+        self.requests = 0  # Requests that carried a deadline
+        self.fallbacks: Dict[str, int] = {}  # Items answered without a model pass, per content kind
+        self.disconnects = 0  # Requests whose client left before the result
+
+    def fallback(self, kind: str, count: int = 1) -> None:
+        self.fallbacks[kind] = self.fallbacks.get(kind, 0) + count
+
+    def stats(self, batchers=()) -> Dict[str, Any]:
+        """Counters here plus the dropped/wasted item counts of ``batchers``."""
+        dropped_expired = dropped_cancelled = wasted = 0
+        for batcher in batchers:
+            dropped_expired += batcher.dropped_expired
+            dropped_cancelled += batcher.dropped_cancelled
+            wasted += batcher.wasted
+        return {
+            "requests_with_deadline": self.requests,
+            "fallbacks": dict(self.fallbacks),
+            "disconnects": self.disconnects,
+            "dropped_expired": dropped_expired,
+            "dropped_cancelled": dropped_cancelled,
+            "wasted_items": wasted,
+        }
+
+# Singleton instance
+deadline_stats = DeadlineStats()
+
+def deadline_after(timeout_ms: Optional[float], start: Optional[float] = None) -> Optional[Deadline]:
+    """Deadline for a client budget in milliseconds (or the configured default), capped."""
+    if timeout_ms is None:
+        timeout_ms = settings.DEFAULT_REQUEST_TIMEOUT_MS
+        if timeout_ms is None:
+            return None
+    deadline_stats.requests += 1
+    return Deadline.after(min(timeout_ms, settings.MAX_REQUEST_TIMEOUT_MS), start)
+
+async def until_disconnected(request: Request, work: Awaitable) -> Any:
+    """
+    Await ``work``, cancelling it if the client disconnects first.
+
+    The request body has been read by the time a handler runs, so the next
+    ASGI message is ``http.disconnect``, sent when the client goes away (or
+    after the response). Cancelling the work cancels its queued batcher
+    items, which are then dropped before they reach a model.
+    """
+    task = asyncio.ensure_future(work)
+
+    async def disconnected() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        done, _ = await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        # A receive() that fails tells nothing about the client: keep waiting
+        if task not in done and watcher.exception() is None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            deadline_stats.disconnects += 1
+            raise RequestCancelled()
+        return await task
+    finally:
+        watcher.cancel()
+        task.cancel()
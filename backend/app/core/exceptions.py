@@ -28,6 +28,22 @@ class FileUploadError(ContentModerationException):
             detail=detail
         )
 
+class StorageError(ContentModerationException):
+    """Exception raised when the object storage backend fails."""
+    def __init__(self, detail: str = "Object storage is unavailable"):
+        super().__init__(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=detail
+        )
+
+class PolicyError(ContentModerationException):
+    """Exception raised when a moderation policy is invalid."""
+    def __init__(self, detail: str = "Invalid moderation policy"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+
 class ModelLoadError(ContentModerationException):
     """Exception raised when ML model fails to load."""
     def __init__(self, detail: str = "Failed to load ML model"):
@@ -36,6 +52,55 @@ class ModelLoadError(ContentModerationException):
             detail=detail
         )
 
+class ModelRolloutError(ContentModerationException):
+    """Exception raised when a model swap or shadow evaluation cannot start."""
+    def __init__(self, detail: str = "Model rollout conflict", status_code: int = status.HTTP_409_CONFLICT):
+        super().__init__(
+            status_code=status_code,
+            detail=detail
+        )
+
+class ServiceOverloaded(ContentModerationException):
+    """Exception raised when a request is shed to keep higher-priority traffic on time."""
+    def __init__(self, detail: str = "Service overloaded, retry later", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class DeadlineExceeded(ContentModerationException):
+    """Exception raised when work cannot finish before the request's deadline."""
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=detail
+        )
+
+class RequestCancelled(ContentModerationException):
+    """Exception raised when the client disconnected before its result was ready."""
+    def __init__(self, detail: str = "Client closed request"):
+        super().__init__(
+            status_code=499,  # nginx's "client closed request"; nobody reads the response
+            detail=detail
+        )
+
+class QuotaExceeded(ContentModerationException):
+    """Exception raised when a user has used up a usage quota for this period."""
+    def __init__(self, detail: str = "Usage quota exceeded"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail
+        )
+
+class ProfilerBusy(ContentModerationException):
+    """Exception raised when a profile is requested while another is running."""
+    def __init__(self, detail: str = "A profile is already running"):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+
 class RateLimitExceeded(ContentModerationException):
     """Exception raised when rate limit is exceeded."""
     def __init__(self, detail: str = "Rate limit exceeded"):
@@ -0,0 +1,115 @@
+# backend/app/core/health.py
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+class DatabaseCheck:
+    """
+    ``SELECT 1`` over a pooled connection, cached for ``ttl`` seconds.
+
+    Probes arriving together share one check, so a burst of health checks
+    costs at most one round trip per ``ttl`` instead of a new session each.
+    """
+
+    def __init__(self, ttl: float = settings.HEALTH_DB_CHECK_TTL):
+        self.ttl = ttl
+        self.ok = False
+        self.error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < self.ttl
+
+    def _ping(self) -> None:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    async def check(self) -> bool:
+        if self._fresh():
+            return self.ok
+        async with self._lock:
+            if self._fresh():
+                return self.ok
+            start = time.perf_counter()
+            try:
+                await run_in_threadpool(self._ping)
+                self.ok, self.error = True, None
+            except Exception as e:
+                if self.ok:
+                    logger.warning(f"Database check failed: {e}")
+                self.ok, self.error = False, str(e)
+            self.latency_ms = (time.perf_counter() - start) * 1000
+            self._checked_at = time.monotonic()
+        return self.ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "error": self.error,
+            "latency_ms": None if self.latency_ms is None else round(self.latency_ms, 2),
+            "age_seconds": round(time.monotonic() - self._checked_at, 2) if self._checked_at > 0 else None,
+        }
+
+class Readiness:
+    """
+    Whether this worker should receive traffic.
+
+    Ready once startup has finished, the models are loaded and warmed up
+    (when ``models_required``), and the cached database check passes. Goes
+    unready again on shutdown so load balancers drain the worker first.
+    """
+
+    def __init__(self, database: DatabaseCheck, models_required: bool = settings.ML_PRELOAD):
+        self.database = database
+        self.models_required = models_required
+        self.started = False
+        self.stopping = False
+        self.models_loaded = False
+        self.warmed_up = False
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def mark_started(self) -> None:
+        self.started = True
+
+    def mark_stopping(self) -> None:
+        self.stopping = True
+
+    def mark_models_loaded(self) -> None:
+        self.models_loaded = True
+
+    def mark_warmed_up(self, seconds: float) -> None:
+        self.warmed_up = True
+        self.warmup_seconds = seconds
+
+    def mark_failed(self, error: str) -> None:
+        self.error = error
+
+    async def check(self) -> Tuple[bool, Dict[str, Any]]:
+        database_ok = await self.database.check()
+        models_ok = not self.models_required or (self.models_loaded and self.warmed_up)
+        ready = self.started and not self.stopping and models_ok and database_ok
+        return ready, {
+            "started": self.started,
+            "stopping": self.stopping,
+            "models_loaded": self.models_loaded,
+            "warmed_up": self.warmed_up,
+            "warmup_seconds": None if self.warmup_seconds is None else round(self.warmup_seconds, 3),
+            "database": database_ok,
+            "error": self.error,
+        }
+
+# Singleton instances
+database_check = DatabaseCheck()
+readiness = Readiness(database_check)
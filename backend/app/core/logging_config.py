@@ -1,4 +1,5 @@
 import logging
+import logging.config
 import sys
 from typing import Any
 from app.core.config import settings
@@ -12,7 +13,6 @@ def setup_logging() -> None:
     if settings.LOG_FORMAT == "json":
         # JSON format for structured logging
         import json
-        import logging.config
         
         logging_config = {
             "version": 1,
@@ -8,6 +8,7 @@ from starlette.types import ASGIApp
 
 from app.core.config import settings
 from app.core.exceptions import RateLimitExceeded
+from app.core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         start_time = time.time()
+        # Request deadlines count from here (see app.api.deps.request_deadline)
+        request.state.received_at = time.monotonic()
         
         # Log request
         logger.info(
@@ -27,12 +30,27 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             }
         )
         
-        # Process request
-        response = await call_next(request)
+        # Process request, traced if sampled
+        span = tracer.start_trace(
+            "http.request",
+            request.headers.get("traceparent"),
+            **{"http.request.method": request.method, "url.path": request.url.path},
+        )
+        try:
+            with tracer.activate(span):
+                response = await call_next(request)
+        except Exception as e:
+            if span is not None:
+                span.end(e)
+            raise
         
         # Calculate process time
         process_time = time.time() - start_time
         response.headers["X-Process-Time"] = str(process_time)
+        if span is not None:
+            span.set(**{"http.response.status_code": response.status_code})
+            span.end()
+            response.headers["X-Trace-Id"] = span.trace.trace_id
         
         # Log response
         logger.info(
@@ -59,7 +77,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
         
         # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/api/docs", "/api/redoc", "/api/v1/openapi.json"]:
+        if request.url.path in ["/health", "/livez", "/readyz", "/api/docs", "/api/redoc", "/api/v1/openapi.json"]:
             return await call_next(request)
         
         # Get client identifier
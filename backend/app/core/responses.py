@@ -0,0 +1,144 @@
+# backend/app/core/responses.py
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.core.tracing import tracer
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is then not offered
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+COMPACT_MEDIA_TYPE = "application/vnd.moderation.compact+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# OpenAPI ``responses`` entry for endpoints that negotiate a compact format
+COMPACT_RESPONSES: Dict[Any, Dict[str, Any]] = {
+    200: {"content": {COMPACT_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPES[0]: {}}},
+}
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), default=str).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that skips ``jsonable_encoder`` and encodes with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Pick the moderation wire format for an Accept header.
+
+    Returns ``JSON_MEDIA_TYPE``, ``COMPACT_MEDIA_TYPE`` or a MessagePack
+    type (only if msgpack is installed); anything else gets plain JSON.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    offered: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered.append((-quality, position, media_type.lower()))
+    for quality, _, media_type in sorted(offered):
+        if quality == 0:
+            break
+        if media_type == COMPACT_MEDIA_TYPE:
+            return COMPACT_MEDIA_TYPE
+        if media_type in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return media_type
+        if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+def compact_results(results: Sequence[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Moderation results as score arrays in one shared category order.
+
+    Each result becomes ``{"action", "approved", "scores", "violations",
+    "rules", "near_duplicate"?, "language"?, "fallback"?}``, where ``scores`` follows the top-level
+    ``categories`` list and ``violations`` holds indexes into it. Policy
+    thresholds, reasons and the duplicated score map are left out.
+    """
+    categories: Dict[str, int] = {}
+    for result in results:
+        for category in (result or {}).get("scores", {}):
+            categories.setdefault(category, len(categories))
+    compact: List[Optional[Dict[str, Any]]] = []
+    versions = set()
+    for result in results:
+        if result is None:
+            compact.append(None)
+            continue
+        scores = [0.0] * len(categories)
+        for category, score in result.get("scores", {}).items():
+            scores[categories[category]] = round(float(score), 4)
+        policy = result.get("policy") or {}
+        if policy.get("version") is not None:
+            versions.add(policy["version"])
+        item = {
+            "action": result.get("action"),
+            "approved": result["is_approved"],
+            "scores": scores,
+            "violations": [
+                categories[category]
+                for category, detail in result.get("categories", {}).items()
+                if detail.get("is_violation")
+            ],
+            "rules": policy.get("rules", []),
+        }
+        for optional in ("near_duplicate", "language", "fallback"):
+            if optional in result:
+                item[optional] = result[optional]
+        compact.append(item)
+    return {
+        "categories": list(categories),
+        "policy_version": versions.pop() if len(versions) == 1 else sorted(versions),
+        "results": compact,
+    }
+
+def compact_response(
+    payload: Dict[str, Any], results: Sequence[Optional[Dict[str, Any]]], media_type: str
+) -> Response:
+    """``payload`` plus ``compact_results(results)``, as compact JSON or MessagePack."""
+    body = {**payload, **compact_results(results)}
+    if media_type == COMPACT_MEDIA_TYPE:
+        return Response(dumps(body), media_type=COMPACT_MEDIA_TYPE)
+    return Response(msgpack.packb(body, use_bin_type=True), media_type=media_type)
+
+def moderation_response(
+    results: Sequence[Optional[Dict[str, Any]]], media_type: str, *, single: bool = False
+) -> Response:
+    """
+    Encode moderation results in the negotiated format.
+
+    Full JSON keeps the ``{"status", "data", "timestamp"}`` envelope, with
+    ``data`` a single result when ``single`` is set. Compact formats carry
+    ``{"status", "timestamp", "categories", "policy_version", "results"}``.
+    """
+    envelope: Dict[str, Any] = {"status": "success", "timestamp": datetime.utcnow().isoformat()}
+    with tracer.span("serialize", media_type=media_type, results=len(results)):
+        if media_type == JSON_MEDIA_TYPE:
+            envelope["data"] = results[0] if single else list(results)
+            return FastJSONResponse(envelope)
+        return compact_response(envelope, results, media_type)
@@ -0,0 +1,65 @@
+# backend/app/core/startup.py
+import os
+import sys
+import time
+from typing import Any, Dict, Optional
+
+class StartupTimer:
+    """
+    Startup milestones of this process, reported by ``/health``.
+
+    The clock starts when this module is first imported (``main.py`` imports
+    it before anything else) and restarts in each pre-forked worker, whose
+    imports and models were already done by the master before the fork.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.forked = False
+        self.import_seconds: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+        self.models_ready_seconds: Optional[float] = None
+        self.preload_seconds: Optional[float] = None  # Master's model load, in pre-fork mode
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark_imported(self) -> None:
+        self.import_seconds = self._elapsed()
+
+    def mark_preloaded(self, seconds: float) -> None:
+        self.preload_seconds = seconds
+
+    def mark_forked(self) -> None:
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.forked = True
+        self.ready_seconds = None
+        self.models_ready_seconds = None
+
+    def mark_ready(self) -> None:
+        """The app finished its startup and is serving requests."""
+        self.ready_seconds = self._elapsed()
+
+    def mark_models_ready(self) -> None:
+        """Every registered model is loaded."""
+        self.models_ready_seconds = self._elapsed()
+
+    def stats(self) -> Dict[str, Any]:
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value, 3)
+
+        return {
+            "pid": self.pid,
+            "forked": self.forked,
+            "uptime_seconds": rounded(self._elapsed()),
+            "import_seconds": rounded(self.import_seconds),
+            "ready_seconds": rounded(self.ready_seconds),
+            "models_ready_seconds": rounded(self.models_ready_seconds),
+            "preload_seconds": rounded(self.preload_seconds),
+            "torch_imported": "torch" in sys.modules,
+        }
+
+# Singleton instance
+startup_timer = StartupTimer()
@@ -0,0 +1,242 @@
+# backend/app/core/tracing.py
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """One timed operation of a trace, recorded with OpenTelemetry's field names."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace: "Trace", name: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes["exception.type"] = type(error).__name__
+        self.trace.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status},
+            "resource": {"service.name": settings.PROJECT_NAME, "process.pid": os.getpid()},
+        }
+
+class Trace:
+    """The spans of one sampled request; exported together when the root span ends."""
+
+    __slots__ = ("tracer", "trace_id", "root", "spans", "exported", "_lock")
+
+    def __init__(self, tracer: "Tracer", trace_id: str):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.exported = False
+        self._lock = threading.Lock()
+
+    def finish(self, span: Span) -> None:
+        with self._lock:
+            if self.exported:
+                # Ended after the response (e.g. dependency teardown): export on its own
+                spans = [span]
+            else:
+                self.spans.append(span)
+                if span is not self.root:
+                    return
+                self.exported = True
+                spans = self.spans
+        self.tracer.export(spans)
+
+# Innermost open span of the current request, if it is being traced
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """``(trace_id, parent_span_id, sampled)`` from a W3C ``traceparent`` header."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+class Tracer:
+    """
+    Per-request span tracing with head sampling, cheap enough to leave on.
+
+    ``start_trace()`` decides once per request whether it is traced: a
+    ``sample_rate`` fraction is, plus (with ``honor_traceparent``) requests
+    whose W3C ``traceparent`` header is marked sampled, which then join the
+    caller's trace. For requests that are not traced, ``span()`` costs one
+    context variable lookup.
+
+    Finished traces are queued and written by a background thread as JSON
+    lines, one span per line with OpenTelemetry span field names, to
+    ``export_path``: a local file a collector's file receiver (or a
+    script) can ship on.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: float = settings.TRACE_SAMPLE_RATE,
+        export_path: Optional[str] = settings.TRACE_EXPORT_PATH,
+        honor_traceparent: bool = settings.TRACE_HONOR_TRACEPARENT,
+        max_queued: int = 10000,
+    ):
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self.honor_traceparent = honor_traceparent
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_queued)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+        self.traces = 0
+        self.exported_spans = 0
+        self.dropped_traces = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.export_path) and (self.sample_rate > 0 or self.honor_traceparent)
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Optional[Span]:
+        """Root span for a request if it is sampled (the caller must ``end()`` it), else None."""
+        if not self.export_path:
+            return None
+        parent = parse_traceparent(traceparent) if self.honor_traceparent else None
+        if parent is not None and parent[2]:
+            trace_id, parent_span_id = parent[0], parent[1]
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trace_id, parent_span_id = os.urandom(16).hex(), None
+        else:
+            return None
+        trace = Trace(self, trace_id)
+        trace.root = Span(trace, name, parent_span_id, attributes)
+        self.traces += 1
+        return trace.root
+
+    def start_span(self, name: str, **attributes: Any) -> Optional[Span]:
+        """Child of the current span that is not made current (for spans ended elsewhere)."""
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        return Span(parent.trace, name, parent.span_id, attributes)
+
+    @contextlib.contextmanager
+    def activate(self, span: Optional[Span]) -> Iterator[Optional[Span]]:
+        """Make ``span`` the current span in this context while the block runs."""
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time the block as a child of the current span; does nothing if the request is not traced."""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped_traces += 1
+            return
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="trace-export", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [json.dumps(span.to_dict(), default=str) for spans in batch for span in spans]
+            try:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                self.exported_spans += len(lines)
+            except OSError as e:
+                self.failed += len(batch)
+                logger.warning(f"Could not write traces to {self.export_path}: {e}")
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait (up to ``timeout`` seconds) until queued traces are written."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "export_path": self.export_path,
+            "traces": self.traces,
+            "exported_spans": self.exported_spans,
+            "queued_traces": self._queue.qsize(),
+            "dropped_traces": self.dropped_traces,
+            "failed_traces": self.failed,
+        }
+
+# Singleton instance
+tracer = Tracer()
@@ -0,0 +1,132 @@
+# backend/app/core/uploads.py
+import io
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.exceptions import FileUploadError
+
+class UploadBufferPool:
+    """
+    Reusable ``bytearray`` buffers for reading uploads in memory.
+
+    Up to ``max_buffers`` buffers are sized for the largest allowed upload
+    and kept, so each request reads into memory that is already allocated
+    instead of growing a new bytes object. Extra concurrent requests get an
+    empty buffer that ``read_upload`` grows to the upload's size and that is
+    discarded afterwards.
+    """
+
+    def __init__(self, buffer_size: int, max_buffers: int):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free: List[bytearray] = []
+        self._pooled = 0  # Full-size buffers allocated, free or in use
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[bytearray]:
+        if self._free:
+            buffer = self._free.pop()
+        elif self._pooled < self.max_buffers:
+            buffer = bytearray(self.buffer_size)
+            self._pooled += 1
+        else:
+            buffer = bytearray()
+        try:
+            yield buffer
+        finally:
+            if len(buffer) == self.buffer_size and len(self._free) < self.max_buffers:
+                self._free.append(buffer)
+
+async def read_upload(
+    file: UploadFile,
+    buffer: bytearray,
+    max_size: int = settings.MAX_UPLOAD_SIZE,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+    hasher: Optional[Any] = None,
+) -> memoryview:
+    """
+    Read an upload once into ``buffer``, enforcing the size limit while streaming.
+
+    A buffer shorter than ``max_size`` is grown to the upload's size instead.
+
+    Args:
+        file: The uploaded file
+        buffer: Destination buffer, ideally at least ``max_size`` bytes long
+        max_size: Maximum allowed upload size in bytes
+        chunk_size: Bytes read per step
+        hasher: Optional ``hashlib`` object updated with each chunk as it is read
+
+    Returns:
+        A memoryview over the bytes read; only valid while ``buffer`` is held
+
+    Raises:
+        FileUploadError: As soon as the upload exceeds ``max_size``
+    """
+    growing = len(buffer) < max_size
+    if growing:
+        del buffer[:]
+    else:
+        view = memoryview(buffer)
+    size = 0
+    while size < max_size:
+        chunk = await file.read(min(chunk_size, max_size - size))
+        if not chunk:
+            break
+        if growing:
+            buffer += chunk
+        else:
+            view[size:size + len(chunk)] = chunk
+        size += len(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+    else:
+        # Exactly at the limit: anything left means the upload is too large
+        if await file.read(1):
+            raise FileUploadError(
+                f"File size exceeds maximum allowed size ({max_size} bytes)"
+            )
+    return memoryview(buffer) if growing else view[:size]
+
+class MemoryviewReader(io.RawIOBase):
+    """Seekable read-only file object over a memoryview, without copying it."""
+
+    def __init__(self, data: memoryview):
+        self._data = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._data) - self._pos)
+        if n <= 0:
+            return 0
+        b[:n] = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._data) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+upload_buffers = UploadBufferPool(
+    buffer_size=settings.MAX_UPLOAD_SIZE,
+    max_buffers=settings.UPLOAD_BUFFER_POOL_SIZE,
+)
@@ -9,6 +9,10 @@ def validate_file_upload(file: UploadFile) -> None:
     """
     Validate uploaded file for size and type.
     
+    The size is only checked here when the multipart parser already knows it;
+    ``read_upload`` enforces the limit while the body is streamed, so the
+    spooled file never has to be seeked to measure it.
+    
     Args:
         file: The uploaded file
         
@@ -16,11 +20,8 @@ def validate_file_upload(file: UploadFile) -> None:
         FileUploadError: If file validation fails
     """
     # Check file size
-    file.file.seek(0, os.SEEK_END)
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset file pointer
-    
-    if file_size > settings.MAX_UPLOAD_SIZE:
+    file_size = getattr(file, "size", None)
+    if file_size is not None and file_size > settings.MAX_UPLOAD_SIZE:
         raise FileUploadError(
             f"File size ({file_size} bytes) exceeds maximum allowed size "
             f"({settings.MAX_UPLOAD_SIZE} bytes)"
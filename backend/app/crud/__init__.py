@@ -0,0 +1,3 @@
+from .crud_blob import blob
+from .crud_content import content
+from .crud_user import user
@@ -0,0 +1,90 @@
+# backend/app/crud/crud_blob.py
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.blob import Blob
+
+class CRUDBlob:
+    """Reference-counted blobs, keyed by SHA-256 instead of an integer id."""
+
+    def __init__(self, model=Blob):
+        self.model = model
+
+    def get(self, db: Session, sha256: str) -> Optional[Blob]:
+        return db.get(self.model, sha256)
+
+    def add_reference(self, db: Session, *, sha256: str) -> Optional[Blob]:
+        """Take one more reference to an existing blob; None if it does not exist."""
+        stmt = (
+            update(self.model)
+            .where(self.model.sha256 == sha256)
+            .values(ref_count=self.model.ref_count + 1)
+            .returning(self.model.sha256)
+        )
+        found = db.execute(stmt).scalar_one_or_none()
+        db.commit()
+        return self.get(db, sha256) if found else None
+
+    def insert(
+        self, db: Session, *, sha256: str, size: int, content_type: Optional[str] = None
+    ) -> bool:
+        """
+        Insert a blob holding one reference, without committing; False if it already exists.
+
+        The caller commits once the object is written: until then the
+        transaction holds the new row, so a concurrent upload of the same
+        bytes waits for it instead of referencing an object not written yet,
+        and no release can drop the reference meanwhile.
+        """
+        try:
+            db.execute(
+                insert(self.model),
+                [{"sha256": sha256, "size": size, "content_type": content_type, "ref_count": 1}],
+            )
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+
+    def release(self, db: Session, *, sha256: str) -> bool:
+        """
+        Drop one reference, deleting the row once none are left, without committing.
+
+        The caller deletes the stored object only if this deleted the row,
+        and commits once it is gone: until then the transaction holds the
+        row's write lock, so a concurrent upload of the same bytes waits,
+        finds no blob and uploads it again, rather than taking a reference
+        to an object that is about to be deleted.
+
+        Returns True if that was the last reference and the row was deleted.
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.sha256 == sha256, self.model.ref_count > 0)
+            .values(ref_count=self.model.ref_count - 1)
+            .returning(self.model.ref_count)
+        )
+        remaining = db.execute(stmt).scalar_one_or_none()
+        if remaining != 0:
+            return False
+        # Re-check the count so a reference taken meanwhile keeps the row
+        deleted = db.execute(
+            delete(self.model).where(self.model.sha256 == sha256, self.model.ref_count == 0)
+        )
+        return deleted.rowcount == 1
+
+    def set_moderation_result(
+        self, db: Session, *, sha256: str, result: Dict[str, Any]
+    ) -> None:
+        db.execute(
+            update(self.model)
+            .where(self.model.sha256 == sha256)
+            .values(is_approved=result["is_approved"], moderation_result=json.dumps(result))
+        )
+        db.commit()
+
+blob = CRUDBlob(Blob)
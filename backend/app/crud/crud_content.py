@@ -1,24 +1,225 @@
 # backend/app/crud/crud_content.py
-from typing import List, Optional
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, bindparam, func, insert, or_, select, update
 
 from app.crud.base import CRUDBase
-from app.models.content import Content
+from app.models.content import REVIEW_CLAIMED, REVIEW_DONE, REVIEW_PENDING, Content
 from app.schemas.content import ContentCreate, ContentUpdate
+from app.services.score_store import moderation_columns
 
 class CRUDContent(CRUDBase[Content, ContentCreate, ContentUpdate]):
     def create_with_owner(
-        self, db: Session, *, obj_in: ContentCreate, owner_id: int
+        self, db: Session, *, obj_in: ContentCreate, owner_id: int, **extra: Any
     ) -> Content:
+        """Create content owned by ``owner_id``; ``extra`` sets further columns."""
         obj_in_data = obj_in.dict()
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
+        db_obj = self.model(**obj_in_data, **extra, user_id=owner_id)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
     
+    def create_multi_with_owner(
+        self, db: Session, *, objs_in: List[ContentCreate], owner_id: int
+    ) -> List[int]:
+        """
+        Insert many rows with one batched INSERT ... RETURNING in a single transaction.
+        
+        Returns the new ids in the same order as ``objs_in``.
+        """
+        if not objs_in:
+            return []
+        rows = [{**obj_in.dict(), "user_id": owner_id} for obj_in in objs_in]
+        stmt = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+        ids = db.scalars(stmt, rows).all()
+        db.commit()
+        return list(ids)
+    
+    def remove(self, db: Session, *, id: int, commit: bool = True) -> Content:
+        """Delete content; with ``commit=False`` the deletion is only flushed, for the caller to commit."""
+        obj = db.get(self.model, id)
+        db.delete(obj)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return obj
+    
+    def update_moderation_results(
+        self, db: Session, *, rows: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Write back moderation outcomes as one executemany UPDATE keyed by id.
+        
+        Each row needs ``id`` plus the columns to set, e.g. ``is_approved``
+        and ``moderation_result``.
+        """
+        if not rows:
+            return
+        db.execute(update(self.model), rows)
+        db.commit()
+    
+    def set_moderation_results(
+        self, db: Session, *, results: Dict[int, Dict[str, Any]]
+    ) -> None:
+        """Store moderation results (decision, JSON and packed raw scores) by content id."""
+        rows = [
+            {"id": content_id, **moderation_columns(db, result)}
+            for content_id, result in results.items()
+        ]
+        self.update_moderation_results(db, rows=rows)
+    
+    def _claimable(self, now: datetime):
+        return or_(
+            Content.review_status == REVIEW_PENDING,
+            and_(Content.review_status == REVIEW_CLAIMED, Content.review_lease_expires_at < now),
+        )
+    
+    def claim_for_review(
+        self, db: Session, *, reviewer_id: int, limit: int, lease_seconds: float
+    ) -> List[Content]:
+        """
+        Lease up to ``limit`` queued items to a reviewer, highest priority first.
+        
+        Candidates are selected ``FOR UPDATE SKIP LOCKED``, so concurrent
+        claimers on Postgres pass over each other's rows instead of waiting
+        on them. The UPDATE repeats the claimable condition, which is what
+        prevents double assignment where row locks are not available
+        (SQLite): a row taken in between is skipped and the next round
+        tops the claim up. Claims whose lease expired are claimable again.
+        """
+        now = datetime.utcnow()
+        lease = {
+            "review_status": REVIEW_CLAIMED,
+            "review_claimed_by": reviewer_id,
+            "review_lease_expires_at": now + timedelta(seconds=lease_seconds),
+        }
+        claimed: List[int] = []
+        for _ in range(3):
+            wanted = limit - len(claimed)
+            candidates = db.scalars(
+                select(Content.id)
+                .where(self._claimable(now))
+                .order_by(Content.review_priority.desc(), Content.id)
+                .limit(wanted)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if candidates:
+                claimed += db.scalars(
+                    update(Content)
+                    .where(Content.id.in_(candidates), self._claimable(now))
+                    .values(**lease)
+                    .returning(Content.id)
+                    .execution_options(synchronize_session=False)
+                ).all()
+            db.commit()
+            if len(candidates) < wanted or len(claimed) >= limit:
+                break
+        if not claimed:
+            return []
+        return (
+            db.query(Content)
+            .filter(Content.id.in_(claimed))
+            .order_by(Content.review_priority.desc(), Content.id)
+            .all()
+        )
+    
+    def release_reviews(self, db: Session, *, reviewer_id: int, ids: List[int]) -> List[int]:
+        """Hand claimed items back to the queue; returns the ids released."""
+        released = db.scalars(
+            update(Content)
+            .where(
+                Content.id.in_(ids),
+                Content.review_status == REVIEW_CLAIMED,
+                Content.review_claimed_by == reviewer_id,
+            )
+            .values(review_status=REVIEW_PENDING, review_claimed_by=None, review_lease_expires_at=None)
+            .returning(Content.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return list(released)
+    
+    def record_reviews(
+        self, db: Session, *, reviewer_id: int, decisions: Dict[int, bool]
+    ) -> List[int]:
+        """
+        Apply human decisions (content id -> approved) to items the reviewer holds.
+        
+        Items whose lease expired still count as held until someone else
+        claims them. The stored moderation result gets the human decision
+        too (``is_approved``, ``action`` and ``reviewed_by``); its scores
+        and per-category details stay the model's. Returns the ids
+        actually decided.
+        """
+        now = datetime.utcnow()
+        decided: List[int] = []
+        results: List[Dict[str, Any]] = []
+        for approved in (True, False):
+            ids = [content_id for content_id, value in decisions.items() if value is approved]
+            if not ids:
+                continue
+            rows = db.execute(
+                update(Content)
+                .where(
+                    Content.id.in_(ids),
+                    Content.review_status == REVIEW_CLAIMED,
+                    Content.review_claimed_by == reviewer_id,
+                )
+                .values(
+                    is_approved=approved,
+                    moderation_action="approve" if approved else "reject",
+                    review_status=REVIEW_DONE,
+                    review_lease_expires_at=None,
+                    reviewed_by=reviewer_id,
+                    reviewed_at=now,
+                )
+                .returning(Content.id, Content.moderation_result)
+                .execution_options(synchronize_session=False)
+            ).all()
+            for content_id, stored in rows:
+                result = json.loads(stored or "{}")
+                result.update(
+                    is_approved=approved,
+                    action="approve" if approved else "reject",
+                    reviewed_by=reviewer_id,
+                )
+                results.append({"content_id": content_id, "moderation_result": json.dumps(result)})
+                decided.append(content_id)
+        if results:
+            # Same transaction as the decisions, so nothing else has touched these rows
+            db.connection().execute(
+                update(Content).where(Content.id == bindparam("content_id")), results
+            )
+        db.commit()
+        return decided
+    
+    def review_queue_stats(self, db: Session) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        counts = dict(db.execute(
+            select(Content.review_status, func.count())
+            .where(Content.review_status.in_([REVIEW_PENDING, REVIEW_CLAIMED]))
+            .group_by(Content.review_status)
+        ).all())
+        expired = db.scalar(
+            select(func.count()).where(
+                Content.review_status == REVIEW_CLAIMED, Content.review_lease_expires_at < now
+            )
+        )
+        oldest = db.scalar(
+            select(func.min(Content.created_at)).where(Content.review_status == REVIEW_PENDING)
+        )
+        return {
+            "pending": counts.get(REVIEW_PENDING, 0),
+            "claimed": counts.get(REVIEW_CLAIMED, 0),
+            "expired_leases": expired or 0,
+            "oldest_pending_at": oldest,
+        }
+    
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100,
         is_approved: Optional[bool] = None, content_type: Optional[str] = None
@@ -44,5 +245,16 @@ class CRUDContent(CRUDBase[Content, ContentCreate, ContentUpdate]):
             query = query.filter(Content.content_type == content_type)
         
         return query.offset(skip).limit(limit).all()
+    
+    def get_by_ids(
+        self, db: Session, *, ids: List[int], moderation_action: Optional[str] = None
+    ) -> Dict[int, Content]:
+        """Rows for ``ids`` that exist (and have ``moderation_action``, if given), by id."""
+        if not ids:
+            return {}
+        query = db.query(self.model).filter(Content.id.in_(ids))
+        if moderation_action:
+            query = query.filter(Content.moderation_action == moderation_action)
+        return {row.id: row for row in query.all()}
 
 content = CRUDContent(Content)
\ No newline at end of file
@@ -0,0 +1,8 @@
+from .user import User
+from .content import Content
+from .moderation_log import ModerationLog
+from .analytics import ModerationRollup
+from .image_hash import ImageHash
+from .blob import Blob
+from .score_layout import ScoreLayout
+from .usage import UsageCounter, UsageQuota
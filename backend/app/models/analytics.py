@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index, UniqueConstraint
+from .base import Base
+
+class ModerationRollup(Base):
+    """Hourly moderation counters, maintained incrementally from moderation events."""
+    __tablename__ = "moderation_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket", "dimension", "key", name="uq_moderation_rollups_bucket_dimension_key"),
+        Index("ix_moderation_rollups_dimension_key_bucket", "dimension", "key", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket = Column(DateTime, nullable=False)  # Start of the hour
+    dimension = Column(String(32), nullable=False)  # 'total', 'category', 'content_type' or 'user'
+    key = Column(String(64), nullable=False)  # Category name, content type, user id or 'all'
+    total = Column(Integer, nullable=False, default=0)
+    violations = Column(Integer, nullable=False, default=0)
+    latency_ms_sum = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Integer, String, Text
+from .base import Base
+from datetime import datetime
+
+class Blob(Base):
+    """Uploaded file stored once under its SHA-256, shared by every Content that references it."""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)  # Hex digest; the storage key is derived from it
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)  # Content rows whose file_path points here
+    is_approved = Column(Boolean, nullable=True)  # None until moderated
+    moderation_result = Column(Text, nullable=True)  # JSON string, reused by duplicate uploads
+    created_at = Column(DateTime, default=datetime.utcnow)
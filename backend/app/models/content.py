@@ -1,21 +1,46 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Float, Index, LargeBinary, String, Text, DateTime, Boolean, ForeignKey, text
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
 
+# Human review states
+REVIEW_PENDING = "pending"  # Waiting to be claimed
+REVIEW_CLAIMED = "claimed"  # Leased to a reviewer until review_lease_expires_at
+REVIEW_DONE = "done"
+
 class Content(Base):
     __tablename__ = "content"
+    __table_args__ = (
+        # Claim order of the review queue; only queued rows are indexed on Postgres
+        Index(
+            "ix_content_review_queue",
+            "review_status",
+            "review_priority",
+            postgresql_where=text("review_status IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content_type = Column(String(50), nullable=False)  # 'text' or 'image'
     content = Column(Text, nullable=True)  # For text content
     file_path = Column(String(255), nullable=True)  # For file paths
+    blob_sha256 = Column(String(64), nullable=True, index=True)  # Blob an upload holds a reference to; server-set only
     is_approved = Column(Boolean, default=False)
     moderation_result = Column(Text, nullable=True)  # JSON string of moderation results
+    moderation_action = Column(String(16), nullable=True, index=True)  # approve, review or reject
+    policy_version = Column(String(64), nullable=True)  # Policy that made the current decision
+    score_layout = Column(Integer, nullable=True)  # ScoreLayout id: category order of ``scores``
+    scores = Column(LargeBinary, nullable=True)  # Raw model scores, little-endian float32
+    review_status = Column(String(16), nullable=True)  # None when no human review is needed
+    review_priority = Column(Float, nullable=True)  # Highest category score; claimed highest first
+    review_claimed_by = Column(Integer, ForeignKey('users.id'), nullable=True)
+    review_lease_expires_at = Column(DateTime, nullable=True)
+    reviewed_by = Column(Integer, ForeignKey('users.id'), nullable=True)
+    reviewed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = Column(Integer, ForeignKey('users.id'))
     
     # Relationships
-    user = relationship("User", back_populates="contents")
+    user = relationship("User", back_populates="contents", foreign_keys=[user_id])
     moderation_logs = relationship("ModerationLog", back_populates="content")
\ No newline at end of file
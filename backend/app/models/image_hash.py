@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text
+from .base import Base
+from datetime import datetime
+
+class ImageHash(Base):
+    """Perceptual hash of an image with a known moderation verdict."""
+    __tablename__ = "image_hashes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    phash = Column(BigInteger, nullable=False, index=True)  # Unsigned 64-bit hash stored as signed
+    dhash = Column(BigInteger, nullable=False)
+    verdict = Column(String(16), nullable=False)  # 'bad' or 'good'
+    scores = Column(Text, nullable=True)  # JSON string of the original per-category scores
+    source = Column(String(16), nullable=False, default="learned")  # 'admin' (registered) or 'learned'
+    created_at = Column(DateTime, default=datetime.utcnow)
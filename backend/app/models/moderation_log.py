@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey
+from sqlalchemy.orm import relationship
+from .base import Base
+from datetime import datetime
+
+class ModerationLog(Base):
+    __tablename__ = "moderation_logs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_id = Column(Integer, ForeignKey('content.id', ondelete="SET NULL"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)
+    content_type = Column(String(50), nullable=False)  # 'text' or 'image'
+    is_approved = Column(Boolean, nullable=False)
+    scores = Column(Text, nullable=True)  # JSON string of per-category scores
+    violations = Column(Text, nullable=True)  # JSON list of violated categories
+    reason = Column(Text, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    # Relationships
+    content = relationship("Content", back_populates="moderation_logs")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, Text
+from .base import Base
+
+class ScoreLayout(Base):
+    """Category order of the float32 score arrays stored on content rows."""
+    __tablename__ = "score_layouts"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Derived from the categories
+    categories = Column(Text, nullable=False)  # JSON list; column i of the array is categories[i]
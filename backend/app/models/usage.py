@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, UniqueConstraint
+from .base import Base
+
+class UsageCounter(Base):
+    """Daily moderation usage per user, maintained by batched upserts from the usage meter."""
+    __tablename__ = "usage_counters"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_usage_counters_user_id_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False, index=True)  # UTC day
+    texts = Column(Integer, nullable=False, default=0)
+    tokens = Column(Integer, nullable=False, default=0)  # Model input tokens of scored texts
+    images = Column(Integer, nullable=False, default=0)
+    model_seconds = Column(Float, nullable=False, default=0.0)  # Share of batch inference time
+
+class UsageQuota(Base):
+    """Monthly usage limits of one user; NULL means unlimited (or the configured default)."""
+    __tablename__ = "usage_quotas"
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    texts = Column(Integer, nullable=True)
+    tokens = Column(Integer, nullable=True)
+    images = Column(Integer, nullable=True)
+    model_seconds = Column(Float, nullable=True)
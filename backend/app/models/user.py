@@ -17,4 +17,4 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    contents = relationship("Content", back_populates="user")
\ No newline at end of file
+    contents = relationship("Content", back_populates="user", foreign_keys="Content.user_id")
\ No newline at end of file
@@ -0,0 +1,40 @@
+from .token import Token, TokenPayload
+from .user import User, UserCreate, UserInDB, UserUpdate
+from .content import (
+    Content,
+    ContentBulkCreate,
+    ContentBulkResult,
+    ContentCreate,
+    ContentInDB,
+    ContentUpdate,
+    ContentUploadResult,
+    SimilarContent,
+    SimilarContentItem,
+)
+from .analytics import (
+    AnalyticsOverview,
+    RollupCount,
+    Timeseries,
+    TimeseriesPoint,
+    UserAnalytics,
+)
+from .policy import PolicyEvaluateRequest, PolicyEvaluateResult, PolicyStatus
+from .review import (
+    ReviewClaim,
+    ReviewDecisions,
+    ReviewItem,
+    ReviewQueueStats,
+    ReviewRelease,
+    ReviewResult,
+)
+from .moderation import (
+    BatchModerationRequest,
+    BatchModerationResponse,
+    CategoryResult,
+    CompactModerationResponse,
+    CompactModerationResult,
+    ModerationResponse,
+    ModerationResult,
+)
+from .model_rollout import ModelOperation, ModelStatus, ModelSwapRequest, ShadowStartRequest
+from .usage import DailyUsage, UsageMetrics, UsageQuota, UserUsage
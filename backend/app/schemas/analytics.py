@@ -0,0 +1,35 @@
+# backend/app/schemas/analytics.py
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+class RollupCount(BaseModel):
+    key: str
+    total: int
+    violations: int
+    violation_rate: float
+    avg_latency_ms: float
+
+class AnalyticsOverview(BaseModel):
+    since: datetime
+    hours: int
+    total: RollupCount
+    categories: List[RollupCount]
+    content_types: List[RollupCount]
+
+class TimeseriesPoint(BaseModel):
+    bucket: datetime
+    total: int
+    violations: int
+    violation_rate: float
+
+class Timeseries(BaseModel):
+    dimension: str
+    key: str
+    points: List[TimeseriesPoint]
+
+class UserAnalytics(BaseModel):
+    user_id: int
+    since: datetime
+    hours: int
+    total: RollupCount
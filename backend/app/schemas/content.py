@@ -1,6 +1,7 @@
 # backend/app/schemas/content.py
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+import json
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 class ContentBase(BaseModel):
@@ -11,6 +12,18 @@ class ContentBase(BaseModel):
 class ContentCreate(ContentBase):
     pass
 
+class ContentBulkCreate(BaseModel):
+    items: List[ContentCreate] = Field(..., min_length=1)
+    # "none": insert only, "background": moderate after responding,
+    # "inline": moderate text items before responding
+    moderation: Literal["none", "background", "inline"] = "none"
+
+class ContentBulkResult(BaseModel):
+    ids: List[int]  # Same order as the submitted items
+    count: int
+    moderation: str
+    results: Optional[List[Optional[Dict[str, Any]]]] = None  # Only for inline moderation
+
 class ContentUpdate(ContentBase):
     is_approved: Optional[bool] = None
     moderation_result: Optional[Dict[str, Any]] = None
@@ -18,6 +31,7 @@ class ContentUpdate(ContentBase):
 class ContentInDBBase(ContentBase):
     id: int
     is_approved: bool
+    moderation_action: Optional[str] = None  # approve, review or reject
     moderation_result: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
@@ -26,8 +40,29 @@ class ContentInDBBase(ContentBase):
     class Config:
         from_attributes = True
 
+    @field_validator("moderation_result", mode="before")
+    @classmethod
+    def parse_moderation_result(cls, value: Any) -> Any:
+        # Stored as a JSON string on the model
+        return json.loads(value) if isinstance(value, str) else value
+
 class Content(ContentInDBBase):
     pass
 
 class ContentInDB(ContentInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+class SimilarContentItem(BaseModel):
+    content: Content
+    similarity: float  # Cosine similarity of the two texts' embeddings
+
+class SimilarContent(BaseModel):
+    content_id: int
+    model: str  # Text model whose embeddings were compared
+    items: List[SimilarContentItem]  # Most similar first
+
+class ContentUploadResult(BaseModel):
+    content: Content
+    sha256: str
+    deduplicated: bool  # Identical bytes were already stored; nothing was uploaded
+    moderation_reused: bool  # Result came from the stored blob instead of the model
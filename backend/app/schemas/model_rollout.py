@@ -0,0 +1,35 @@
+# backend/app/schemas/model_rollout.py
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+class ModelSwapRequest(BaseModel):
+    source: Optional[str] = Field(
+        default=None,
+        description="Local path or hub name of the new model; omit to reload the configured one",
+    )
+
+class ShadowStartRequest(BaseModel):
+    source: str = Field(..., min_length=1, description="Local path or hub name of the candidate model")
+    sample_rate: float = Field(default=settings.SHADOW_SAMPLE_RATE, gt=0, le=1)
+
+class ModelOperation(BaseModel):
+    key: str
+    operation: str  # "swap" or "shadow"
+    source: Optional[str] = None
+    state: str  # loading, warming, draining, done or failed
+    started_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    model: Optional[str] = None
+    load_seconds: Optional[float] = None
+    drain_seconds: Optional[float] = None
+    promoted_shadow: Optional[bool] = None
+    warmup: Optional[Dict[str, float]] = None
+
+class ModelStatus(BaseModel):
+    registry: Dict[str, Any]
+    text_models: Dict[str, Any]
+    operations: Dict[str, ModelOperation]
+    shadows: Dict[str, Any]
@@ -0,0 +1,54 @@
+# backend/app/schemas/moderation.py
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class CategoryResult(BaseModel):
+    score: float
+    threshold: float
+    is_violation: bool
+
+class PolicyMatch(BaseModel):
+    version: str
+    rules: List[str] = []
+
+class ModerationResult(BaseModel):
+    is_approved: bool
+    action: Optional[str] = None  # "approve", "review" or "reject"
+    categories: Dict[str, CategoryResult] = {}
+    scores: Dict[str, float] = {}
+    reason: str
+    policy: Optional[PolicyMatch] = None
+    near_duplicate: Optional[Dict[str, Any]] = None
+    language: Optional[str] = None  # Detected language, when language routing is enabled
+    fallback: Optional[str] = None  # Why no model scored this, e.g. "deadline"
+
+class ModerationResponse(BaseModel):
+    status: str
+    data: ModerationResult
+    timestamp: str
+
+class BatchModerationRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, description="Texts to moderate")
+    content_type: Optional[str] = Field(default="text", description="Type of content")
+
+class BatchModerationResponse(BaseModel):
+    status: str
+    data: List[ModerationResult]
+    timestamp: str
+
+class CompactModerationResult(BaseModel):
+    action: Optional[str] = None
+    approved: bool
+    scores: List[float]  # In the order of the response's ``categories``
+    violations: List[int]  # Indexes into ``categories``
+    rules: List[str] = []
+    near_duplicate: Optional[Dict[str, Any]] = None
+    language: Optional[str] = None
+    fallback: Optional[str] = None
+
+class CompactModerationResponse(BaseModel):
+    status: str
+    timestamp: str
+    categories: List[str]
+    policy_version: Any  # One version, or a sorted list if results differ
+    results: List[Optional[CompactModerationResult]]
@@ -0,0 +1,27 @@
+# backend/app/schemas/policy.py
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class PolicyStatus(BaseModel):
+    version: str
+    path: Optional[str] = None
+    reloads: int
+    reload_errors: int
+    last_error: Optional[str] = None
+    content_types: List[str]
+    tenants: int
+    document: Dict[str, Any]
+
+class PolicyEvaluateRequest(BaseModel):
+    items: List[Dict[str, float]] = Field(..., description="Per-category scores of each item")
+    content_type: Optional[str] = None
+    tenant: Optional[str] = None
+    policy: Optional[Dict[str, Any]] = Field(
+        default=None, description="Candidate policy document to evaluate instead of the live one"
+    )
+
+class PolicyEvaluateResult(BaseModel):
+    version: str
+    actions: List[str]
+    counts: Dict[str, int]
+    changed: int  # Items whose action differs from the live policy's
@@ -0,0 +1,31 @@
+# backend/app/schemas/review.py
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from .content import Content
+
+class ReviewItem(Content):
+    review_status: Optional[str] = None
+    review_priority: Optional[float] = None
+    review_lease_expires_at: Optional[datetime] = None
+
+class ReviewClaim(BaseModel):
+    items: List[ReviewItem]
+    lease_expires_at: Optional[datetime] = None
+
+class ReviewRelease(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+class ReviewDecisions(BaseModel):
+    decisions: Dict[int, bool] = Field(..., min_length=1, description="Content id -> approved")
+
+class ReviewResult(BaseModel):
+    ids: List[int]  # Items the request applied to
+    skipped: List[int]  # Not held by this reviewer (never claimed, taken over or already decided)
+
+class ReviewQueueStats(BaseModel):
+    pending: int
+    claimed: int
+    expired_leases: int
+    oldest_pending_at: Optional[datetime] = None
@@ -7,4 +7,6 @@ class Token(BaseModel):
     token_type: str
 
 class TokenPayload(BaseModel):
-    sub: Optional[int] = None
\ No newline at end of file
+    sub: Optional[int] = None
+    exp: Optional[int] = None  # Expiry as a Unix timestamp
+    priority: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,28 @@
+# backend/app/schemas/usage.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+
+class UsageMetrics(BaseModel):
+    texts: int = 0
+    tokens: int = 0  # Model input tokens of texts that were scored
+    images: int = 0
+    model_seconds: float = 0.0  # Share of batched inference time
+
+class UsageQuota(BaseModel):
+    # Monthly limits; null removes a limit
+    texts: Optional[int] = Field(default=None, ge=0)
+    tokens: Optional[int] = Field(default=None, ge=0)
+    images: Optional[int] = Field(default=None, ge=0)
+    model_seconds: Optional[float] = Field(default=None, ge=0)
+
+class DailyUsage(UsageMetrics):
+    day: date
+
+class UserUsage(BaseModel):
+    user_id: int
+    period_start: date
+    usage: UsageMetrics
+    quota: UsageQuota
+    exceeded: List[str]
+    daily: List[DailyUsage] = []
@@ -0,0 +1,237 @@
+# backend/app/services/analytics.py
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.analytics import ModerationRollup
+from app.models.moderation_log import ModerationLog
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_TOTAL = "total"
+DIMENSION_CATEGORY = "category"
+DIMENSION_CONTENT_TYPE = "content_type"
+DIMENSION_USER = "user"
+DIMENSIONS = (DIMENSION_TOTAL, DIMENSION_CATEGORY, DIMENSION_CONTENT_TYPE, DIMENSION_USER)
+TOTAL_KEY = "all"
+
+# (bucket, dimension, key) -> [total, violations, latency_ms_sum]
+RollupCounts = Dict[Tuple[datetime, str, str], List[float]]
+
+def hour_bucket(timestamp: datetime) -> datetime:
+    """Truncate a timestamp to the start of its hour."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def _json_field(value: Any) -> Any:
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or []
+
+def accumulate(rows: Iterable[Dict[str, Any]], counts: Optional[RollupCounts] = None) -> RollupCounts:
+    """
+    Fold moderation log rows into per-hour rollup increments.
+
+    Rows use the ``ModerationLog`` column names; ``scores`` and ``violations``
+    may be JSON strings (as stored) or already decoded.
+    """
+    if counts is None:
+        counts = defaultdict(lambda: [0, 0, 0.0])
+    for row in rows:
+        bucket = hour_bucket(row["created_at"])
+        violated = 0 if row["is_approved"] else 1
+        latency = row.get("latency_ms") or 0.0
+
+        keys = [(DIMENSION_TOTAL, TOTAL_KEY), (DIMENSION_CONTENT_TYPE, row["content_type"])]
+        if row.get("user_id") is not None:
+            keys.append((DIMENSION_USER, str(row["user_id"])))
+        for dimension, key in keys:
+            entry = counts[(bucket, dimension, key)]
+            entry[0] += 1
+            entry[1] += violated
+            entry[2] += latency
+
+        violations = set(_json_field(row.get("violations")))
+        for category in _json_field(row.get("scores")):
+            entry = counts[(bucket, DIMENSION_CATEGORY, category)]
+            entry[0] += 1
+            entry[1] += 1 if category in violations else 0
+    return counts
+
+def apply_rollups(db: Session, counts: RollupCounts) -> None:
+    """
+    Add rollup increments with one upsert per batch.
+
+    Uses ``INSERT ... ON CONFLICT DO UPDATE`` on PostgreSQL and SQLite; other
+    dialects fall back to read-modify-write per row.
+    """
+    if not counts:
+        return
+    rows = [
+        {
+            "bucket": bucket,
+            "dimension": dimension,
+            "key": key,
+            "total": int(total),
+            "violations": int(violations),
+            "latency_ms_sum": float(latency),
+        }
+        for (bucket, dimension, key), (total, violations, latency) in counts.items()
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        _apply_rollups_generic(db, rows)
+        return
+
+    table = ModerationRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.bucket, table.c.dimension, table.c.key],
+        set_={
+            "total": table.c.total + stmt.excluded.total,
+            "violations": table.c.violations + stmt.excluded.violations,
+            "latency_ms_sum": table.c.latency_ms_sum + stmt.excluded.latency_ms_sum,
+        },
+    )
+    db.execute(stmt, rows)
+
+def _apply_rollups_generic(db: Session, rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        rollup = db.execute(
+            select(ModerationRollup).where(
+                ModerationRollup.bucket == row["bucket"],
+                ModerationRollup.dimension == row["dimension"],
+                ModerationRollup.key == row["key"],
+            ).with_for_update()
+        ).scalar_one_or_none()
+        if rollup is None:
+            db.add(ModerationRollup(**row))
+        else:
+            rollup.total += row["total"]
+            rollup.violations += row["violations"]
+            rollup.latency_ms_sum += row["latency_ms_sum"]
+    db.flush()
+
+def record_log_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Moderation recorder listener: roll up freshly inserted log rows."""
+    apply_rollups(db, accumulate(rows))
+
+def _to_count(key: str, total: int, violations: int, latency: float) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "total": total,
+        "violations": violations,
+        "violation_rate": violations / total if total else 0.0,
+        "avg_latency_ms": latency / total if total else 0.0,
+    }
+
+def get_counts(
+    db: Session, *, since: datetime, dimension: str, key: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Sum rollups for one dimension since ``since``, grouped by key."""
+    stmt = (
+        select(
+            ModerationRollup.key,
+            func.sum(ModerationRollup.total),
+            func.sum(ModerationRollup.violations),
+            func.sum(ModerationRollup.latency_ms_sum),
+        )
+        .where(ModerationRollup.dimension == dimension, ModerationRollup.bucket >= since)
+        .group_by(ModerationRollup.key)
+    )
+    if key is not None:
+        stmt = stmt.where(ModerationRollup.key == key)
+    counts = [
+        _to_count(row_key, int(total or 0), int(violations or 0), float(latency or 0.0))
+        for row_key, total, violations, latency in db.execute(stmt).all()
+    ]
+    return sorted(counts, key=lambda count: count["total"], reverse=True)
+
+def get_total(db: Session, *, since: datetime, dimension: str, key: str) -> Dict[str, Any]:
+    """Summed counters for a single dimension key, zero-filled when absent."""
+    counts = get_counts(db, since=since, dimension=dimension, key=key)
+    return counts[0] if counts else _to_count(key, 0, 0, 0.0)
+
+def get_timeseries(
+    db: Session, *, since: datetime, dimension: str, key: str
+) -> List[Dict[str, Any]]:
+    """Hourly points for one dimension key, with empty hours filled as zero."""
+    stmt = (
+        select(ModerationRollup.bucket, ModerationRollup.total, ModerationRollup.violations)
+        .where(
+            ModerationRollup.dimension == dimension,
+            ModerationRollup.key == key,
+            ModerationRollup.bucket >= since,
+        )
+    )
+    by_bucket = {bucket: (total, violations) for bucket, total, violations in db.execute(stmt).all()}
+
+    points = []
+    bucket = hour_bucket(since)
+    end = hour_bucket(datetime.utcnow())
+    while bucket <= end:
+        total, violations = by_bucket.get(bucket, (0, 0))
+        points.append({
+            "bucket": bucket,
+            "total": total,
+            "violations": violations,
+            "violation_rate": violations / total if total else 0.0,
+        })
+        bucket += timedelta(hours=1)
+    return points
+
+def backfill_rollups(
+    db: Session, *, since: Optional[datetime] = None, chunk_size: int = 5000
+) -> int:
+    """
+    Rebuild rollups from the moderation log.
+
+    Existing rollups from ``since`` onward are deleted, then the log is read
+    in id-ordered chunks of ``chunk_size`` rows; each chunk is aggregated in
+    memory and upserted before the next one is read, so memory stays bounded
+    regardless of history size.
+
+    Returns:
+        Number of log rows processed
+    """
+    reset = delete(ModerationRollup)
+    if since is not None:
+        since = hour_bucket(since)
+        reset = reset.where(ModerationRollup.bucket >= since)
+    db.execute(reset)
+    db.commit()
+
+    columns = [
+        ModerationLog.id,
+        ModerationLog.user_id,
+        ModerationLog.content_type,
+        ModerationLog.is_approved,
+        ModerationLog.scores,
+        ModerationLog.violations,
+        ModerationLog.latency_ms,
+        ModerationLog.created_at,
+    ]
+    last_id = 0
+    processed = 0
+    while True:
+        stmt = select(*columns).where(ModerationLog.id > last_id).order_by(ModerationLog.id).limit(chunk_size)
+        if since is not None:
+            stmt = stmt.where(ModerationLog.created_at >= since)
+        rows = [dict(row._mapping) for row in db.execute(stmt)]
+        if not rows:
+            break
+        apply_rollups(db, accumulate(rows))
+        db.commit()
+        last_id = rows[-1]["id"]
+        processed += len(rows)
+        logger.info(f"Backfilled rollups from {processed} moderation log rows")
+    return processed
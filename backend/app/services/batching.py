@@ -0,0 +1,190 @@
+# backend/app/services/batching.py
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.exceptions import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+class DynamicBatcher:
+    """
+    Groups concurrent requests into batches for one batch function.
+
+    ``submit()`` queues an item and waits for its result. A single worker
+    task takes up to ``max_batch_size`` queued items, waiting at most
+    ``max_wait_ms`` for a batch to fill, and runs ``process_batch`` on
+    ``executor``. While a batch is running new requests keep queueing, so
+    batches grow with load and stay small (low latency) when traffic is light.
+
+    ``process_batch`` receives a list of items and must return one result
+    per item, in order; items left without a result fail with
+    ``RuntimeError``.
+
+    With ``priorities`` > 1 each priority level has its own queue and
+    batches are filled from level 0 first, so urgent items overtake queued
+    lower-priority ones. ``on_queue_delay(level, seconds)`` is called with
+    how long each item waited before joining a batch, and with the age of
+    the oldest item each level leaves queued, so a starved level still
+    reports its growing delay.
+
+    Items may carry a deadline (``time.monotonic()`` seconds). Items whose
+    caller has gone (cancelled future) or whose deadline falls before a
+    batch of typical duration would finish are dropped when the batch is
+    formed; expired ones fail with ``DeadlineExceeded``. Results computed
+    for callers that left while their batch ran are counted as ``wasted``.
+
+    An item's ``meter`` callback, if given, receives the item's share of
+    its batch's run time (for usage accounting).
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        *,
+        executor: Optional[Executor] = None,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+        priorities: int = 1,
+        on_queue_delay: Optional[Callable[[int, float], None]] = None,
+    ):
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+
+        self.on_queue_delay = on_queue_delay
+        self._queues: List[Deque[Tuple[Any, asyncio.Future, float, Optional[float], Optional[Callable]]]] = [
+            deque() for _ in range(max(1, priorities))
+        ]
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.batch_seconds = 0.0  # Moving average of process_batch run time
+        self.dropped_cancelled = 0
+        self.dropped_expired = 0
+        self.wasted = 0
+
+    async def submit(
+        self,
+        item: Any,
+        priority: int = 0,
+        deadline: Optional[float] = None,
+        meter: Optional[Callable[[float], None]] = None,
+    ) -> Any:
+        """Queue ``item`` at ``priority`` (0 is served first) and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        queue = self._queues[min(max(priority, 0), len(self._queues) - 1)]
+        queue.append((item, future, loop.time(), deadline, meter))
+        self._wakeup.set()
+        return await future
+
+    def close(self) -> None:
+        """Stop the worker task (only once nothing can submit to this batcher anymore)."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued(),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "avg_batch_ms": self.batch_seconds * 1000,
+            "dropped_cancelled": self.dropped_cancelled,
+            "dropped_expired": self.dropped_expired,
+            "wasted": self.wasted,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self.queued():
+                continue
+
+            # Give the batch a short window to fill up
+            deadline = loop.time() + self.max_wait
+            while self.queued() < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+
+            batch = []
+            now = loop.time()
+            # Latest deadline a batch starting now can still meet
+            finish_by = time.monotonic() + self.batch_seconds
+            for level, queue in enumerate(self._queues):
+                while queue and len(batch) < self.max_batch_size:
+                    item, future, queued_at, deadline, meter = queue.popleft()
+                    if future.done():  # Skip requests cancelled while queued
+                        self.dropped_cancelled += 1
+                        continue
+                    if deadline is not None and deadline < finish_by:
+                        self.dropped_expired += 1
+                        future.set_exception(DeadlineExceeded())
+                        continue
+                    batch.append((item, future, meter))
+                    if self.on_queue_delay is not None:
+                        self.on_queue_delay(level, now - queued_at)
+            if self.queued():
+                self._wakeup.set()
+                if self.on_queue_delay is not None:
+                    for level, queue in enumerate(self._queues):
+                        if queue:
+                            self.on_queue_delay(level, now - queue[0][2])
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = list(await loop.run_in_executor(
+                    self.executor, self.process_batch, [item for item, _, _ in batch]
+                ))
+            except Exception as e:
+                logger.error(f"{self.name}: batch of {len(batch)} failed: {e}", exc_info=True)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if len(results) != len(batch):
+                logger.error(f"{self.name}: batch of {len(batch)} returned {len(results)} results")
+
+            seconds = time.perf_counter() - start
+            self.batch_seconds = seconds if not self.batches else 0.8 * self.batch_seconds + 0.2 * seconds
+            self.batches += 1
+            self.items += len(batch)
+            share = seconds / len(batch)
+            for (_, future, meter), result in zip(batch, results):
+                if meter is not None:
+                    meter(share)
+                if future.done():  # The caller left while the batch ran
+                    self.wasted += 1
+                else:
+                    future.set_result(result)
+            for _, future, _ in batch[len(results):]:
+                if not future.done():
+                    future.set_exception(RuntimeError(
+                        f"{self.name}: batch of {len(batch)} returned only {len(results)} results"
+                    ))
@@ -0,0 +1,73 @@
+# backend/app/services/bulk_moderation.py
+import logging
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.load_shedding import BULK
+from app.services.ml_service import get_content_moderator_async
+from app.services.moderation_recorder import moderation_recorder
+
+logger = logging.getLogger(__name__)
+
+async def moderate_contents(
+    db: Session,
+    items: Sequence[Tuple[int, str]],
+    *,
+    user_id: Optional[int] = None,
+    priority: str = BULK,
+) -> Dict[int, Dict]:
+    """
+    Moderate stored text content in batches and write the outcomes back.
+
+    Args:
+        db: Database session used for the write-back
+        items: ``(content_id, text)`` pairs to moderate
+        user_id: Owner of the content, recorded in the moderation log
+        priority: Load shedding class the texts are queued under
+
+    Returns:
+        Dict mapping content id to its moderation result
+    """
+    moderator = await get_content_moderator_async()
+    results: Dict[int, Dict] = {}
+    batch_size = max(1, settings.BULK_MODERATION_BATCH_SIZE)
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        start_time = time.perf_counter()
+        chunk_results = await moderator.moderate_texts(
+            [text for _, text in chunk],
+            tenant=str(user_id) if user_id is not None else None,
+            priority=priority,
+            user_id=user_id,
+            content_ids=[content_id for content_id, _ in chunk],
+        )
+        latency_ms = (time.perf_counter() - start_time) * 1000 / len(chunk)
+        chunk_by_id = {content_id: result for (content_id, _), result in zip(chunk, chunk_results)}
+        results.update(chunk_by_id)
+        await run_in_threadpool(crud.content.set_moderation_results, db, results=chunk_by_id)
+        for content_id, _ in chunk:
+            await moderation_recorder.record({
+                "content_type": "text",
+                "content_id": content_id,
+                "user_id": user_id,
+                "latency_ms": latency_ms,
+                "result": results[content_id],
+            })
+    return results
+
+async def moderate_contents_in_background(
+    items: Sequence[Tuple[int, str]], user_id: Optional[int] = None, priority: str = BULK
+) -> None:
+    """Background-task entry point: moderate ``items`` with a dedicated session."""
+    db = SessionLocal()
+    try:
+        results = await moderate_contents(db, items, user_id=user_id, priority=priority)
+        logger.info(f"Background moderation finished for {len(results)} content items")
+    finally:
+        db.close()
@@ -0,0 +1,368 @@
+# backend/app/services/embedding_store.py
+import asyncio
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"EMBF16v1"
+# Magic, vector dimension and the model name (NUL padded): 256 bytes
+_HEADER = struct.Struct("<8sI244s")
+HEADER_SIZE = _HEADER.size
+_CHUNK_ROWS = 65536  # Vectors converted to float32 at a time while scanning
+
+def record_dtype(dim: int) -> np.dtype:
+    return np.dtype([("content_id", "<i8"), ("vector", "<f2", (dim,))])
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length as float32 (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class EmbeddingFile:
+    """
+    Append-only file of ``(content id, float16 vector)`` records for one model.
+
+    A header names the model and vector dimension; fixed-size records
+    follow. Appends are single writes to a file opened in append mode, so
+    worker processes sharing the file never interleave records. Readers
+    map the file with ``np.memmap`` and map it again as it grows.
+    """
+
+    def __init__(self, path: str, model: Optional[str] = None, dim: Optional[int] = None):
+        self.path = path
+        if model is not None and not os.path.exists(path):
+            try:
+                with open(path, "xb") as f:
+                    f.write(_HEADER.pack(_MAGIC, dim, model.encode("utf-8")[:244]))
+            except FileExistsError:  # Another worker created it first
+                pass
+        with open(path, "rb") as f:
+            magic, dim, name = _HEADER.unpack(f.read(HEADER_SIZE))
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not an embedding file")
+        self.model = name.rstrip(b"\0").decode("utf-8", "replace")
+        self.dim = dim
+        self.dtype = record_dtype(dim)
+        self._map: Optional[np.memmap] = None
+        self._mapped_rows = 0
+
+    def rows(self) -> int:
+        """Complete records in the file."""
+        return max(0, (os.path.getsize(self.path) - HEADER_SIZE) // self.dtype.itemsize)
+
+    def repair(self) -> None:
+        """Cut off a partly written last record (left by a crash), so later appends stay aligned."""
+        size = HEADER_SIZE + self.rows() * self.dtype.itemsize
+        if os.path.getsize(self.path) > size:
+            logger.warning(f"Truncating a partial record at the end of {self.path}")
+            os.truncate(self.path, size)
+
+    def append(self, content_ids: Sequence[int], vectors: np.ndarray) -> None:
+        records = np.empty(len(content_ids), self.dtype)
+        records["content_id"] = content_ids
+        records["vector"] = vectors
+        data = memoryview(records.tobytes())
+        with open(self.path, "ab", buffering=0) as f:
+            while data:
+                data = data[f.write(data):]
+
+    def records(self, stop: int) -> np.ndarray:
+        """The first ``stop`` records, memory-mapped (read-only, not copied)."""
+        if self._map is None or stop > self._mapped_rows:
+            self._map = np.memmap(self.path, dtype=self.dtype, mode="r", offset=HEADER_SIZE, shape=(stop,))
+            self._mapped_rows = stop
+        return self._map[:stop]
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour search over one embedding file.
+
+    Vectors are stored at unit length, so cosine similarity is a dot
+    product. Up to ``exact_max_rows`` vectors, a search compares the query
+    with all of them. Past that, spherical k-means on a sample groups them
+    into about sqrt(n) clusters, every vector is listed under its nearest
+    centroid (an inverted file), and a search only scans the lists of the
+    query's ``probes`` nearest centroids. The index follows the file:
+    records appended by any process are listed on the next search, and the
+    clusters are retrained once the file has grown fourfold since.
+    """
+
+    def __init__(
+        self,
+        store: EmbeddingFile,
+        *,
+        exact_max_rows: int = settings.EMBEDDING_EXACT_MAX_ROWS,
+        probes: int = settings.EMBEDDING_IVF_PROBES,
+        train_sample: int = settings.EMBEDDING_IVF_TRAIN_SAMPLE,
+    ):
+        self.store = store
+        self.exact_max_rows = exact_max_rows
+        self.probes = probes
+        self.train_sample = train_sample
+        self.rows = 0  # Records indexed so far
+        self.trained_rows = 0
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        # Content id of every record, copied out so lookups do not page in the vectors
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _vectors(self, start: int, stop: int) -> np.ndarray:
+        return self.store.records(stop)["vector"][start:stop].astype(np.float32)
+
+    def sync(self) -> None:
+        """Index the records appended since the last call."""
+        with self._lock:
+            total = self.store.rows()
+            if total == self.rows:
+                return
+            if total > len(self._ids):
+                self._ids = np.concatenate([self._ids, self.store.records(total)["content_id"][len(self._ids):]])
+            if total > self.exact_max_rows and (self.centroids is None or total >= 4 * self.trained_rows):
+                self._train(total)
+            elif self.centroids is not None:
+                self._assign(self.rows, total)
+            else:
+                self.rows = total
+
+    def _train(self, total: int, iterations: int = 10) -> None:
+        start = time.perf_counter()
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(total, min(total, self.train_sample), replace=False))
+        sample = self.store.records(total)["vector"][sample_rows].astype(np.float32)
+        n_lists = int(min(len(sample), max(16, min(4096, np.sqrt(total)))))
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            present, starts = np.unique(labels[order], return_index=True)
+            # Clusters left empty keep their centroid
+            centroids[present] = normalize(np.add.reduceat(sample[order], starts, axis=0))
+        self.centroids = centroids
+        self._lists = [[] for _ in range(n_lists)]
+        self.rows = 0
+        self.trained_rows = total
+        self._assign(0, total)
+        logger.info(
+            f"Clustered {total} {self.store.model} embeddings into {n_lists} lists "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+    def _assign(self, start: int, stop: int) -> None:
+        for chunk_start in range(start, stop, _CHUNK_ROWS):
+            chunk_stop = min(stop, chunk_start + _CHUNK_ROWS)
+            labels = np.argmax(self._vectors(chunk_start, chunk_stop) @ self.centroids.T, axis=1)
+            for row, label in enumerate(labels.tolist(), chunk_start):
+                self._lists[label].append(row)
+        self.rows = stop
+
+    def _candidates(self, query: np.ndarray) -> Tuple[int, Optional[np.ndarray]]:
+        """Rows a search scans: all of the first ``rows`` (None), or the probed lists."""
+        self.sync()
+        with self._lock:
+            if self.centroids is None:
+                return self.rows, None
+            probed = np.argsort(-(self.centroids @ query))[:self.probes]
+            rows = [np.asarray(self._lists[label], dtype=np.int64) for label in probed.tolist()]
+            return self.rows, np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+    def search(
+        self, query: np.ndarray, k: int, exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Up to ``k`` ``(content id, similarity)`` pairs, most similar first, one per content id."""
+        query = normalize(query)
+        total, rows = self._candidates(query)
+        if not total:
+            return []
+        records = self.store.records(total)
+        # Re-moderated content has several records: fetch extra to fill k after dropping repeats
+        fetch = 4 * k + 16
+        if rows is None:
+            best_rows, best_sims = [], []
+            for start in range(0, total, _CHUNK_ROWS):
+                stop = min(total, start + _CHUNK_ROWS)
+                sims = self._vectors(start, stop) @ query
+                top = np.argpartition(-sims, fetch)[:fetch] if len(sims) > fetch else np.arange(len(sims))
+                best_rows.append(top + start)
+                best_sims.append(sims[top])
+            rows, sims = np.concatenate(best_rows), np.concatenate(best_sims)
+        else:
+            sims = records["vector"][rows].astype(np.float32) @ query
+        order = np.argsort(-sims)
+        content_ids = self._ids[rows[order]]
+        results: List[Tuple[int, float]] = []
+        seen: Set[int] = set() if exclude is None else {exclude}
+        for content_id, similarity in zip(content_ids.tolist(), sims[order].tolist()):
+            if content_id in seen:
+                continue
+            seen.add(content_id)
+            results.append((content_id, similarity))
+            if len(results) == k:
+                break
+        return results
+
+    def vector(self, content_id: int) -> Optional[np.ndarray]:
+        """The latest stored vector of ``content_id``, or None."""
+        self.sync()
+        ids = self._ids
+        matches = np.flatnonzero(ids == content_id)
+        if not len(matches):
+            return None
+        return self.store.records(len(ids))["vector"][matches[-1]].astype(np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dim": self.store.dim,
+            "vectors": self.store.rows(),
+            "indexed": self.rows,
+            "lists": len(self._lists) if self.centroids is not None else 0,
+        }
+
+def _file_name(model: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "--", model).strip("-.") + ".emb"
+
+class EmbeddingIndex:
+    """
+    Stored embeddings of moderated content, one file and index per text model.
+
+    The moderation pass computes each text's embedding anyway; it is
+    appended here with the content id and never recomputed. Models embed
+    into different spaces, so each model (including a hot-swapped
+    replacement) gets its own file, and a search stays within the model
+    that embedded the query content.
+    """
+
+    def __init__(self, directory: str = settings.EMBEDDING_DIR):
+        self.directory = directory
+        self._indexes: Dict[str, IVFIndex] = {}  # By file name
+        self._lock = threading.Lock()
+        self._pending: Set[asyncio.Future] = set()
+
+        self.added = 0
+        self.failed = 0
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    def _open(self, name: str, model: Optional[str] = None, dim: Optional[int] = None) -> IVFIndex:
+        index = self._indexes.get(name)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    store = EmbeddingFile(os.path.join(self.directory, name), model, dim)
+                    index = self._indexes[name] = IVFIndex(store)
+        return index
+
+    def _refresh(self) -> List[IVFIndex]:
+        """Indexes for every file in the directory, including files other workers created."""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".emb") and name not in self._indexes:
+                    self._open(name)
+        return list(self._indexes.values())
+
+    def load(self) -> int:
+        """Open the stored files, repairing torn last records; returns the number of vectors."""
+        indexes = self._refresh()
+        for index in indexes:
+            index.store.repair()
+        total = sum(index.store.rows() for index in indexes)
+        logger.info(f"Found {total} stored embeddings in {len(indexes)} files")
+        return total
+
+    def add(self, model: str, content_ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Append embeddings of ``model`` (one row per content id) to its file."""
+        vectors = np.asarray(vectors)
+        os.makedirs(self.directory, exist_ok=True)
+        index = self._open(_file_name(model), model, vectors.shape[1])
+        if index.store.dim != vectors.shape[1]:
+            raise ValueError(f"{model} embeddings have {index.store.dim} dimensions, not {vectors.shape[1]}")
+        index.store.append(content_ids, vectors.astype(np.float16))
+        self.added += len(content_ids)
+
+    def add_in_background(self, model: str, content_ids: Sequence[int], vectors: np.ndarray) -> None:
+        """``add()`` on the default executor, off the request path."""
+        future = asyncio.get_running_loop().run_in_executor(None, self._add_logged, model, content_ids, vectors)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _add_logged(self, model: str, content_ids: Sequence[int], vectors: np.ndarray) -> None:
+        try:
+            self.add(model, content_ids, vectors)
+        except Exception as e:
+            self.failed += len(content_ids)
+            logger.error(f"Failed to store embeddings: {e}")
+
+    def copy(self, model: str, source_id: int, content_ids: Sequence[int]) -> bool:
+        """Store ``source_id``'s latest ``model`` embedding again under ``content_ids``; False if it has none."""
+        self._refresh()
+        index = self._indexes.get(_file_name(model))
+        vector = index.vector(source_id) if index is not None else None
+        if vector is None:
+            return False
+        index.store.append(content_ids, np.repeat(vector[None, :], len(content_ids), axis=0).astype(np.float16))
+        self.added += len(content_ids)
+        return True
+
+    def copy_in_background(self, model: str, source_id: int, content_ids: Sequence[int]) -> None:
+        """``copy()`` off the request path, once the embeddings already queued are written."""
+        loop = asyncio.get_running_loop()
+        queued = list(self._pending)
+
+        async def run() -> None:
+            await asyncio.gather(*queued, return_exceptions=True)
+            await loop.run_in_executor(None, self._copy_logged, model, source_id, content_ids)
+
+        future = asyncio.ensure_future(run())
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _copy_logged(self, model: str, source_id: int, content_ids: Sequence[int]) -> None:
+        try:
+            copied = self.copy(model, source_id, content_ids)
+        except Exception as e:
+            copied = False
+            logger.error(f"Failed to store embeddings: {e}")
+        if not copied:
+            self.failed += len(content_ids)
+
+    def similar(self, content_id: int, k: int) -> Optional[Dict[str, Any]]:
+        """
+        Content most similar to ``content_id``, or None if it has no stored embedding.
+
+        Returns ``{"model", "results"}`` with ``results`` a list of
+        ``(content id, cosine similarity)``, most similar first.
+        """
+        start = time.perf_counter()
+        for index in self._refresh():
+            query = index.vector(content_id)
+            if query is not None:
+                results = index.search(query, k, exclude=content_id)
+                self.searches += 1
+                self.search_seconds += time.perf_counter() - start
+                return {"model": index.store.model, "results": results}
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.EMBEDDINGS_ENABLED,
+            "models": {index.store.model: index.stats() for index in list(self._indexes.values())},
+            "added": self.added,
+            "failed": self.failed,
+            "searches": self.searches,
+            "avg_search_ms": self.search_seconds / self.searches * 1000 if self.searches else 0.0,
+        }
+
+# Singleton instance
+embedding_index = EmbeddingIndex()
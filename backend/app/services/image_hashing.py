@@ -0,0 +1,350 @@
+# backend/app/services/image_hashing.py
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import delete, insert, select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.image_hash import ImageHash
+
+logger = logging.getLogger(__name__)
+
+VERDICT_BAD = "bad"
+VERDICT_GOOD = "good"
+SOURCE_ADMIN = "admin"  # Registered through the API; never replaced by learned verdicts or evicted
+SOURCE_LEARNED = "learned"  # Remembered from confident model scores
+_PRUNE_EVERY = 1000  # Learned rows written between prunes of the table
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so ``D @ x @ D.T`` is the 2D DCT of ``x``."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+_DCT_32 = _dct_matrix(32)
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+def phash(gray: np.ndarray) -> int:
+    """64-bit perceptual hash of a 32x32 grayscale array (low-frequency DCT signs vs median)."""
+    coeffs = _DCT_32 @ gray.astype(np.float32) @ _DCT_32.T
+    low = coeffs[:8, :8].ravel()
+    return _bits_to_int(low > np.median(low[1:]))
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit difference hash of an 8x9 (rows x cols) grayscale array."""
+    return _bits_to_int(gray[:, 1:] > gray[:, :-1])
+
+def compute_hashes(pixels: np.ndarray) -> Tuple[int, int]:
+    """pHash and dHash of a decoded RGB uint8 array."""
+    gray = Image.fromarray(pixels).convert("L")
+    gray32 = np.asarray(gray.resize((32, 32), Image.BOX))
+    gray9x8 = np.asarray(gray.resize((9, 8), Image.BOX), dtype=np.int16)
+    return phash(gray32), dhash(gray9x8)
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def to_signed64(value: int) -> int:
+    """Store unsigned 64-bit hashes in a signed BIGINT column."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over 64-bit hashes for Hamming-radius search.
+
+    Hashes are split into ``chunks`` 16-bit substrings, each with its own
+    exact-match table. If two hashes differ in at most ``r`` bits, then by
+    pigeonhole at least one substring differs in at most ``r // chunks``
+    bits, so a search only probes those few neighbouring buckets per table
+    and verifies the small candidate set, instead of scanning every hash.
+    Slots of removed hashes are reused by later additions.
+    """
+
+    chunks = 4
+    chunk_bits = 16
+
+    def __init__(self):
+        self._values: List[int] = []
+        self._payloads: List[Any] = []
+        self._positions: Dict[int, int] = {}
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.chunks)]
+        self._free: List[int] = []
+        self._mask = (1 << self.chunk_bits) - 1
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _substrings(self, value: int) -> List[int]:
+        return [(value >> (i * self.chunk_bits)) & self._mask for i in range(self.chunks)]
+
+    def get(self, value: int) -> Any:
+        """Payload stored for exactly ``value``, or None."""
+        position = self._positions.get(value)
+        return None if position is None else self._payloads[position]
+
+    def add(self, value: int, payload: Any) -> None:
+        """Store ``payload`` for ``value``, replacing the payload it already has."""
+        position = self._positions.get(value)
+        if position is not None:
+            self._payloads[position] = payload
+            return
+        if self._free:
+            position = self._free.pop()
+            self._values[position] = value
+            self._payloads[position] = payload
+        else:
+            position = len(self._values)
+            self._values.append(value)
+            self._payloads.append(payload)
+        self._positions[value] = position
+        for table, substring in zip(self._tables, self._substrings(value)):
+            table.setdefault(substring, []).append(position)
+
+    def remove(self, value: int) -> bool:
+        position = self._positions.pop(value, None)
+        if position is None:
+            return False
+        for table, substring in zip(self._tables, self._substrings(value)):
+            bucket = table[substring]
+            bucket.remove(position)
+            if not bucket:
+                del table[substring]
+        self._payloads[position] = None
+        self._free.append(position)
+        return True
+
+    def _neighbours(self, substring: int, radius: int) -> List[int]:
+        neighbours = [substring]
+        if radius >= 1:
+            flips = [substring ^ (1 << bit) for bit in range(self.chunk_bits)]
+            neighbours.extend(flips)
+            if radius >= 2:
+                neighbours.extend(
+                    substring ^ (1 << a) ^ (1 << b)
+                    for a in range(self.chunk_bits)
+                    for b in range(a + 1, self.chunk_bits)
+                )
+        return neighbours
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int, Any]]:
+        """All ``(distance, hash, payload)`` within ``max_distance`` of ``value``."""
+        radius = max_distance // self.chunks
+        if radius > 2:
+            # Probing would enumerate too many buckets; scan instead
+            candidates = list(self._positions.values())
+        else:
+            candidates = set()
+            for table, substring in zip(self._tables, self._substrings(value)):
+                for neighbour in self._neighbours(substring, radius):
+                    bucket = table.get(neighbour)
+                    if bucket:
+                        candidates.update(bucket)
+        matches = []
+        for position in candidates:
+            distance = hamming(value, self._values[position])
+            if distance <= max_distance:
+                matches.append((distance, self._values[position], self._payloads[position]))
+        return matches
+
+class ImageHashIndex:
+    """
+    In-memory index of known-bad and known-good image hashes.
+
+    Lookups search the pHash multi-index and confirm candidates with dHash; a
+    known-bad match within range wins over a known-good one. New hashes are
+    added in memory immediately and persisted to ``image_hashes`` off the
+    request path, and the table is loaded back at startup.
+
+    Hashes registered by an admin are kept for good. Hashes learned from
+    confident model scores are bounded like the text index: at most
+    ``max_learned`` of them, each for ``learned_ttl_seconds``, evicted
+    oldest-first in memory and pruned from the table. For the same pHash a
+    learned verdict never replaces an admin one, and "good" never replaces
+    "bad".
+    """
+
+    def __init__(
+        self,
+        max_distance: int = settings.IMAGE_HASH_MAX_DISTANCE,
+        dhash_max_distance: int = settings.IMAGE_HASH_DHASH_MAX_DISTANCE,
+        max_learned: int = settings.IMAGE_HASH_MAX_LEARNED,
+        learned_ttl_seconds: float = settings.IMAGE_HASH_LEARNED_TTL_SECONDS,
+        session_factory=SessionLocal,
+    ):
+        self.max_distance = max_distance
+        self.dhash_max_distance = dhash_max_distance
+        self.max_learned = max_learned
+        self.learned_ttl_seconds = learned_ttl_seconds
+        self.session_factory = session_factory
+        self._index = MultiIndexHash()
+        self._learned: "OrderedDict[int, float]" = OrderedDict()  # pHash -> when learned, oldest first
+        self._lock = threading.Lock()
+        self._pending: Set[asyncio.Future] = set()
+        self._writes = itertools.count(1)
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def load(self) -> int:
+        """Prune expired learned rows, then load the rest into memory; returns the number loaded."""
+        db = self.session_factory()
+        try:
+            self._prune(db)
+            rows = db.execute(
+                select(
+                    ImageHash.phash, ImageHash.dhash, ImageHash.verdict, ImageHash.scores,
+                    ImageHash.source, ImageHash.created_at,
+                ).order_by(ImageHash.id)
+            ).all()
+        finally:
+            db.close()
+        with self._lock:
+            for phash_value, dhash_value, verdict, scores, source, created_at in rows:
+                learned_at = created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else time.time()
+                self._insert(
+                    from_signed64(phash_value), from_signed64(dhash_value), verdict,
+                    json.loads(scores or "{}"), source, learned_at,
+                )
+            self._evict(time.time())
+        logger.info(f"Loaded {len(rows)} image hashes")
+        return len(rows)
+
+    def lookup(self, phash_value: int, dhash_value: int) -> Optional[Dict[str, Any]]:
+        """Closest known near-duplicate, or None."""
+        start = time.perf_counter()
+        with self._lock:
+            candidates = self._index.search(phash_value, self.max_distance)
+        best = None
+        for distance, _, (candidate_dhash, verdict, scores, _) in candidates:
+            if hamming(dhash_value, candidate_dhash) > self.dhash_max_distance:
+                continue
+            rank = (verdict != VERDICT_BAD, distance)
+            if best is None or rank < best[0]:
+                best = (rank, {"distance": distance, "verdict": verdict, "scores": scores})
+        self.lookups += 1
+        self.lookup_seconds += time.perf_counter() - start
+        if best is None:
+            return None
+        self.hits += 1
+        return best[1]
+
+    def _insert(
+        self, phash_value: int, dhash_value: int, verdict: str,
+        scores: Dict[str, float], source: str, learned_at: float,
+    ) -> bool:
+        """Index a hash unless it would override a stronger verdict (caller holds the lock)."""
+        existing = self._index.get(phash_value)
+        if existing is not None:
+            _, existing_verdict, _, existing_source = existing
+            if existing_source == SOURCE_ADMIN and source != SOURCE_ADMIN:
+                return False
+            if existing_verdict == VERDICT_BAD and verdict != VERDICT_BAD:
+                return False
+        self._index.add(phash_value, (dhash_value, verdict, scores, source))
+        self._learned.pop(phash_value, None)
+        if source == SOURCE_LEARNED:
+            self._learned[phash_value] = learned_at
+        return True
+
+    def _evict(self, now: float) -> None:
+        while self._learned:
+            phash_value, learned_at = next(iter(self._learned.items()))
+            if len(self._learned) <= self.max_learned and now - learned_at < self.learned_ttl_seconds:
+                break
+            self._learned.popitem(last=False)
+            self._index.remove(phash_value)
+            self.evictions += 1
+
+    def add(
+        self,
+        phash_value: int,
+        dhash_value: int,
+        verdict: str,
+        scores: Dict[str, float],
+        *,
+        source: str = SOURCE_LEARNED,
+        persist: bool = True,
+    ) -> bool:
+        """
+        Index a hash now and, if ``persist``, write it to the database in the background.
+
+        Returns:
+            False if the pHash already has a verdict this one may not replace
+        """
+        now = time.time()
+        with self._lock:
+            added = self._insert(phash_value, dhash_value, verdict, scores, source, now)
+            self._evict(now)
+        if added and persist:
+            row = {
+                "phash": to_signed64(phash_value),
+                "dhash": to_signed64(dhash_value),
+                "verdict": verdict,
+                "scores": json.dumps(scores),
+                "source": source,
+            }
+            future = asyncio.get_running_loop().run_in_executor(None, self._persist, row)
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+        return added
+
+    def _persist(self, row: Dict[str, Any]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(ImageHash), [row])
+            db.commit()
+            if row["source"] == SOURCE_LEARNED and next(self._writes) % _PRUNE_EVERY == 0:
+                self._prune(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to persist image hash: {e}")
+        finally:
+            db.close()
+
+    def _prune(self, db) -> None:
+        """Delete learned rows past their TTL or beyond the newest ``max_learned``."""
+        learned = ImageHash.source == SOURCE_LEARNED
+        cutoff = datetime.utcnow() - timedelta(seconds=self.learned_ttl_seconds)
+        db.execute(delete(ImageHash).where(learned, ImageHash.created_at < cutoff))
+        oldest_kept = db.execute(
+            select(ImageHash.id).where(learned)
+            .order_by(ImageHash.id.desc()).offset(max(0, self.max_learned - 1)).limit(1)
+        ).scalar()
+        if oldest_kept is not None:
+            db.execute(delete(ImageHash).where(learned, ImageHash.id < oldest_kept))
+        db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hashes": len(self._index),
+            "learned": len(self._learned),
+            "evictions": self.evictions,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "avg_lookup_us": self.lookup_seconds / self.lookups * 1e6 if self.lookups else 0.0,
+        }
+
+# Singleton instance
+image_hash_index = ImageHashIndex()
@@ -0,0 +1,351 @@
+# backend/app/services/language_id.py
+import bisect
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+UNDETERMINED = "und"
+ROUTE_REVIEW = "review"  # Route that skips the models and sends the text to human review
+
+# Scripts used by (mostly) one language: identified without the n-gram model.
+# Each entry is (first code point, last code point, language).
+_SCRIPT_RANGES = sorted([
+    (0x0370, 0x03FF, "el"),  # Greek
+    (0x0400, 0x04FF, "ru"),  # Cyrillic
+    (0x0530, 0x058F, "hy"),  # Armenian
+    (0x0590, 0x05FF, "he"),  # Hebrew
+    (0x0600, 0x06FF, "ar"),  # Arabic
+    (0x0900, 0x097F, "hi"),  # Devanagari
+    (0x0980, 0x09FF, "bn"),  # Bengali
+    (0x0E00, 0x0E7F, "th"),  # Thai
+    (0x10A0, 0x10FF, "ka"),  # Georgian
+    (0x3040, 0x30FF, "ja"),  # Hiragana and Katakana
+    (0x4E00, 0x9FFF, "zh"),  # CJK ideographs (Japanese kana outvote these)
+    (0xAC00, 0xD7AF, "ko"),  # Hangul
+])
+_SCRIPT_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Small samples of everyday text the Latin-script profiles are built from
+SAMPLES: Dict[str, str] = {
+    "en": (
+        "the people who were there said that they would not have done it if they had known what "
+        "was going to happen. you should think about what you want and then tell me, because I "
+        "have been waiting for this all day and this is the best thing that has happened to us. "
+        "she is going with her friends to the city and they will be back in the evening. we do "
+        "not know why he did that but it is not right and everyone here thinks the same thing. "
+        "please send me the photos when you can, I would like to see them before the weekend"
+    ),
+    "es": (
+        "la gente que estaba allí dijo que no lo habrían hecho si hubieran sabido lo que iba a "
+        "pasar. deberías pensar en lo que quieres y después decírmelo, porque he estado "
+        "esperando esto todo el día y es lo mejor que nos ha pasado. ella va con sus amigos a "
+        "la ciudad y volverán por la noche. no sabemos por qué lo hizo pero no está bien y todos "
+        "aquí piensan lo mismo. por favor envíame las fotos cuando puedas, me gustaría verlas "
+        "antes del fin de semana"
+    ),
+    "fr": (
+        "les gens qui étaient là ont dit qu'ils ne l'auraient pas fait s'ils avaient su ce qui "
+        "allait se passer. tu devrais penser à ce que tu veux et ensuite me le dire, parce que "
+        "j'attends cela depuis toute la journée et c'est la meilleure chose qui nous soit "
+        "arrivée. elle va en ville avec ses amis et ils reviendront ce soir. nous ne savons pas "
+        "pourquoi il a fait ça mais ce n'est pas bien et tout le monde ici pense la même chose. "
+        "envoie-moi les photos quand tu peux, je voudrais les voir avant le week-end"
+    ),
+    "de": (
+        "die leute, die dort waren, sagten, dass sie es nicht getan hätten, wenn sie gewusst "
+        "hätten, was passieren würde. du solltest darüber nachdenken, was du willst, und es "
+        "mir dann sagen, weil ich schon den ganzen tag darauf warte und das ist das beste, was "
+        "uns passiert ist. sie geht mit ihren freunden in die stadt und sie kommen am abend "
+        "zurück. wir wissen nicht, warum er das gemacht hat, aber es ist nicht richtig und alle "
+        "hier denken dasselbe. bitte schick mir die fotos, wenn du kannst, ich möchte sie vor "
+        "dem wochenende sehen"
+    ),
+    "it": (
+        "le persone che erano lì hanno detto che non lo avrebbero fatto se avessero saputo "
+        "cosa sarebbe successo. dovresti pensare a quello che vuoi e poi dirmelo, perché lo sto "
+        "aspettando da tutto il giorno ed è la cosa migliore che ci sia successa. lei va in "
+        "città con i suoi amici e torneranno questa sera. non sappiamo perché lo ha fatto ma "
+        "non è giusto e tutti qui pensano la stessa cosa. per favore mandami le foto quando "
+        "puoi, vorrei vederle prima del fine settimana"
+    ),
+    "pt": (
+        "as pessoas que estavam lá disseram que não o teriam feito se soubessem o que ia "
+        "acontecer. você deveria pensar no que quer e depois me dizer, porque estou esperando "
+        "isso o dia todo e é a melhor coisa que já nos aconteceu. ela vai para a cidade com os "
+        "amigos e eles voltam à noite. não sabemos por que ele fez isso, mas não está certo e "
+        "todos aqui pensam a mesma coisa. por favor me manda as fotos quando puder, eu gostaria "
+        "de vê-las antes do fim de semana"
+    ),
+    "nl": (
+        "de mensen die daar waren zeiden dat ze het niet hadden gedaan als ze hadden geweten "
+        "wat er zou gebeuren. je moet nadenken over wat je wilt en het me dan vertellen, want "
+        "ik wacht hier al de hele dag op en dit is het beste wat ons is overkomen. ze gaat met "
+        "haar vrienden naar de stad en ze komen vanavond terug. we weten niet waarom hij dat "
+        "deed, maar het is niet goed en iedereen hier denkt hetzelfde. stuur me alsjeblieft de "
+        "foto's als je kunt, ik wil ze voor het weekend zien"
+    ),
+}
+
+_NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+_CODE_POINTS = 0x110000  # Three code points packed in base 0x110000 still fit an int64
+
+def normalize(text: str) -> str:
+    """Lowercase with every run of non-letters collapsed to one space, padded with spaces."""
+    return f" {_NON_LETTERS.sub(' ', text.lower()).strip()} "
+
+class LanguageIdentifier:
+    """
+    Character n-gram language identification (multinomial naive Bayes).
+
+    Scripts that belong to one language (Greek, Hangul, Arabic, ...) are
+    decided by counting code points. Latin-script text is scored against
+    per-language n-gram log-probabilities built from ``samples`` (unless
+    ``scripts_only``, which leaves all Latin-script text undetermined). Scoring
+    is vectorized: the text's code points are packed into one int64 key
+    per n-gram, looked up with ``searchsorted`` in the sorted vocabulary,
+    and the resulting count vector scores every language in one matrix
+    product. Text too short or too close between languages to call is
+    ``UNDETERMINED``.
+    """
+
+    def __init__(
+        self,
+        samples: Dict[str, str] = SAMPLES,
+        *,
+        ngram_sizes: Sequence[int] = (1, 2, 3),
+        min_chars: int = settings.LANGUAGE_ID_MIN_CHARS,
+        max_chars: int = settings.LANGUAGE_ID_MAX_CHARS,
+        min_confidence: float = settings.LANGUAGE_ID_MIN_CONFIDENCE,
+        smoothing: float = 0.5,
+        scripts_only: bool = False,
+    ):
+        self.scripts_only = scripts_only
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.min_confidence = min_confidence
+        self.languages = list(samples)
+
+        counts = [self._count(normalize(text)) for text in samples.values()]
+        self.vocabulary: Dict[str, int] = {}
+        for language_counts in counts:
+            for gram in language_counts:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        matrix = np.full((len(self.languages), len(self.vocabulary)), smoothing, dtype=np.float64)
+        for row, language_counts in enumerate(counts):
+            for gram, count in language_counts.items():
+                matrix[row, self.vocabulary[gram]] += count
+        # Normalized per n-gram size, so each size is its own distribution
+        for size in self.ngram_sizes:
+            columns = [index for gram, index in self.vocabulary.items() if len(gram) == size]
+            matrix[:, columns] /= matrix[:, columns].sum(axis=1, keepdims=True)
+        self.log_probs = np.log(matrix).T.copy()  # (vocabulary, languages)
+
+        # Per n-gram size: sorted packed keys and the vocabulary row of each
+        self._keys: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for size in self.ngram_sizes:
+            grams = [(gram, index) for gram, index in self.vocabulary.items() if len(gram) == size]
+            keys = np.concatenate([self._gram_keys(gram, size) for gram, _ in grams])
+            order = np.argsort(keys)
+            rows = np.array([index for _, index in grams], dtype=np.int64)
+            self._keys[size] = (keys[order], rows[order])
+
+    @staticmethod
+    def _gram_keys(text: str, size: int) -> np.ndarray:
+        """Packed int64 key of every ``size``-character window of ``text``."""
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype="<u4").astype(np.int64)
+        count = len(codes) - size + 1
+        if count <= 0:
+            return np.empty(0, dtype=np.int64)
+        keys = codes[:count].copy()
+        for offset in range(1, size):
+            keys *= _CODE_POINTS
+            keys += codes[offset:offset + count]
+        return keys
+
+    def _count(self, text: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for size in self.ngram_sizes:
+            for i in range(len(text) - size + 1):
+                gram = text[i:i + size]
+                if gram != " " * size:
+                    counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def _script(self, text: str) -> Optional[str]:
+        """Language of the dominant non-Latin script, if most letters use one."""
+        if text.isascii():
+            return None
+        votes: Dict[str, int] = {}
+        letters = 0
+        for char in text:
+            if not char.isalpha():
+                continue
+            letters += 1
+            code = ord(char)
+            if code < 0x0370:
+                continue
+            index = bisect.bisect_right(_SCRIPT_STARTS, code) - 1
+            if index >= 0 and code <= _SCRIPT_RANGES[index][1]:
+                language = _SCRIPT_RANGES[index][2]
+                votes[language] = votes.get(language, 0) + 1
+        if not votes or sum(votes.values()) * 2 < letters:
+            return None
+        if "ja" in votes:
+            # Japanese mixes kana with ideographs; any kana decides it
+            return "ja"
+        return max(votes, key=votes.get)
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """
+        Return ``(language, confidence)`` for one text.
+
+        Only the first ``max_chars`` characters are looked at. Confidence is
+        the posterior probability of the chosen language (1.0 for scripts).
+        """
+        text = text[:self.max_chars]
+        language = self._script(text)
+        if language is not None:
+            return language, 1.0
+        if self.scripts_only:
+            return UNDETERMINED, 0.0
+        normalized = normalize(text)
+        if len(normalized) - 2 < self.min_chars:
+            return UNDETERMINED, 0.0
+        rows = []
+        for size, (known, known_rows) in self._keys.items():
+            keys = self._gram_keys(normalized, size)
+            positions = np.minimum(np.searchsorted(known, keys), len(known) - 1)
+            found = known[positions] == keys
+            rows.append(known_rows[positions[found]])
+        rows = np.concatenate(rows)
+        if not len(rows):
+            return UNDETERMINED, 0.0
+        scores = np.bincount(rows, minlength=len(self.vocabulary)) @ self.log_probs
+        best = int(scores.argmax())
+        # Posterior of the best language, computed stably in log space
+        confidence = 1.0 / float(np.exp(scores - scores[best]).sum())
+        if confidence < self.min_confidence:
+            return UNDETERMINED, confidence
+        return self.languages[best], confidence
+
+def load_corpus(path: str) -> Dict[str, str]:
+    """Training text per language from a JSON object (``{"en": "...", "es": "..."}``)."""
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    if not isinstance(corpus, dict) or not all(isinstance(text, str) for text in corpus.values()):
+        raise ValueError(f"{path}: expected a JSON object mapping languages to text")
+    return corpus
+
+class LanguageRouter:
+    """
+    Picks the model registry key each text is moderated with.
+
+    ``routes`` maps languages to registry keys; undetermined text is
+    treated as ``default_language`` and any other language goes to
+    ``fallback`` (a registry key, or ``ROUTE_REVIEW`` to skip the models).
+    Detection time and route counts are kept per language.
+
+    The built-in ``SAMPLES`` are a few sentences per language, too little
+    to tell English spam or technical text (brand names, jargon) from
+    Italian or Dutch, so by default only non-Latin scripts are identified
+    and Latin-script text stays with ``default_language``. Profiles
+    trained on ``LANGUAGE_ID_CORPUS_PATH`` turn n-gram routing on.
+    """
+
+    def __init__(
+        self,
+        identifier: Optional[LanguageIdentifier] = None,
+        *,
+        routes: Optional[Dict[str, str]] = None,
+        default_language: str = settings.TEXT_DEFAULT_LANGUAGE,
+        fallback: str = settings.TEXT_FALLBACK_ROUTE,
+        enabled: bool = settings.LANGUAGE_ROUTING_ENABLED,
+    ):
+        self._identifier = identifier
+        self.routes = dict(settings.TEXT_LANGUAGE_ROUTES if routes is None else routes)
+        self.default_language = default_language
+        self.fallback = fallback
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def identifier(self) -> LanguageIdentifier:
+        # Built on first use: the profiles take a few milliseconds to compile
+        if self._identifier is None:
+            if settings.LANGUAGE_ID_CORPUS_PATH:
+                self._identifier = LanguageIdentifier(load_corpus(settings.LANGUAGE_ID_CORPUS_PATH))
+            else:
+                self._identifier = LanguageIdentifier(scripts_only=True)
+        return self._identifier
+
+    def route_keys(self) -> List[str]:
+        """Registry keys this router can send text to."""
+        keys = {*self.routes.values(), self.fallback, self.routes.get(self.default_language, self.fallback)}
+        keys.discard(ROUTE_REVIEW)
+        return sorted(keys)
+
+    def route_for(self, language: str) -> str:
+        if language == UNDETERMINED:
+            language = self.default_language
+        return self.routes.get(language, self.fallback)
+
+    def route_many(self, texts: Sequence[str]) -> Tuple[List[Optional[str]], List[str]]:
+        """
+        Identify and route each text.
+
+        Returns:
+            ``(languages, routes)`` in the order of ``texts``; languages
+            are None when routing is disabled
+        """
+        if not self.enabled:
+            return [None] * len(texts), [self.route_for(self.default_language)] * len(texts)
+        identifier = self.identifier
+        languages: List[Optional[str]] = []
+        routes: List[str] = []
+        timings: List[float] = []
+        for text in texts:
+            start = time.perf_counter()
+            language, _ = identifier.detect(text)
+            timings.append(time.perf_counter() - start)
+            languages.append(language)
+            routes.append(self.route_for(language))
+        with self._lock:
+            for language, route, seconds in zip(languages, routes, timings):
+                entry = self._stats.get(language)
+                if entry is None:
+                    entry = self._stats[language] = {"texts": 0, "seconds": 0.0, "max_seconds": 0.0, "routes": {}}
+                entry["texts"] += 1
+                entry["seconds"] += seconds
+                entry["max_seconds"] = max(entry["max_seconds"], seconds)
+                entry["routes"][route] = entry["routes"].get(route, 0) + 1
+        return languages, routes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            languages = {
+                language: {
+                    "texts": entry["texts"],
+                    "avg_us": round(entry["seconds"] / entry["texts"] * 1e6, 1),
+                    "max_us": round(entry["max_seconds"] * 1e6, 1),
+                    "routes": dict(entry["routes"]),
+                }
+                for language, entry in sorted(self._stats.items())
+            }
+        return {
+            "enabled": self.enabled,
+            "routes": self.routes,
+            "default_language": self.default_language,
+            "fallback": self.fallback,
+            "languages": languages,
+        }
+
+# Singleton instance
+language_router = LanguageRouter()
@@ -0,0 +1,120 @@
+# backend/app/services/load_shedding.py
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+INTERACTIVE = "interactive"  # Live chat and other users waiting on the verdict
+STANDARD = "standard"  # Single-item API calls
+BULK = "bulk"  # Batch endpoints, backfills and background moderation
+PRIORITY_CLASSES = (INTERACTIVE, STANDARD, BULK)  # Served in this order
+
+def priority_level(priority: str) -> int:
+    """Queue index of a priority class (0 is served first); unknown classes are standard."""
+    try:
+        return PRIORITY_CLASSES.index(priority)
+    except ValueError:
+        return PRIORITY_CLASSES.index(STANDARD)
+
+class _ClassState:
+    def __init__(self, target: float):
+        self.target = target
+        self.overloaded = False
+        self.window_start = time.monotonic()
+        self.window_min = math.inf
+        self.window_samples = 0
+        self.admitted = 0
+        self.shed = 0
+        self.samples = 0
+        self.delay_sum = 0.0
+        self.max_delay = 0.0
+
+class LoadShedder:
+    """
+    Admission control from measured queue delay, per priority class.
+
+    Batchers report how long each item waited in their queue. Per class,
+    the smallest delay seen over each ``interval`` is compared to the
+    class's target (as in CoDel, the minimum ignores short bursts and only
+    reacts to a standing queue). A class whose minimum exceeds its target
+    is overloaded until a later window comes in under it, or a window
+    passes with no items at all.
+
+    ``admit()`` refuses a class that is overloaded itself, or when any
+    higher-priority class is: bulk work is shed first to protect standard
+    and interactive traffic, and is refused early, before any
+    tokenization or inference is spent on it.
+    """
+
+    def __init__(
+        self,
+        targets_ms: Optional[Dict[str, float]] = None,
+        *,
+        interval_ms: float = settings.QUEUE_DELAY_INTERVAL_MS,
+        enabled: bool = settings.LOAD_SHEDDING_ENABLED,
+    ):
+        targets_ms = settings.QUEUE_DELAY_TARGETS_MS if targets_ms is None else targets_ms
+        self.interval = interval_ms / 1000
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._states = [
+            _ClassState(targets_ms.get(priority, math.inf) / 1000) for priority in PRIORITY_CLASSES
+        ]
+
+    def _roll(self, state: _ClassState, now: float) -> None:
+        if now - state.window_start < self.interval:
+            return
+        state.overloaded = state.window_samples > 0 and state.window_min > state.target
+        state.window_start = now
+        state.window_min = math.inf
+        state.window_samples = 0
+
+    def record(self, level: int, delay: float) -> None:
+        """Report that an item of priority ``level`` waited ``delay`` seconds to be batched."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states[min(level, len(self._states) - 1)]
+            self._roll(state, now)
+            state.window_min = min(state.window_min, delay)
+            state.window_samples += 1
+            state.samples += 1
+            state.delay_sum += delay
+            state.max_delay = max(state.max_delay, delay)
+
+    def admit(self, priority: str) -> bool:
+        """Whether to take on new work of class ``priority`` now (counted either way)."""
+        level = priority_level(priority)
+        now = time.monotonic()
+        with self._lock:
+            for state in self._states:
+                self._roll(state, now)
+            admitted = not self.enabled or not any(
+                state.overloaded for state in self._states[:level + 1]
+            )
+            if admitted:
+                self._states[level].admitted += 1
+            else:
+                self._states[level].shed += 1
+        return admitted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "classes": {
+                    priority: {
+                        "target_ms": state.target * 1000,
+                        "overloaded": state.overloaded,
+                        "admitted": state.admitted,
+                        "shed": state.shed,
+                        "avg_queue_ms": state.delay_sum / state.samples * 1000 if state.samples else 0.0,
+                        "max_queue_ms": state.max_delay * 1000,
+                    }
+                    for priority, state in zip(PRIORITY_CLASSES, self._states)
+                },
+            }
+
+# Singleton instance
+load_shedder = LoadShedder()
@@ -1,151 +1,920 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextlib
+import functools
 import logging
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
-from PIL import Image
-import io
+import os
+import threading
+import time
+import numpy as np
+
+from app.core.config import settings
+from app.core.deadlines import Deadline, deadline_stats
+from app.core.exceptions import DeadlineExceeded
+from app.core.tracing import tracer
+from app.services.batching import DynamicBatcher
+from app.services.embedding_store import embedding_index
+from app.services.image_hashing import (
+    SOURCE_ADMIN,
+    VERDICT_BAD,
+    VERDICT_GOOD,
+    compute_hashes,
+    image_hash_index,
+)
+from app.services.image_pipeline import decode_image, image_size_from_config, normalize_batch
+from app.services.language_id import ROUTE_REVIEW, language_router
+from app.services.load_shedding import PRIORITY_CLASSES, STANDARD, load_shedder, priority_level
+from app.services.model_registry import ModelBundle, model_registry
+from app.services.near_duplicate import text_dedup_index
+from app.services.policy import policy_engine
+from app.services.text_batching import PadStats, TokenCache, length_bucket, pad_batch
+from app.services.torch_runtime import torch_runtime
+from app.services.usage import usage_meter
 
 logger = logging.getLogger(__name__)
 
+# torch and transformers take seconds to import, so they are only imported
+# inside the functions that need them: processes and routes that never
+# moderate (migrations, analytics, auth) start without them.
+
+def get_device() -> str:
+    import torch
+    # Thread pools and allocator settings must be in place before the first model loads
+    torch_runtime.configure()
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def load_nli_model(model_name: str) -> ModelBundle:
+    """Zero-shot NLI model and tokenizer from a local path or a hub name."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    
+    device = get_device()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.to(device)
+    model = torch_runtime.prepare_model(model, model_name)
+    return ModelBundle(model_name, model, tokenizer=tokenizer, device=device)
+
+def load_text_model() -> ModelBundle:
+    """Zero-shot NLI text model (a local fine-tune at ML_MODEL_PATH, if present)."""
+    return load_nli_model(
+        settings.ML_MODEL_PATH if os.path.isdir(settings.ML_MODEL_PATH) else settings.TEXT_MODEL_NAME
+    )
+
+def load_multilingual_text_model() -> ModelBundle:
+    """Zero-shot NLI model trained on XNLI, for languages the English model cannot judge."""
+    return load_nli_model(settings.TEXT_MULTILINGUAL_MODEL_NAME)
+
+def load_image_model() -> ModelBundle:
+    """
+    Image classifier plus the preprocessing constants it was trained with.
+    
+    Only the processor's config is kept: decoding and normalization run in
+    our own batched NumPy pipeline rather than the per-image processor.
+    """
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+    
+    device = get_device()
+    model_name = settings.IMAGE_MODEL_NAME
+    processor = AutoImageProcessor.from_pretrained(model_name)
+    model = AutoModelForImageClassification.from_pretrained(model_name)
+    model.to(device)
+    model = torch_runtime.prepare_model(model, model_name)
+    labels = [model.config.id2label[i] for i in range(model.config.num_labels)]
+    return ModelBundle(
+        model_name,
+        model,
+        device=device,
+        config={
+            "size": image_size_from_config(processor.size),
+            "mean": list(processor.image_mean),
+            "std": list(processor.image_std),
+            "labels": labels,
+        },
+    )
+
+model_registry.register("text", load_text_model)
+model_registry.register("text-multilingual", load_multilingual_text_model)
+model_registry.register("image", load_image_model)
+
+# Content categories every text model scores, as zero-shot NLI hypotheses
+TEXT_CATEGORIES = [
+    "hate_speech",
+    "harassment",
+    "self_harm",
+    "sexual_content",
+    "violence",
+    "illegal_activities",
+    "personal_information"
+]
+
+class TextScores(dict):
+    """Category scores of one text, carrying the pooled embedding its model pass produced."""
+    
+    __slots__ = ("embedding",)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.embedding: Optional[np.ndarray] = None
+
+class StoredPremise(list):
+    """Premise token ids of a text whose embedding will be stored, so its model pass must produce one."""
+    
+    __slots__ = ()
+
+class TextModelPipeline:
+    """
+    Tokenization, length-bucketed batching and scoring for one text model.
+    
+    Every model registry key that texts are routed to gets its own
+    pipeline, so texts are only batched with texts for the same model.
+    Requests hold a ``lease()`` while their texts are in the pipeline, so
+    a hot swap can wait for them to finish before ``close()`` frees it.
+    """
+    # Zero-shot NLI hypothesis used to score each category
+    hypothesis_template = "This text contains {}."
+    
+    def __init__(
+        self, key: str, bundle: ModelBundle, categories: List[str], executor: ThreadPoolExecutor
+    ):
+        self.key = key
+        self.model_name = bundle.name
+        self.tokenizer = bundle.tokenizer
+        self.model = bundle.model
+        self.device = bundle.device
+        self.categories = categories
+        self.leases = 0
+        self.closed = False
+        self._lease_lock = threading.Lock()
+        self._prepare_text_batching(executor)
+    
+    @contextlib.contextmanager
+    def lease(self):
+        """Mark the pipeline in use for the duration of the block."""
+        with self._lease_lock:
+            self.leases += 1
+        try:
+            yield self
+        finally:
+            with self._lease_lock:
+                self.leases -= 1
+    
+    async def drain(self, warn_after: float = settings.MODEL_SWAP_DRAIN_WARN_SECONDS) -> float:
+        """Wait until no request holds a lease; returns the seconds waited."""
+        start = time.perf_counter()
+        warned = False
+        while self.leases:
+            if not warned and time.perf_counter() - start > warn_after:
+                logger.warning(f"Text model '{self.key}' still has {self.leases} requests in flight")
+                warned = True
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - start
+    
+    def close(self) -> None:
+        """Stop the batchers and drop the model, tokenizer and caches (after ``drain()``)."""
+        self.closed = True
+        for batcher in self.text_batchers.values():
+            batcher.close()
+        self.model = None
+        self.tokenizer = None
+        self.token_cache = TokenCache(0)
+    
+    def _prepare_text_batching(self, executor: ThreadPoolExecutor):
+        """
+        Pre-tokenize the category hypotheses and set up one batcher per length bucket.
+        
+        Texts are grouped by token length and each batch is padded to its
+        bucket boundary, so one long text no longer pads a whole batch to 512.
+        """
+        self.hypothesis_ids = [
+            self.tokenizer(
+                self.hypothesis_template.format(category.replace("_", " ")),
+                add_special_tokens=False,
+            )["input_ids"]
+            for category in self.categories
+        ]
+        self.length_buckets = sorted(settings.TEXT_LENGTH_BUCKETS)
+        # Tokens every (premise, hypothesis) pair adds besides the premise
+        self.pair_overhead = (
+            self.tokenizer.num_special_tokens_to_add(pair=True)
+            + max(len(ids) for ids in self.hypothesis_ids)
+        )
+        self.max_premise_tokens = self.length_buckets[-1] - self.pair_overhead
+        self.pad_token_id = self.tokenizer.pad_token_id
+        
+        self.token_cache = TokenCache(settings.TEXT_TOKEN_CACHE_SIZE)
+        self.pad_stats = PadStats()
+        self.text_batchers = {
+            bucket: DynamicBatcher(
+                functools.partial(self._score_encoded, pad_to=bucket),
+                executor=executor,
+                max_batch_size=settings.ML_BATCH_SIZE,
+                max_wait_ms=settings.TEXT_BATCH_WAIT_MS,
+                name=f"{self.key}-batcher-{bucket}",
+                priorities=len(PRIORITY_CLASSES),
+                on_queue_delay=load_shedder.record,
+            )
+            for bucket in self.length_buckets
+        }
+        if not getattr(self.tokenizer, "is_fast", False):
+            logger.warning(
+                f"Tokenizer of text model '{self.key}' is not a fast (Rust) tokenizer; "
+                "batch encoding will be slow"
+            )
+    
+    def _tokenize_batch(self, texts: List[str]) -> List[List[int]]:
+        """Premise token ids (no special tokens) via the tokenizer's batch API."""
+        return self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=self.max_premise_tokens,
+        )["input_ids"]
+    
+    def encode(self, texts: List[str]) -> List[List[int]]:
+        """Premise token ids of ``texts``, through the token id cache."""
+        return self.token_cache.encode_many(texts, self._tokenize_batch)
+    
+    def _bucket_for(self, premise_ids: List[int]) -> int:
+        return length_bucket(len(premise_ids) + self.pair_overhead, self.length_buckets)
+    
+    def submit(
+        self,
+        premise_ids: List[int],
+        priority: str = STANDARD,
+        deadline: Optional[Deadline] = None,
+        meter: Optional[Callable[[float], None]] = None,
+        embed: bool = False,
+    ) -> "asyncio.Future[Dict[str, float]]":
+        """
+        Queue an encoded text on the batcher for its length bucket, in ``priority``'s queue.
+        
+        With ``embed`` (and embeddings enabled) its scores carry the text's embedding.
+        """
+        if embed and settings.EMBEDDINGS_ENABLED:
+            premise_ids = StoredPremise(premise_ids)
+        return self.text_batchers[self._bucket_for(premise_ids)].submit(
+            premise_ids, priority_level(priority), deadline.expires_at if deadline else None, meter
+        )
+    
+    def min_pass_seconds(self) -> float:
+        """Time the cheapest model pass takes: the fastest bucket's average batch."""
+        measured = [batcher.batch_seconds for batcher in self.text_batchers.values() if batcher.batches]
+        return max(settings.MIN_MODEL_BUDGET_MS / 1000, min(measured, default=0.0))
+    
+    def _score_encoded(self, premises: List[List[int]], pad_to: int) -> List[Dict[str, float]]:
+        """
+        Score pre-tokenized texts against every category in one forward pass.
+        
+        Each (text, category hypothesis) pair is scored by the NLI head; the
+        category score is the entailment probability against contradiction.
+        Pairs are padded to exactly ``pad_to`` tokens. Hidden states are
+        only requested when a ``StoredPremise`` is in the batch, and only
+        those texts' scores get an embedding.
+        """
+        import torch
+        
+        categories = self.categories
+        sequences = [
+            self.tokenizer.build_inputs_with_special_tokens(premise, hypothesis)
+            for premise in premises
+            for hypothesis in self.hypothesis_ids
+        ]
+        input_ids, attention_mask = pad_batch(sequences, pad_to, self.pad_token_id)
+        self.pad_stats.record(pad_to, attention_mask)
+        
+        embed = [isinstance(premise, StoredPremise) for premise in premises]
+        mask = torch.from_numpy(attention_mask).to(self.device)
+        with torch_runtime.inference():
+            outputs = self.model(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=mask,
+                # Encoder-decoder models return the encoder's last layer anyway
+                output_hidden_states=any(embed) and not self.model.config.is_encoder_decoder,
+            )
+        logits = outputs.logits
+        
+        # XNLI checkpoints spell their labels in upper case
+        label2id = {label.lower(): i for label, i in self.model.config.label2id.items()}
+        entail_contra = logits[:, [label2id.get("contradiction", 0), label2id.get("entailment", 2)]]
+        probs = torch.softmax(entail_contra, dim=1)[:, 1].view(len(premises), len(categories))
+        results = [TextScores(zip(categories, row)) for row in probs.cpu().tolist()]
+        if any(embed):
+            for scores, embedding, wanted in zip(results, self._pooled(outputs, mask), embed):
+                if wanted:
+                    scores.embedding = embedding
+        return results
+    
+    def _pooled(self, outputs: Any, attention_mask: Any) -> np.ndarray:
+        """
+        One unit-length float16 embedding per text from a forward pass's outputs.
+        
+        The mean of the encoder's last hidden states over the tokens of each
+        text's first (text, hypothesis) pair; the hypothesis is the same for
+        every text, so embeddings of different texts stay comparable.
+        """
+        import torch
+        
+        hidden = getattr(outputs, "encoder_last_hidden_state", None)
+        if hidden is None:
+            hidden = outputs.hidden_states[-1]
+        stride = len(self.hypothesis_ids)
+        hidden = hidden[::stride].float()
+        mask = attention_mask[::stride].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return torch.nn.functional.normalize(pooled, dim=1).cpu().numpy().astype(np.float16)
+    
+    def score_texts(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Score texts synchronously, one forward pass per length bucket present."""
+        encoded = self.encode(texts)
+        by_bucket: Dict[int, List[int]] = {}
+        for i, premise in enumerate(encoded):
+            by_bucket.setdefault(self._bucket_for(premise), []).append(i)
+        scores: List[Optional[Dict[str, float]]] = [None] * len(texts)
+        for bucket, positions in by_bucket.items():
+            bucket_scores = self._score_encoded([encoded[i] for i in positions], bucket)
+            for i, row in zip(positions, bucket_scores):
+                scores[i] = row
+        return scores
+    
+    def warmup(self, timed) -> None:
+        """Score one text padded to each bucket boundary, plus a full batch in the smallest."""
+        token = self._tokenize_batch(["warmup"])[0][:1] or [self.pad_token_id]
+        for bucket in self.length_buckets:
+            premise = token * max(1, bucket - self.pair_overhead)
+            timed(f"{self.key}_{bucket}x1", self._score_encoded, [premise], bucket)
+        if settings.ML_BATCH_SIZE > 1:
+            bucket = self.length_buckets[0]
+            premise = token * max(1, bucket - self.pair_overhead)
+            timed(
+                f"{self.key}_{bucket}x{settings.ML_BATCH_SIZE}",
+                self._score_encoded, [premise] * settings.ML_BATCH_SIZE, bucket,
+            )
+    
+    def stats(self) -> Dict:
+        """Pad waste, token cache and per-bucket batcher stats."""
+        return {
+            "model": self.model_name,
+            "leases": self.leases,
+            "tokenizer_fast": bool(getattr(self.tokenizer, "is_fast", False)),
+            "padding": self.pad_stats.stats(),
+            "token_cache": self.token_cache.stats(),
+            "batchers": {bucket: batcher.stats() for bucket, batcher in self.text_batchers.items()},
+        }
+
 class ContentModerator:
     def __init__(self):
-        self.text_pipeline = None
-        self.image_pipeline = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self._load_models()
+        self.device = get_device()
+        # Decoding gets its own pool so large images never queue in front of
+        # text or image inference
+        self.decode_executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_DECODE_WORKERS, thread_name_prefix="image-decode"
+        )
+        self.inference_executor = ThreadPoolExecutor(
+            max_workers=settings.INFERENCE_WORKERS, thread_name_prefix="inference"
+        )
+        self.image_batcher = DynamicBatcher(
+            self._infer_images,
+            executor=self.inference_executor,
+            max_batch_size=settings.IMAGE_BATCH_SIZE,
+            max_wait_ms=settings.IMAGE_BATCH_WAIT_MS,
+            name="image-batcher",
+            priorities=len(PRIORITY_CLASSES),
+            on_queue_delay=load_shedder.record,
+        )
+        self.content_categories = list(TEXT_CATEGORIES)
+        self.text_pipelines: Dict[str, TextModelPipeline] = {}
+        self._pipelines_lock = threading.Lock()
+        # Candidate models scoring sampled traffic per text model key (see model_rollout)
+        self.shadows: Dict[str, Any] = {}
+        # The default text model loads now; other routed models on first use
+        self.text_pipeline = self.load_text_pipeline("text")
     
-    def _load_models(self):
-        """Load the ML models for text and image moderation"""
-        try:
-            # Text moderation model (Hate speech, offensive language, etc.)
-            model_name = "facebook/bart-large-mnli"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            self.model.to(self.device)
-            
-            # Define content categories we want to moderate
-            self.content_categories = [
-                "hate_speech",
-                "harassment",
-                "self_harm",
-                "sexual_content",
-                "violence",
-                "illegal_activities",
-                "personal_information"
-            ]
-            
-            logger.info("Content moderation models loaded successfully")
-            
-        except Exception as e:
-            logger.error(f"Error loading ML models: {str(e)}")
-            raise
+    def load_text_pipeline(self, key: str) -> TextModelPipeline:
+        """The pipeline for text model ``key``, loading the model on first use."""
+        pipeline = self.text_pipelines.get(key)
+        if pipeline is not None:
+            return pipeline
+        with self._pipelines_lock:
+            pipeline = self.text_pipelines.get(key)
+            if pipeline is None:
+                try:
+                    bundle = model_registry.get(key)
+                except Exception as e:
+                    logger.error(f"Error loading text model '{key}': {str(e)}")
+                    raise
+                pipeline = TextModelPipeline(
+                    key, bundle, self.content_categories, self.inference_executor
+                )
+                self.text_pipelines[key] = pipeline
+                logger.info(f"Text moderation pipeline '{key}' ready ({bundle.name})")
+        return pipeline
+    
+    def replace_text_pipeline(self, key: str, pipeline: TextModelPipeline) -> Optional[TextModelPipeline]:
+        """
+        Route new requests for ``key`` to ``pipeline``; returns the one it replaces.
+        
+        Requests that already hold a lease on the old pipeline finish on it.
+        """
+        with self._pipelines_lock:
+            previous = self.text_pipelines.get(key)
+            self.text_pipelines[key] = pipeline
+            if key == "text":
+                self.text_pipeline = pipeline
+        return previous
+    
+    async def _lease_text_pipeline(self, key: str, leases: contextlib.ExitStack) -> TextModelPipeline:
+        """The live pipeline for ``key``, leased until ``leases`` exits."""
+        while True:
+            pipeline = self.text_pipelines.get(key)
+            if pipeline is None:
+                loop = asyncio.get_running_loop()
+                pipeline = await loop.run_in_executor(None, self.load_text_pipeline, key)
+            # Lost a race with a swap that has already closed it: take the new one
+            if not pipeline.closed:
+                leases.enter_context(pipeline.lease())
+                return pipeline
+    
+    def text_batching_stats(self) -> Dict:
+        """Pad waste, token cache and batcher stats per loaded text model, for /health."""
+        return {key: pipeline.stats() for key, pipeline in self.text_pipelines.items()}
+    
+    def _build_result(
+        self, scores: Dict[str, float], content_type: str = "text", tenant: Optional[str] = None
+    ) -> Dict:
+        """Turn per-category scores into the moderation response shape under the current policy."""
+        return policy_engine.evaluate(scores, content_type=content_type, tenant=tenant)
+    
+    def _fallback_result(self, kind: str, language: Optional[str] = None) -> Dict:
+        """Result for an item its deadline left no time to score: a human reviews it."""
+        deadline_stats.fallback(kind)
+        result = {
+            "is_approved": False,
+            "action": "review",
+            "categories": {},
+            "scores": {},
+            "reason": "Deadline too short for a model pass",
+            "fallback": "deadline",
+        }
+        if language is not None:
+            result["language"] = language
+        return result
+    
+    def batchers(self) -> List[DynamicBatcher]:
+        """Every batcher in front of a live model."""
+        batchers = [self.image_batcher]
+        for pipeline in list(self.text_pipelines.values()):
+            batchers.extend(pipeline.text_batchers.values())
+        return batchers
     
-    async def moderate_text(self, text: str) -> Dict:
+    def _unrouted_result(self, language: Optional[str]) -> Dict:
+        """Result for text in a language no model is routed for: a human reviews it."""
+        return {
+            "is_approved": False,
+            "action": "review",
+            "categories": {},
+            "scores": {},
+            "reason": f"No moderation model for language '{language}'",
+            "language": language,
+        }
+    
+    def warmup(self) -> Dict[str, float]:
+        """
+        Run throwaway batches so real requests don't pay first-call costs.
+        
+        Scores one text padded to each ``TEXT_LENGTH_BUCKETS`` boundary (plus
+        a full ``ML_BATCH_SIZE`` batch in the smallest bucket) with every
+        loaded text model and, if the image model is loaded, an image batch
+        of 1 and ``IMAGE_BATCH_SIZE``.
+        These are exactly the shapes batches are padded to, so the
+        allocator's caches and kernel choices are ready for real traffic.
+        
+        Returns:
+            Seconds spent on each warmup shape
+        """
+        timings: Dict[str, float] = {}
+        
+        def timed(name: str, fn, *args) -> None:
+            start = time.perf_counter()
+            fn(*args)
+            timings[name] = round(time.perf_counter() - start, 3)
+        
+        for pipeline in list(self.text_pipelines.values()):
+            pipeline.warmup(timed)
+        if model_registry.is_loaded("image"):
+            size = model_registry.get("image").config["size"]
+            blank = np.zeros((size, size, 3), dtype=np.uint8)
+            for batch_size in sorted({1, settings.IMAGE_BATCH_SIZE}):
+                timed(f"image_x{batch_size}", self._infer_images, [blank] * batch_size)
+        return timings
+    
+    def _store_embeddings(
+        self, model_name: str, content_ids: Sequence[Optional[int]], chunk_scores: Sequence[Any]
+    ) -> Set[int]:
+        """
+        Append the embeddings of scored texts that belong to stored content.
+        
+        Embeddings are taken off the scores, so they never reach results,
+        the dedup index or the audit log. Returns the content ids stored.
+        """
+        embedded = []
+        for content_id, scores in zip(content_ids, chunk_scores):
+            embedding = getattr(scores, "embedding", None)
+            if embedding is None:
+                continue
+            scores.embedding = None
+            if content_id is not None:
+                embedded.append((content_id, embedding))
+        if embedded:
+            embedding_index.add_in_background(
+                model_name,
+                [content_id for content_id, _ in embedded],
+                np.stack([embedding for _, embedding in embedded]),
+            )
+        return {content_id for content_id, _ in embedded}
+    
+    async def moderate_texts(
+        self,
+        texts: List[str],
+        content_type: str = "text",
+        tenant: Optional[str] = None,
+        priority: str = STANDARD,
+        deadline: Optional[Deadline] = None,
+        user_id: Optional[int] = None,
+        content_ids: Optional[Sequence[Optional[int]]] = None,
+    ) -> List[Dict]:
+        """
+        Analyze a batch of texts.
+        
+        Near-duplicates of recently moderated texts inherit that verdict from
+        the MinHash index (marked with ``near_duplicate``) and skip the model.
+        The rest are language-identified and routed to a text model (or, for
+        languages no model handles, straight to human review), tokenized
+        (through that model's token id cache) and queued on the model's
+        batcher for their length bucket, where they are batched together
+        with concurrent requests' texts of similar length.
+        
+        With a ``deadline``, texts are only tokenized and queued while a
+        model pass can still finish in time, and the batcher drops them once
+        it cannot; those texts get a fallback "review" result (marked
+        ``fallback``) instead of waiting for scores nobody will read.
+        Near-duplicate matches keep their verdict regardless.
+        
+        Texts with a ``content_ids`` entry have their embedding computed and
+        appended to the embedding store for similarity search; for such
+        texts only near-duplicates whose embedding was stored match, and
+        that embedding is stored again under the new content id.
+        
+        Args:
+            texts: The text contents to analyze
+            content_type: Kind of text, for content type policy overrides
+            tenant: Whose policy overrides apply (the content owner's user id)
+            priority: Load shedding class; higher classes are batched first
+            deadline: When the caller stops waiting, if ever
+            user_id: Whose usage (texts, tokens, model-seconds) this is
+            content_ids: Stored content each text belongs to, if any
+        
+        Returns:
+            List of moderation results in the same order as ``texts``
+        """
+        loop = asyncio.get_running_loop()
+        usage_meter.add(user_id, texts=len(texts))
+        meter = functools.partial(usage_meter.add_model_seconds, user_id) if user_id is not None else None
+        batch_size = max(1, settings.ML_BATCH_SIZE)
+        results: List[Optional[Dict]] = [None] * len(texts)
+        signatures = [
+            text_dedup_index.signature(text) if settings.TEXT_DEDUP_ENABLED else None
+            for text in texts
+        ]
+        embed = [
+            settings.EMBEDDINGS_ENABLED and content_ids is not None and content_ids[i] is not None
+            for i in range(len(texts))
+        ]
+        # (model, content id) a text's embedding was stored under
+        embedded_as: Dict[int, Tuple[str, int]] = {}
+        copies: Dict[Tuple[str, int], List[int]] = {}
+        position = 0
+        while position < len(texts):
+            # Look up each chunk just before it runs, so later chunks can
+            # match texts moderated by earlier ones
+            chunk: List[int] = []
+            while position < len(texts) and len(chunk) < batch_size:
+                signature = signatures[position]
+                match = (
+                    text_dedup_index.lookup(signature, embedded_only=embed[position])
+                    if signature is not None else None
+                )
+                if match is not None:
+                    if embed[position]:
+                        copies.setdefault(match["embedded"], []).append(content_ids[position])
+                    # Policy applied per hit: it may have changed, and tenants differ
+                    result = self._build_result(match["scores"], content_type, tenant)
+                    if match["language"] is not None:
+                        result["language"] = match["language"]
+                    result["near_duplicate"] = match["near_duplicate"]
+                    results[position] = result
+                else:
+                    chunk.append(position)
+                position += 1
+            if not chunk:
+                continue
+            languages, routes = language_router.route_many([texts[i] for i in chunk])
+            language_of = dict(zip(chunk, languages))
+            by_route: Dict[str, List[int]] = {}
+            for i, language, route in zip(chunk, languages, routes):
+                if route == ROUTE_REVIEW:
+                    results[i] = self._unrouted_result(language)
+                else:
+                    by_route.setdefault(route, []).append(i)
+            if deadline is not None:
+                for route in list(by_route):
+                    pipeline = self.text_pipelines.get(route)
+                    budget = (
+                        pipeline.min_pass_seconds() if pipeline is not None
+                        else settings.MIN_MODEL_BUDGET_MS / 1000
+                    )
+                    if not deadline.fits(budget):
+                        for i in by_route.pop(route):
+                            results[i] = self._fallback_result("text", language_of[i])
+            chunk = [i for positions in by_route.values() for i in positions]
+            if not chunk:
+                continue
+            try:
+                with contextlib.ExitStack() as leases:
+                    submitted = []
+                    model_names: Dict[str, str] = {}
+                    for route, positions in by_route.items():
+                        pipeline = await self._lease_text_pipeline(route, leases)
+                        model_names[route] = pipeline.model_name
+                        with tracer.span("tokenize", model=pipeline.model_name, texts=len(positions)):
+                            encoded = await loop.run_in_executor(
+                                None, pipeline.encode, [texts[i] for i in positions]
+                            )
+                        usage_meter.add(user_id, tokens=sum(len(premise) for premise in encoded))
+                        submitted.extend(
+                            pipeline.submit(premise, priority, deadline, meter, embed[i])
+                            for i, premise in zip(positions, encoded)
+                        )
+                    start = time.perf_counter()
+                    with tracer.span("inference", kind="text", texts=len(submitted)):
+                        chunk_scores = await asyncio.gather(*submitted, return_exceptions=True)
+                    seconds = time.perf_counter() - start
+                for scores in chunk_scores:
+                    if isinstance(scores, Exception) and not isinstance(scores, DeadlineExceeded):
+                        raise scores
+                offset = 0
+                for route, positions in by_route.items():
+                    shadow = self.shadows.get(route)
+                    scored = [
+                        (texts[i], scores)
+                        for i, scores in zip(positions, chunk_scores[offset:offset + len(positions)])
+                        if not isinstance(scores, DeadlineExceeded)
+                    ]
+                    if shadow is not None and scored:
+                        shadow.observe(
+                            [text for text, _ in scored], [scores for _, scores in scored],
+                            seconds, content_type, tenant,
+                        )
+                    if content_ids is not None:
+                        stored = self._store_embeddings(
+                            model_names[route],
+                            [content_ids[i] for i in positions],
+                            chunk_scores[offset:offset + len(positions)],
+                        )
+                        for i in positions:
+                            if content_ids[i] in stored:
+                                embedded_as[i] = (model_names[route], content_ids[i])
+                    offset += len(positions)
+                for i, scores in zip(chunk, chunk_scores):
+                    if isinstance(scores, DeadlineExceeded):
+                        results[i] = self._fallback_result("text", language_of[i])
+                        continue
+                    results[i] = self._build_result(scores, content_type, tenant)
+                    if language_of[i] is not None:
+                        results[i]["language"] = language_of[i]
+                    if signatures[i] is not None:
+                        text_dedup_index.add(signatures[i], scores, language_of[i], embedded_as.get(i))
+            except Exception as e:
+                logger.error(f"Error in text moderation: {str(e)}")
+                # Without scores nothing can be decided, so a human reviews it
+                for i in chunk:
+                    results[i] = {
+                        "is_approved": False,
+                        "action": "review",
+                        "categories": {},
+                        "scores": {},
+                        "reason": f"Error during moderation: {str(e)}"
+                    }
+        for (model_name, source_id), copy_ids in copies.items():
+            embedding_index.copy_in_background(model_name, source_id, copy_ids)
+        return results
+    
+    async def moderate_text(
+        self,
+        text: str,
+        content_type: str = "text",
+        tenant: Optional[str] = None,
+        priority: str = STANDARD,
+        deadline: Optional[Deadline] = None,
+        user_id: Optional[int] = None,
+    ) -> Dict:
         """
         Analyze text content for inappropriate content.
         
         Args:
             text: The text content to analyze
-            
+            content_type: Kind of text, for content type policy overrides
+            tenant: Whose policy overrides apply (the content owner's user id)
+            priority: Load shedding class; higher classes are batched first
+            deadline: When the caller stops waiting, if ever
+            user_id: Whose usage this is
+        
         Returns:
             Dict containing moderation results
         """
+        return (await self.moderate_texts(
+            [text], content_type, tenant, priority, deadline, user_id
+        ))[0]
+    
+    async def _decode(self, fn: Callable, *args) -> Any:
+        """
+        Run ``fn`` on the decode pool, letting it finish even if the caller is cancelled.
+        
+        The image data is usually a view over a pooled upload buffer that the
+        request hands back as soon as this returns; a decode still reading
+        it would see the next upload's bytes.
+        """
+        future = asyncio.get_running_loop().run_in_executor(self.decode_executor, fn, *args)
         try:
-            # Tokenize the input text
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            ).to(self.device)
-            
-            # Get model predictions for each category
-            results = {}
-            for category in self.content_categories:
-                # This is a simplified example - in practice, you'd use a fine-tuned model
-                # or a more sophisticated approach for each category
-                output = self.model(**inputs)
-                logits = output.logits
-                probs = torch.softmax(logits, dim=1)
-                
-                # For demonstration, using random scores
-                # In a real implementation, you would have proper category-specific logic
-                score = torch.rand(1).item()  # Random score for demo
-                results[category] = {
-                    "score": score,
-                    "threshold": 0.7,  # Example threshold
-                    "is_violation": score > 0.7
-                }
-            
-            # Determine overall moderation decision
-            has_violations = any(result["is_violation"] for result in results.values())
-            
-            return {
-                "is_approved": not has_violations,
-                "categories": results,
-                "scores": {k: v["score"] for k, v in results.items()},
-                "reason": "Violation found in content" if has_violations else "Content approved"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in text moderation: {str(e)}")
-            # In case of error, we might want to flag for human review
-            return {
-                "is_approved": False,
-                "categories": {},
-                "scores": {},
-                "reason": f"Error during moderation: {str(e)}"
-            }
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            while not future.done():
+                with contextlib.suppress(asyncio.CancelledError):
+                    await asyncio.wait({future})
+            raise
     
-    async def moderate_image(self, image_bytes: bytes) -> Dict:
+    def _prepare_image(
+        self, image_data: Union[bytes, memoryview]
+    ) -> Tuple[np.ndarray, Optional[Tuple[int, int]]]:
+        """Decode to the image model's input size and hash it (runs on the decode pool)."""
+        bundle = model_registry.get("image")
+        pixels = decode_image(image_data, bundle.config["size"])
+        hashes = compute_hashes(pixels) if settings.IMAGE_HASH_ENABLED else None
+        return pixels, hashes
+    
+    def _infer_images(self, images: List[np.ndarray]) -> List[Dict[str, float]]:
+        """Classify a batch of decoded images in one forward pass (runs on the inference pool)."""
+        import torch
+        
+        bundle = model_registry.get("image")
+        batch = normalize_batch(images, bundle.config["mean"], bundle.config["std"])
+        pixel_values = torch.from_numpy(batch).to(bundle.device)
+        with torch_runtime.inference():
+            logits = bundle.model(pixel_values=pixel_values).logits
+        probs = torch.softmax(logits, dim=-1).cpu().numpy()
+        labels = bundle.config["labels"]
+        return [dict(zip(labels, row.tolist())) for row in probs]
+    
+    def _remember_image(self, hashes: Tuple[int, int], scores: Dict[str, float]) -> None:
+        """Add confidently classified images to the near-duplicate index."""
+        top_score = max(scores.values(), default=0.0)
+        if top_score >= settings.IMAGE_HASH_BAD_MIN_SCORE:
+            verdict = VERDICT_BAD
+        elif top_score < settings.IMAGE_HASH_GOOD_MAX_SCORE:
+            verdict = VERDICT_GOOD
+        else:
+            return
+        image_hash_index.add(*hashes, verdict, scores)
+    
+    async def moderate_image(
+        self,
+        image_data: Union[bytes, memoryview],
+        tenant: Optional[str] = None,
+        priority: str = STANDARD,
+        deadline: Optional[Deadline] = None,
+        user_id: Optional[int] = None,
+    ) -> Dict:
         """
         Analyze image content for inappropriate content.
         
+        Decoding and hashing run on the decode pool. Near-duplicates of
+        known-bad or known-good images reuse the stored scores; anything
+        else is batched with concurrent uploads for a single classifier pass,
+        unless the ``deadline`` leaves no time for one (see ``moderate_texts``).
+        
         Args:
-            image_bytes: Binary image data
-            
+            image_data: Binary image data; a memoryview over an upload buffer
+                is read in place without copying
+            tenant: Whose policy overrides apply (the content owner's user id)
+            priority: Load shedding class; higher classes are batched first
+            deadline: When the caller stops waiting, if ever
+            user_id: Whose usage (images, model-seconds) this is
+        
         Returns:
             Dict containing moderation results
         """
+        usage_meter.add(user_id, images=1)
         try:
-            # In a real implementation, you would use a proper image moderation model
-            # This is a placeholder that returns random results
-            return {
-                "is_approved": True,  # For demo purposes
-                "categories": {
-                    "explicit_content": {
-                        "score": 0.1,
-                        "threshold": 0.7,
-                        "is_violation": False
-                    },
-                    "violence": {
-                        "score": 0.2,
-                        "threshold": 0.7,
-                        "is_violation": False
-                    },
-                    "suggestive_content": {
-                        "score": 0.3,
-                        "threshold": 0.7,
-                        "is_violation": False
+            pixels, hashes = await self._decode(self._prepare_image, image_data)
+            
+            if hashes is not None:
+                match = image_hash_index.lookup(*hashes)
+                if match is not None:
+                    result = self._build_result(match["scores"], "image", tenant)
+                    result["near_duplicate"] = {
+                        "distance": match["distance"],
+                        "verdict": match["verdict"],
                     }
-                },
-                "scores": {
-                    "explicit_content": 0.1,
-                    "violence": 0.2,
-                    "suggestive_content": 0.3
-                },
-                "reason": "Content approved"
-            }
+                    return result
             
+            if deadline is not None and not deadline.fits(
+                max(settings.MIN_MODEL_BUDGET_MS / 1000, self.image_batcher.batch_seconds)
+            ):
+                return self._fallback_result("image")
+            try:
+                with tracer.span("inference", kind="image"):
+                    label_scores = await self.image_batcher.submit(
+                        pixels, priority_level(priority), deadline.expires_at if deadline else None,
+                        functools.partial(usage_meter.add_model_seconds, user_id) if user_id is not None else None,
+                    )
+            except DeadlineExceeded:
+                return self._fallback_result("image")
+            
+            # Labels such as "normal" describe safe content and are not categories
+            safe_labels = {label.lower() for label in settings.IMAGE_SAFE_LABELS}
+            scores = {
+                label: score for label, score in label_scores.items()
+                if label.lower() not in safe_labels
+            }
+            if hashes is not None:
+                self._remember_image(hashes, scores)
+            return self._build_result(scores, "image", tenant)
+        
         except Exception as e:
             logger.error(f"Error in image moderation: {str(e)}")
             return {
                 "is_approved": False,
+                "action": "review",
                 "categories": {},
                 "scores": {},
                 "reason": f"Error during image moderation: {str(e)}"
             }
 
-# Singleton instance
-content_moderator = ContentModerator()
+    async def register_image(self, image_data: Union[bytes, memoryview], verdict: str) -> Dict:
+        """
+        Add an image to the near-duplicate index as known-bad or known-good.
+        
+        Registered verdicts are never replaced by learned ones, but a "good"
+        registration does not override a known-bad hash.
+        
+        Returns:
+            Dict with the image's hashes, the verdict and whether it was stored
+        """
+        bundle = model_registry.get("image")
+        pixels = await self._decode(decode_image, image_data, bundle.config["size"])
+        phash_value, dhash_value = compute_hashes(pixels)
+        scores = {"known_bad": 1.0} if verdict == VERDICT_BAD else {}
+        stored = image_hash_index.add(phash_value, dhash_value, verdict, scores, source=SOURCE_ADMIN)
+        return {
+            "phash": f"{phash_value:016x}",
+            "dhash": f"{dhash_value:016x}",
+            "verdict": verdict,
+            "stored": stored,
+        }
+
+_moderator: Optional[ContentModerator] = None
+_moderator_lock = threading.Lock()
+
+def get_content_moderator() -> ContentModerator:
+    """
+    The shared ContentModerator, created (and the text model loaded) on first call.
+    
+    Raises whatever model loading raises; callers turn that into ModelLoadError.
+    """
+    global _moderator
+    if _moderator is None:
+        with _moderator_lock:
+            if _moderator is None:
+                _moderator = ContentModerator()
+    return _moderator
+
+def loaded_content_moderator() -> Optional[ContentModerator]:
+    """The shared moderator if it has been created, without creating it."""
+    return _moderator
+
+async def get_content_moderator_async() -> ContentModerator:
+    """``get_content_moderator()`` that loads off the event loop on first use."""
+    if _moderator is not None:
+        return _moderator
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_content_moderator)
+
+def preload_models() -> None:
+    """Load every model requests can use now instead of on first request."""
+    moderator = get_content_moderator()
+    for key in language_router.route_keys():
+        moderator.load_text_pipeline(key)
+    # Text models no language is routed to are never used, so never loaded
+    for key in model_registry.keys():
+        if not key.startswith("text"):
+            model_registry.get(key)
@@ -0,0 +1,100 @@
+# backend/app/services/model_registry.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ModelBundle:
+    """A loaded model together with its tokenizer or preprocessing config."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        *,
+        tokenizer: Any = None,
+        device: str = "cpu",
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.config = config or {}
+        self.loaded_at = time.time()
+        self.load_seconds = 0.0
+
+class ModelRegistry:
+    """
+    Named model loaders shared by the moderation services.
+
+    Loaders are registered up front and run once, on first ``get()``; later
+    calls return the cached bundle. Loading is serialized per registry so
+    concurrent first requests do not load the same weights twice.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], ModelBundle]] = {}
+        self._bundles: Dict[str, ModelBundle] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: str, loader: Callable[[], ModelBundle]) -> None:
+        """Register (or replace) the loader for ``key``."""
+        self._loaders[key] = loader
+
+    def get(self, key: str) -> ModelBundle:
+        """Return the bundle for ``key``, loading it on first use."""
+        bundle = self._bundles.get(key)
+        if bundle is not None:
+            return bundle
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is None:
+                if key not in self._loaders:
+                    raise KeyError(f"No model registered under '{key}'")
+                start = time.perf_counter()
+                bundle = self._loaders[key]()
+                bundle.load_seconds = time.perf_counter() - start
+                self._bundles[key] = bundle
+                logger.info(f"Loaded model '{key}' ({bundle.name}) in {bundle.load_seconds:.1f}s")
+        return bundle
+
+    def load(self, key: str) -> ModelBundle:
+        """Run the loader for ``key`` again and return the new bundle, without caching it."""
+        if key not in self._loaders:
+            raise KeyError(f"No model registered under '{key}'")
+        start = time.perf_counter()
+        bundle = self._loaders[key]()
+        bundle.load_seconds = time.perf_counter() - start
+        return bundle
+
+    def set(self, key: str, bundle: ModelBundle) -> Optional[ModelBundle]:
+        """Make ``bundle`` the cached model for ``key``; returns the one it replaces."""
+        if key not in self._loaders:
+            raise KeyError(f"No model registered under '{key}'")
+        with self._lock:
+            previous = self._bundles.get(key)
+            self._bundles[key] = bundle
+        return previous
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._bundles
+
+    def keys(self) -> List[str]:
+        return list(self._loaders)
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded models and their load times, for health endpoints."""
+        return {
+            key: {
+                "model": bundle.name,
+                "device": bundle.device,
+                "load_seconds": round(bundle.load_seconds, 3),
+            }
+            for key, bundle in self._bundles.items()
+        }
+
+# Singleton instance
+model_registry = ModelRegistry()
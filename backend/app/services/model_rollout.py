@@ -0,0 +1,325 @@
+# backend/app/services/model_rollout.py
+import asyncio
+import gc
+import logging
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.exceptions import ModelRolloutError
+from app.services.ml_service import ContentModerator, TextModelPipeline, load_nli_model
+from app.services.model_registry import ModelBundle, model_registry
+from app.services.policy import policy_engine
+
+logger = logging.getLogger(__name__)
+
+def release_memory(device: str) -> None:
+    """Collect dropped model weights now, and hand freed GPU memory back to the driver."""
+    gc.collect()
+    if device.startswith("cuda"):
+        import torch
+        torch.cuda.empty_cache()
+
+def _warm(pipeline: TextModelPipeline) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+
+    def timed(name: str, fn, *args) -> None:
+        start = time.perf_counter()
+        fn(*args)
+        timings[name] = round(time.perf_counter() - start, 3)
+
+    pipeline.warmup(timed)
+    return timings
+
+class ShadowEvaluation:
+    """
+    Scores a sampled fraction of one text model's traffic with a candidate.
+
+    The moderator calls ``observe()`` with texts the live model has just
+    scored. Each text is sampled with probability ``sample_rate``; sampled
+    texts are scored by the candidate on its own single-thread executor
+    in a background task, so responses never wait for it. Per category
+    score deltas, decisions the candidate would change under the live
+    policy, and both models' per-text latency are recorded.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        source: str,
+        bundle: ModelBundle,
+        pipeline: TextModelPipeline,
+        executor: ThreadPoolExecutor,
+        *,
+        sample_rate: float = settings.SHADOW_SAMPLE_RATE,
+        max_pending: int = settings.SHADOW_MAX_PENDING,
+    ):
+        self.key = key
+        self.source = source
+        self.bundle = bundle
+        self.pipeline = pipeline
+        self.executor = executor
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.started_at = time.time()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.sampled = 0
+        self.compared = 0
+        self.dropped = 0
+        self.errors = 0
+        self.action_changes: Counter = Counter()
+        self._delta_sum: Dict[str, float] = {}
+        self._abs_delta_sum: Dict[str, float] = {}
+        self._max_abs_delta: Dict[str, float] = {}
+        self._live_seconds = 0.0
+        self._shadow_seconds = 0.0
+
+    def observe(
+        self,
+        texts: List[str],
+        scores: List[Dict[str, float]],
+        seconds: float,
+        content_type: str = "text",
+        tenant: Optional[str] = None,
+    ) -> None:
+        """Maybe score some of ``texts`` with the candidate; never blocks."""
+        picked = [i for i in range(len(texts)) if random.random() < self.sample_rate]
+        if not picked:
+            return
+        if len(self._tasks) >= self.max_pending:
+            self.dropped += len(picked)
+            return
+        self.sampled += len(picked)
+        self._live_seconds += seconds / len(texts) * len(picked)
+        task = asyncio.get_running_loop().create_task(self._compare(
+            [texts[i] for i in picked], [scores[i] for i in picked], content_type, tenant
+        ))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compare(
+        self,
+        texts: List[str],
+        live_scores: List[Dict[str, float]],
+        content_type: str,
+        tenant: Optional[str],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            with self.pipeline.lease():
+                start = time.perf_counter()
+                shadow_scores = await loop.run_in_executor(self.executor, self.pipeline.score_texts, texts)
+                self._shadow_seconds += time.perf_counter() - start
+        except Exception as e:
+            self.errors += len(texts)
+            logger.warning(f"Shadow model for '{self.key}' failed: {e}")
+            return
+        for live, shadow in zip(live_scores, shadow_scores):
+            for category, score in live.items():
+                if category not in shadow:
+                    continue
+                delta = shadow[category] - score
+                self._delta_sum[category] = self._delta_sum.get(category, 0.0) + delta
+                self._abs_delta_sum[category] = self._abs_delta_sum.get(category, 0.0) + abs(delta)
+                self._max_abs_delta[category] = max(self._max_abs_delta.get(category, 0.0), abs(delta))
+            live_action = policy_engine.evaluate(live, content_type=content_type, tenant=tenant)["action"]
+            shadow_action = policy_engine.evaluate(shadow, content_type=content_type, tenant=tenant)["action"]
+            if live_action != shadow_action:
+                self.action_changes[f"{live_action} -> {shadow_action}"] += 1
+        self.compared += len(texts)
+
+    async def stop(self, keep_model: bool = False) -> Optional[ModelBundle]:
+        """
+        Wait for pending comparisons, then free the candidate.
+
+        With ``keep_model`` the candidate's bundle is returned instead of
+        released, for promoting it to the live model.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.pipeline.drain()
+        self.pipeline.close()
+        self.executor.shutdown(wait=False)
+        bundle, self.bundle = self.bundle, None
+        if keep_model:
+            return bundle
+        release_memory(bundle.device)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        compared = self.compared
+        return {
+            "source": self.source,
+            "sample_rate": self.sample_rate,
+            "started_at": self.started_at,
+            "sampled": self.sampled,
+            "compared": compared,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pending": len(self._tasks),
+            "action_changes": dict(self.action_changes),
+            "action_change_rate": sum(self.action_changes.values()) / compared if compared else 0.0,
+            "categories": {
+                category: {
+                    "mean_delta": round(self._delta_sum[category] / compared, 6),
+                    "mean_abs_delta": round(self._abs_delta_sum[category] / compared, 6),
+                    "max_abs_delta": round(self._max_abs_delta[category], 6),
+                }
+                for category in self._delta_sum
+            } if compared else {},
+            "live_ms_per_text": self._live_seconds / self.sampled * 1000 if self.sampled else 0.0,
+            "shadow_ms_per_text": self._shadow_seconds / compared * 1000 if compared else 0.0,
+        }
+
+class ModelRollout:
+    """
+    Hot swaps and shadow evaluations of the text models in this process.
+
+    A swap loads the new weights off the event loop, builds and warms a
+    fresh pipeline, then switches the moderator to it in one step. Requests
+    already holding the old pipeline finish on it; once the last one
+    leaves, the old pipeline is closed and its memory released. Only one
+    swap or shadow change per model key runs at a time.
+
+    Each worker process has its own models, so with several workers every
+    one of them has to be told (e.g. via the admin endpoint on each).
+    """
+
+    def __init__(self):
+        self.operations: Dict[str, Dict[str, Any]] = {}  # Latest operation per model key
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _check(self, moderator: ContentModerator, key: str) -> None:
+        if key not in moderator.text_pipelines:
+            raise ModelRolloutError(f"No text model '{key}' is loaded", status_code=404)
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            raise ModelRolloutError(f"A {self.operations[key]['operation']} of '{key}' is already running")
+
+    def _start(self, key: str, operation: str, source: Optional[str], coroutine) -> Dict[str, Any]:
+        status = {
+            "key": key,
+            "operation": operation,
+            "source": source,
+            "state": "loading",
+            "started_at": time.time(),
+            "finished_at": None,
+            "error": None,
+        }
+        self.operations[key] = status
+        self._tasks[key] = asyncio.get_running_loop().create_task(self._run(status, coroutine))
+        return status
+
+    async def _run(self, status: Dict[str, Any], coroutine) -> None:
+        try:
+            await coroutine(status)
+            status["state"] = "done"
+        except Exception as e:
+            logger.error(f"Model {status['operation']} of '{status['key']}' failed: {e}", exc_info=True)
+            status["state"] = "failed"
+            status["error"] = str(e)
+        finally:
+            status["finished_at"] = time.time()
+
+    def start_swap(self, moderator: ContentModerator, key: str, source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start replacing text model ``key`` in the background.
+
+        ``source`` is a local path or hub model name; without it the
+        registered loader runs again (picking up new weights at
+        ``ML_MODEL_PATH``). A shadow of the same source is promoted
+        without loading it twice.
+        """
+        self._check(moderator, key)
+
+        async def swap(status: Dict[str, Any]) -> None:
+            loop = asyncio.get_running_loop()
+            bundle = None
+            shadow = moderator.shadows.get(key)
+            if shadow is not None and source is not None and shadow.source == source:
+                moderator.shadows.pop(key)
+                bundle = await shadow.stop(keep_model=True)
+                status["promoted_shadow"] = True
+            if bundle is None and source is None:
+                bundle = await loop.run_in_executor(None, model_registry.load, key)
+            elif bundle is None:
+                bundle = await loop.run_in_executor(None, load_nli_model, source)
+            pipeline = None
+            try:
+                status.update(state="warming", model=bundle.name, load_seconds=round(bundle.load_seconds, 3))
+                pipeline = TextModelPipeline(key, bundle, moderator.content_categories, moderator.inference_executor)
+                status["warmup"] = await loop.run_in_executor(moderator.inference_executor, _warm, pipeline)
+            except Exception:
+                # Nothing serves from the new model yet: free it instead of leaking its memory
+                if pipeline is not None:
+                    pipeline.close()
+                device = bundle.device
+                bundle = pipeline = None  # The last references, so the collection frees the weights
+                release_memory(device)
+                raise
+
+            status["state"] = "draining"
+            previous = moderator.replace_text_pipeline(key, pipeline)
+            model_registry.set(key, bundle)
+            if previous is not None:
+                status["drain_seconds"] = round(await previous.drain(), 3)
+                previous.close()
+                device = previous.device
+                del previous
+                release_memory(device)
+            logger.info(f"Swapped text model '{key}' to {bundle.name}")
+
+        return self._start(key, "swap", source, swap)
+
+    def start_shadow(
+        self,
+        moderator: ContentModerator,
+        key: str,
+        source: str,
+        sample_rate: float = settings.SHADOW_SAMPLE_RATE,
+    ) -> Dict[str, Any]:
+        """Start loading ``source`` as a shadow of text model ``key`` (replacing any current shadow)."""
+        self._check(moderator, key)
+
+        async def shadow(status: Dict[str, Any]) -> None:
+            loop = asyncio.get_running_loop()
+            previous = moderator.shadows.pop(key, None)
+            if previous is not None:
+                await previous.stop()
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shadow-{key}")
+            try:
+                bundle = await loop.run_in_executor(executor, load_nli_model, source)
+                status.update(state="warming", model=bundle.name, load_seconds=round(bundle.load_seconds, 3))
+                pipeline = TextModelPipeline(key, bundle, moderator.content_categories, executor)
+                status["warmup"] = await loop.run_in_executor(executor, _warm, pipeline)
+            except Exception:
+                executor.shutdown(wait=False)
+                raise
+            moderator.shadows[key] = ShadowEvaluation(
+                key, source, bundle, pipeline, executor, sample_rate=sample_rate
+            )
+            logger.info(f"Shadowing text model '{key}' with {bundle.name} on {sample_rate:.1%} of traffic")
+
+        return self._start(key, "shadow", source, shadow)
+
+    async def stop_shadow(self, moderator: ContentModerator, key: str) -> Dict[str, Any]:
+        """Stop the shadow of ``key`` and return its final stats."""
+        self._check(moderator, key)
+        shadow = moderator.shadows.pop(key, None)
+        if shadow is None:
+            raise ModelRolloutError(f"Text model '{key}' has no shadow", status_code=404)
+        await shadow.stop()
+        return shadow.stats()
+
+    def stats(self, moderator: Optional[ContentModerator]) -> Dict[str, Any]:
+        return {
+            "operations": self.operations,
+            "shadows": {key: shadow.stats() for key, shadow in moderator.shadows.items()} if moderator else {},
+        }
+
+# Singleton instance
+model_rollout = ModelRollout()
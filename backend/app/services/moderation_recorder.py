@@ -0,0 +1,224 @@
+# backend/app/services/moderation_recorder.py
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.content import Content
+from app.models.moderation_log import ModerationLog
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+class ModerationRecorder:
+    """
+    Write-behind recorder for moderation outcomes.
+
+    Request handlers call ``record()``, which only appends to an in-memory
+    buffer. A background task flushes the buffer with batched inserts once
+    ``batch_size`` events are queued or ``flush_interval`` seconds have passed,
+    and ``stop()`` drains whatever is left on shutdown.
+
+    The buffer is bounded by ``max_buffer``. When it is full the
+    ``overflow_policy`` decides what happens: ``drop_oldest`` evicts the
+    oldest event, ``drop_newest`` discards the incoming one and ``block``
+    makes the caller wait for a flush to free space (backpressure).
+
+    Only the audit log is written. A result describes whatever the client
+    sent with the request, not necessarily the stored content an event
+    names, so content rows are updated by the code that moderated their
+    stored text or image, never from here.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_buffer: int = settings.MODERATION_LOG_BUFFER_SIZE,
+        batch_size: int = settings.MODERATION_LOG_BATCH_SIZE,
+        flush_interval: float = settings.MODERATION_LOG_FLUSH_INTERVAL,
+        overflow_policy: str = settings.MODERATION_LOG_OVERFLOW_POLICY,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow_policy}'. "
+                f"Expected one of: {', '.join(OVERFLOW_POLICIES)}"
+            )
+        self.max_buffer = max(1, max_buffer)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.session_factory = session_factory
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Session, List[Dict[str, Any]]], None]] = []
+
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add_listener(self, listener: Callable[[Session, List[Dict[str, Any]]], None]) -> None:
+        """
+        Register a callback that runs inside each flush transaction.
+
+        Listeners receive the session and the log rows being inserted, so
+        derived tables are updated in the same commit as the audit log.
+        Registering the same listener again is a no-op.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Session, List[Dict[str, Any]]], None]) -> None:
+        """Unregister a callback added with ``add_listener`` (no-op if absent)."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Moderation recorder started")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info(
+            f"Moderation recorder stopped ({self.flushed} flushed, "
+            f"{self.dropped} dropped, {self.failed} failed)"
+        )
+
+    async def record(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue a moderation event without touching the database.
+
+        Args:
+            event: Dict with ``content_type`` and ``result`` (the moderation
+                result dict), plus optional ``user_id``, ``content_id``,
+                ``is_superuser`` and ``latency_ms``
+
+        Returns:
+            False if the event was dropped because the buffer is full
+        """
+        event.setdefault("created_at", datetime.utcnow())
+
+        while len(self._buffer) >= self.max_buffer:
+            if self.overflow_policy == "drop_newest":
+                self.dropped += 1
+                return False
+            if self.overflow_policy == "drop_oldest":
+                self._buffer.popleft()
+                self.dropped += 1
+                break
+            # block: the producer pays for the flush that makes room
+            await self.flush()
+
+        self._buffer.append(event)
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    async def flush(self) -> None:
+        """Write all buffered events in batches of ``batch_size``."""
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [
+                    self._buffer.popleft()
+                    for _ in range(min(self.batch_size, len(self._buffer)))
+                ]
+                try:
+                    await run_in_threadpool(self._write_batch, batch)
+                    self.flushed += len(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.error(f"Failed to flush {len(batch)} moderation events: {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for health and monitoring endpoints."""
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "overflow_policy": self.overflow_policy,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    def _write_batch(self, events: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            # Content ids come from clients, so check existence and ownership
+            # here (one query per batch) rather than on the request path.
+            content_ids = {e["content_id"] for e in events if e.get("content_id") is not None}
+            owners: Dict[int, Optional[int]] = {}
+            if content_ids:
+                owners = dict(db.execute(
+                    select(Content.id, Content.user_id).where(Content.id.in_(content_ids))
+                ).all())
+
+            log_rows = []
+            for event in events:
+                result = event["result"]
+                categories = result.get("categories", {})
+                content_id = event.get("content_id")
+                if content_id is not None and (
+                    content_id not in owners
+                    or not (event.get("is_superuser") or owners[content_id] == event.get("user_id"))
+                ):
+                    content_id = None
+                    event["content_id"] = None
+                log_rows.append({
+                    "content_id": content_id,
+                    "user_id": event.get("user_id"),
+                    "content_type": event["content_type"],
+                    "is_approved": result["is_approved"],
+                    "scores": json.dumps(result.get("scores", {})),
+                    "violations": json.dumps(
+                        [name for name, category in categories.items() if category.get("is_violation")]
+                    ),
+                    "reason": result.get("reason"),
+                    "latency_ms": event.get("latency_ms"),
+                    "created_at": event["created_at"],
+                })
+
+            db.execute(insert(ModerationLog), log_rows)
+            for listener in self._listeners:
+                listener(db, log_rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Singleton instance
+moderation_recorder = ModerationRecorder()
@@ -0,0 +1,231 @@
+# backend/app/services/moderation_stream.py
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from app import models
+from app.core.config import settings
+from app.core.deadlines import deadline_after
+from app.core.exceptions import ContentValidationError
+from app.core.responses import dumps
+from app.core.validators import validate_text_content
+from app.services.load_shedding import INTERACTIVE, load_shedder
+from app.services.ml_service import ContentModerator
+from app.services.usage import usage_meter
+from app.services.moderation_recorder import moderation_recorder
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Allows ``rate`` events per second on average and bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class StreamStats:
+    """Connection and message counters for every stream in this process."""
+
+    def __init__(self):
+        self.connections = 0
+        self.total_connections = 0
+        self.rejected_connections = 0
+        self.messages = 0
+        self.rate_limited = 0
+        self.invalid = 0
+        self.expired = 0
+        self.latency_seconds = 0.0
+
+    def open(self, max_connections: int = settings.WS_MAX_CONNECTIONS) -> bool:
+        """Count a new connection, or refuse it when the process is at its limit."""
+        if self.connections >= max_connections:
+            self.rejected_connections += 1
+            return False
+        self.connections += 1
+        self.total_connections += 1
+        return True
+
+    def close(self) -> None:
+        self.connections -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "total_connections": self.total_connections,
+            "rejected_connections": self.rejected_connections,
+            "messages": self.messages,
+            "rate_limited": self.rate_limited,
+            "invalid": self.invalid,
+            "expired": self.expired,
+            "avg_latency_ms": self.latency_seconds / self.messages * 1000 if self.messages else 0.0,
+        }
+
+# Singleton instance
+stream_stats = StreamStats()
+
+class ModerationStream:
+    """
+    Moderates the messages of one WebSocket connection.
+
+    Clients send ``{"id": ..., "text": ..., "content_type": ...}`` frames and
+    receive ``{"id": ..., "result": {...}}`` (or ``{"id": ..., "error": ...}``)
+    as each message finishes, not necessarily in order. Messages are
+    moderated concurrently, so they share batches with every other
+    connection and request.
+
+    Flow control: at most ``max_in_flight`` messages are moderated at once;
+    beyond that the connection is not read, and TCP backpressure slows the
+    client down. Messages above the per-connection rate are answered with
+    a ``rate_limited`` error instead of being moderated, messages arriving
+    while interactive traffic is being shed with ``overloaded``, and
+    messages past the user's usage quota with ``quota_exceeded``.
+
+    The connection is closed (code 1008, reason ``token_expired``) at
+    ``expires_at``, the Unix time the user's token expires, so a client has
+    to reconnect with a fresh token.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        moderator: ContentModerator,
+        user: models.User,
+        *,
+        max_in_flight: int = settings.WS_MAX_IN_FLIGHT,
+        messages_per_second: float = settings.WS_MESSAGES_PER_SECOND,
+        burst: int = settings.WS_BURST,
+        max_chars: int = settings.WS_MAX_MESSAGE_CHARS,
+        expires_at: Optional[float] = None,
+    ):
+        self.websocket = websocket
+        self.moderator = moderator
+        self.user = user
+        self.expires_at = expires_at
+        self.max_chars = max_chars
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._bucket = TokenBucket(messages_per_second, burst)
+        self._send_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects."""
+        try:
+            while True:
+                await self._slots.acquire()
+                try:
+                    frame = await self._receive()
+                except BaseException:
+                    self._slots.release()
+                    raise
+                if frame is None:
+                    stream_stats.expired += 1
+                    await self.websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="token_expired")
+                    return
+                message, error = self._parse(frame)
+                if error is None and not self._bucket.take():
+                    stream_stats.rate_limited += 1
+                    error = "rate_limited"
+                if error is None and usage_meter.exceeded(self.user.id):
+                    error = "quota_exceeded"
+                if error is None and not load_shedder.admit(INTERACTIVE):
+                    error = "overloaded"
+                if error is not None:
+                    self._slots.release()
+                    await self._send({"id": message.get("id") if message else None, "error": error})
+                    continue
+                task = asyncio.create_task(self._moderate(message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    async def _receive(self) -> Optional[str]:
+        """The next frame's text, or None once the token has expired."""
+        timeout = None if self.expires_at is None else self.expires_at - time.time()
+        try:
+            event = await asyncio.wait_for(self.websocket.receive(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(event.get("code", 1000))
+        if event.get("text") is not None:
+            return event["text"]
+        return (event.get("bytes") or b"").decode("utf-8", errors="replace")
+
+    def _parse(self, frame: str):
+        try:
+            message = json.loads(frame)
+        except ValueError:
+            stream_stats.invalid += 1
+            return None, "invalid_json"
+        if not isinstance(message, dict):
+            stream_stats.invalid += 1
+            return None, "invalid_message"
+        text = message.get("text")
+        if not isinstance(text, str) or not text.strip():
+            stream_stats.invalid += 1
+            return message, "missing_text"
+        if len(text) > self.max_chars:
+            stream_stats.invalid += 1
+            return message, "text_too_long"
+        try:
+            # The same checks as the HTTP endpoints
+            validate_text_content(text)
+        except ContentValidationError:
+            stream_stats.invalid += 1
+            return message, "invalid_text"
+        return message, None
+
+    async def _moderate(self, message: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        content_type = message.get("content_type")
+        content_type = content_type if isinstance(content_type, str) and content_type else "text"
+        timeout_ms = message.get("timeout_ms")
+        valid_timeout = isinstance(timeout_ms, (int, float)) and not isinstance(timeout_ms, bool)
+        deadline = deadline_after(timeout_ms if valid_timeout and timeout_ms >= 0 else None)
+        try:
+            result = await self.moderator.moderate_text(
+                message["text"], content_type, tenant=str(self.user.id),
+                priority=INTERACTIVE, deadline=deadline, user_id=self.user.id,
+            )
+            latency = time.perf_counter() - start
+            stream_stats.messages += 1
+            stream_stats.latency_seconds += latency
+            await self._send({"id": message.get("id"), "result": result})
+            await moderation_recorder.record({
+                "content_type": content_type,
+                "user_id": self.user.id,
+                "is_superuser": self.user.is_superuser,
+                "latency_ms": latency * 1000,
+                "result": result,
+            })
+        except Exception as e:
+            logger.error(f"Stream moderation failed: {e}", exc_info=True)
+            await self._send({"id": message.get("id"), "error": "moderation_failed"})
+        finally:
+            self._slots.release()
+
+    async def _send(self, payload: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(dumps(payload).decode("utf-8"))
+            except (WebSocketDisconnect, RuntimeError):
+                pass  # The client went away; the reader loop ends the stream
@@ -0,0 +1,221 @@
+# backend/app/services/near_duplicate.py
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.core.config import settings
+
+_SHIFT = np.uint64(32)
+_NON_WORD = re.compile(r"[\W_]+")
+_DIGIT = re.compile(r"\d")
+
+def normalize_text(text: str) -> str:
+    """Casefold, strip punctuation and collapse whitespace; digits become ``0``."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _DIGIT.sub("0", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+def shingle_hashes(text: str, size: int) -> np.ndarray:
+    """Unique 32-bit hashes of the character ``size``-grams of ``text``."""
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    if len(data) <= size:
+        windows = data[None, :]
+        size = len(data)
+    else:
+        windows = sliding_window_view(data, size)
+    # Polynomial rolling hash, wrapping at 2**32
+    powers = np.uint32(16777619) ** np.arange(size - 1, -1, -1, dtype=np.uint32)
+    return np.unique(windows.astype(np.uint32) @ powers)
+
+class _Entry:
+    __slots__ = ("signature", "scores", "language", "embedded", "created_at", "hits")
+
+    def __init__(
+        self,
+        signature: np.ndarray,
+        scores: Dict[str, float],
+        language: Optional[str],
+        embedded: Optional[Tuple[str, int]],
+        created_at: float,
+    ):
+        self.signature = signature
+        self.scores = scores
+        self.language = language
+        self.embedded = embedded
+        self.created_at = created_at
+        self.hits = 0
+
+class TextDedupIndex:
+    """
+    MinHash + LSH index of recently moderated texts.
+
+    Each text is normalized, split into character shingles and reduced to a
+    ``num_perm`` MinHash signature; the signature is cut into ``bands`` and
+    each band is a bucket key, so texts sharing any band become candidates.
+    Candidates are confirmed by the estimated Jaccard similarity (the
+    fraction of equal MinHash values) against ``threshold``.
+
+    Memory is bounded by ``max_entries`` and entries expire ``ttl_seconds``
+    after they were moderated; both evict oldest-first. A match that has
+    been hit ``campaign_size`` times is reported as part of a campaign.
+
+    Entries hold only a private copy of the model's category scores, never
+    a result dict: callers apply the policy (with the requesting tenant's
+    overrides) to the scores on every hit. Scores depend on the text alone,
+    so one index is shared by all tenants, which also lets a campaign be
+    spotted across accounts. Embeddings are not kept either; an entry only
+    names the ``(model, content id)`` its text's embedding was stored under.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = settings.TEXT_DEDUP_THRESHOLD,
+        num_perm: int = settings.TEXT_DEDUP_NUM_PERM,
+        bands: int = settings.TEXT_DEDUP_BANDS,
+        shingle_size: int = settings.TEXT_DEDUP_SHINGLE_SIZE,
+        min_chars: int = settings.TEXT_DEDUP_MIN_CHARS,
+        max_entries: int = settings.TEXT_DEDUP_MAX_ENTRIES,
+        ttl_seconds: float = settings.TEXT_DEDUP_TTL_SECONDS,
+        campaign_size: int = settings.TEXT_DEDUP_CAMPAIGN_SIZE,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.min_chars = min_chars
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.campaign_size = campaign_size
+
+        # Multiply-shift hash family: ((a * x + b) mod 2**64) >> 32, a odd
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2**64, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**64, size=(num_perm, 1), dtype=np.uint64)
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of ``text``, or None if it is too short to compare."""
+        normalized = normalize_text(text)
+        if len(normalized) < self.min_chars:
+            return None
+        hashes = shingle_hashes(normalized, self.shingle_size).astype(np.uint64)
+        return ((self._a * hashes + self._b) >> _SHIFT).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, -1)]
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - entry.created_at < self.ttl_seconds:
+                break
+            self._entries.popitem(last=False)
+            for buckets, key in zip(self._buckets, self._band_keys(entry.signature)):
+                bucket = buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del buckets[key]
+            self.evictions += 1
+
+    def lookup(self, signature: np.ndarray, embedded_only: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Scores of the most similar recent text, or None.
+
+        With ``embedded_only``, only texts whose embedding was stored match.
+
+        Returns:
+            ``{"scores", "language", "embedded", "near_duplicate"}``; the
+            scores are a fresh copy and ``near_duplicate`` describes the match
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._evict(time.monotonic())
+            candidates: Set[int] = set()
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                bucket = buckets.get(key)
+                if bucket:
+                    candidates.update(bucket)
+            best_similarity, best = 0.0, None
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if embedded_only and entry.embedded is None:
+                    continue
+                similarity = float(np.count_nonzero(entry.signature == signature)) / self.num_perm
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best_similarity, best = similarity, entry
+            if best is not None:
+                best.hits += 1
+                hits = best.hits
+        self.lookups += 1
+        self.lookup_seconds += time.perf_counter() - start
+        if best is None:
+            return None
+        self.hits += 1
+        return {
+            "scores": dict(best.scores),
+            "language": best.language,
+            "embedded": best.embedded,
+            "near_duplicate": {
+                "similarity": round(best_similarity, 3),
+                "matches": hits,
+                "campaign": bool(self.campaign_size) and hits >= self.campaign_size,
+            },
+        }
+
+    def add(
+        self,
+        signature: np.ndarray,
+        scores: Dict[str, float],
+        language: Optional[str] = None,
+        embedded: Optional[Tuple[str, int]] = None,
+    ) -> None:
+        """
+        Remember the category scores (copied as plain floats) for a text's signature.
+
+        ``embedded`` is the ``(model, content id)`` the text's embedding was
+        stored under, if it was.
+        """
+        scores = {category: float(score) for category, score in scores.items()}
+        with self._lock:
+            now = time.monotonic()
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(signature, scores, language, embedded, now)
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(key, set()).add(entry_id)
+            self._evict(now)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "evictions": self.evictions,
+            "avg_lookup_us": self.lookup_seconds / self.lookups * 1e6 if self.lookups else 0.0,
+        }
+
+# Singleton instance
+text_dedup_index = TextDedupIndex()
@@ -0,0 +1,401 @@
+# backend/app/services/policy.py
+import ast
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import PolicyError
+
+logger = logging.getLogger(__name__)
+
+# Ordered by severity: an item gets the most severe action any check asks for
+ACTIONS = ("approve", "review", "reject")
+APPROVE, REVIEW, REJECT = range(len(ACTIONS))
+
+_COMPARISONS = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+}
+_ARITHMETIC = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+_FUNCTIONS = {"max": np.maximum, "min": np.minimum}
+_KEYWORDS = re.compile(r"\b(and|or|not)\b", re.IGNORECASE)
+
+# An evaluator maps a column getter (category name -> score column) to values
+Evaluator = Callable[[Callable[[str], np.ndarray]], Any]
+
+def compile_expression(expression: str) -> Evaluator:
+    """
+    Compile a rule condition such as ``violence > 0.5 and self_harm > 0.3``.
+
+    Names are category scores; ``and``/``or``/``not`` (in any case),
+    comparisons (chained ones too), ``+ - * /`` and ``max``/``min`` are
+    supported. The evaluator works on whole score columns at once, so one
+    call decides every row of a score matrix. A row where any division is
+    not finite (a score divided by zero) does not match.
+    """
+    try:
+        tree = ast.parse(_KEYWORDS.sub(lambda match: match.group(1).lower(), expression), mode="eval")
+    except SyntaxError as e:
+        raise PolicyError(f"Invalid rule expression {expression!r}: {e.msg}")
+    quotients: List[Evaluator] = []
+    condition = _compile(tree.body, expression, quotients)
+
+    def evaluate(column):
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            matched = np.asarray(condition(column), dtype=bool)
+            for quotient in quotients:
+                matched = np.logical_and(matched, np.isfinite(quotient(column)))
+        return matched
+    return evaluate
+
+def _compile(node: ast.AST, expression: str, quotients: List[Evaluator]) -> Evaluator:
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda column: column(name)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        value = float(node.value)
+        return lambda column: value
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile(value, expression, quotients) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda column: functools.reduce(combine, [operand(column) for operand in operands])
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile(node.operand, expression, quotients)
+        negate = np.logical_not if isinstance(node.op, ast.Not) else np.negative
+        return lambda column: negate(operand(column))
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        operands = [_compile(value, expression, quotients) for value in [node.left] + node.comparators]
+        ops = [_COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(column):
+            values = [operand(column) for operand in operands]
+            return functools.reduce(
+                np.logical_and, [op(left, right) for op, left, right in zip(ops, values, values[1:])]
+            )
+        return compare
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        left = _compile(node.left, expression, quotients)
+        right = _compile(node.right, expression, quotients)
+        op = _ARITHMETIC[type(node.op)]
+
+        def arithmetic(column):
+            return op(left(column), right(column))
+        if isinstance(node.op, ast.Div):
+            quotients.append(arithmetic)
+        return arithmetic
+    if (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS and len(node.args) >= 2 and not node.keywords
+    ):
+        args = [_compile(arg, expression, quotients) for arg in node.args]
+        op = _FUNCTIONS[node.func.id]
+        return lambda column: functools.reduce(op, [arg(column) for arg in args])
+    raise PolicyError(f"Unsupported syntax in rule expression {expression!r}: {ast.unparse(node)}")
+
+def score_matrix(items: Sequence[Dict[str, float]]) -> Tuple[List[str], np.ndarray]:
+    """Stack per-item score dicts into ``(categories, matrix)``; absent scores are 0."""
+    categories = sorted({category for scores in items for category in scores})
+    index = {category: i for i, category in enumerate(categories)}
+    matrix = np.zeros((len(items), len(categories)), dtype=np.float32)
+    for row, scores in enumerate(items):
+        for category, score in scores.items():
+            matrix[row, index[category]] = score
+    return categories, matrix
+
+class PolicyRule:
+    """A named condition over category scores and the action it triggers."""
+
+    def __init__(self, name: str, when: str, action: str):
+        if action not in (ACTIONS[REVIEW], ACTIONS[REJECT]):
+            raise PolicyError(f"Rule {name!r}: action must be 'review' or 'reject'")
+        self.name = name
+        self.when = when
+        self.action = action
+        self.severity = ACTIONS.index(action)
+        self.evaluate = compile_expression(when)
+
+class CompiledPolicy:
+    """
+    Thresholds and rules for one scope, evaluated over score matrices.
+
+    A score above its category's threshold rejects the item; rules add
+    ``review`` or ``reject``. Per category list, the column order and the
+    threshold vector are resolved once and cached.
+    """
+
+    def __init__(self, default_threshold: float, thresholds: Dict[str, float], rules: List[PolicyRule]):
+        self.default_threshold = default_threshold
+        self.thresholds = thresholds
+        self.rules = rules
+        self._layouts: Dict[Tuple[str, ...], Tuple[Dict[str, int], np.ndarray]] = {}
+
+    def _layout(self, categories: Sequence[str]) -> Tuple[Dict[str, int], np.ndarray]:
+        key = tuple(categories)
+        layout = self._layouts.get(key)
+        if layout is None:
+            thresholds = np.array(
+                [self.thresholds.get(category, self.default_threshold) for category in key],
+                dtype=np.float32,
+            )
+            index = {category: i for i, category in enumerate(key)}
+            layout = self._layouts.setdefault(key, (index, thresholds))
+        return layout
+
+    def thresholds_for(self, categories: Sequence[str]) -> np.ndarray:
+        return self._layout(categories)[1]
+
+    def evaluate_matrix(
+        self, categories: Sequence[str], scores: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decide every row of a ``(n, len(categories))`` score matrix.
+
+        Categories a rule names but ``categories`` lacks score 0.
+
+        Returns:
+            ``(actions, violations, rule_hits)``: an int8 index into
+            ``ACTIONS`` per row, the ``(n, categories)`` threshold
+            violations and the ``(n, rules)`` rule matches
+        """
+        scores = np.asarray(scores, dtype=np.float32)
+        n = len(scores)
+        index, thresholds = self._layout(categories)
+        zeros = np.zeros(n, dtype=np.float32)
+
+        def column(name: str) -> np.ndarray:
+            i = index.get(name)
+            return scores[:, i] if i is not None else zeros
+
+        violations = scores > thresholds
+        actions = np.where(violations.any(axis=1), REJECT, APPROVE).astype(np.int8)
+        rule_hits = np.zeros((n, len(self.rules)), dtype=bool)
+        for j, rule in enumerate(self.rules):
+            rule_hits[:, j] = np.broadcast_to(np.asarray(rule.evaluate(column), dtype=bool), (n,))
+            np.maximum(actions, np.where(rule_hits[:, j], rule.severity, APPROVE), out=actions, casting="unsafe")
+        return actions, violations, rule_hits
+
+def _merge_scope(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlay a scope's settings; rules with the same name replace the base rule."""
+    rules = {rule["name"]: rule for rule in base.get("rules", [])}
+    rules.update({rule["name"]: rule for rule in override.get("rules", [])})
+    return {
+        "default_threshold": override.get("default_threshold", base.get("default_threshold")),
+        "thresholds": {**base.get("thresholds", {}), **override.get("thresholds", {})},
+        "rules": list(rules.values()),
+    }
+
+def _compile_scope(scope: Dict[str, Any]) -> CompiledPolicy:
+    rules = [PolicyRule(rule["name"], rule["when"], rule.get("action", "review")) for rule in scope["rules"]]
+    thresholds = {category: float(value) for category, value in scope["thresholds"].items()}
+    return CompiledPolicy(float(scope["default_threshold"]), thresholds, rules)
+
+def _resolve(
+    content_types: Dict[str, Any], tenants: Dict[str, Any], content_type: Optional[str], tenant: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    return (
+        content_type if content_type in content_types else None,
+        str(tenant) if tenant is not None and str(tenant) in tenants else None,
+    )
+
+class PolicyEngine:
+    """
+    Moderation policy: per-category thresholds and rules, with overrides.
+
+    The policy is a JSON document::
+
+        {
+          "version": "2024-06-01",
+          "default_threshold": 0.7,
+          "thresholds": {"self_harm": 0.5},
+          "rules": [{"name": "violent_self_harm", "when": "violence > 0.5 and self_harm > 0.3",
+                     "action": "review"}],
+          "content_types": {"image": {"thresholds": {"nsfw": 0.8}}},
+          "tenants": {"42": {"default_threshold": 0.6}}
+        }
+
+    Content type overrides apply over the base policy and tenant overrides
+    over those. Tenants are keyed by the content owner's user id. Every
+    scope is compiled and validated when the document loads; the file at
+    ``path`` is re-read when it changes (checked at most every
+    ``reload_interval`` seconds), and a broken file keeps the last good policy.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.MODERATION_POLICY_PATH,
+        reload_interval: float = settings.MODERATION_POLICY_RELOAD_INTERVAL,
+    ):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+        self.load_document(self.default_document())
+        self.maybe_reload(force=True)
+
+    @staticmethod
+    def default_document() -> Dict[str, Any]:
+        return {"version": "default", "default_threshold": settings.MODERATION_DEFAULT_THRESHOLD}
+
+    def load_document(self, document: Dict[str, Any]) -> None:
+        """Compile and validate every scope of ``document``, then swap it in."""
+        if not isinstance(document, dict):
+            raise PolicyError("Policy must be a JSON object")
+        try:
+            base = _merge_scope(
+                {"default_threshold": settings.MODERATION_DEFAULT_THRESHOLD}, document
+            )
+            content_types = document.get("content_types", {})
+            tenants = document.get("tenants", {})
+            compiled = {(None, None): _compile_scope(base)}
+            for content_type, override in content_types.items():
+                compiled[(content_type, None)] = _compile_scope(_merge_scope(base, override))
+            for tenant, override in tenants.items():
+                compiled[(None, str(tenant))] = _compile_scope(_merge_scope(base, override))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise PolicyError(f"Malformed policy: {e!r}")
+        tenants = {str(tenant): override for tenant, override in tenants.items()}
+        self.document = document
+        self.version = str(document.get("version", "unversioned"))
+        # Swapped as one tuple so readers never mix two policies
+        self._state = (base, content_types, tenants, compiled)
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Re-read the policy file if it changed; returns whether a new policy loaded."""
+        now = time.monotonic()
+        if not self.path or (not force and now - self._checked_at < self.reload_interval):
+            return False
+        # Another thread already checking makes this check redundant
+        if not self._lock.acquire(blocking=force):
+            return False
+        try:
+            self._checked_at = now
+            return self._reload_if_changed(force)
+        finally:
+            self._lock.release()
+
+    def _reload_if_changed(self, force: bool) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime and not force:
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.load_document(json.load(f))
+        except (OSError, ValueError, PolicyError) as e:
+            self.reload_errors += 1
+            self.last_error = str(e.detail if isinstance(e, PolicyError) else e)
+            logger.error(f"Keeping policy {self.version}; failed to load {self.path}: {self.last_error}")
+            self._mtime = mtime  # Retried once the file changes again
+            return False
+        self._mtime = mtime
+        self.reloads += 1
+        self.last_error = None
+        logger.info(f"Loaded moderation policy {self.version} from {self.path}")
+        return True
+
+    def resolve_scope(
+        self, content_type: Optional[str] = None, tenant: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """``(content_type, tenant)`` with values that have no overrides replaced by None."""
+        _, content_types, tenants, _ = self._state
+        return _resolve(content_types, tenants, content_type, tenant)
+
+    def policy_for(self, content_type: Optional[str] = None, tenant: Optional[str] = None) -> CompiledPolicy:
+        """The compiled policy for a content type and tenant (combinations compile on first use)."""
+        self.maybe_reload()
+        # One snapshot throughout, so a concurrent reload cannot mix two policies
+        base, content_types, tenants, compiled = self._state
+        content_type, tenant = _resolve(content_types, tenants, content_type, tenant)
+        policy = compiled.get((content_type, tenant))
+        if policy is None:
+            scope = _merge_scope(base, content_types[content_type])
+            # Concurrent first uses may both compile; setdefault keeps one for everyone
+            policy = compiled.setdefault(
+                (content_type, tenant), _compile_scope(_merge_scope(scope, tenants[tenant]))
+            )
+        return policy
+
+    def evaluate_many(
+        self,
+        categories: Sequence[str],
+        scores: np.ndarray,
+        *,
+        content_type: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> np.ndarray:
+        """Action index (into ``ACTIONS``) for each row of a score matrix."""
+        return self.policy_for(content_type, tenant).evaluate_matrix(categories, scores)[0]
+
+    def evaluate(
+        self,
+        scores: Dict[str, float],
+        *,
+        content_type: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Turn per-category scores into the moderation response shape."""
+        policy = self.policy_for(content_type, tenant)
+        categories = list(scores)
+        actions, violations, rule_hits = policy.evaluate_matrix(
+            categories,
+            np.fromiter(scores.values(), dtype=np.float32, count=len(categories)).reshape(1, -1),
+        )
+        thresholds = policy.thresholds_for(categories)
+        action = ACTIONS[actions[0]]
+        matched = [rule.name for rule, hit in zip(policy.rules, rule_hits[0]) if hit]
+        if action == ACTIONS[APPROVE]:
+            reason = "Content approved"
+        elif action == ACTIONS[REVIEW]:
+            reason = f"Flagged for review: {', '.join(matched)}"
+        else:
+            reason = "Violation found in content"
+        return {
+            "is_approved": action == ACTIONS[APPROVE],
+            "action": action,
+            "categories": {
+                category: {
+                    "score": score,
+                    "threshold": float(thresholds[i]),
+                    "is_violation": bool(violations[0, i]),
+                }
+                for i, (category, score) in enumerate(scores.items())
+            },
+            "scores": scores,
+            "reason": reason,
+            "policy": {"version": self.version, "rules": matched},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+            "content_types": sorted(self._state[1]),
+            "tenants": len(self._state[2]),
+        }
+
+# Singleton instance
+policy_engine = PolicyEngine()
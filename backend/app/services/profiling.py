@@ -0,0 +1,86 @@
+# backend/app/services/profiling.py
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.exceptions import ProfilerBusy
+
+class SamplingProfiler:
+    """
+    On-demand wall-clock sampling profiler for this worker process.
+
+    A background thread reads every other thread's stack with
+    ``sys._current_frames()`` each interval and counts the distinct
+    stacks. The result is in the folded format ("frame;frame;frame count"
+    per line) that flamegraph.pl, speedscope and inferno read directly.
+    Nothing is instrumented, so the profiled code runs at full speed
+    apart from the sampler's share of the GIL. One profile runs at a time.
+    """
+
+    def __init__(self, max_seconds: float = settings.PROFILER_MAX_SECONDS):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self.profiles = 0
+        self.last: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+        return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+    def _sample(self, seconds: float, interval: float) -> Dict[str, Any]:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.perf_counter()
+        end = started + seconds
+        while True:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(self._frame_name(frame))
+                    frame = frame.f_back
+                frames.append(names.get(ident) or f"thread-{ident}")
+                stacks[";".join(reversed(frames))] += 1
+            samples += 1
+            now = time.perf_counter()
+            if now >= end:
+                break
+            time.sleep(min(interval, end - now))
+        return {"stacks": stacks, "samples": samples, "duration": time.perf_counter() - started}
+
+    def profile(self, seconds: float, interval_ms: float = settings.PROFILER_INTERVAL_MS) -> Dict[str, Any]:
+        """Sample all threads for ``seconds`` (blocking the calling thread)."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            result = self._sample(min(seconds, self.max_seconds), max(interval_ms, 1.0) / 1000)
+        finally:
+            self._lock.release()
+        self.profiles += 1
+        self.last = {"samples": result["samples"], "stacks": len(result["stacks"]), "duration": result["duration"]}
+        return result
+
+    async def profile_async(self, seconds: float, interval_ms: float = settings.PROFILER_INTERVAL_MS) -> Dict[str, Any]:
+        """``profile()`` on a worker thread, so the event loop it samples keeps serving."""
+        return await asyncio.to_thread(self.profile, seconds, interval_ms)
+
+    @staticmethod
+    def folded(stacks: Counter) -> str:
+        """Stacks in the folded ("collapsed") format, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self._lock.locked(), "profiles": self.profiles, "last": self.last}
+
+# Singleton instance
+profiler = SamplingProfiler()
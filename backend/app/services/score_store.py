@@ -0,0 +1,281 @@
+# backend/app/services/score_store.py
+import json
+import logging
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.content import REVIEW_CLAIMED, REVIEW_PENDING, Content
+from app.models.score_layout import ScoreLayout
+from app.services.policy import ACTIONS, APPROVE, REJECT, REVIEW, PolicyEngine, policy_engine
+
+logger = logging.getLogger(__name__)
+
+SCORE_DTYPE = np.dtype("<f4")
+_ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+_ID_BATCH_SIZE = 500
+
+def layout_id(categories: Sequence[str]) -> int:
+    """Stable id of a category order (31-bit CRC, so it fits a signed INTEGER)."""
+    return zlib.crc32("\x1f".join(categories).encode("utf-8")) & 0x7FFFFFFF
+
+class ScoreLayouts:
+    """
+    Category orders of stored score arrays, cached per process.
+
+    Content rows keep only a layout id next to their float32 array; a new
+    order is written to ``score_layouts`` the first time it is seen.
+    """
+
+    def __init__(self):
+        self._categories: Dict[int, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, db: Session, categories: Sequence[str]) -> int:
+        key = layout_id(categories)
+        known = self._categories.get(key)
+        if known is None:
+            self._store(db, key, tuple(categories))
+        elif known != tuple(categories):
+            raise ValueError(f"Score layout id collision for {list(categories)} and {list(known)}")
+        return key
+
+    def _store(self, db: Session, key: int, categories: Tuple[str, ...]) -> None:
+        stored = self._load(db, key)
+        if stored is None:
+            # A nested transaction keeps a lost insert race from rolling back the caller's work
+            try:
+                with db.begin_nested():
+                    db.execute(insert(ScoreLayout), [{"id": key, "categories": json.dumps(categories)}])
+            except IntegrityError:
+                stored = self._load(db, key)
+        if stored is not None and stored != categories:
+            raise ValueError(f"Score layout id collision for {list(categories)} and {list(stored)}")
+        with self._lock:
+            self._categories[key] = categories
+
+    def _load(self, db: Session, key: int) -> Optional[Tuple[str, ...]]:
+        value = db.execute(select(ScoreLayout.categories).where(ScoreLayout.id == key)).scalar()
+        return tuple(json.loads(value)) if value is not None else None
+
+    def categories(self, db: Session, key: int) -> Tuple[str, ...]:
+        known = self._categories.get(key)
+        if known is None:
+            known = self._load(db, key)
+            if known is None:
+                raise KeyError(f"Unknown score layout {key}")
+            with self._lock:
+                self._categories[key] = known
+        return known
+
+# Singleton instance
+score_layouts = ScoreLayouts()
+
+def review_columns(action: Optional[str], scores: Dict[str, float]) -> Dict[str, Any]:
+    """Review queue state for a decision: queued by top score when it needs a human."""
+    if action != ACTIONS[REVIEW]:
+        return {"review_status": None, "review_priority": None}
+    return {"review_status": REVIEW_PENDING, "review_priority": max(scores.values(), default=0.0)}
+
+def moderation_columns(db: Session, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Content columns a moderation result sets, including the packed raw scores.
+
+    Results without scores (errors) store no score array. A ``review``
+    action queues the content for human review.
+    """
+    scores = result.get("scores") or {}
+    columns = {
+        "is_approved": result["is_approved"],
+        "moderation_result": json.dumps(result),
+        "moderation_action": result.get("action"),
+        "policy_version": (result.get("policy") or {}).get("version"),
+        "score_layout": None,
+        "scores": None,
+        **review_columns(result.get("action"), scores),
+    }
+    if scores:
+        columns["score_layout"] = score_layouts.register(db, list(scores))
+        columns["scores"] = np.fromiter(scores.values(), dtype=SCORE_DTYPE, count=len(scores)).tobytes()
+    return columns
+
+def rethreshold(
+    db: Session,
+    *,
+    engine: PolicyEngine = policy_engine,
+    chunk_size: int = settings.RETHRESHOLD_CHUNK_SIZE,
+    content_type: Optional[str] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Re-decide stored content from its raw scores under ``engine``'s policy.
+
+    Rows are read in id order, ``chunk_size`` at a time, and grouped by
+    score layout and policy scope; each group's arrays are stacked into one
+    matrix and evaluated in a single vectorized call. Only rows whose
+    action changes are written back (one executemany UPDATE per chunk),
+    with their stored moderation result patched to match. Rows a human
+    has reviewed, or is reviewing, keep their decision, including rows
+    claimed or decided while the run is in progress: the UPDATE repeats
+    that condition for every row.
+
+    Returns:
+        Counts of rows scanned, changed, and of each ``old -> new`` transition
+    """
+    tenants = engine.document.get("tenants", {})
+    scanned = 0
+    changed = 0
+    transitions: Counter = Counter()
+    last_id = 0
+    while True:
+        stmt = (
+            select(
+                Content.id, Content.content_type, Content.user_id,
+                Content.score_layout, Content.scores, Content.moderation_action,
+            )
+            .where(
+                Content.id > last_id,
+                Content.scores.is_not(None),
+                Content.reviewed_at.is_(None),
+                or_(Content.review_status.is_(None), Content.review_status != REVIEW_CLAIMED),
+            )
+            .order_by(Content.id)
+            .limit(chunk_size)
+        )
+        if content_type is not None:
+            stmt = stmt.where(Content.content_type == content_type)
+        rows = db.execute(stmt).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        groups: Dict[Tuple[int, Optional[str], Optional[str]], List[Any]] = {}
+        for row in rows:
+            # Rows only need separate groups when a tenant has overrides
+            tenant = str(row.user_id) if tenants and str(row.user_id) in tenants else None
+            scope = engine.resolve_scope(row.content_type, tenant)
+            groups.setdefault((row.score_layout, *scope), []).append(row)
+
+        updates: Dict[int, Dict[str, Any]] = {}
+        for (layout, group_content_type, tenant), group in groups.items():
+            categories = score_layouts.categories(db, layout)
+            matrix = np.frombuffer(b"".join(row.scores for row in group), dtype=SCORE_DTYPE)
+            matrix = matrix.reshape(len(group), len(categories))
+            actions = engine.evaluate_many(
+                categories, matrix, content_type=group_content_type, tenant=tenant
+            )
+            previous = np.fromiter(
+                (_ACTION_CODES.get(row.moderation_action, -1) for row in group),
+                dtype=np.int8, count=len(group),
+            )
+            for i in np.flatnonzero(actions != previous):
+                row, new_action = group[i], ACTIONS[actions[i]]
+                transitions[f"{row.moderation_action} -> {new_action}"] += 1
+                updates[row.id] = {
+                    "content_type": group_content_type,
+                    "tenant": tenant,
+                    "scores": dict(zip(categories, matrix[i].tolist())),
+                    "is_approved": new_action == ACTIONS[APPROVE],
+                    "moderation_action": new_action,
+                }
+        changed += len(updates)
+        if updates and not dry_run:
+            _write_decisions(db, engine, updates)
+        logger.info(f"Re-thresholded {scanned} content rows, {changed} changed")
+
+    return {
+        "scanned": scanned,
+        "changed": changed,
+        "transitions": dict(transitions),
+        "policy_version": engine.version,
+        "dry_run": dry_run,
+    }
+
+def _write_decisions(db: Session, engine: PolicyEngine, updates: Dict[int, Dict[str, Any]]) -> None:
+    ids = list(updates)
+    stored: Dict[int, Optional[str]] = {}
+    # Bounded IN lists keep under the database's bind parameter limit
+    for start in range(0, len(ids), _ID_BATCH_SIZE):
+        stored.update(db.execute(
+            select(Content.id, Content.moderation_result)
+            .where(Content.id.in_(ids[start:start + _ID_BATCH_SIZE]))
+        ).all())
+    rows = []
+    for content_id, decision in updates.items():
+        result = json.loads(stored.get(content_id) or "{}")
+        result.update(engine.evaluate(
+            decision["scores"], content_type=decision["content_type"], tenant=decision["tenant"]
+        ))
+        rows.append({
+            "content_id": content_id,
+            "is_approved": decision["is_approved"],
+            "moderation_action": decision["moderation_action"],
+            "policy_version": engine.version,
+            "moderation_result": json.dumps(result),
+            **review_columns(decision["moderation_action"], decision["scores"]),
+        })
+    # A Core executemany: SET columns come from each row's keys, the guard is checked per row
+    db.connection().execute(
+        update(Content)
+        .where(
+            Content.id == bindparam("content_id"),
+            Content.reviewed_at.is_(None),
+            Content.review_status.is_distinct_from(REVIEW_CLAIMED),
+        ),
+        rows,
+    )
+    db.commit()
+
+def backfill_scores(db: Session, *, chunk_size: int = settings.SCORE_BACKFILL_CHUNK_SIZE) -> int:
+    """
+    Pack the scores of rows moderated before raw scores were stored.
+
+    Reads the JSON moderation results of rows without a score array, in id
+    order, and writes the packed arrays and actions back per chunk.
+
+    Returns:
+        Number of rows backfilled
+    """
+    backfilled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Content.id, Content.moderation_result)
+            .where(
+                Content.id > last_id,
+                Content.scores.is_(None),
+                Content.moderation_result.is_not(None),
+            )
+            .order_by(Content.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            result = json.loads(row.moderation_result)
+            if not result.get("scores"):
+                continue
+            columns = moderation_columns(db, result)
+            updates.append({
+                "id": row.id,
+                "score_layout": columns["score_layout"],
+                "scores": columns["scores"],
+                "moderation_action": result.get("action")
+                or ACTIONS[APPROVE if result["is_approved"] else REJECT],
+            })
+        if updates:
+            db.execute(update(Content), updates)
+        db.commit()
+        backfilled += len(updates)
+        logger.info(f"Backfilled scores for {backfilled} content rows")
+    return backfilled
@@ -1,35 +1,411 @@
+# backend/app/services/storage.py
+import asyncio
+import hashlib
+import inspect
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Optional, Tuple, Union
+
+import aiofiles
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import crud
 from app.core.config import settings
-# import os
+from app.core.exceptions import FileUploadError, StorageError
 
-class StorageService:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
+logger = logging.getLogger(__name__)
+
+Source = Union[bytes, bytearray, memoryview, Any]
+
+BLOB_PREFIX = "blobs"
+
+def blob_key(sha256: str) -> str:
+    """Storage key of a content-addressed blob."""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}"
+
+def blob_hash(key: Optional[str]) -> Optional[str]:
+    """The SHA-256 behind a blob key, or None for any other key."""
+    parts = (key or "").split("/")
+    if len(parts) == 3 and parts[0] == BLOB_PREFIX and len(parts[2]) == 64:
+        return parts[2]
+    return None
+
+async def iter_parts(source: Source, part_size: int) -> AsyncIterator[bytes]:
+    """
+    Yield ``source`` in parts of ``part_size`` bytes (the last may be shorter).
+
+    ``source`` is bytes-like, or a file object whose ``read(n)`` is sync or
+    async (e.g. an ``UploadFile``); file objects are streamed, never read whole.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast("B")
+        for start in range(0, len(view), part_size):
+            yield bytes(view[start:start + part_size])
+        return
+
+    part = bytearray()
+    while True:
+        chunk = source.read(part_size - len(part))
+        if inspect.isawaitable(chunk):
+            chunk = await chunk
+        if not chunk:
+            break
+        part += chunk
+        if len(part) >= part_size:
+            yield bytes(part)
+            part.clear()
+    if part:
+        yield bytes(part)
+
+def validate_key(key: str) -> str:
+    """Reject keys that are empty, absolute or escape the storage root."""
+    normalized = os.path.normpath(key).replace(os.sep, "/")
+    if not key or key.startswith("/") or normalized.startswith(".."):
+        raise FileUploadError(f"Invalid storage key: {key!r}")
+    return normalized
+
+class StorageBackend(ABC):
+    """Object storage that streams writes and never blocks the event loop."""
+
+    @abstractmethod
+    async def save(self, key: str, source: Source, content_type: Optional[str] = None) -> int:
+        """Store ``source`` under ``key``; returns the number of bytes written."""
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes:
+        """Return the object stored under ``key``."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Delete ``key``; returns False if it did not exist (where detectable)."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL for ``key``."""
+
+    async def close(self) -> None:
+        pass
+
+class S3Backend(StorageBackend):
+    """
+    S3 storage through boto3, run on a dedicated thread pool.
+
+    The pool and the client's connection pool are both sized to
+    ``max_pool_connections``, so every worker thread has a warm connection.
+    Objects up to ``part_size`` go up in one ``put_object``; larger ones
+    use a multipart upload with up to ``concurrency`` parts in flight, read
+    from the source as earlier parts finish, so memory stays bounded at
+    roughly ``(concurrency + 1) * part_size`` per upload.
+    """
+
+    def __init__(
+        self,
+        bucket: str = settings.S3_BUCKET_NAME,
+        *,
+        region: str = settings.AWS_REGION,
+        endpoint_url: Optional[str] = settings.S3_ENDPOINT_URL,
+        max_pool_connections: int = settings.S3_MAX_POOL_CONNECTIONS,
+        part_size: int = settings.S3_MULTIPART_PART_SIZE,
+        concurrency: int = settings.S3_MULTIPART_CONCURRENCY,
+        client: Any = None,
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.endpoint_url = endpoint_url
+        self.max_pool_connections = max_pool_connections
+        self.part_size = part_size
+        self.concurrency = max(1, concurrency)
+        self._client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_pool_connections, thread_name_prefix="s3"
         )
-        self.bucket_name = settings.S3_BUCKET_NAME
 
-    async def upload_file(self, file, file_name: str) -> str:
-        try:
-            self.s3_client.upload_fileobj(
-                file,
-                self.bucket_name,
-                file_name
+    @property
+    def client(self) -> Any:
+        # Created on first use so importing the service never touches AWS config
+        if self._client is None:
+            self._client = boto3.client(
+                "s3",
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                region_name=self.region,
+                endpoint_url=self.endpoint_url,
+                config=Config(
+                    max_pool_connections=self.max_pool_connections,
+                    retries={"max_attempts": 5, "mode": "adaptive"},
+                ),
             )
-            return f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{file_name}"
-        except ClientError as e:
-            raise Exception(f"Error uploading file to S3: {str(e)}")
+        return self._client
+
+    async def _call(self, method: str, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: getattr(self.client, method)(**kwargs)
+        )
+
+    async def save(self, key: str, source: Source, content_type: Optional[str] = None) -> int:
+        key = validate_key(key)
+        extra = {"ContentType": content_type} if content_type else {}
+        parts = iter_parts(source, self.part_size)
+        try:
+            first = await parts.__anext__()
+        except StopAsyncIteration:
+            first = b""
+        try:
+            try:
+                second = await parts.__anext__()
+            except StopAsyncIteration:
+                await self._call("put_object", Bucket=self.bucket, Key=key, Body=first, **extra)
+                return len(first)
+            return await self._save_multipart(key, first, second, parts, extra)
+        except (BotoCoreError, ClientError) as e:
+            raise StorageError(f"Error uploading file to S3: {str(e)}")
+
+    async def _save_multipart(
+        self, key: str, first: bytes, second: bytes, rest: AsyncIterator[bytes], extra: dict
+    ) -> int:
+        upload = await self._call("create_multipart_upload", Bucket=self.bucket, Key=key, **extra)
+        upload_id = upload["UploadId"]
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+        size = 0
+
+        async def upload_part(number: int, body: bytes) -> dict:
+            try:
+                response = await self._call(
+                    "upload_part", Bucket=self.bucket, Key=key,
+                    UploadId=upload_id, PartNumber=number, Body=body,
+                )
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                slots.release()
+
+        async def all_parts() -> AsyncIterator[bytes]:
+            yield first
+            yield second
+            async for part in rest:
+                yield part
 
-    async def delete_file(self, file_name: str) -> bool:
         try:
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=file_name
+            number = 0
+            async for body in all_parts():
+                # Wait for a free slot before reading further from the source
+                await slots.acquire()
+                number += 1
+                size += len(body)
+                tasks.append(asyncio.ensure_future(upload_part(number, body)))
+                if any(task.done() and task.exception() for task in tasks):
+                    break
+            completed = await asyncio.gather(*tasks)
+            await self._call(
+                "complete_multipart_upload", Bucket=self.bucket, Key=key,
+                UploadId=upload_id, MultipartUpload={"Parts": completed},
             )
+            return size
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self._call(
+                    "abort_multipart_upload", Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload {upload_id} for {key}: {e}")
+            raise
+
+    async def read(self, key: str) -> bytes:
+        key = validate_key(key)
+        try:
+            response = await self._call("get_object", Bucket=self.bucket, Key=key)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, response["Body"].read)
+        except (BotoCoreError, ClientError) as e:
+            raise StorageError(f"Error reading file from S3: {str(e)}")
+
+    async def delete(self, key: str) -> bool:
+        key = validate_key(key)
+        try:
+            await self._call("delete_object", Bucket=self.bucket, Key=key)
             return True
-        except ClientError as e:
-            raise Exception(f"Error deleting file from S3: {str(e)}")
\ No newline at end of file
+        except (BotoCoreError, ClientError) as e:
+            raise StorageError(f"Error deleting file from S3: {str(e)}")
+
+    def url(self, key: str) -> str:
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+class LocalBackend(StorageBackend):
+    """
+    Filesystem storage under ``root`` for tests and offline deployments.
+
+    Writes stream through ``aiofiles`` into a temporary file that is renamed
+    into place, so readers never see a partial object.
+    """
+
+    def __init__(
+        self,
+        root: str = settings.STORAGE_LOCAL_ROOT,
+        *,
+        base_url: str = settings.STORAGE_LOCAL_BASE_URL,
+        chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+    ):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url
+        self.chunk_size = chunk_size
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, validate_key(key))
+
+    async def save(self, key: str, source: Source, content_type: Optional[str] = None) -> int:
+        path = self.path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        size = 0
+        try:
+            await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in iter_parts(source, self.chunk_size):
+                    await f.write(chunk)
+                    size += len(chunk)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+            return size
+        except OSError as e:
+            await asyncio.to_thread(self._remove, tmp_path)
+            raise StorageError(f"Error writing file to local storage: {str(e)}")
+
+    async def read(self, key: str) -> bytes:
+        try:
+            async with aiofiles.open(self.path(key), "rb") as f:
+                return await f.read()
+        except OSError as e:
+            raise StorageError(f"Error reading file from local storage: {str(e)}")
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self._remove, self.path(key))
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url.rstrip('/')}/{validate_key(key)}"
+
+def create_backend(name: str = settings.STORAGE_BACKEND) -> StorageBackend:
+    if name == "s3":
+        return S3Backend()
+    if name == "local":
+        return LocalBackend()
+    raise ValueError(f"Unknown storage backend: {name!r}")
+
+class StorageService:
+    """
+    Stores uploaded files on the configured backend (``STORAGE_BACKEND``).
+
+    Media is content-addressed: ``store_blob`` keys it by SHA-256 and keeps a
+    reference count in the ``blobs`` table, so identical uploads are stored
+    once, and ``delete_file`` only removes a blob with its last reference.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or create_backend()
+
+    async def upload_file(
+        self, file: Source, file_name: str, content_type: Optional[str] = None
+    ) -> str:
+        """Stream ``file`` to storage under ``file_name`` and return its URL."""
+        await self.backend.save(file_name, file, content_type=content_type)
+        return self.backend.url(file_name)
+
+    async def store_blob(
+        self,
+        db: Session,
+        data: Union[bytes, bytearray, memoryview],
+        *,
+        sha256: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Take a reference to the blob holding ``data``, uploading it only if new.
+
+        Args:
+            db: Database session for the reference count
+            data: File contents
+            sha256: Hex digest of ``data`` if already computed while reading it
+            content_type: MIME type stored with a new blob
+
+        Returns:
+            ``(blob, uploaded)``; ``uploaded`` is False for a duplicate
+        """
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        while True:
+            blob = await run_in_threadpool(crud.blob.add_reference, db, sha256=sha256)
+            if blob is not None:
+                return blob, False
+            # The reference is taken before the object is written and committed
+            # after it (see ``crud.blob.insert``); if another upload created the
+            # row meanwhile, reference that one instead
+            if await run_in_threadpool(
+                crud.blob.insert, db, sha256=sha256, size=len(data), content_type=content_type
+            ):
+                break
+        try:
+            await self.backend.save(blob_key(sha256), data, content_type=content_type)
+            await run_in_threadpool(db.commit)
+        except BaseException:
+            await run_in_threadpool(db.rollback)
+            raise
+        return await run_in_threadpool(crud.blob.get, db, sha256), True
+
+    async def release_blob(self, db: Session, sha256: str) -> bool:
+        """
+        Drop one reference; returns True if that was the last and the blob was deleted.
+
+        The object is deleted only when the guarded decrement removed the
+        row, before that removal commits (see ``crud.blob.release``). If
+        deleting it fails, the reference is kept. Changes already pending on
+        ``db``, such as deleting the content that held the reference, commit
+        or roll back together with it.
+        """
+        try:
+            deleted = await run_in_threadpool(crud.blob.release, db, sha256=sha256)
+            if deleted:
+                await self.backend.delete(blob_key(sha256))
+            await run_in_threadpool(db.commit)
+        except BaseException:
+            await run_in_threadpool(db.rollback)
+            raise
+        return deleted
+
+    async def read_file(self, file_name: str) -> bytes:
+        return await self.backend.read(file_name)
+
+    async def delete_file(self, file_name: str, db: Optional[Session] = None) -> bool:
+        """
+        Delete a stored file. Blob keys are reference counted when ``db`` is
+        given: the blob is only removed once its last reference is released.
+        """
+        sha256 = blob_hash(file_name)
+        if sha256 is not None and db is not None:
+            return await self.release_blob(db, sha256)
+        return await self.backend.delete(file_name)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+# Singleton instance
+storage_service = StorageService()
@@ -0,0 +1,115 @@
+# backend/app/services/text_batching.py
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+def length_bucket(length: int, boundaries: Sequence[int]) -> int:
+    """Smallest boundary that fits ``length`` (the largest one if none does)."""
+    index = bisect.bisect_left(boundaries, length)
+    return boundaries[min(index, len(boundaries) - 1)]
+
+def pad_batch(
+    sequences: Sequence[Sequence[int]], pad_to: int, pad_id: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Right-pad token id sequences to exactly ``pad_to`` columns.
+
+    Returns ``(input_ids, attention_mask)`` as int64 arrays of shape
+    ``(len(sequences), pad_to)``; longer sequences are cut at ``pad_to``.
+    """
+    input_ids = np.full((len(sequences), pad_to), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(sequences), pad_to), dtype=np.int64)
+    for row, sequence in enumerate(sequences):
+        n = min(len(sequence), pad_to)
+        input_ids[row, :n] = sequence[:n]
+        attention_mask[row, :n] = 1
+    return input_ids, attention_mask
+
+class TokenCache:
+    """
+    LRU cache of token ids per input text.
+
+    ``encode_many`` looks every text up and sends only the misses to
+    ``encode_batch`` (one call, so a fast tokenizer encodes them in parallel).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encode_many(
+        self, texts: Sequence[str], encode_batch: Callable[[List[str]], List[List[int]]]
+    ) -> List[List[int]]:
+        results: List[Optional[List[int]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                ids = self._entries.get(text)
+                if ids is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    self._entries.move_to_end(text)
+                    results[i] = ids
+            self.hits += len(texts) - sum(len(positions) for positions in missing.values())
+            self.misses += sum(len(positions) for positions in missing.values())
+
+        if missing:
+            unique = list(missing)
+            encoded = encode_batch(unique)
+            with self._lock:
+                for text, ids in zip(unique, encoded):
+                    for i in missing[text]:
+                        results[i] = ids
+                    if self.max_entries > 0:
+                        self._entries[text] = ids
+                        self._entries.move_to_end(text)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class PadStats:
+    """Real versus padding tokens fed to the model, overall and per bucket."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.real_tokens = 0
+        self.pad_tokens = 0
+        self.batches_by_bucket: Dict[int, int] = {}
+
+    def record(self, bucket: int, attention_mask: np.ndarray) -> None:
+        real = int(attention_mask.sum())
+        with self._lock:
+            self.batches += 1
+            self.real_tokens += real
+            self.pad_tokens += attention_mask.size - real
+            self.batches_by_bucket[bucket] = self.batches_by_bucket.get(bucket, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.real_tokens + self.pad_tokens
+        return {
+            "batches": self.batches,
+            "real_tokens": self.real_tokens,
+            "pad_tokens": self.pad_tokens,
+            "pad_ratio": self.pad_tokens / total if total else 0.0,
+            "avg_pad_tokens_per_batch": self.pad_tokens / self.batches if self.batches else 0.0,
+            "batches_by_bucket": dict(sorted(self.batches_by_bucket.items())),
+        }
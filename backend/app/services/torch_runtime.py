@@ -0,0 +1,150 @@
+# backend/app/services/torch_runtime.py
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def available_cpus() -> int:
+    """CPUs this process may run on (its affinity mask, where the OS has one)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def server_workers() -> int:
+    """Server processes sharing the machine: SERVER_WORKERS, else WEB_CONCURRENCY, else 1."""
+    if settings.SERVER_WORKERS:
+        return settings.SERVER_WORKERS
+    try:
+        return max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        return 1
+
+def plan_threads(cpus: int, workers: int, num_threads: Optional[int] = None) -> int:
+    """Intra-op threads for one process: ``num_threads`` if set, else an even share of the CPUs."""
+    if num_threads:
+        return num_threads
+    return max(1, cpus // max(1, workers))
+
+class TorchRuntime:
+    """
+    Process-wide torch settings for serving.
+
+    Left alone, every server process sizes its intra-op thread pool to all
+    the machine's cores, so N workers run N times as many busy threads as
+    there are cores. ``configure()`` gives each process an even share of
+    the CPUs in its affinity mask instead, and one inter-op thread: the
+    inference pool's threads already run forward passes side by side.
+
+    Thread pools do not survive fork, so the settings are applied once per
+    process (tracked by pid): the model loaders apply them wherever models
+    are loaded, and pre-forked workers apply them again at startup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured_pid: Optional[int] = None
+        self.effective: Dict[str, Any] = {}
+        self.models: Dict[str, Dict[str, Any]] = {}  # Fast paths applied, per model name
+
+    def configure(self) -> None:
+        """Apply the thread and memory settings in this process (once; imports torch)."""
+        if self._configured_pid == os.getpid():
+            return
+        with self._lock:
+            if self._configured_pid == os.getpid():
+                return
+            if settings.TORCH_CUDA_ALLOC_CONF:
+                # Read when CUDA first allocates, so it only has to precede that
+                os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", settings.TORCH_CUDA_ALLOC_CONF)
+            import torch
+
+            cpus = available_cpus()
+            workers = server_workers()
+            threads = plan_threads(cpus, workers, settings.TORCH_NUM_THREADS)
+            torch.set_num_threads(threads)
+            if settings.TORCH_INTEROP_THREADS:
+                try:
+                    torch.set_num_interop_threads(settings.TORCH_INTEROP_THREADS)
+                except RuntimeError:
+                    # Settable once per process; forked workers keep the parent's
+                    pass
+            memory_fraction = None
+            if settings.TORCH_CUDA_MEMORY_FRACTION and torch.cuda.is_available():
+                torch.cuda.set_per_process_memory_fraction(settings.TORCH_CUDA_MEMORY_FRACTION)
+                memory_fraction = settings.TORCH_CUDA_MEMORY_FRACTION
+            self.effective = {
+                "torch_version": torch.__version__,
+                "cpus": cpus,
+                "workers": workers,
+                "cuda_alloc_conf": os.environ.get("PYTORCH_CUDA_ALLOC_CONF"),
+                "cuda_memory_fraction": memory_fraction,
+            }
+            self._configured_pid = os.getpid()
+        logger.info(
+            f"Torch runtime: {torch.get_num_threads()} intra-op threads "
+            f"({cpus} CPUs, {workers} workers), {torch.get_num_interop_threads()} inter-op threads"
+        )
+
+    def configure_if_loaded(self) -> None:
+        """``configure()`` in a process that already imported torch (e.g. a pre-forked worker)."""
+        if "torch" in sys.modules:
+            self.configure()
+
+    def inference(self):
+        """Context manager for forward passes: ``inference_mode()``, or ``no_grad()`` if disabled."""
+        import torch
+        return torch.inference_mode() if settings.TORCH_INFERENCE_MODE else torch.no_grad()
+
+    def prepare_model(self, model: Any, name: str) -> Any:
+        """
+        Ready a loaded model (already on its device) for serving.
+
+        Always switches it to eval mode and freezes its weights; applies the
+        enabled fast paths and returns the model to serve, which is a
+        wrapper when ``torch.compile`` is on.
+        """
+        model.eval()
+        model.requires_grad_(False)
+        applied: Dict[str, Any] = {}
+        if settings.TORCH_BETTER_TRANSFORMER:
+            try:
+                from optimum.bettertransformer import BetterTransformer
+                model = BetterTransformer.transform(model)
+                applied["better_transformer"] = True
+            except Exception as e:  # optimum missing, or an architecture it cannot convert
+                applied["better_transformer"] = False
+                logger.warning(f"BetterTransformer not applied to {name}: {e}")
+        if settings.TORCH_COMPILE:
+            import torch
+            # Length buckets keep input shapes fixed, so static shapes compile once per bucket
+            model = torch.compile(model, mode=settings.TORCH_COMPILE_MODE, dynamic=False)
+            applied["compile"] = settings.TORCH_COMPILE_MODE
+        self.models[name] = applied
+        return model
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings in effect in this process, for health endpoints (never imports torch)."""
+        torch = sys.modules.get("torch")
+        result: Dict[str, Any] = {
+            "configured": self._configured_pid == os.getpid(),
+            "inference_mode": settings.TORCH_INFERENCE_MODE,
+            **self.effective,
+            "models": dict(self.models),
+        }
+        if torch is not None and result["configured"]:
+            result["intra_op_threads"] = torch.get_num_threads()
+            result["interop_threads"] = torch.get_num_interop_threads()
+        else:
+            result["planned_intra_op_threads"] = plan_threads(
+                available_cpus(), server_workers(), settings.TORCH_NUM_THREADS
+            )
+        return result
+
+# Singleton instance
+torch_runtime = TorchRuntime()
@@ -0,0 +1,390 @@
+# backend/app/services/usage.py
+import asyncio
+import calendar
+import itertools
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.usage import UsageCounter, UsageQuota
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("texts", "tokens", "images", "model_seconds")
+
+# (user_id, day) -> [texts, tokens, images, model_seconds]
+UsageCounts = Dict[Tuple[int, date], List[float]]
+
+def period_start(day: date) -> date:
+    """First day of the quota period (calendar month, UTC) that ``day`` is in."""
+    return day.replace(day=1)
+
+def _utc_day() -> date:
+    return datetime.utcnow().date()
+
+def _day_end(day: date) -> float:
+    """Unix time at which UTC ``day`` ends."""
+    return calendar.timegm(day.timetuple()) + 86400
+
+def _zero() -> List[float]:
+    return [0, 0, 0, 0.0]
+
+def _merge(into: UsageCounts, counts: UsageCounts) -> None:
+    for key, values in counts.items():
+        entry = into.get(key)
+        if entry is None:
+            into[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                entry[i] += value
+
+def as_metrics(values: List[float]) -> Dict[str, float]:
+    return {
+        "texts": int(values[0]),
+        "tokens": int(values[1]),
+        "images": int(values[2]),
+        "model_seconds": round(float(values[3]), 6),
+    }
+
+class _Shard:
+    __slots__ = ("lock", "counts")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: UsageCounts = {}
+
+class UsageMeter:
+    """
+    Per-user usage counters (texts, tokens, images, model-seconds) and quotas.
+
+    ``add()`` is on the moderation hot path, so it only bumps an in-memory
+    counter: counters are striped over ``shards``, each thread always
+    writing to its own stripe, so concurrent writers rarely share a lock.
+    A background task swaps the stripes out every ``flush_interval``
+    seconds and adds them to the ``usage_counters`` table (one row per user
+    and UTC day) in one batched upsert.
+
+    The same flush re-reads every user's totals for the current quota
+    period, including usage written by other worker processes, and the
+    quotas table. Quota checks compare those cached totals plus this
+    process's unflushed counts against the limits, so they never touch
+    the database; across workers a quota can be overrun by at most one
+    flush interval of traffic.
+    """
+
+    def __init__(
+        self,
+        *,
+        shards: int = settings.USAGE_COUNTER_SHARDS,
+        flush_interval: float = settings.USAGE_FLUSH_INTERVAL,
+        default_quotas: Optional[Dict[str, float]] = None,
+        enabled: bool = settings.USAGE_METERING_ENABLED,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.flush_interval = flush_interval
+        self.default_quotas = dict(
+            settings.USAGE_DEFAULT_QUOTAS if default_quotas is None else default_quotas
+        )
+        self.enabled = enabled
+        self.session_factory = session_factory
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._local = threading.local()
+        self._next_shard = itertools.count()  # next() on it is atomic, unlike += on an int
+        self._day = _utc_day()
+        self._day_ends = _day_end(self._day)
+
+        # Period totals of every user (as of the last flush) and their quotas
+        self._period: date = period_start(self._day)
+        self._totals: Dict[int, List[float]] = {}
+        self._quotas: Dict[int, Dict[str, float]] = {}
+        self._flushing: UsageCounts = {}  # Swapped out, not yet reflected in _totals
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed = 0
+        self.last_flush_ms = 0.0
+
+    def _today(self) -> date:
+        if time.time() >= self._day_ends:
+            self._day = _utc_day()
+            self._day_ends = _day_end(self._day)
+        return self._day
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._shards[next(self._next_shard) % len(self._shards)]
+            self._local.shard = shard
+        return shard
+
+    def add(
+        self,
+        user_id: Optional[int],
+        *,
+        texts: int = 0,
+        tokens: int = 0,
+        images: int = 0,
+        model_seconds: float = 0.0,
+    ) -> None:
+        """Count usage for ``user_id`` (no-op for anonymous or internal work)."""
+        if user_id is None or not self.enabled:
+            return
+        key = (user_id, self._today())
+        shard = self._shard()
+        with shard.lock:
+            entry = shard.counts.get(key)
+            if entry is None:
+                entry = shard.counts[key] = _zero()
+            entry[0] += texts
+            entry[1] += tokens
+            entry[2] += images
+            entry[3] += model_seconds
+
+    def add_model_seconds(self, user_id: Optional[int], seconds: float) -> None:
+        self.add(user_id, model_seconds=seconds)
+
+    def pending(self, user_id: int) -> List[float]:
+        """Today's usage of ``user_id`` in this process that the table does not have yet."""
+        key = (user_id, self._today())
+        total = _zero()
+        for counts in [self._flushing] + [shard.counts for shard in self._shards]:
+            entry = counts.get(key)
+            if entry is not None:
+                for i, value in enumerate(entry):
+                    total[i] += value
+        return total
+
+    def usage(self, user_id: int) -> Dict[str, float]:
+        """Usage of ``user_id`` in the current quota period, from the cached aggregates."""
+        total = self.pending(user_id)
+        if self._period == period_start(self._today()):
+            for i, value in enumerate(self._totals.get(user_id, ())):
+                total[i] += value
+        return as_metrics(total)
+
+    def current_period(self) -> date:
+        """Start of the current quota period."""
+        return period_start(self._today())
+
+    def users(self) -> List[int]:
+        """Users with usage in the current period, flushed or not."""
+        today = self._today()
+        users = set(self._totals) if self._period == period_start(today) else set()
+        users.update(user_id for user_id, day in list(self._flushing) if day == today)
+        for shard in self._shards:
+            # Writers add keys under the shard lock; iterating without it can race a resize
+            with shard.lock:
+                users.update(user_id for user_id, day in shard.counts if day == today)
+        return sorted(users)
+
+    def quota(self, user_id: int) -> Dict[str, float]:
+        """Limits per metric for ``user_id``; metrics without a limit are left out."""
+        return {**self.default_quotas, **self._quotas.get(user_id, {})}
+
+    def exceeded(self, user_id: int) -> List[str]:
+        """Metrics whose quota ``user_id`` has used up this period (no database access)."""
+        if not self.enabled:
+            return []
+        limits = self.quota(user_id)
+        if not limits:
+            return []
+        usage = self.usage(user_id)
+        return [metric for metric in METRICS if metric in limits and usage[metric] >= limits[metric]]
+
+    def set_quota(self, db: Session, user_id: int, limits: Dict[str, Optional[float]]) -> Dict[str, float]:
+        """Store ``user_id``'s limits (None removes one) and apply them in this process now."""
+        db.merge(UsageQuota(user_id=user_id, **{metric: limits.get(metric) for metric in METRICS}))
+        db.commit()
+        self._quotas[user_id] = {
+            metric: limits[metric] for metric in METRICS if limits.get(metric) is not None
+        }
+        return self.quota(user_id)
+
+    def daily(self, db: Session, user_id: int, days: int) -> List[Dict[str, Any]]:
+        """Per-day usage of ``user_id`` over the last ``days`` days, unflushed usage included."""
+        today = self._today()
+        since = today - timedelta(days=days - 1)
+        rows = db.execute(
+            select(
+                UsageCounter.day, UsageCounter.texts, UsageCounter.tokens,
+                UsageCounter.images, UsageCounter.model_seconds,
+            ).where(UsageCounter.user_id == user_id, UsageCounter.day >= since)
+        ).all()
+        by_day = {row[0]: list(row[1:]) for row in rows}
+        _merge(by_day, {today: self.pending(user_id)})
+        points = []
+        day = since
+        while day <= today:
+            points.append({"day": day, **as_metrics(by_day.get(day, _zero()))})
+            day += timedelta(days=1)
+        return points
+
+    async def start(self) -> None:
+        """Load period totals and quotas, then start the background flush loop."""
+        if self._task is None:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Could not load usage totals: {e}")
+            self._task = asyncio.create_task(self._run())
+            logger.info("Usage meter started")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out the remaining counts."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _swap(self) -> UsageCounts:
+        counts: UsageCounts = {}
+        for shard in self._shards:
+            with shard.lock:
+                swapped, shard.counts = shard.counts, {}
+            _merge(counts, swapped)
+        return counts
+
+    async def flush(self) -> None:
+        """Upsert the counts gathered since the last flush, then refresh totals and quotas."""
+        async with self._flush_lock:
+            start = time.perf_counter()
+            self._flushing = self._swap()
+            period = period_start(self._today())
+            try:
+                totals, quotas = await run_in_threadpool(self._write, self._flushing, period)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to flush usage counters: {e}", exc_info=True)
+                # Keep the counts for the next flush
+                shard = self._shard()
+                with shard.lock:
+                    _merge(shard.counts, self._flushing)
+                self._flushing = {}
+                return
+            self.rows_written += len(self._flushing)
+            # Swapped on the event loop thread, so readers never count a flush twice
+            self._period, self._totals, self._quotas, self._flushing = period, totals, quotas, {}
+            self.flushes += 1
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def _write(
+        self, counts: UsageCounts, period: date
+    ) -> Tuple[Dict[int, List[float]], Dict[int, Dict[str, float]]]:
+        db = self.session_factory()
+        try:
+            apply_usage(db, counts)
+            db.commit()
+            totals = {
+                user_id: [texts or 0, tokens or 0, images or 0, seconds or 0.0]
+                for user_id, texts, tokens, images, seconds in db.execute(
+                    select(
+                        UsageCounter.user_id,
+                        func.sum(UsageCounter.texts),
+                        func.sum(UsageCounter.tokens),
+                        func.sum(UsageCounter.images),
+                        func.sum(UsageCounter.model_seconds),
+                    )
+                    .where(UsageCounter.day >= period)
+                    .group_by(UsageCounter.user_id)
+                ).all()
+            }
+            quotas = {
+                row.user_id: {
+                    metric: getattr(row, metric) for metric in METRICS
+                    if getattr(row, metric) is not None
+                }
+                for row in db.execute(select(UsageQuota)).scalars()
+            }
+            return totals, quotas
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for health and monitoring endpoints."""
+        return {
+            "enabled": self.enabled,
+            "shards": len(self._shards),
+            "pending_keys": sum(len(shard.counts) for shard in self._shards),
+            "users_this_period": len(self._totals),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed": self.failed,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+def apply_usage(db: Session, counts: UsageCounts) -> None:
+    """
+    Add usage increments with one upsert per batch.
+
+    Uses ``INSERT ... ON CONFLICT DO UPDATE`` on PostgreSQL and SQLite; other
+    dialects fall back to read-modify-write per row.
+    """
+    if not counts:
+        return
+    rows = [
+        {
+            "user_id": user_id,
+            "day": day,
+            "texts": int(texts),
+            "tokens": int(tokens),
+            "images": int(images),
+            "model_seconds": float(seconds),
+        }
+        for (user_id, day), (texts, tokens, images, seconds) in counts.items()
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        _apply_usage_generic(db, rows)
+        return
+
+    table = UsageCounter.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.day],
+        set_={metric: table.c[metric] + stmt.excluded[metric] for metric in METRICS},
+    )
+    db.execute(stmt, rows)
+
+def _apply_usage_generic(db: Session, rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        counter = db.execute(
+            select(UsageCounter).where(
+                UsageCounter.user_id == row["user_id"], UsageCounter.day == row["day"]
+            ).with_for_update()
+        ).scalar_one_or_none()
+        if counter is None:
+            db.add(UsageCounter(**row))
+        else:
+            for metric in METRICS:
+                setattr(counter, metric, getattr(counter, metric) + row[metric])
+    db.flush()
+
+# Singleton instance
+usage_meter = UsageMeter()
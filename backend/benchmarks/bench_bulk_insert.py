@@ -0,0 +1,68 @@
+"""
+Compare per-row content inserts with the batched bulk insert.
+
+Usage (from backend/):
+    python benchmarks/bench_bulk_insert.py [--rows 5000] [--database-url sqlite:///bench.db]
+
+Defaults to a throwaway SQLite file; pass a Postgres URL to measure against
+a local server.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp_dir}/bench.db"
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app import crud, models
+    from app.models.base import Base
+    from app.schemas import ContentCreate
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    owner = models.User(email="bench@example.com", hashed_password="not-a-real-hash")
+    db.add(owner)
+    db.commit()
+    items = [
+        ContentCreate(content_type="text", content=f"benchmark message number {i}")
+        for i in range(args.rows)
+    ]
+
+    start = time.perf_counter()
+    for item in items:
+        db_obj = models.Content(**item.dict(), user_id=owner.id)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ids = crud.content.create_multi_with_owner(db, objs_in=items, owner_id=owner.id)
+    bulk = time.perf_counter() - start
+    assert len(ids) == len(items)
+
+    print(f"database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"per-row insert: {args.rows / per_row:10.0f} rows/s ({per_row:.3f}s)")
+    print(f"bulk insert:    {args.rows / bulk:10.0f} rows/s ({bulk:.3f}s)")
+
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+if __name__ == "__main__":
+    main()
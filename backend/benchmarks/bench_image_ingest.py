@@ -0,0 +1,86 @@
+"""
+Compare the old temp-file image ingestion path with the pooled in-memory one.
+
+Usage (from backend/):
+    python benchmarks/bench_image_ingest.py [--iterations 20]
+
+Each upload is a starlette UploadFile over a SpooledTemporaryFile, as built by
+the multipart parser. The old path reads it, writes a NamedTemporaryFile,
+re-reads that file and deletes it; the new path streams it once into a
+pooled buffer. Reports wall time and peak Python allocations per upload.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.datastructures import UploadFile
+
+from app.core.uploads import UploadBufferPool, read_upload
+
+SIZES_MB = (1, 2, 5, 10)
+SPOOL_MAX_SIZE = 1024 * 1024  # starlette's multipart spool threshold
+
+def make_upload(payload: bytes) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    spooled.write(payload)
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=len(payload), filename="image.jpg")
+
+async def old_path(file: UploadFile) -> int:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
+        file_path = tmp_file.name
+        content = await file.read()
+        tmp_file.write(content)
+    with open(file_path, "rb") as f:
+        image_bytes = f.read()
+    os.remove(file_path)
+    return len(image_bytes)
+
+async def new_path(file: UploadFile, pool: UploadBufferPool, max_size: int) -> int:
+    async with pool.acquire() as buffer:
+        image_data = await read_upload(file, buffer, max_size=max_size)
+        return len(image_data)
+
+async def measure(fn, payload: bytes, iterations: int) -> tuple:
+    uploads = [make_upload(payload) for _ in range(iterations)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    for upload in uploads:
+        assert await fn(upload) == len(payload)
+    elapsed = (time.perf_counter() - start) / iterations
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for upload in uploads:
+        await upload.close()
+    return elapsed, peak
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    max_size = max(SIZES_MB) * 1024 * 1024
+    pool = UploadBufferPool(buffer_size=max_size, max_buffers=1)
+    async with pool.acquire():
+        pass  # Pre-allocate the pooled buffer, as a warm worker would have
+
+    print(f"{'size':>6} {'old ms':>9} {'new ms':>9} {'old peak MB':>12} {'new peak MB':>12}")
+    for size_mb in SIZES_MB:
+        payload = os.urandom(size_mb * 1024 * 1024)
+        old_time, old_peak = await measure(old_path, payload, args.iterations)
+        new_time, new_peak = await measure(
+            lambda f: new_path(f, pool, max_size), payload, args.iterations
+        )
+        print(
+            f"{size_mb:>4}MB {old_time * 1000:>9.2f} {new_time * 1000:>9.2f} "
+            f"{old_peak / 2**20:>12.1f} {new_peak / 2**20:>12.1f}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
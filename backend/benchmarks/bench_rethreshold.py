@@ -0,0 +1,91 @@
+"""
+Measure re-thresholding stored content from packed scores.
+
+Usage (from backend/):
+    python benchmarks/bench_rethreshold.py [--rows 200000] [--database-url sqlite:///bench.db]
+
+Fills the content table with ``--rows`` moderated rows (7 categories of
+random scores) under a 0.7 threshold policy, then times a dry run and a
+real run of the re-threshold job under a policy with a lower violence
+threshold and a combination rule. Defaults to a throwaway SQLite file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ["hate_speech", "harassment", "self_harm", "sexual_content", "violence", "illegal_activities", "spam"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp_dir}/bench.db"
+
+    import numpy as np
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from app import models
+    from app.models.base import Base
+    from app.services.policy import ACTIONS, PolicyEngine
+    from app.services.score_store import SCORE_DTYPE, rethreshold, score_layouts
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    owner = models.User(email="bench@example.com", hashed_password="not-a-real-hash")
+    db.add(owner)
+    db.commit()
+
+    old_policy = PolicyEngine(path=None)
+    old_policy.load_document({"version": "v1", "default_threshold": 0.7})
+    layout = score_layouts.register(db, CATEGORIES)
+    scores = np.random.default_rng(0).random((args.rows, len(CATEGORIES)), dtype=np.float32) ** 3
+    actions = old_policy.evaluate_many(CATEGORIES, scores)
+    start = time.perf_counter()
+    for begin in range(0, args.rows, 10000):
+        db.execute(insert(models.Content), [
+            {
+                "content_type": "text",
+                "user_id": owner.id,
+                "is_approved": bool(actions[i] == 0),
+                "moderation_action": ACTIONS[actions[i]],
+                "moderation_result": "{}",
+                "policy_version": "v1",
+                "score_layout": layout,
+                "scores": scores[i].astype(SCORE_DTYPE).tobytes(),
+            }
+            for i in range(begin, min(begin + 10000, args.rows))
+        ])
+    db.commit()
+    print(f"Inserted {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    new_policy = PolicyEngine(path=None)
+    new_policy.load_document({
+        "version": "v2",
+        "default_threshold": 0.7,
+        "thresholds": {"violence": 0.5},
+        "rules": [{"name": "combo", "when": "harassment > 0.4 and hate_speech > 0.4", "action": "review"}],
+    })
+    for dry_run in (True, False):
+        start = time.perf_counter()
+        summary = rethreshold(db, engine=new_policy, chunk_size=args.chunk_size, dry_run=dry_run)
+        elapsed = time.perf_counter() - start
+        label = "dry run" if dry_run else "write"
+        print(
+            f"{label:>8}: {summary['scanned']} rows, {summary['changed']} changed in {elapsed:.2f}s "
+            f"({summary['scanned'] / elapsed:,.0f} rows/s)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure object storage upload throughput by file size, and event-loop stalls.
+
+Usage (from backend/):
+    python benchmarks/bench_storage_upload.py [--sizes 1,8,32,128] [--repeats 3]
+    python benchmarks/bench_storage_upload.py --s3 [--endpoint-url http://localhost:9000]
+
+Always measures the local backend (in a temp dir). With ``--s3`` it also
+measures the S3 backend against S3_BUCKET_NAME (or a MinIO endpoint), plus
+the old path that called boto3's blocking ``upload_fileobj`` inside the
+coroutine. A ticker task runs alongside each upload; "max stall" is the
+longest the event loop went without running it.
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.storage import LocalBackend, S3Backend
+
+async def ticker(stalls: list, stop: asyncio.Event) -> None:
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        stalls.append(now - last)
+        last = now
+
+async def measure(upload, payload: bytes, repeats: int) -> tuple:
+    best, max_stall = float("inf"), 0.0
+    for i in range(repeats):
+        stalls: list = []
+        stop = asyncio.Event()
+        tick = asyncio.create_task(ticker(stalls, stop))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await upload(f"bench/{len(payload)}-{i}.bin", io.BytesIO(payload))
+        best = min(best, time.perf_counter() - start)
+        stop.set()
+        await tick
+        max_stall = max([max_stall] + stalls)
+    return len(payload) / best / 1e6, max_stall * 1000
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,8,32,128", help="File sizes in MB")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--s3", action="store_true", help="Also benchmark S3")
+    parser.add_argument("--endpoint-url", default=None)
+    args = parser.parse_args()
+
+    paths = {"local": LocalBackend(tempfile.mkdtemp()).save}
+    if args.s3:
+        s3 = S3Backend(endpoint_url=args.endpoint_url)
+
+        async def legacy_upload(key: str, file) -> None:
+            s3.client.upload_fileobj(file, s3.bucket, key)  # Blocks the event loop
+
+        paths["s3"] = s3.save
+        paths["s3 (blocking)"] = legacy_upload
+
+    print(f"{'backend':>14} {'size MB':>8} {'MB/s':>9} {'max stall ms':>13}")
+    for size_mb in (int(size) for size in args.sizes.split(",")):
+        payload = os.urandom(size_mb * 1024 * 1024)
+        for name, upload in paths.items():
+            throughput, stall = await measure(upload, payload, args.repeats)
+            print(f"{name:>14} {size_mb:>8} {throughput:>9.1f} {stall:>13.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Measure padding waste of arrival-order text batches against length buckets.
+
+Usage (from backend/):
+    python benchmarks/bench_text_bucketing.py [--texts 20000] [--batch-size 16]
+
+Draws token lengths from a long-tailed distribution (most messages short, a
+few near the 512-token limit) and counts the pad tokens fed to the model
+when each batch is padded to its longest member (``padding=True``) versus
+when texts are grouped by TEXT_LENGTH_BUCKETS and padded to the boundary.
+Forward-pass cost grows with the padded batch size, so the token totals
+are a proxy for inference time.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.text_batching import PadStats, length_bucket, pad_batch
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=settings.ML_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    buckets = sorted(settings.TEXT_LENGTH_BUCKETS)
+    rng = np.random.default_rng(args.seed)
+    lengths = np.clip(rng.lognormal(mean=3.3, sigma=0.9, size=args.texts), 8, buckets[-1]).astype(int)
+    sequences = [[1] * n for n in lengths]
+
+    fifo = PadStats()
+    for start in range(0, len(sequences), args.batch_size):
+        batch = sequences[start:start + args.batch_size]
+        pad_to = max(len(sequence) for sequence in batch)
+        fifo.record(pad_to, pad_batch(batch, pad_to, 0)[1])
+
+    bucketed = PadStats()
+    by_bucket = {}
+    for sequence in sequences:
+        by_bucket.setdefault(length_bucket(len(sequence), buckets), []).append(sequence)
+    for bucket, members in by_bucket.items():
+        for start in range(0, len(members), args.batch_size):
+            bucketed.record(bucket, pad_batch(members[start:start + args.batch_size], bucket, 0)[1])
+
+    print(f"{'strategy':>10} {'batches':>8} {'total tokens':>13} {'pad tokens':>11} {'pad %':>6}")
+    for name, stats in (("arrival", fifo.stats()), ("bucketed", bucketed.stats())):
+        total = stats["real_tokens"] + stats["pad_tokens"]
+        print(f"{name:>10} {stats['batches']:>8} {total:>13} {stats['pad_tokens']:>11} {stats['pad_ratio'] * 100:>5.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure MinHash/LSH near-duplicate lookups against a text model forward pass.
+
+Usage (from backend/):
+    python benchmarks/bench_text_dedup.py [--entries 100000] [--queries 2000] [--model]
+
+Fills the index with ``--entries`` distinct synthetic messages, then times
+signature + lookup for near-duplicate variants (hits) and unseen texts
+(misses). With ``--model`` (needs torch/transformers) it also times one
+forward pass of the text model for a single text, which is what a hit saves.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.near_duplicate import TextDedupIndex
+
+WORDS = [
+    "account", "click", "free", "offer", "limited", "winner", "prize", "verify",
+    "meeting", "project", "weekend", "update", "photos", "dinner", "review", "report",
+    "delivery", "payment", "urgent", "support", "crypto", "invest", "profit", "today",
+]
+
+def make_text(rng: random.Random) -> str:
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 30)))
+    token = "".join(rng.choices(string.ascii_lowercase, k=8))
+    return f"{words} {token}"
+
+def vary(rng: random.Random, text: str) -> str:
+    """A campaign-style variant: one word swapped and punctuation added."""
+    words = text.split()
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words).upper() + "!!!"
+
+def time_lookups(index: TextDedupIndex, texts) -> tuple:
+    hits = 0
+    start = time.perf_counter()
+    for text in texts:
+        if index.lookup(index.signature(text)) is not None:
+            hits += 1
+    return (time.perf_counter() - start) / len(texts), hits
+
+def time_model(text: str, repeats: int = 5) -> float:
+    from app.services.ml_service import get_content_moderator
+
+    pipeline = get_content_moderator().text_pipeline
+    pipeline.score_texts([text])  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pipeline.score_texts([text])
+    return (time.perf_counter() - start) / repeats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--model", action="store_true", help="Also time a text model forward pass")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    index = TextDedupIndex(max_entries=args.entries, ttl_seconds=3600, campaign_size=0)
+    texts = [make_text(rng) for _ in range(args.entries)]
+
+    start = time.perf_counter()
+    for text in texts:
+        index.add(index.signature(text), {"is_approved": True})
+    fill = time.perf_counter() - start
+
+    variants = [vary(rng, rng.choice(texts)) for _ in range(args.queries)]
+    unseen = [make_text(rng) for _ in range(args.queries)]
+    hit_time, hits = time_lookups(index, variants)
+    miss_time, false_hits = time_lookups(index, unseen)
+
+    print(f"indexed {len(index)} texts in {fill:.2f}s")
+    print(f"near-duplicate lookup: {hit_time * 1e6:8.1f} us  ({hits}/{len(variants)} matched)")
+    print(f"unseen text lookup:    {miss_time * 1e6:8.1f} us  ({false_hits}/{len(unseen)} matched)")
+    if args.model:
+        model_time = time_model(variants[0])
+        print(f"text model forward:    {model_time * 1e6:8.1f} us  ({model_time / hit_time:.0f}x a lookup)")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+from app.core.startup import startup_timer  # First, so import time covers everything below
+
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
@@ -6,13 +10,30 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import text
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.db.session import engine, Base, SessionLocal
+from app.db.session import engine, Base
 from app.core.logging_config import setup_logging
 from app.core.middleware import LoggingMiddleware, RateLimitMiddleware
+from app.services.moderation_recorder import moderation_recorder
+from app.services import analytics
+from app.services.image_hashing import image_hash_index
+from app.services.near_duplicate import text_dedup_index
+from app.services.embedding_store import embedding_index
+from app.services.language_id import language_router
+from app.services.load_shedding import load_shedder
+from app.services.usage import usage_meter
+from app.core.deadlines import deadline_stats
+from app.core.tracing import tracer
+from app.services.profiling import profiler
+from app.services.torch_runtime import torch_runtime
+from app.services.moderation_stream import stream_stats
+from app.services.policy import policy_engine
+from app.services.ml_service import get_content_moderator, loaded_content_moderator, preload_models
+from app.core.health import database_check, readiness
+from app.services.model_registry import model_registry
+from app.services.model_rollout import model_rollout
 from app.core.exceptions import (
     ContentModerationException,
     ContentValidationError,
@@ -36,19 +57,76 @@ async def lifespan(app: FastAPI):
         logger.error(f"Error creating database tables: {e}")
         raise
 
-    # Verify database connection
-    try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+    # Verify database connection (also primes the cached probe result)
+    if await database_check.check():
         logger.info("Database connection verified")
+    else:
+        logger.warning(f"Database connection check failed: {database_check.error}")
+
+    # Load known image hashes for near-duplicate lookups
+    try:
+        image_hash_index.load()
     except Exception as e:
-        logger.warning(f"Database connection check failed: {e}")
+        logger.warning(f"Could not load image hash index: {e}")
+
+    # Open the stored content embeddings (indexed lazily, on first search)
+    try:
+        embedding_index.load()
+    except Exception as e:
+        logger.warning(f"Could not open embedding store: {e}")
+
+    # Start write-behind moderation audit logging; rollups are updated in
+    # the same transaction as each flushed batch
+    moderation_recorder.add_listener(analytics.record_log_rows)
+    await moderation_recorder.start()
+
+    # Per-user usage counters; also loads this month's totals and quotas
+    await usage_meter.start()
+
+    # Pre-forked workers inherit torch but not its thread pools: size them here
+    torch_runtime.configure_if_loaded()
+
+    # Load and warm up models off the event loop; /livez answers meanwhile
+    # and /readyz reports ready once they are done. In pre-fork mode
+    # (run.py --prefork) they are already loaded and only warmup runs here.
+    preload_task = None
+    if settings.ML_PRELOAD:
+        preload_task = asyncio.create_task(preload_models_in_background())
+
+    readiness.mark_started()
+    startup_timer.mark_ready()
+    logger.info(f"Application ready in {startup_timer.ready_seconds:.2f}s")
 
     yield  # Application runs here
 
     # Shutdown: Clean up resources
     logger.info("Shutting down application...")
+    readiness.mark_stopping()
+    if preload_task is not None:
+        preload_task.cancel()
+    await moderation_recorder.stop()
+    moderation_recorder.remove_listener(analytics.record_log_rows)
+    await usage_meter.stop()
+    await asyncio.to_thread(tracer.flush)
+
+async def preload_models_in_background() -> None:
+    """Load every model in a worker thread, warm them up and mark the worker ready."""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, preload_models)
+        readiness.mark_models_loaded()
+        startup_timer.mark_models_ready()
+        logger.info(f"Models ready in {startup_timer.models_ready_seconds:.2f}s")
+        
+        # Warm up on the pool that serves inference
+        moderator = get_content_moderator()
+        start = time.perf_counter()
+        timings = await loop.run_in_executor(moderator.inference_executor, moderator.warmup)
+        readiness.mark_warmed_up(time.perf_counter() - start)
+        logger.info(f"Models warmed up in {readiness.warmup_seconds:.2f}s: {timings}")
+    except Exception as e:
+        readiness.mark_failed(str(e))
+        logger.error(f"Model preload failed; this worker will not report ready: {e}")
 
 def create_application() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -109,17 +187,50 @@ def create_application() -> FastAPI:
     # Include API routers
     app.include_router(api_router, prefix=settings.API_V1_STR)
 
-    # Health check endpoint
+    # Health check endpoints
+    @app.get("/livez", tags=["health"])
+    async def liveness_check() -> dict:
+        """Liveness probe: the process is up and its event loop is responsive."""
+        return {"status": "alive"}
+    
+    @app.get("/readyz", tags=["health"])
+    async def readiness_check() -> JSONResponse:
+        """Readiness probe: models loaded and warmed up, database reachable (503 otherwise)."""
+        ready, details = await readiness.check()
+        return JSONResponse(
+            status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "ready" if ready else "not_ready", **details},
+        )
+    
     @app.get("/health", tags=["health"])
     async def health_check() -> dict:
         """Comprehensive health check endpoint."""
-        db_status = check_db_connection()
+        db_status = await database_check.check()
+        moderator = loaded_content_moderator()
         return {
             "status": "healthy" if db_status else "degraded",
             "version": "1.0.0",
             "environment": settings.ENVIRONMENT,
             "database": "connected" if db_status else "disconnected",
-            "rate_limiting": "enabled" if settings.RATE_LIMIT_ENABLED else "disabled"
+            "database_check": database_check.stats(),
+            "rate_limiting": "enabled" if settings.RATE_LIMIT_ENABLED else "disabled",
+            "moderation_log": moderation_recorder.stats(),
+            "image_hash_index": image_hash_index.stats(),
+            "text_dedup_index": text_dedup_index.stats(),
+            "policy": policy_engine.stats(),
+            "moderation_stream": stream_stats.stats(),
+            "startup": startup_timer.stats(),
+            "models": model_registry.stats(),
+            "text_batching": moderator.text_batching_stats() if moderator else None,
+            "language_routing": language_router.stats(),
+            "model_rollout": model_rollout.stats(moderator),
+            "load_shedding": load_shedder.stats(),
+            "deadlines": deadline_stats.stats(moderator.batchers() if moderator else ()),
+            "usage_metering": usage_meter.stats(),
+            "tracing": tracer.stats(),
+            "profiler": profiler.stats(),
+            "torch_runtime": torch_runtime.stats(),
+            "embeddings": embedding_index.stats(),
         }
     
     @app.get("/", tags=["root"])
@@ -129,22 +240,15 @@ def create_application() -> FastAPI:
             "message": "Smart Content Moderation API",
             "version": "1.0.0",
             "docs": "/api/docs",
-            "health": "/health"
+            "health": "/health",
+            "liveness": "/livez",
+            "readiness": "/readyz"
         }
 
     return app
 
-def check_db_connection() -> bool:
-    """Check if the database is accessible."""
-    try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
-        return True
-    except Exception:
-        return False
-
 app = create_application()
+startup_timer.mark_imported()
 
 if __name__ == "__main__":
     import uvicorn
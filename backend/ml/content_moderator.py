@@ -3,6 +3,8 @@ from transformers import pipeline
 import torch
 from typing import Dict, Any
 
+from app.services.policy import policy_engine
+
 class ContentModerator:
     def __init__(self):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -17,7 +19,7 @@ class ContentModerator:
         ]
     
     async def moderate_text(self, text: str) -> Dict[str, Any]:
-        results = {}
+        scores = {}
         for category in self.categories:
             result = self.text_pipeline(
                 text,
@@ -25,12 +27,6 @@ class ContentModerator:
                 hypothesis_template="This text contains {}."
             )
             score = result["scores"][0] if result["labels"][0] == category else 1 - result["scores"][0]
-            results[category] = {
-                "score": float(score),
-                "is_violation": score > 0.7
-            }
+            scores[category] = float(score)
         
-        return {
-            "is_approved": not any(r["is_violation"] for r in results.values()),
-            "categories": results
-        }
\ No newline at end of file
+        return policy_engine.evaluate(scores, content_type="text")
\ No newline at end of file
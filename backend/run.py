@@ -1,6 +1,120 @@
 # backend/run.py
+"""
+Run the API server.
+
+    python run.py                              # single process
+    python run.py --reload                     # development: restart on code changes
+    python run.py --prefork --workers 4        # production: shared preloaded models
+
+With ``--prefork`` this process imports the app and loads every model once,
+then forks the workers, which serve from one shared listening socket. The
+weights are inherited copy-on-write instead of being loaded again per
+worker, and ``gc.freeze()`` keeps the garbage collector from touching (and
+so copying) the pages they live on. Dead workers are restarted.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
 import uvicorn
-from app.main import app
+
+logger = logging.getLogger("run")
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def serve_prefork(args: argparse.Namespace) -> None:
+    from app.core.startup import startup_timer
+    import main
+    from app.db.session import engine
+    from app.services.ml_service import preload_models
+
+    # Torch thread pools are sized per worker from this (see app.services.torch_runtime)
+    os.environ.setdefault("WEB_CONCURRENCY", str(args.workers))
+    start = time.perf_counter()
+    # Only load weights here: running inference before the fork would start
+    # torch's thread pools, which do not survive it
+    preload_models()
+    startup_timer.mark_preloaded(time.perf_counter() - start)
+    logger.info(f"Models preloaded in {startup_timer.preload_seconds:.1f}s; forking {args.workers} workers")
+
+    engine.dispose()  # Pooled DB connections must not be shared across fork
+    sock = bind_socket(args.host, args.port, args.backlog)
+    gc.collect()
+    gc.freeze()
+
+    workers: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            startup_timer.mark_forked()
+            config = uvicorn.Config(
+                main.app, log_level=args.log_level, timeout_keep_alive=args.keep_alive
+            )
+            uvicorn.Server(config).run(sockets=[sock])
+            os._exit(0)
+        workers[pid] = slot
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for slot in range(args.workers):
+        spawn(slot)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = workers.pop(pid, None)
+        if slot is not None and not stopping:
+            logger.warning(f"Worker {pid} exited with status {status}; restarting")
+            spawn(slot)
+    sock.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the content moderation API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--prefork", action="store_true", help="Preload models, then fork workers")
+    parser.add_argument("--reload", action="store_true", help="Restart on code changes (development only)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.prefork and args.reload:
+        parser.error("--reload cannot be combined with --prefork")
+    if args.prefork:
+        serve_prefork(args)
+    else:
+        uvicorn.run(
+            "main:app", host=args.host, port=args.port, reload=args.reload,
+            log_level=args.log_level, timeout_keep_alive=args.keep_alive, backlog=args.backlog,
+        )
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    main()
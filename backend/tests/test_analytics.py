@@ -0,0 +1,144 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import deps
+from app.api.v1.endpoints import analytics as analytics_endpoints
+from app.models import ModerationLog, User
+from app.models.analytics import ModerationRollup
+from app.models.base import Base
+from app.services import analytics
+from app.services.moderation_recorder import ModerationRecorder
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def make_row(created_at: datetime, **overrides) -> dict:
+    row = {
+        "user_id": 1,
+        "content_type": "text",
+        "is_approved": False,
+        "scores": json.dumps({"violence": 0.9, "spam": 0.1}),
+        "violations": json.dumps(["violence"]),
+        "latency_ms": 10.0,
+        "created_at": created_at,
+    }
+    row.update(overrides)
+    return row
+
+def rollups(db) -> dict:
+    return {
+        (rollup.bucket, rollup.dimension, rollup.key): (rollup.total, rollup.violations, rollup.latency_ms_sum)
+        for rollup in db.scalars(select(ModerationRollup))
+    }
+
+def test_accumulate_counts_per_hour_and_dimension() -> None:
+    hour = datetime(2024, 6, 1, 10)
+    counts = analytics.accumulate([
+        make_row(hour.replace(minute=5)),
+        make_row(hour.replace(minute=55), is_approved=True, violations=[], scores={"spam": 0.2}, user_id=None),
+        make_row(hour + timedelta(hours=1), content_type="image", latency_ms=None),
+    ])
+    assert counts[(hour, "total", "all")] == [2, 1, 20.0]
+    assert counts[(hour, "content_type", "text")] == [2, 1, 20.0]
+    assert counts[(hour, "user", "1")] == [1, 1, 10.0]
+    assert counts[(hour, "category", "violence")] == [1, 1, 0.0]
+    assert counts[(hour, "category", "spam")] == [2, 0, 0.0]
+    assert counts[(hour + timedelta(hours=1), "content_type", "image")] == [1, 1, 0.0]
+
+def test_apply_rollups_adds_to_existing_buckets() -> None:
+    db = make_session_factory()()
+    hour = datetime(2024, 6, 1, 10)
+    analytics.apply_rollups(db, analytics.accumulate([make_row(hour)]))
+    analytics.apply_rollups(db, analytics.accumulate([make_row(hour), make_row(hour, is_approved=True)]))
+    db.commit()
+    assert rollups(db)[(hour, "total", "all")] == (3, 2, 30.0)
+    analytics.apply_rollups(db, {})
+
+def test_backfill_rollups_is_idempotent() -> None:
+    db = make_session_factory()()
+    hour = datetime(2024, 6, 1, 10)
+    db.add_all([
+        ModerationLog(**make_row(hour + timedelta(minutes=i, hours=i % 3)))
+        for i in range(7)
+    ])
+    db.commit()
+
+    assert analytics.backfill_rollups(db, chunk_size=3) == 7
+    first = rollups(db)
+    assert first[(hour, "total", "all")] == (3, 3, 30.0)
+    assert analytics.backfill_rollups(db, chunk_size=2) == 7
+    assert rollups(db) == first
+
+    # Only hours from ``since`` are rebuilt; earlier ones are kept
+    assert analytics.backfill_rollups(db, since=hour + timedelta(hours=1, minutes=30)) == 4
+    assert rollups(db) == first
+
+def test_listener_registration_is_idempotent() -> None:
+    session_factory = make_session_factory()
+    recorder = ModerationRecorder(session_factory=session_factory)
+    recorder.add_listener(analytics.record_log_rows)
+    recorder.add_listener(analytics.record_log_rows)
+
+    async def run() -> None:
+        await recorder.record({
+            "content_type": "text", "user_id": None, "latency_ms": 5.0,
+            "result": {"is_approved": True, "scores": {"spam": 0.1}},
+        })
+        await recorder.flush()
+
+    asyncio.run(run())
+    db = session_factory()
+    assert [total for (_, dimension, _), (total, _, _) in rollups(db).items() if dimension == "total"] == [1]
+
+    recorder.remove_listener(analytics.record_log_rows)
+    recorder.remove_listener(analytics.record_log_rows)
+    asyncio.run(run())
+    db.expire_all()
+    assert [total for (_, dimension, _), (total, _, _) in rollups(db).items() if dimension == "total"] == [1]
+
+def make_client(db, user) -> TestClient:
+    app = FastAPI()
+    app.include_router(analytics_endpoints.router, prefix="/analytics")
+    app.dependency_overrides[deps.get_db] = lambda: db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    app.dependency_overrides[deps.get_current_active_superuser] = lambda: user
+    return TestClient(app, raise_server_exceptions=False)
+
+def test_analytics_endpoints() -> None:
+    db = make_session_factory()()
+    user = User(id=1, email="admin@example.com", hashed_password="x", is_active=True, is_superuser=True)
+    db.add(user)
+    db.commit()
+    now = datetime.utcnow()
+    analytics.apply_rollups(db, analytics.accumulate([
+        make_row(now), make_row(now, is_approved=True, violations=[]), make_row(now - timedelta(hours=30)),
+    ]))
+    db.commit()
+    client = make_client(db, user)
+
+    overview = client.get("/analytics/overview", params={"hours": 24}).json()
+    assert (overview["hours"], overview["total"]["total"], overview["total"]["violations"]) == (24, 2, 1)
+    assert overview["total"]["violation_rate"] == 0.5
+    assert {count["key"]: count["total"] for count in overview["categories"]} == {"violence": 2, "spam": 2}
+    assert client.get("/analytics/overview", params={"hours": 48}).json()["total"]["total"] == 3
+
+    points = client.get("/analytics/timeseries", params={"hours": 3}).json()["points"]
+    assert [point["total"] for point in points] == [0, 0, 2]
+    response = client.get("/analytics/timeseries", params={"dimension": "colour"})
+    assert response.status_code == 400
+
+    assert client.get("/analytics/users/me").json()["total"]["total"] == 2
+    assert client.get("/analytics/users/2").json()["total"] == {
+        "key": "2", "total": 0, "violations": 0, "violation_rate": 0.0, "avg_latency_ms": 0.0,
+    }
@@ -0,0 +1,80 @@
+import asyncio
+
+from app.services.batching import DynamicBatcher
+
+def test_full_batch_runs_without_waiting() -> None:
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def main():
+        batcher = DynamicBatcher(process, max_batch_size=4, max_wait_ms=10_000)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(4))), timeout=5
+        )
+        batcher.close()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == [0, 2, 4, 6]
+    assert batches == [[0, 1, 2, 3]]
+    assert (stats["batches"], stats["items"], stats["avg_batch_size"]) == (1, 4, 4.0)
+
+def test_partial_batch_runs_after_max_wait() -> None:
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return list(items)
+
+    async def main():
+        batcher = DynamicBatcher(process, max_batch_size=8, max_wait_ms=20)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+        elapsed = loop.time() - start
+        batcher.close()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(main())
+    assert results == ["a", "b"]
+    assert batches == [["a", "b"]]
+    assert elapsed >= 0.015
+
+def test_batch_error_reaches_every_caller_and_worker_keeps_going() -> None:
+    def process(items):
+        if "bad" in items:
+            raise ValueError("boom")
+        return list(items)
+
+    async def main():
+        batcher = DynamicBatcher(process, max_batch_size=2, max_wait_ms=5)
+        failed = await asyncio.gather(batcher.submit("bad"), batcher.submit("ok"), return_exceptions=True)
+        recovered = await batcher.submit("fine")
+        batcher.close()
+        return failed, recovered
+
+    failed, recovered = asyncio.run(main())
+    assert [type(error) for error in failed] == [ValueError, ValueError]
+    assert recovered == "fine"
+
+def test_missing_results_fail_the_unmatched_callers() -> None:
+    def process(items):
+        return list(items)[:1]
+
+    async def main():
+        batcher = DynamicBatcher(process, max_batch_size=3, max_wait_ms=5)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True), timeout=5
+        )
+        batcher.close()
+        return results
+
+    first, *rest = asyncio.run(main())
+    assert first == 0
+    assert len(rest) == 2
+    for error in rest:
+        assert isinstance(error, RuntimeError)
+        assert "returned only 1 results" in str(error)
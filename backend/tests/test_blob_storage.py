@@ -0,0 +1,194 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.models import Blob, Content, User
+from app.api import deps
+from app.core.config import settings
+from app.api.v1.endpoints import content as content_endpoints
+from app.models.base import Base
+from app.services.storage import LocalBackend, StorageService, blob_hash, blob_key
+
+def make_session():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def test_duplicate_uploads_share_one_blob(tmp_path) -> None:
+    db = make_session()
+    backend = LocalBackend(str(tmp_path))
+    service = StorageService(backend)
+    data = b"\x89PNG fake image bytes" * 100
+
+    async def run():
+        first = await service.store_blob(db, data, content_type="image/png")
+        second = await service.store_blob(db, memoryview(data))
+        return first, second
+
+    (blob, uploaded), (duplicate, uploaded_again) = asyncio.run(run())
+    sha256 = blob.sha256
+    assert (uploaded, uploaded_again) == (True, False)
+    assert duplicate.sha256 == sha256
+    assert db.get(Blob, sha256).ref_count == 2
+    assert len(list(tmp_path.rglob(sha256))) == 1
+
+    key = blob_key(sha256)
+    assert blob_hash(key) == sha256
+    assert asyncio.run(service.delete_file(key, db=db)) is False
+    assert (tmp_path / key).exists()
+    assert asyncio.run(service.delete_file(key, db=db)) is True
+    assert not (tmp_path / key).exists()
+    assert db.get(Blob, sha256) is None
+
+def test_reference_is_taken_before_the_object_is_written(tmp_path) -> None:
+    db = make_session()
+    seen = []
+
+    class CheckingBackend(LocalBackend):
+        async def save(self, key, source, content_type=None):
+            seen.append(db.get(Blob, blob_hash(key)).ref_count)
+            if len(seen) == 1:
+                raise OSError("disk full")
+            return await super().save(key, source, content_type)
+
+    service = StorageService(CheckingBackend(str(tmp_path)))
+    with pytest.raises(OSError):
+        asyncio.run(service.store_blob(db, b"image"))
+    assert db.query(Blob).count() == 0  # The failed write gave its reference back
+
+    blob, uploaded = asyncio.run(service.store_blob(db, b"image"))
+    assert seen == [1, 1] and uploaded is True
+    assert blob.ref_count == 1 and (tmp_path / blob_key(blob.sha256)).exists()
+
+def test_moderation_result_is_linked_to_blob(tmp_path) -> None:
+    db = make_session()
+    service = StorageService(LocalBackend(str(tmp_path)))
+    blob, _ = asyncio.run(service.store_blob(db, b"image"))
+    crud.blob.set_moderation_result(
+        db, sha256=blob.sha256, result={"is_approved": False, "scores": {"nsfw": 0.97}}
+    )
+
+    duplicate, uploaded = asyncio.run(service.store_blob(db, b"image"))
+    assert uploaded is False
+    assert duplicate.is_approved is False
+    assert '"nsfw": 0.97' in duplicate.moderation_result
+
+def test_removed_content_keeps_its_file_path() -> None:
+    db = make_session()
+    owner = User(email="owner@example.com", hashed_password="x")
+    db.add(owner)
+    db.commit()
+    content = Content(content_type="image", file_path=blob_key("a" * 64), user_id=owner.id)
+    db.add(content)
+    db.commit()
+
+    removed = crud.content.remove(db, id=content.id)
+    assert blob_hash(removed.file_path) == "a" * 64
+
+class FakeModerator:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    async def moderate_image(self, data, tenant=None, user_id=None, **kwargs):
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return {"is_approved": True, "action": "approve", "scores": {"nsfw": 0.01}}
+
+def make_client(monkeypatch, tmp_path, db, user, moderator=None) -> TestClient:
+    monkeypatch.setattr(content_endpoints, "storage_service", StorageService(LocalBackend(str(tmp_path))))
+    app = FastAPI()
+    app.include_router(content_endpoints.router, prefix="/content")
+    app.dependency_overrides[deps.get_db] = lambda: db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    app.dependency_overrides[deps.get_metered_user] = lambda: user
+    app.dependency_overrides[deps.get_moderator] = lambda: moderator or FakeModerator()
+    return TestClient(app, raise_server_exceptions=False)
+
+def add_user(db, email: str) -> User:
+    user = User(email=email, hashed_password="x", is_active=True, is_superuser=False)
+    db.add(user)
+    db.commit()
+    return user
+
+def upload(client: TestClient, data: bytes):
+    return client.post("/content/upload", files={"file": ("a.png", data, "image/png")})
+
+def test_owner_deleting_an_upload_releases_its_blob(monkeypatch, tmp_path) -> None:
+    db = make_session()
+    owner = add_user(db, "owner@example.com")
+    client = make_client(monkeypatch, tmp_path, db, owner)
+
+    first = upload(client, b"png bytes").json()
+    second = upload(client, b"png bytes").json()
+    sha256 = first["sha256"]
+    assert second["deduplicated"] is True
+    assert db.get(Blob, sha256).ref_count == 2
+
+    assert client.delete(f"/content/{first['content']['id']}").status_code == 200
+    db.expire_all()
+    assert db.get(Blob, sha256).ref_count == 1
+    assert (tmp_path / blob_key(sha256)).exists()
+
+    assert client.delete(f"/content/{second['content']['id']}").status_code == 200
+    db.expire_all()
+    assert db.get(Blob, sha256) is None
+    assert not (tmp_path / blob_key(sha256)).exists()
+
+def test_client_set_file_path_cannot_release_another_users_blob(monkeypatch, tmp_path) -> None:
+    db = make_session()
+    victim = add_user(db, "victim@example.com")
+    sha256 = upload(make_client(monkeypatch, tmp_path, db, victim), b"victim image").json()["sha256"]
+
+    attacker = add_user(db, "attacker@example.com")
+    client = make_client(monkeypatch, tmp_path, db, attacker)
+    created = client.post("/content/", json={"content_type": "image", "file_path": blob_key(sha256)}).json()
+    assert client.delete(f"/content/{created['id']}").status_code == 200
+
+    db.expire_all()
+    assert db.get(Blob, sha256).ref_count == 1
+    assert any(tmp_path.rglob(sha256))
+
+def test_failed_upload_gives_its_reference_back(monkeypatch, tmp_path) -> None:
+    db = make_session()
+    owner = add_user(db, "owner@example.com")
+    client = make_client(monkeypatch, tmp_path, db, owner, FakeModerator(fail=True))
+
+    assert upload(client, b"png bytes").status_code == 500
+    db.expire_all()
+    assert db.query(Blob).count() == 0 and db.query(Content).count() == 0
+    assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+def test_oversize_upload_is_rejected_before_storing(monkeypatch, tmp_path) -> None:
+    db = make_session()
+    owner = add_user(db, "owner@example.com")
+    client = make_client(monkeypatch, tmp_path, db, owner)
+
+    response = upload(client, b"x" * (settings.MAX_UPLOAD_SIZE + 1))
+    assert response.status_code == 400
+    assert "exceeds maximum allowed size" in response.json()["detail"]
+    assert db.query(Blob).count() == 0 and db.query(Content).count() == 0
+    assert upload(client, b"small enough").status_code == 200
+
+def test_content_is_kept_when_its_blob_cannot_be_deleted(monkeypatch, tmp_path) -> None:
+    db = make_session()
+    owner = add_user(db, "owner@example.com")
+    client = make_client(monkeypatch, tmp_path, db, owner)
+    created = upload(client, b"png bytes").json()
+
+    async def fail(key):
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr(content_endpoints.storage_service.backend, "delete", fail)
+    assert client.delete(f"/content/{created['content']['id']}").status_code == 500
+    db.expire_all()
+    # The content row and its reference stay together
+    assert db.get(Content, created["content"]["id"]) is not None
+    assert db.get(Blob, created["sha256"]).ref_count == 1
@@ -0,0 +1,139 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.api import deps
+from app.api.v1.endpoints import content as content_endpoints
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models import Content, User
+from app.models.base import Base
+from app.schemas import ContentCreate
+from app.services import bulk_moderation
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+class FakeModerator:
+    def __init__(self):
+        self.calls = []
+
+    async def moderate_texts(self, texts, tenant=None, priority=None, user_id=None, content_ids=None):
+        self.calls.append(list(content_ids))
+        return [
+            {"is_approved": "spam" not in text, "action": "reject" if "spam" in text else "approve",
+             "scores": {"spam": 0.9 if "spam" in text else 0.1}}
+            for text in texts
+        ]
+
+class FakeRecorder:
+    def __init__(self):
+        self.events = []
+
+    async def record(self, event):
+        self.events.append(event)
+        return True
+
+def setup(monkeypatch):
+    session_factory = make_session_factory()
+    db = session_factory()
+    user = User(email="owner@example.com", hashed_password="x", is_active=True)
+    db.add(user)
+    db.commit()
+
+    moderator = FakeModerator()
+    recorder = FakeRecorder()
+
+    async def get_moderator():
+        return moderator
+
+    monkeypatch.setattr(bulk_moderation, "get_content_moderator_async", get_moderator)
+    monkeypatch.setattr(bulk_moderation, "moderation_recorder", recorder)
+    monkeypatch.setattr(bulk_moderation, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "BULK_MODERATION_BATCH_SIZE", 2)
+
+    app = FastAPI()
+    app.include_router(content_endpoints.router, prefix="/content")
+    app.dependency_overrides[deps.get_db] = lambda: db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    client = TestClient(app, raise_server_exceptions=False)
+    client.headers["Authorization"] = f"Bearer {create_access_token(user.id)}"
+    return client, db, user, moderator, recorder
+
+ITEMS = [
+    {"content_type": "text", "content": "hello"},
+    {"content_type": "image", "file_path": "blobs/aa/bb"},
+    {"content_type": "text", "content": "buy spam now"},
+    {"content_type": "text", "content": "see you"},
+]
+
+def test_create_multi_returns_ids_in_submission_order() -> None:
+    db = make_session_factory()()
+    user = User(email="owner@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    # Rows already present so new ids do not simply start at 1
+    db.add_all([Content(content_type="text", content="old", user_id=user.id) for _ in range(3)])
+    db.commit()
+
+    texts = [f"item {i}" for i in range(50)]
+    ids = crud.content.create_multi_with_owner(
+        db, objs_in=[ContentCreate(content_type="text", content=text) for text in texts], owner_id=user.id
+    )
+    assert len(ids) == 50 and len(set(ids)) == 50
+    assert [db.get(Content, content_id).content for content_id in ids] == texts
+    assert crud.content.create_multi_with_owner(db, objs_in=[], owner_id=user.id) == []
+
+def test_bulk_insert_without_moderation(monkeypatch) -> None:
+    client, db, _, moderator, _ = setup(monkeypatch)
+    response = client.post("/content/bulk", json={"items": ITEMS})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["count"], body["moderation"], body["results"]) == (4, "none", None)
+    contents = [db.get(Content, content_id) for content_id in body["ids"]]
+    assert [content.content_type for content in contents] == ["text", "image", "text", "text"]
+    assert [content.moderation_result for content in contents] == [None] * 4
+    assert moderator.calls == []
+
+def test_bulk_limit_is_enforced(monkeypatch) -> None:
+    client, db, _, _, _ = setup(monkeypatch)
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 3)
+    response = client.post("/content/bulk", json={"items": ITEMS})
+    assert response.status_code == 400
+    assert "limited to 3 items" in response.json()["detail"]
+    assert db.query(Content).count() == 0
+    assert client.post("/content/bulk", json={"items": ITEMS[:3]}).status_code == 200
+
+def test_bulk_inline_moderation_returns_results_in_order(monkeypatch) -> None:
+    client, db, user, moderator, recorder = setup(monkeypatch)
+    body = client.post("/content/bulk", json={"items": ITEMS, "moderation": "inline"}).json()
+    ids = body["ids"]
+    assert body["moderation"] == "inline"
+    assert [result and result["action"] for result in body["results"]] == ["approve", None, "reject", "approve"]
+    # Text items only, in chunks of BULK_MODERATION_BATCH_SIZE
+    assert moderator.calls == [[ids[0], ids[2]], [ids[3]]]
+    db.expire_all()
+    assert [db.get(Content, content_id).moderation_action for content_id in ids] == [
+        "approve", None, "reject", "approve",
+    ]
+    assert [event["content_id"] for event in recorder.events] == [ids[0], ids[2], ids[3]]
+    assert {event["user_id"] for event in recorder.events} == {user.id}
+
+def test_bulk_background_moderation_writes_results_after_responding(monkeypatch) -> None:
+    client, db, _, moderator, _ = setup(monkeypatch)
+    body = client.post("/content/bulk", json={"items": ITEMS, "moderation": "background"}).json()
+    ids = body["ids"]
+    assert (body["moderation"], body["results"]) == ("background", None)
+    # TestClient runs background tasks before returning the response
+    assert moderator.calls == [[ids[0], ids[2]], [ids[3]]]
+    db.expire_all()
+    assert [db.get(Content, content_id).is_approved for content_id in (ids[0], ids[2], ids[3])] == [
+        True, False, True,
+    ]
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.deadlines import Deadline, until_disconnected
+from app.core.exceptions import DeadlineExceeded, RequestCancelled
+from app.services import ml_service
+from app.services.batching import DynamicBatcher
+from app.services.ml_service import ContentModerator, TextModelPipeline
+from app.services.model_registry import ModelBundle, ModelRegistry
+
+class FakeTokenizer:
+    is_fast = True
+    pad_token_id = 0
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return {"input_ids": [1] * len(texts.split())}
+        return {"input_ids": [[1] * len(text.split()) for text in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3
+
+def slow_score(self, premises, pad_to):
+    time.sleep(0.05)
+    return [{"toxic": 0.1} for _ in premises]
+
+@pytest.fixture
+def moderator(monkeypatch) -> ContentModerator:
+    registry = ModelRegistry()
+    registry.register("text", lambda: ModelBundle("fake", None, tokenizer=FakeTokenizer()))
+    monkeypatch.setattr(ml_service, "model_registry", registry)
+    monkeypatch.setattr(ml_service, "get_device", lambda: "cpu")
+    monkeypatch.setattr(TextModelPipeline, "_score_encoded", slow_score)
+    monkeypatch.setattr(ml_service.settings, "TEXT_DEDUP_ENABLED", False)
+    return ContentModerator()
+
+def test_batcher_drops_expired_and_cancelled_items() -> None:
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        time.sleep(0.02)
+        return items
+
+    async def main():
+        batcher = DynamicBatcher(process, executor=None, max_batch_size=4, max_wait_ms=5)
+        expired = asyncio.ensure_future(batcher.submit("expired", deadline=time.monotonic()))
+        gone = asyncio.ensure_future(batcher.submit("gone"))
+        kept = asyncio.ensure_future(batcher.submit("kept", deadline=time.monotonic() + 10))
+        await asyncio.sleep(0)
+        gone.cancel()
+        assert await kept == "kept"
+        with pytest.raises(DeadlineExceeded):
+            await expired
+
+        # A caller leaving mid-batch wastes its result
+        late = asyncio.ensure_future(batcher.submit("late"))
+        await asyncio.sleep(0.01)
+        late.cancel()
+        await asyncio.sleep(0.03)
+        batcher.close()
+        return batcher
+
+    batcher = asyncio.run(main())
+    assert batches == [["kept"], ["late"]]
+    assert (batcher.dropped_expired, batcher.dropped_cancelled, batcher.wasted) == (1, 1, 1)
+    assert batcher.batch_seconds > 0
+
+def test_short_deadline_falls_back_without_a_model_pass(moderator) -> None:
+    async def scenario():
+        assert (await moderator.moderate_text("warm the average up"))["action"] == "approve"
+        pipeline = moderator.text_pipelines["text"]
+        batches = sum(batcher.batches for batcher in pipeline.text_batchers.values())
+
+        result = await moderator.moderate_text("hello there", deadline=Deadline.after(5))
+        assert result["action"] == "review" and result["fallback"] == "deadline"
+        assert sum(batcher.batches for batcher in pipeline.text_batchers.values()) == batches
+
+        result = await moderator.moderate_text("hello there", deadline=Deadline.after(5000))
+        assert result["action"] == "approve" and "fallback" not in result
+
+    asyncio.run(scenario())
+
+class FakeRequest:
+    def __init__(self, disconnect_after: float):
+        self.disconnect_after = disconnect_after
+
+    async def receive(self):
+        await asyncio.sleep(self.disconnect_after)
+        return {"type": "http.disconnect"}
+
+def test_disconnect_cancels_the_work() -> None:
+    cancelled = []
+
+    async def work(seconds):
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            cancelled.append(seconds)
+            raise
+        return seconds
+
+    async def scenario():
+        assert await until_disconnected(FakeRequest(1.0), work(0.01)) == 0.01
+        with pytest.raises(RequestCancelled):
+            await until_disconnected(FakeRequest(0.01), work(1.0))
+
+    asyncio.run(scenario())
+    assert cancelled == [1.0]
+
+def test_disconnect_waits_for_the_decode_reading_the_upload(moderator, monkeypatch) -> None:
+    decoded = []
+
+    def slow_prepare(image_data):
+        time.sleep(0.1)
+        decoded.append(bytes(image_data))
+        return None, None
+
+    monkeypatch.setattr(moderator, "_prepare_image", slow_prepare)
+
+    async def scenario():
+        buffer = bytearray(b"upload")
+        with pytest.raises(RequestCancelled):
+            await until_disconnected(FakeRequest(0.01), moderator.moderate_image(memoryview(buffer)))
+        # The buffer may be reused from here on: the decode has finished with it
+        assert decoded == [b"upload"]
+
+    asyncio.run(scenario())
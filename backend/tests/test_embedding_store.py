@@ -0,0 +1,133 @@
+import asyncio
+import os
+
+import numpy as np
+
+from app.services import ml_service
+from app.services.embedding_store import HEADER_SIZE, EmbeddingFile, EmbeddingIndex, IVFIndex, normalize
+from app.services.ml_service import ContentModerator, StoredPremise, TextModelPipeline, TextScores
+from app.services.model_registry import ModelBundle, ModelRegistry
+from app.services.near_duplicate import TextDedupIndex
+
+def clustered_vectors(n: int, dim: int = 32, clusters: int = 40, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(clusters, dim)))
+    return normalize(centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim)) / np.sqrt(dim))
+
+def test_file_appends_float16_records_and_repairs_a_torn_tail(tmp_path) -> None:
+    path = str(tmp_path / "model.emb")
+    store = EmbeddingFile(path, "some/model", 8)
+    vectors = normalize(np.random.default_rng(1).normal(size=(3, 8)))
+    store.append([10, 11, 12], vectors.astype(np.float16))
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * (8 + 2 * 8)
+
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")  # A crash mid-append
+    reopened = EmbeddingFile(path)
+    assert (reopened.model, reopened.dim, reopened.rows()) == ("some/model", 8, 3)
+    reopened.repair()
+    reopened.append([13], vectors[:1].astype(np.float16))
+    records = reopened.records(reopened.rows())
+    assert records["content_id"].tolist() == [10, 11, 12, 13]
+    assert records["vector"].dtype == np.float16
+    assert np.allclose(records["vector"][3], vectors[0], atol=1e-3)
+
+def test_ivf_search_agrees_with_exact_search(tmp_path) -> None:
+    vectors = clustered_vectors(6000)
+    store = EmbeddingFile(str(tmp_path / "m.emb"), "m", vectors.shape[1])
+    store.append(list(range(len(vectors))), vectors.astype(np.float16))
+    exact = IVFIndex(store, exact_max_rows=10 ** 9)
+    approximate = IVFIndex(store, exact_max_rows=1000, probes=8, train_sample=3000)
+
+    recall = []
+    for query_id in range(0, 6000, 300):
+        truth = [item for item, _ in exact.search(vectors[query_id], 10, exclude=query_id)]
+        found = approximate.search(vectors[query_id], 10, exclude=query_id)
+        assert query_id not in [item for item, _ in found]
+        assert [s for _, s in found] == sorted((s for _, s in found), reverse=True)
+        recall.append(len(set(truth) & {item for item, _ in found}) / 10)
+    assert approximate.centroids is not None and len(approximate.centroids) >= 16
+    assert np.mean(recall) > 0.9
+
+    # Appends are listed under their nearest cluster, not retrained
+    store.append([99999], vectors[:1].astype(np.float16))
+    assert approximate.search(vectors[0], 2)[1][0] in (0, 99999)
+    assert approximate.rows == 6001 and approximate.trained_rows == 6000
+
+def test_searches_see_other_workers_appends_once_per_content(tmp_path) -> None:
+    writer = EmbeddingIndex(str(tmp_path))
+    reader = EmbeddingIndex(str(tmp_path))
+    vectors = clustered_vectors(50, dim=16)
+    writer.add("text-model", list(range(50)), vectors)
+    writer.add("text-model", [7], vectors[7:8])  # Re-moderated content
+
+    found = reader.similar(7, 5)
+    assert found["model"] == "text-model"
+    ids = [item for item, _ in found["results"]]
+    assert len(ids) == len(set(ids)) == 5 and 7 not in ids
+    assert reader.similar(1234, 5) is None
+
+def patch_moderator(monkeypatch, tmp_path, dedup: bool = False) -> EmbeddingIndex:
+    class FakeTokenizer:
+        is_fast = True
+        pad_token_id = 0
+
+        def __call__(self, texts, **kwargs):
+            return {"input_ids": [[1] * len(text.split()) for text in texts]}
+
+        def num_special_tokens_to_add(self, pair=False):
+            return 3
+
+    def score(self, premises, pad_to):
+        results = []
+        for premise in premises:
+            scores = TextScores(toxic=0.1)
+            if isinstance(premise, StoredPremise):
+                scores.embedding = normalize(np.full(4, len(premise))).astype(np.float16)
+            results.append(scores)
+        return results
+
+    registry = ModelRegistry()
+    registry.register("text", lambda: ModelBundle("fake", None, tokenizer=FakeTokenizer()))
+    monkeypatch.setattr(ml_service, "model_registry", registry)
+    monkeypatch.setattr(ml_service, "get_device", lambda: "cpu")
+    monkeypatch.setattr(TextModelPipeline, "_score_encoded", score)
+    monkeypatch.setattr(ml_service.settings, "TEXT_DEDUP_ENABLED", dedup)
+    monkeypatch.setattr(ml_service, "text_dedup_index", TextDedupIndex(min_chars=10))
+    index = EmbeddingIndex(str(tmp_path))
+    monkeypatch.setattr(ml_service, "embedding_index", index)
+    return index
+
+def test_moderation_stores_embeddings_of_stored_content(monkeypatch, tmp_path) -> None:
+    index = patch_moderator(monkeypatch, tmp_path)
+
+    async def scenario():
+        moderator = ContentModerator()
+        results = await moderator.moderate_texts(["one two", "three", "four five six"], content_ids=[5, None, 6])
+        await asyncio.gather(*index._pending)
+        return results
+
+    results = asyncio.run(scenario())
+    records = index._refresh()[0].store.records(2)
+    assert sorted(records["content_id"].tolist()) == [5, 6]
+    assert index.stats()["added"] == 2
+    assert all(getattr(result["scores"], "embedding", None) is None for result in results)
+
+def test_near_duplicates_of_stored_content_reuse_its_embedding(monkeypatch, tmp_path) -> None:
+    index = patch_moderator(monkeypatch, tmp_path, dedup=True)
+    spam = "buy cheap watches now at our store number {}"
+
+    async def scenario():
+        moderator = ContentModerator()
+        # Not stored, so stored content cannot inherit from it
+        await moderator.moderate_texts([spam.format(0)])
+        first = await moderator.moderate_texts([spam.format(1)], content_ids=[5])
+        second = await moderator.moderate_texts([spam.format(2)], content_ids=[6])
+        await asyncio.gather(*index._pending)
+        return first + second
+
+    results = asyncio.run(scenario())
+    assert "near_duplicate" not in results[0] and "near_duplicate" in results[1]
+    records = index._refresh()[0].store.records(2)
+    assert records["content_id"].tolist() == [5, 6]
+    assert (records["vector"][0] == records["vector"][1]).all()
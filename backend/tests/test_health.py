@@ -0,0 +1,45 @@
+import asyncio
+
+from app.core.health import DatabaseCheck, Readiness
+
+class CountingCheck(DatabaseCheck):
+    def __init__(self, ttl: float, fail: bool = False):
+        super().__init__(ttl=ttl)
+        self.pings = 0
+        self.fail = fail
+
+    def _ping(self) -> None:
+        self.pings += 1
+        if self.fail:
+            raise ConnectionError("database down")
+
+def test_database_check_is_cached_and_shared() -> None:
+    check = CountingCheck(ttl=60)
+
+    async def run():
+        return await asyncio.gather(*(check.check() for _ in range(20)))
+
+    assert all(asyncio.run(run()))
+    assert asyncio.run(check.check())
+    assert check.pings == 1
+
+def test_readiness_waits_for_warmup_and_drains_on_shutdown() -> None:
+    readiness = Readiness(CountingCheck(ttl=60), models_required=True)
+    assert asyncio.run(readiness.check())[0] is False
+
+    readiness.mark_started()
+    readiness.mark_models_loaded()
+    assert asyncio.run(readiness.check())[0] is False
+
+    readiness.mark_warmed_up(1.5)
+    ready, details = asyncio.run(readiness.check())
+    assert ready and details["warmup_seconds"] == 1.5
+
+    readiness.mark_stopping()
+    assert asyncio.run(readiness.check())[0] is False
+
+def test_readiness_requires_database() -> None:
+    readiness = Readiness(CountingCheck(ttl=60, fail=True), models_required=False)
+    readiness.mark_started()
+    ready, details = asyncio.run(readiness.check())
+    assert not ready and details["database"] is False
@@ -0,0 +1,150 @@
+import io
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.image_hash import ImageHash
+from app.services.image_hashing import (
+    SOURCE_ADMIN,
+    SOURCE_LEARNED,
+    VERDICT_BAD,
+    VERDICT_GOOD,
+    ImageHashIndex,
+    MultiIndexHash,
+    compute_hashes,
+    from_signed64,
+    hamming,
+    to_signed64,
+)
+from app.services.image_pipeline import decode_image
+
+def make_image(seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    # Smooth random blobs so the image survives re-encoding the way photos do
+    small = rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    return Image.fromarray(small).resize((400, 300), Image.BICUBIC)
+
+def encode(image: Image.Image, fmt: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **kwargs)
+    return buffer.getvalue()
+
+def test_reencoded_image_is_near_duplicate() -> None:
+    image = make_image(1)
+    original = compute_hashes(decode_image(encode(image, "PNG"), 224))
+    reencoded = compute_hashes(decode_image(encode(image, "JPEG", quality=60), 224))
+    other = compute_hashes(decode_image(encode(make_image(2), "PNG"), 224))
+
+    assert hamming(original[0], reencoded[0]) <= 6
+    assert hamming(original[0], other[0]) > 6
+
+def test_multi_index_matches_brute_force() -> None:
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    index = MultiIndexHash()
+    for i, value in enumerate(values):
+        index.add(value, i)
+
+    for _ in range(50):
+        query = values[rng.randrange(len(values))] ^ (1 << rng.randrange(64))
+        expected = sorted(i for i, value in enumerate(values) if hamming(query, value) <= 8)
+        found = sorted(payload for _, _, payload in index.search(query, 8))
+        assert found == expected
+
+def test_signed64_roundtrip() -> None:
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed64(value)
+        assert -(1 << 63) <= signed < (1 << 63)
+        assert from_signed64(signed) == value
+
+def test_multi_index_remove_reuses_slots() -> None:
+    rng = random.Random(1)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    index = MultiIndexHash()
+    for value in values:
+        index.add(value, value)
+    removed = set(values[::3])
+    for value in removed:
+        assert index.remove(value)
+    assert not index.remove(values[0])
+    replacements = [rng.getrandbits(64) for _ in range(len(removed))]
+    for value in replacements:
+        index.add(value, value)
+    live = [value for value in values if value not in removed] + replacements
+    assert len(index) == len(live) == len(index._values)
+
+    for query in values[:50]:
+        expected = sorted(value for value in live if hamming(query, value) <= 12)
+        assert sorted(payload for _, _, payload in index.search(query, 12)) == expected
+        assert sorted(payload for _, _, payload in index.search(query, 4)) == [
+            value for value in expected if hamming(query, value) <= 4
+        ]
+
+def test_learned_verdicts_never_override_admin_or_bad() -> None:
+    index = ImageHashIndex(max_distance=6, dhash_max_distance=10)
+    assert index.add(1, 1, VERDICT_BAD, {"nsfw": 1.0}, source=SOURCE_ADMIN, persist=False)
+    assert not index.add(1, 1, VERDICT_GOOD, {"nsfw": 0.01}, persist=False)
+    assert not index.add(1, 1, VERDICT_BAD, {"nsfw": 0.95}, persist=False)
+    assert not index.add(1, 1, VERDICT_GOOD, {}, source=SOURCE_ADMIN, persist=False)
+    assert index.lookup(1, 1)["scores"] == {"nsfw": 1.0}
+
+    assert index.add(2, 2, VERDICT_BAD, {"nsfw": 0.95}, persist=False)
+    assert not index.add(2, 2, VERDICT_GOOD, {"nsfw": 0.01}, persist=False)
+    assert index.lookup(2, 2)["verdict"] == VERDICT_BAD
+    # An admin may confirm a learned verdict, which then stays
+    assert index.add(2, 2, VERDICT_BAD, {"known_bad": 1.0}, source=SOURCE_ADMIN, persist=False)
+    assert index.stats()["learned"] == 0
+
+def far(i: int) -> int:
+    """Hashes that are far apart in Hamming distance."""
+    return random.Random(i).getrandbits(64)
+
+def test_learned_hashes_are_capped_and_expire() -> None:
+    index = ImageHashIndex(max_learned=3, learned_ttl_seconds=60)
+    index.add(far(0), 0, VERDICT_BAD, {}, source=SOURCE_ADMIN, persist=False)
+    for i in range(1, 6):
+        index.add(far(i), 0, VERDICT_GOOD, {}, persist=False)
+    assert index.stats()["learned"] == 3 and index.evictions == 2
+    assert index.lookup(far(1), 0) is None
+    assert index.lookup(far(5), 0) is not None
+
+    index._learned[far(3)] -= 120  # Learned two minutes ago
+    index._learned.move_to_end(far(3), last=False)
+    index.add(far(6), 0, VERDICT_GOOD, {}, persist=False)
+    assert index.lookup(far(3), 0) is None
+    assert index.lookup(far(0), 0)["verdict"] == VERDICT_BAD  # Admin hashes are never evicted
+
+def test_load_prunes_learned_rows_and_keeps_admin_verdicts() -> None:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    now = datetime.utcnow()
+
+    def row(i, verdict, source, age):
+        return ImageHash(
+            phash=to_signed64(far(i)), dhash=0, verdict=verdict, source=source, created_at=now - age,
+        )
+
+    db = session_factory()
+    db.add_all(
+        [row(1, VERDICT_BAD, SOURCE_ADMIN, timedelta(days=400)),
+         row(1, VERDICT_GOOD, SOURCE_LEARNED, timedelta(0)),
+         row(2, VERDICT_GOOD, SOURCE_LEARNED, timedelta(days=2))]
+        + [row(i, VERDICT_GOOD, SOURCE_LEARNED, timedelta(0)) for i in range(3, 7)]
+    )
+    db.commit()
+
+    index = ImageHashIndex(max_learned=3, learned_ttl_seconds=86400, session_factory=session_factory)
+    index.load()
+    assert index.lookup(far(1), 0)["verdict"] == VERDICT_BAD
+    assert index.stats()["learned"] == 3
+    assert index.lookup(far(2), 0) is None  # Expired
+    assert index.lookup(far(3), 0) is None  # Beyond the cap
+    sources = [row.source for row in db.query(ImageHash).order_by(ImageHash.id)]
+    assert sources == [SOURCE_ADMIN] + [SOURCE_LEARNED] * 3
@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_pipeline import decode_image, image_size_from_config, normalize_batch
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+def test_decode_image_resizes_to_rgb_square() -> None:
+    image = Image.new("RGBA", (640, 480), (200, 40, 10, 128))
+    pixels = decode_image(encode(image, "PNG"), 224)
+    assert pixels.shape == (224, 224, 3)
+    assert pixels.dtype == np.uint8
+    assert pixels[100, 100].tolist() == [200, 40, 10]
+
+def test_decode_image_accepts_memoryview_and_large_jpeg() -> None:
+    image = Image.new("RGB", (2000, 1500), (0, 128, 255))
+    pixels = decode_image(memoryview(encode(image, "JPEG")), 64)
+    assert pixels.shape == (64, 64, 3)
+    assert np.abs(pixels.astype(int) - [0, 128, 255]).max() <= 4
+
+def test_decode_image_keeps_matching_size() -> None:
+    image = Image.new("L", (32, 32), 77)
+    assert decode_image(encode(image, "PNG"), 32).tolist() == [[[77, 77, 77]] * 32] * 32
+
+def test_normalize_batch_matches_reference() -> None:
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, size=(4, 5, 3), dtype=np.uint8) for _ in range(3)]
+    mean, std = [0.485, 0.456, 0.406], [0.229, 0.224, 0.225]
+    batch = normalize_batch(images, mean, std)
+
+    expected = ((np.stack(images) / 255.0 - mean) / std).transpose(0, 3, 1, 2)
+    assert batch.shape == (3, 3, 4, 5)
+    assert batch.dtype == np.float32
+    assert batch.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(batch, expected, rtol=1e-5, atol=1e-5)
+
+def test_image_size_from_config() -> None:
+    assert image_size_from_config(384) == 384
+    assert image_size_from_config({"height": 256, "width": 256}) == 256
+    assert image_size_from_config({"shortest_edge": 224}) == 224
+    assert image_size_from_config([192, 192]) == 192
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.language_id import (
+    ROUTE_REVIEW, SAMPLES, UNDETERMINED, LanguageIdentifier, LanguageRouter, load_corpus,
+)
+
+ENGLISH_SPAM_AND_TECH = [
+    "Get the new iPhone 15 Pro at 70% off, limited offer, click the link to claim yours today",
+    "Kubernetes operators reconcile the desired state of custom resources in the cluster",
+    "Join our telegram channel for daily crypto signals and guaranteed profits",
+    "Buy cheap viagra online, free shipping worldwide, no prescription needed",
+]
+
+@pytest.fixture(scope="module")
+def identifier() -> LanguageIdentifier:
+    return LanguageIdentifier(min_chars=20, max_chars=300, min_confidence=0.9)
+
+@pytest.mark.parametrize("language, text", [
+    ("en", "I can't believe you would say something like that to me, you should be ashamed"),
+    ("es", "No puedo creer que me digas algo así, deberías estar avergonzado"),
+    ("fr", "Je n'arrive pas à croire que tu me dises une chose pareille, tu devrais avoir honte"),
+    ("de", "Ich kann nicht glauben, dass du so etwas zu mir sagst, du solltest dich schämen"),
+    ("it", "clicca qui per richiedere il tuo premio gratuito adesso"),
+    ("pt", "clique aqui para resgatar seu prêmio grátis agora mesmo"),
+    ("nl", "klik hier om je gratis prijs nu op te halen"),
+    ("ru", "Я не могу поверить, что ты мне такое говоришь"),
+    ("ja", "こんにちは、元気ですか？今日は天気がいいですね"),
+    ("zh", "我不敢相信你会对我说这样的话"),
+    ("ar", "لا أصدق أنك تقول لي شيئا كهذا"),
+])
+def test_detects_language(identifier, language, text) -> None:
+    assert identifier.detect(text)[0] == language
+
+def test_short_text_is_undetermined(identifier) -> None:
+    assert identifier.detect("lol ok") == (UNDETERMINED, 0.0)
+    assert identifier.detect("12345 !!! 67890 ??? 12345") == (UNDETERMINED, 0.0)
+
+def test_router_routes_and_counts_per_language(identifier) -> None:
+    router = LanguageRouter(
+        identifier, routes={"en": "text", "es": "text-multilingual"},
+        default_language="en", fallback=ROUTE_REVIEW, enabled=True,
+    )
+    languages, routes = router.route_many([
+        "The meeting has been moved to Thursday afternoon, please update your calendar.",
+        "No puedo creer que me digas algo así, deberías estar avergonzado",
+        "Ich kann nicht glauben, dass du so etwas zu mir sagst, du solltest dich schämen",
+        "ok",
+    ])
+    assert languages == ["en", "es", "de", UNDETERMINED]
+    assert routes == ["text", "text-multilingual", ROUTE_REVIEW, "text"]
+    assert router.route_keys() == ["text", "text-multilingual"]
+    stats = router.stats()["languages"]
+    assert stats["de"]["routes"] == {ROUTE_REVIEW: 1}
+    assert stats["en"]["texts"] == 1 and stats["en"]["avg_us"] > 0
+
+def test_disabled_router_sends_everything_to_default(identifier) -> None:
+    router = LanguageRouter(identifier, routes={"en": "text"}, enabled=False)
+    assert router.route_many(["Hola a todos, ¿cómo estáis hoy?"]) == ([None], ["text"])
+
+def test_english_spam_and_tech_text_routes_to_english_model() -> None:
+    # The sample profiles call some of these Italian, Spanish or Dutch
+    router = LanguageRouter(routes={"en": "text"}, default_language="en", enabled=True)
+    languages, routes = router.route_many(ENGLISH_SPAM_AND_TECH)
+    assert routes == ["text"] * len(ENGLISH_SPAM_AND_TECH)
+    assert languages == [UNDETERMINED] * len(ENGLISH_SPAM_AND_TECH)
+
+def test_default_fallback_is_english_model() -> None:
+    assert settings.TEXT_FALLBACK_ROUTE == "text"
+    router = LanguageRouter(routes={"en": "text"}, enabled=True)
+    assert router.route_many(ENGLISH_SPAM_AND_TECH[:1] + ["Я не могу поверить, что ты мне такое говоришь"]) == (
+        [UNDETERMINED, "ru"], ["text", "text"],
+    )
+
+def test_script_signal_still_diverts() -> None:
+    router = LanguageRouter(routes={"en": "text"}, fallback=ROUTE_REVIEW, enabled=True)
+    languages, routes = router.route_many(["我不敢相信你会对我说这样的话", ENGLISH_SPAM_AND_TECH[1]])
+    assert languages == ["zh", UNDETERMINED]
+    assert routes == [ROUTE_REVIEW, "text"]
+
+def test_scripts_only_identifier_skips_latin_text() -> None:
+    identifier = LanguageIdentifier(scripts_only=True)
+    assert identifier.detect("No puedo creer que me digas algo así, deberías estar avergonzado") == (UNDETERMINED, 0.0)
+    assert identifier.detect("Я не могу поверить, что ты мне такое говоришь") == ("ru", 1.0)
+
+def test_corpus_turns_on_latin_routing(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "corpus.json"
+    path.write_text(json.dumps(SAMPLES), encoding="utf-8")
+    assert load_corpus(str(path)) == SAMPLES
+    monkeypatch.setattr(settings, "LANGUAGE_ID_CORPUS_PATH", str(path))
+    router = LanguageRouter(routes={"en": "text", "es": "text-es"}, enabled=True)
+    assert router.route_many(["No puedo creer que me digas algo así, deberías estar avergonzado"]) == (
+        ["es"], ["text-es"],
+    )
+
+def test_corpus_must_map_languages_to_text(tmp_path) -> None:
+    path = tmp_path / "corpus.json"
+    path.write_text(json.dumps(["not", "a", "mapping"]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_corpus(str(path))
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Run in a fresh interpreter so modules other tests imported do not count.
+# A meta path finder records (and refuses) every attempt to import the heavy
+# libraries, so the check holds whether or not they are installed here.
+SCRIPT = """
+import sys
+
+HEAVY = ("torch", "transformers", "optimum")
+attempted = []
+
+class Recorder:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in HEAVY:
+            attempted.append(name)
+            raise ImportError(f"{name} imported at import time")
+        return None
+
+sys.meta_path.insert(0, Recorder())
+
+import main
+import run
+from app.api.v1.api import api_router
+from app.services import ml_service, torch_runtime
+
+assert main.app is not None
+assert not attempted, attempted
+assert not [name for name in sys.modules if name.split(".")[0] in HEAVY]
+assert torch_runtime.torch_runtime.stats()["configured"] is False
+print("ok")
+"""
+
+def test_importing_the_app_does_not_load_ml_libraries(tmp_path) -> None:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/app.db",
+        "ML_PRELOAD": "false",
+        "LOG_FORMAT": "text",
+        "PYTHONPATH": str(BACKEND),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
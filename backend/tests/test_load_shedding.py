@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from app.services.batching import DynamicBatcher
+from app.services.load_shedding import BULK, INTERACTIVE, STANDARD, LoadShedder, priority_level
+
+TARGETS_MS = {INTERACTIVE: 50.0, STANDARD: 250.0, BULK: 2000.0}
+
+def _next_window() -> None:
+    time.sleep(0.015)
+
+def test_sheds_lower_classes_first() -> None:
+    shedder = LoadShedder(TARGETS_MS, interval_ms=10, enabled=True)
+    # Bursts do not count: only the window's smallest delay is compared
+    shedder.record(priority_level(BULK), 5.0)
+    shedder.record(priority_level(BULK), 0.1)
+    _next_window()
+    assert shedder.admit(BULK)
+
+    shedder.record(priority_level(BULK), 3.0)
+    _next_window()
+    assert not shedder.admit(BULK)
+    assert shedder.admit(STANDARD) and shedder.admit(INTERACTIVE)
+
+    shedder.record(priority_level(STANDARD), 0.5)
+    _next_window()
+    assert not shedder.admit(STANDARD)
+    assert not shedder.admit(BULK)
+    assert shedder.admit(INTERACTIVE)
+
+    classes = shedder.stats()["classes"]
+    assert classes[BULK]["shed"] == 2 and classes[BULK]["admitted"] == 1
+    assert classes[STANDARD]["shed"] == 1 and classes[STANDARD]["overloaded"]
+    assert classes[INTERACTIVE]["shed"] == 0
+
+def test_recovers_when_queue_delay_drops() -> None:
+    shedder = LoadShedder(TARGETS_MS, interval_ms=10, enabled=True)
+    shedder.record(priority_level(STANDARD), 1.0)
+    _next_window()
+    assert not shedder.admit(STANDARD)
+
+    shedder.record(priority_level(STANDARD), 0.01)
+    _next_window()
+    assert shedder.admit(STANDARD)
+
+    shedder.record(priority_level(STANDARD), 1.0)
+    _next_window()
+    assert not shedder.admit(STANDARD)
+    _next_window()  # No traffic at all
+    assert shedder.admit(STANDARD)
+
+def test_disabled_shedder_admits_everything() -> None:
+    shedder = LoadShedder(TARGETS_MS, interval_ms=10, enabled=False)
+    shedder.record(priority_level(INTERACTIVE), 10.0)
+    _next_window()
+    assert shedder.admit(BULK)
+
+def test_batcher_serves_higher_priority_first() -> None:
+    batches = []
+    delays = []
+
+    def process(items):
+        batches.append(list(items))
+        return items
+
+    async def main():
+        batcher = DynamicBatcher(
+            process, executor=None, max_batch_size=2, max_wait_ms=20, priorities=3,
+            on_queue_delay=lambda level, delay: delays.append(level),
+        )
+        bulk = [asyncio.ensure_future(batcher.submit(f"bulk-{i}", 2)) for i in range(2)]
+        urgent = [asyncio.ensure_future(batcher.submit(f"chat-{i}", 0)) for i in range(2)]
+        results = await asyncio.gather(*bulk, *urgent)
+        batcher.close()
+        return results
+
+    assert asyncio.run(main()) == ["bulk-0", "bulk-1", "chat-0", "chat-1"]
+    assert batches == [["chat-0", "chat-1"], ["bulk-0", "bulk-1"]]
+    # The waiting bulk queue reports its head's age while it is passed over
+    assert delays[:3] == [0, 0, 2]
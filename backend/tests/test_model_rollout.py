@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ModelRolloutError
+from app.services import ml_service, model_rollout as rollout_module
+from app.services.ml_service import ContentModerator, TextModelPipeline
+from app.services.model_registry import ModelBundle, ModelRegistry
+from app.services.model_rollout import ModelRollout
+
+class FakeTokenizer:
+    is_fast = True
+    pad_token_id = 0
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return {"input_ids": [1] * len(texts.split())}
+        return {"input_ids": [[1] * len(text.split()) for text in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3
+
+def fake_bundle(toxicity: float) -> ModelBundle:
+    # The "model" is just the toxicity score every text gets
+    return ModelBundle(f"fake-{toxicity}", toxicity, tokenizer=FakeTokenizer())
+
+def fake_score(self, premises, pad_to):
+    return [{"toxic": self.model} for _ in premises]
+
+@pytest.fixture
+def moderator(monkeypatch) -> ContentModerator:
+    registry = ModelRegistry()
+    registry.register("text", lambda: fake_bundle(0.1))
+    monkeypatch.setattr(ml_service, "model_registry", registry)
+    monkeypatch.setattr(rollout_module, "model_registry", registry)
+    monkeypatch.setattr(rollout_module, "load_nli_model", lambda source: fake_bundle(float(source)))
+    monkeypatch.setattr(ml_service, "get_device", lambda: "cpu")
+    monkeypatch.setattr(TextModelPipeline, "_score_encoded", fake_score)
+    monkeypatch.setattr(ml_service.settings, "TEXT_DEDUP_ENABLED", False)
+    return ContentModerator()
+
+def test_swap_waits_for_in_flight_requests(moderator) -> None:
+    rollout = ModelRollout()
+
+    async def scenario():
+        old = moderator.text_pipelines["text"]
+        assert (await moderator.moderate_text("a friendly hello"))["action"] == "approve"
+        with old.lease():
+            status = rollout.start_swap(moderator, "text", "0.95")
+            with pytest.raises(ModelRolloutError):
+                rollout.start_swap(moderator, "text", "0.5")
+            for _ in range(100):
+                if status["state"] == "draining":
+                    break
+                await asyncio.sleep(0.01)
+            # New requests already use the new model; the old one waits for our lease
+            assert status["state"] == "draining" and not old.closed
+            assert (await moderator.moderate_text("another hello"))["action"] == "reject"
+        await rollout._tasks["text"]
+        assert status["state"] == "done" and status["model"] == "fake-0.95"
+        assert old.closed and old.model is None
+        assert ml_service.model_registry.get("text").name == "fake-0.95"
+
+    asyncio.run(scenario())
+
+def test_shadow_records_deltas_without_changing_results(moderator) -> None:
+    rollout = ModelRollout()
+
+    async def scenario():
+        status = rollout.start_shadow(moderator, "text", "0.9", sample_rate=1.0)
+        await rollout._tasks["text"]
+        assert status["state"] == "done"
+        results = await moderator.moderate_texts(["first message", "second message"])
+        assert [result["action"] for result in results] == ["approve", "approve"]
+        stats = await rollout.stop_shadow(moderator, "text")
+        assert stats["compared"] == 2
+        assert stats["categories"]["toxic"]["mean_delta"] == pytest.approx(0.8)
+        assert stats["action_changes"] == {"approve -> reject": 2}
+        assert moderator.shadows == {}
+
+    asyncio.run(scenario())
+
+def test_swap_promotes_the_loaded_shadow(moderator, monkeypatch) -> None:
+    rollout = ModelRollout()
+
+    async def scenario():
+        rollout.start_shadow(moderator, "text", "0.9", sample_rate=0.5)
+        await rollout._tasks["text"]
+        monkeypatch.setattr(rollout_module, "load_nli_model", pytest.fail)
+        status = rollout.start_swap(moderator, "text", "0.9")
+        await rollout._tasks["text"]
+        assert status["state"] == "done" and status["promoted_shadow"] is True
+        assert moderator.shadows == {}
+        assert (await moderator.moderate_text("promoted model"))["action"] == "reject"
+
+    asyncio.run(scenario())
+
+def test_failed_swap_frees_the_new_model(moderator, monkeypatch) -> None:
+    rollout = ModelRollout()
+    released = []
+    monkeypatch.setattr(rollout_module, "release_memory", released.append)
+
+    def broken_warmup(pipeline):
+        raise RuntimeError("warmup failed")
+
+    async def scenario():
+        rollout.start_shadow(moderator, "text", "0.9", sample_rate=0.5)
+        await rollout._tasks["text"]
+        monkeypatch.setattr(rollout_module, "_warm", broken_warmup)
+        status = rollout.start_swap(moderator, "text", "0.9")
+        await rollout._tasks["text"]
+        assert status["state"] == "failed" and status["error"] == "warmup failed"
+        assert released == ["cpu"]
+        # The live model is untouched
+        assert (await moderator.moderate_text("still the old model"))["action"] == "approve"
+
+    asyncio.run(scenario())
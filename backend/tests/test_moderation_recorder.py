@@ -0,0 +1,99 @@
+import asyncio
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Content, ModerationLog, User
+from app.models.base import Base
+from app.services.moderation_recorder import ModerationRecorder
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def make_event(**overrides) -> dict:
+    event = {
+        "content_type": "text",
+        "user_id": 1,
+        "latency_ms": 12.5,
+        "result": {
+            "is_approved": False,
+            "scores": {"violence": 0.9},
+            "reason": "Violation found in content",
+        },
+    }
+    event.update(overrides)
+    return event
+
+def test_record_is_buffered_until_flush() -> None:
+    session_factory = make_session_factory()
+    recorder = ModerationRecorder(batch_size=100, session_factory=session_factory)
+
+    async def run() -> None:
+        for _ in range(3):
+            await recorder.record(make_event())
+        db = session_factory()
+        assert db.query(ModerationLog).count() == 0
+        db.close()
+        await recorder.stop()
+
+    asyncio.run(run())
+
+    db = session_factory()
+    assert db.query(ModerationLog).count() == 3
+    assert recorder.stats()["flushed"] == 3
+    db.close()
+
+def test_flush_links_owned_content_without_changing_it() -> None:
+    session_factory = make_session_factory()
+    db = session_factory()
+    owner = User(email="owner@example.com", hashed_password="x")
+    db.add(owner)
+    db.commit()
+    content = Content(content_type="text", content="hello", user_id=owner.id)
+    db.add(content)
+    db.commit()
+    content_id, owner_id = content.id, owner.id
+    db.close()
+
+    recorder = ModerationRecorder(session_factory=session_factory)
+
+    async def run() -> None:
+        await recorder.record(make_event(content_id=content_id, user_id=owner_id + 1))
+        await recorder.record(make_event(content_id=content_id, user_id=owner_id))
+        await recorder.flush()
+
+    asyncio.run(run())
+
+    db = session_factory()
+    logs = db.scalars(select(ModerationLog).order_by(ModerationLog.id)).all()
+    assert [log.content_id for log in logs] == [None, content_id]
+    # The result is of the request's payload, so the stored content keeps its own
+    content = db.get(Content, content_id)
+    assert (content.moderation_result, content.is_approved) == (None, False)
+    db.close()
+
+def test_overflow_policies() -> None:
+    session_factory = make_session_factory()
+    drop_newest = ModerationRecorder(
+        max_buffer=2, overflow_policy="drop_newest", session_factory=session_factory
+    )
+    block = ModerationRecorder(
+        max_buffer=2, overflow_policy="block", session_factory=session_factory
+    )
+
+    async def run() -> None:
+        results = [await drop_newest.record(make_event()) for _ in range(3)]
+        assert results == [True, True, False]
+        assert drop_newest.stats()["dropped"] == 1
+
+        for _ in range(3):
+            assert await block.record(make_event())
+        assert block.stats()["flushed"] == 2
+        assert block.stats()["buffered"] == 1
+
+    asyncio.run(run())
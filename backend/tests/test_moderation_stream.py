@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.services.moderation_stream import ModerationStream, TokenBucket
+
+class FakeUser:
+    id = 1
+    is_superuser = False
+
+class FakeModerator:
+    def __init__(self):
+        self.calls = []
+
+    async def moderate_text(self, text, content_type="text", tenant=None, priority="standard", deadline=None, user_id=None):
+        self.calls.append((text, content_type, tenant))
+        await asyncio.sleep(0.01 if text == "slow" else 0)
+        return {"is_approved": "bad" not in text, "action": "approve", "scores": {}}
+
+def make_client(moderator, **options) -> TestClient:
+    app = FastAPI()
+
+    @app.websocket("/stream")
+    async def stream(websocket: WebSocket):
+        await websocket.accept()
+        await ModerationStream(websocket, moderator, FakeUser(), **options).run()
+
+    return TestClient(app)
+
+def test_messages_are_answered_by_id() -> None:
+    moderator = FakeModerator()
+    with make_client(moderator).websocket_connect("/stream") as ws:
+        ws.send_json({"id": "a", "text": "slow"})
+        ws.send_json({"id": "b", "text": "something bad", "content_type": "chat"})
+        replies = {reply["id"]: reply for reply in (ws.receive_json(), ws.receive_json())}
+    # The fast message overtakes the slow one
+    assert replies["a"]["result"]["is_approved"] is True
+    assert replies["b"]["result"]["is_approved"] is False
+    assert ("something bad", "chat", "1") in moderator.calls
+
+def test_invalid_and_rate_limited_messages_get_errors() -> None:
+    moderator = FakeModerator()
+    client = make_client(moderator, messages_per_second=0.001, burst=2, max_chars=20)
+    with client.websocket_connect("/stream") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"id": None, "error": "invalid_json"}
+        ws.send_json({"id": 1, "text": "x" * 21})
+        assert ws.receive_json() == {"id": 1, "error": "text_too_long"}
+        replies = []
+        for i in range(3):
+            ws.send_json({"id": i, "text": "hello"})
+            replies.append(ws.receive_json())
+    assert [reply.get("error") for reply in replies] == [None, None, "rate_limited"]
+    assert len(moderator.calls) == 2
+
+def test_messages_get_the_http_text_validation() -> None:
+    moderator = FakeModerator()
+    with make_client(moderator, max_chars=20000).websocket_connect("/stream") as ws:
+        ws.send_json({"id": 1, "text": "x" * 10001})
+        assert ws.receive_json() == {"id": 1, "error": "invalid_text"}
+    assert moderator.calls == []
+
+def test_stream_closes_when_the_token_expires() -> None:
+    moderator = FakeModerator()
+    with make_client(moderator, expires_at=time.time() + 0.3).websocket_connect("/stream") as ws:
+        ws.send_json({"id": 1, "text": "hello"})
+        assert ws.receive_json()["result"]["is_approved"] is True
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert (closed.value.code, closed.value.reason) == (1008, "token_expired")
+
+def test_token_comes_from_the_header_or_subprotocol_but_not_the_url() -> None:
+    app = FastAPI()
+
+    @app.websocket("/token")
+    async def token(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_json({"token": deps.websocket_token(websocket)})
+
+    client = TestClient(app)
+    with client.websocket_connect("/token", headers={"Authorization": "Bearer abc"}) as ws:
+        assert ws.receive_json() == {"token": "abc"}
+    with client.websocket_connect("/token", subprotocols=[deps.WS_TOKEN_SUBPROTOCOL, "def"]) as ws:
+        assert ws.receive_json() == {"token": "def"}
+    with client.websocket_connect("/token?token=ghi") as ws:
+        assert ws.receive_json() == {"token": None}
+
+def test_token_bucket_refills() -> None:
+    bucket = TokenBucket(rate=1000, burst=1)
+    assert bucket.take()
+    bucket.updated -= 0.01
+    assert bucket.take()
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from app.services import ml_service
+from app.services.ml_service import ContentModerator, TextModelPipeline, TextScores
+from app.services.model_registry import ModelBundle, ModelRegistry
+from app.services.near_duplicate import TextDedupIndex, normalize_text
+from app.services.policy import PolicyEngine
+
+SPAM = "Congratulations!!! You have WON a $500 gift card. Claim it now at http://win-prizes.example/{} before it expires"
+OTHER = "The council meeting on Thursday will discuss the new cycle lanes proposed for the high street"
+
+def make_index(**kwargs) -> TextDedupIndex:
+    options = dict(threshold=0.8, min_chars=20, max_entries=100, ttl_seconds=60, campaign_size=3)
+    options.update(kwargs)
+    return TextDedupIndex(**options)
+
+def test_normalize_text() -> None:
+    assert normalize_text("  Hello,   WORLD!! 2024 ") == "hello world 0000"
+
+def test_spam_variants_inherit_verdict() -> None:
+    index = make_index()
+    index.add(index.signature(SPAM.format("a1")), {"spam": 0.97, "toxic": 0.02}, "en")
+
+    match = index.lookup(index.signature(SPAM.format("b2").replace("WON", "won")))
+    assert match is not None
+    assert (match["scores"], match["language"]) == ({"spam": 0.97, "toxic": 0.02}, "en")
+    assert match["near_duplicate"]["similarity"] >= 0.8
+    assert index.lookup(index.signature(OTHER)) is None
+
+def test_matches_do_not_share_state() -> None:
+    index = make_index()
+    scores = {"spam": 0.9}
+    index.add(index.signature(SPAM.format(1)), scores)
+    scores["spam"] = 0.0
+    first = index.lookup(index.signature(SPAM.format(2)))
+    first["scores"]["spam"] = 0.1
+    first["near_duplicate"]["campaign"] = True
+    second = index.lookup(index.signature(SPAM.format(3)))
+    assert second["scores"] == {"spam": 0.9}
+    assert second["near_duplicate"]["campaign"] is False
+
+def test_campaign_flag_after_repeated_matches() -> None:
+    index = make_index()
+    index.add(index.signature(SPAM.format(0)), {"spam": 0.01})
+    flags = [index.lookup(index.signature(SPAM.format(i)))["near_duplicate"]["campaign"] for i in range(1, 4)]
+    assert flags == [False, False, True]
+
+def test_short_texts_are_not_indexed() -> None:
+    assert make_index().signature("ok thanks") is None
+
+def test_eviction_bounds_memory_and_age() -> None:
+    index = make_index(max_entries=5)
+    for i in range(20):
+        index.add(index.signature(f"{OTHER} and item number {'x' * i}"), {"spam": 0.01})
+    assert len(index) == 5
+
+    index = make_index(ttl_seconds=0.01)
+    index.add(index.signature(SPAM.format(1)), {"spam": 0.99})
+    time.sleep(0.02)
+    assert index.lookup(index.signature(SPAM.format(1))) is None
+    assert len(index) == 0
+
+def test_hits_are_re_evaluated_under_the_callers_policy(monkeypatch) -> None:
+    class FakeTokenizer:
+        is_fast = True
+        pad_token_id = 0
+
+        def __call__(self, texts, **kwargs):
+            return {"input_ids": [[1] * len(text.split()) for text in texts]}
+
+        def num_special_tokens_to_add(self, pair=False):
+            return 3
+
+    passes = []
+
+    def score(self, premises, pad_to):
+        passes.append(len(premises))
+        return [TextScores(spam=0.8) for _ in premises]
+
+    policy = PolicyEngine(path=None)
+    policy.load_document({"version": "v1", "default_threshold": 0.7, "tenants": {"7": {"thresholds": {"spam": 0.9}}}})
+    registry = ModelRegistry()
+    registry.register("text", lambda: ModelBundle("fake", None, tokenizer=FakeTokenizer()))
+    monkeypatch.setattr(ml_service, "model_registry", registry)
+    monkeypatch.setattr(ml_service, "get_device", lambda: "cpu")
+    monkeypatch.setattr(ml_service, "policy_engine", policy)
+    monkeypatch.setattr(ml_service, "text_dedup_index", make_index())
+    monkeypatch.setattr(TextModelPipeline, "_score_encoded", score)
+
+    async def scenario():
+        moderator = ContentModerator()
+        first = await moderator.moderate_text(SPAM.format(1), tenant="1")
+        first["categories"]["spam"]["score"] = 0.0
+        second = await moderator.moderate_text(SPAM.format(2), tenant="7")
+        third = await moderator.moderate_text(SPAM.format(3), tenant="1")
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert passes == [1]
+    assert (first["action"], second["action"], third["action"]) == ("reject", "approve", "reject")
+    assert "near_duplicate" in second and "near_duplicate" not in first
+    assert third["categories"]["spam"]["score"] == 0.8
@@ -0,0 +1,94 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.core.exceptions import PolicyError
+from app.services.policy import ACTIONS, PolicyEngine, compile_expression, score_matrix
+
+POLICY = {
+    "version": "test-1",
+    "default_threshold": 0.7,
+    "thresholds": {"self_harm": 0.5},
+    "rules": [{"name": "violent_self_harm", "when": "violence > 0.5 and self_harm > 0.3", "action": "review"}],
+    "content_types": {"image": {"default_threshold": 0.9}},
+    "tenants": {"7": {"thresholds": {"violence": 0.95}}},
+}
+
+def make_engine(document=POLICY) -> PolicyEngine:
+    engine = PolicyEngine(path=None)
+    engine.load_document(document)
+    return engine
+
+def test_expression_evaluates_columns() -> None:
+    evaluate = compile_expression("0.2 < a <= 0.6 or max(a, b) > 0.9 and not c > 0.5")
+    columns = {"a": np.array([0.3, 0.1, 0.1]), "b": np.array([0.0, 0.95, 0.95]), "c": np.array([0.0, 0.0, 0.9])}
+    assert evaluate(columns.__getitem__).tolist() == [True, True, False]
+
+def test_expression_keywords_in_any_case() -> None:
+    evaluate = compile_expression("a > 0.5 AND b > 0.5 Or NOT c < 0.5")
+    columns = {"a": np.array([0.9, 0.9, 0.1]), "b": np.array([0.9, 0.1, 0.1]), "c": np.array([0.0, 0.0, 0.9])}
+    assert evaluate(columns.__getitem__).tolist() == [True, False, True]
+
+def test_non_finite_division_does_not_match() -> None:
+    evaluate = compile_expression("a / b > 2 or not a / b < 2")
+    columns = {"a": np.array([0.9, 0.9, 0.0, 0.1]), "b": np.array([0.3, 0.0, 0.0, 0.5])}
+    with np.errstate(all="raise"):
+        assert evaluate(columns.__getitem__).tolist() == [True, False, False, False]
+
+@pytest.mark.parametrize("expression", ["__import__('os')", "a.b > 1", "a == 1", "a >"])
+def test_expression_rejects_unsupported_syntax(expression) -> None:
+    with pytest.raises(PolicyError):
+        compile_expression(expression)
+
+def test_thresholds_rules_and_overrides() -> None:
+    engine = make_engine()
+    result = engine.evaluate({"violence": 0.6, "self_harm": 0.4})
+    assert result["action"] == "review"
+    assert result["is_approved"] is False
+    assert result["policy"] == {"version": "test-1", "rules": ["violent_self_harm"]}
+
+    result = engine.evaluate({"violence": 0.1, "self_harm": 0.55})
+    assert result["action"] == "reject"
+    assert result["categories"]["self_harm"]["threshold"] == pytest.approx(0.5)
+
+    assert engine.evaluate({"nsfw": 0.8}, content_type="image")["is_approved"] is True
+    assert engine.evaluate({"violence": 0.9, "self_harm": 0.1}, tenant="7")["action"] == "approve"
+    assert engine.evaluate({"violence": 0.9, "nsfw": 0.1}, content_type="image", tenant="7")["action"] == "approve"
+
+def test_evaluate_many_matches_single_items() -> None:
+    engine = make_engine()
+    rng = np.random.default_rng(0)
+    items = [
+        {"violence": float(v), "self_harm": float(s), "hate_speech": float(h)}
+        for v, s, h in rng.random((200, 3))
+    ]
+    categories, matrix = score_matrix(items)
+    actions = engine.evaluate_many(categories, matrix)
+    assert [ACTIONS[action] for action in actions] == [engine.evaluate(item)["action"] for item in items]
+
+def test_concurrent_first_use_compiles_one_policy() -> None:
+    engine = make_engine()
+    with ThreadPoolExecutor(8) as pool:
+        policies = list(pool.map(lambda _: engine.policy_for("image", "7"), range(64)))
+    assert all(policy is policies[0] for policy in policies)
+    assert engine.policy_for("image", "7") is policies[0]
+
+def test_invalid_policy_keeps_previous(tmp_path) -> None:
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps(POLICY))
+    engine = PolicyEngine(path=str(path), reload_interval=0)
+    assert engine.version == "test-1"
+
+    path.write_text(json.dumps({"version": "broken", "rules": [{"name": "x", "when": "a ==", "action": "review"}]}))
+    os.utime(path, (1, 1))
+    assert engine.maybe_reload() is False
+    assert engine.version == "test-1"
+    assert engine.last_error
+
+    path.write_text(json.dumps({**POLICY, "version": "test-2"}))
+    os.utime(path, (2, 2))
+    assert engine.maybe_reload() is True
+    assert engine.version == "test-2"
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.core.exceptions import ProfilerBusy
+from app.core.tracing import Tracer, parse_traceparent
+from app.services.profiling import SamplingProfiler
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_folds_the_stacks_of_other_threads() -> None:
+    profiler = SamplingProfiler(max_seconds=1.0)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        result = profiler.profile(0.1, interval_ms=2)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result["samples"] > 5
+    folded = profiler.folded(result["stacks"])
+    lines = folded.splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("busy;") and "test_profiling:busy_loop" in line for line in lines)
+    assert not any("SamplingProfiler._sample" in line for line in lines)
+
+def test_only_one_profile_runs_at_a_time() -> None:
+    profiler = SamplingProfiler()
+
+    async def scenario():
+        first = asyncio.ensure_future(profiler.profile_async(0.1))
+        await asyncio.sleep(0.02)
+        with pytest.raises(ProfilerBusy):
+            profiler.profile(0.1)
+        await first
+        assert profiler.stats()["profiles"] == 1
+
+    asyncio.run(scenario())
+
+def test_sampled_request_spans_are_exported_nested(tmp_path) -> None:
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(sample_rate=1.0, export_path=str(path), honor_traceparent=False)
+
+    async def handler():
+        with tracer.span("auth"):
+            pass
+        session = tracer.start_span("db.session")
+        with tracer.span("inference", kind="text"):
+            await asyncio.sleep(0)
+        return session
+
+    async def scenario():
+        root = tracer.start_trace("http.request", **{"url.path": "/moderate/text"})
+        with tracer.activate(root):
+            session = await handler()
+        root.end()
+        session.end()  # Ends after the response, like dependency teardown
+
+    asyncio.run(scenario())
+    tracer.flush()
+    spans = {span["name"]: span for span in map(json.loads, path.read_text().splitlines())}
+    assert set(spans) == {"http.request", "auth", "db.session", "inference"}
+    root = spans["http.request"]
+    assert root["parent_span_id"] is None and len(root["trace_id"]) == 32
+    for name in ("auth", "db.session", "inference"):
+        assert spans[name]["trace_id"] == root["trace_id"]
+        assert spans[name]["parent_span_id"] == root["span_id"]
+    assert spans["inference"]["attributes"] == {"kind": "text"}
+    assert spans["inference"]["end_time_unix_nano"] >= spans["inference"]["start_time_unix_nano"]
+
+def test_unsampled_requests_and_traceparent() -> None:
+    tracer = Tracer(sample_rate=0.0, export_path="unused.jsonl", honor_traceparent=True)
+    assert tracer.start_trace("http.request") is None
+    with tracer.span("auth") as span:
+        assert span is None
+
+    header = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    assert parse_traceparent(header) == ("a" * 32, "b" * 16, True)
+    root = tracer.start_trace("http.request", header)
+    assert root.trace.trace_id == "a" * 32 and root.parent_span_id == "b" * 16
+    assert tracer.start_trace("http.request", header[:-2] + "00") is None
+    assert parse_traceparent("garbage") is None
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.core import responses
+from app.core.responses import COMPACT_MEDIA_TYPE, JSON_MEDIA_TYPE, moderation_response, negotiate
+from app.schemas.moderation import CompactModerationResponse, ModerationResponse
+from app.services.policy import PolicyEngine
+
+POLICY = {"version": "test-1", "default_threshold": 0.7, "rules": []}
+
+def make_results():
+    engine = PolicyEngine(path=None)
+    engine.load_document(POLICY)
+    return [
+        engine.evaluate({"toxic": 0.9, "spam": 0.1}),
+        engine.evaluate({"toxic": 0.2, "spam": 0.05}),
+    ]
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    ("text/html", JSON_MEDIA_TYPE),
+    (COMPACT_MEDIA_TYPE, COMPACT_MEDIA_TYPE),
+    (f"application/json;q=0.5, {COMPACT_MEDIA_TYPE}", COMPACT_MEDIA_TYPE),
+    (f"application/json, {COMPACT_MEDIA_TYPE};q=0.2", JSON_MEDIA_TYPE),
+    (f"{COMPACT_MEDIA_TYPE};q=0", JSON_MEDIA_TYPE),
+])
+def test_negotiate(accept, expected) -> None:
+    assert negotiate(accept) == expected
+
+def test_msgpack_only_offered_when_installed(monkeypatch) -> None:
+    monkeypatch.setattr(responses, "msgpack", None)
+    assert negotiate("application/msgpack") == JSON_MEDIA_TYPE
+
+def test_full_json_matches_typed_model() -> None:
+    result = make_results()[0]
+    response = moderation_response([result], JSON_MEDIA_TYPE, single=True)
+    body = ModerationResponse.model_validate(json.loads(response.body))
+    assert body.data.action == "reject"
+    assert body.data.categories["toxic"].is_violation is True
+
+def test_compact_lists_categories_once() -> None:
+    results = make_results()
+    response = moderation_response(results + [None], COMPACT_MEDIA_TYPE)
+    assert response.media_type == COMPACT_MEDIA_TYPE
+    body = CompactModerationResponse.model_validate(json.loads(response.body))
+    assert body.categories == ["toxic", "spam"]
+    assert body.policy_version == "test-1"
+    first, second, missing = body.results
+    assert first.scores == [0.9, 0.1] and first.violations == [0] and not first.approved
+    assert second.action == "approve" and second.violations == []
+    assert missing is None
+    assert len(response.body) < len(moderation_response(results, JSON_MEDIA_TYPE).body)
+
+def test_compact_payload_fields_all_validate() -> None:
+    results = make_results()
+    results[0].update(language="de", near_duplicate={"similarity": 0.9, "matches": 2, "campaign": False})
+    results[1].update(fallback="deadline", language="en")
+    payload = json.loads(moderation_response(results, COMPACT_MEDIA_TYPE).body)
+    body = CompactModerationResponse.model_validate(payload)
+    # No emitted field is dropped by the model
+    assert body.model_dump(exclude_unset=True) == payload
+    assert (body.results[0].language, body.results[1].fallback) == ("de", "deadline")
@@ -0,0 +1,78 @@
+import json
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.models import Content, User
+from app.models.base import Base
+from app.models.content import REVIEW_DONE, REVIEW_PENDING
+
+def make_session_factory(url: str = "sqlite://"):
+    options = {"poolclass": StaticPool} if url == "sqlite://" else {}
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30}, **options)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def add_queue(db, priorities) -> None:
+    db.add_all([User(id=i, email=f"user{i}@example.com", hashed_password="x") for i in (1, 2, 3)])
+    db.add_all([
+        Content(
+            id=i + 1, content_type="text", content=f"text {i}", user_id=1,
+            review_status=REVIEW_PENDING, review_priority=priority,
+        )
+        for i, priority in enumerate(priorities)
+    ])
+    db.commit()
+
+def test_claims_are_ordered_exclusive_and_leased() -> None:
+    db = make_session_factory()()
+    add_queue(db, [0.2, 0.9, 0.5, 0.7, 0.1])
+
+    first = crud.content.claim_for_review(db, reviewer_id=2, limit=2, lease_seconds=60)
+    assert [item.id for item in first] == [2, 4]
+    second = crud.content.claim_for_review(db, reviewer_id=3, limit=10, lease_seconds=60)
+    assert [item.id for item in second] == [3, 1, 5]
+    assert crud.content.claim_for_review(db, reviewer_id=3, limit=10, lease_seconds=60) == []
+
+    # Only the holder can decide
+    assert crud.content.record_reviews(db, reviewer_id=3, decisions={2: True}) == []
+    assert crud.content.record_reviews(db, reviewer_id=2, decisions={2: True, 4: False}) == [2, 4]
+    decided = db.get(Content, 4)
+    db.refresh(decided)
+    assert (decided.review_status, decided.is_approved, decided.moderation_action) == (REVIEW_DONE, False, "reject")
+    assert json.loads(decided.moderation_result) == {"is_approved": False, "action": "reject", "reviewed_by": 2}
+
+    # An expired lease goes back to the queue
+    db.get(Content, 3).review_lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert [item.id for item in crud.content.claim_for_review(db, reviewer_id=2, limit=5, lease_seconds=60)] == [3]
+    assert crud.content.release_reviews(db, reviewer_id=3, ids=[1, 3]) == [1]
+    assert crud.content.review_queue_stats(db)["pending"] == 1
+
+def test_concurrent_claimers_never_share_items(tmp_path) -> None:
+    factory = make_session_factory(f"sqlite:///{tmp_path}/queue.db")
+    with factory() as db:
+        add_queue(db, [i / 300 for i in range(300)])
+
+    claimed = {reviewer: [] for reviewer in (1, 2, 3)}
+
+    def reviewer(reviewer_id: int) -> None:
+        with factory() as db:
+            while True:
+                items = crud.content.claim_for_review(db, reviewer_id=reviewer_id, limit=7, lease_seconds=60)
+                if not items:
+                    return
+                claimed[reviewer_id] += [item.id for item in items]
+
+    threads = [threading.Thread(target=reviewer, args=(reviewer_id,)) for reviewer_id in claimed]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_claimed = [content_id for ids in claimed.values() for content_id in ids]
+    assert sorted(all_claimed) == list(range(1, 301))
@@ -0,0 +1,17 @@
+import sys
+
+import pytest
+
+import run
+
+def test_reload_is_opt_in(monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(run.uvicorn, "run", lambda app, **kwargs: calls.append(kwargs["reload"]))
+    for argv in (["run.py"], ["run.py", "--reload"]):
+        monkeypatch.setattr(sys, "argv", argv)
+        run.main()
+    assert calls == [False, True]
+
+    monkeypatch.setattr(sys, "argv", ["run.py", "--prefork", "--reload"])
+    with pytest.raises(SystemExit):
+        run.main()
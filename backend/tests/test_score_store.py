@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.models import Content, User
+from app.models.base import Base
+from app.services.policy import PolicyEngine
+from app.services.score_store import SCORE_DTYPE, backfill_scores, rethreshold
+
+def make_session():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def make_engine(document) -> PolicyEngine:
+    engine = PolicyEngine(path=None)
+    engine.load_document(document)
+    return engine
+
+def add_contents(db, n: int):
+    db.add(User(id=1, email="owner@example.com", hashed_password="x"))
+    db.add_all([Content(id=i + 1, content_type="text", content=f"text {i}", user_id=1) for i in range(n)])
+    db.commit()
+
+def test_results_are_stored_with_packed_scores() -> None:
+    db = make_session()
+    add_contents(db, 1)
+    result = make_engine({"version": "v1"}).evaluate({"violence": 0.8, "spam": 0.1})
+    crud.content.set_moderation_results(db, results={1: result})
+
+    content = db.get(Content, 1)
+    assert content.moderation_action == "reject"
+    assert content.policy_version == "v1"
+    assert np.frombuffer(content.scores, dtype=SCORE_DTYPE).tolist() == [np.float32(0.8), np.float32(0.1)]
+
+def test_rethreshold_rewrites_only_changed_rows() -> None:
+    db = make_session()
+    add_contents(db, 300)
+    old_policy = make_engine({"version": "v1", "default_threshold": 0.7})
+    rng = np.random.default_rng(0)
+    scores = rng.random((300, 2))
+    crud.content.set_moderation_results(db, results={
+        i + 1: old_policy.evaluate({"violence": float(v), "spam": float(s)}) for i, (v, s) in enumerate(scores)
+    })
+
+    new_policy = make_engine({"version": "v2", "default_threshold": 0.7, "thresholds": {"violence": 0.5}})
+    expected = int(((scores[:, 0] > 0.5) & (scores[:, 0] <= 0.7) & (scores[:, 1] <= 0.7)).sum())
+
+    preview = rethreshold(db, engine=new_policy, chunk_size=64, dry_run=True)
+    assert preview["scanned"] == 300
+    assert preview["changed"] == expected
+    assert db.query(Content).filter(Content.policy_version == "v2").count() == 0
+
+    summary = rethreshold(db, engine=new_policy, chunk_size=64)
+    assert summary["transitions"] == {"approve -> reject": expected}
+    changed = db.query(Content).filter(Content.policy_version == "v2").all()
+    assert len(changed) == expected
+    for content in changed:
+        result = json.loads(content.moderation_result)
+        assert content.is_approved is False
+        assert result["action"] == "reject"
+        assert result["categories"]["violence"]["threshold"] == 0.5
+    assert rethreshold(db, engine=new_policy)["changed"] == 0
+
+def test_rethreshold_leaves_rows_claimed_or_reviewed_mid_run() -> None:
+    db = make_session()
+    add_contents(db, 3)
+    db.add(User(id=2, email="reviewer@example.com", hashed_password="x"))
+    old_policy = make_engine({
+        "version": "v1", "default_threshold": 0.5,
+        "rules": [{"name": "borderline", "when": "violence > 0.3", "action": "review"}],
+    })
+    crud.content.set_moderation_results(db, results={
+        i: old_policy.evaluate({"violence": 0.4}) for i in (1, 2, 3)
+    })
+    assert {content.moderation_action for content in db.query(Content)} == {"review"}
+
+    new_policy = make_engine({"version": "v2", "default_threshold": 0.3})
+    evaluate_many = new_policy.evaluate_many
+
+    def claim_then_evaluate(*args, **kwargs):
+        # A reviewer takes two items between the read and the write
+        claimed = crud.content.claim_for_review(db, reviewer_id=2, limit=2, lease_seconds=60)
+        crud.content.record_reviews(db, reviewer_id=2, decisions={claimed[0].id: True})
+        return evaluate_many(*args, **kwargs)
+
+    new_policy.evaluate_many = claim_then_evaluate
+    assert rethreshold(db, engine=new_policy)["changed"] == 3
+
+    db.expire_all()
+    contents = {content.id: content for content in db.query(Content)}
+    assert (contents[1].moderation_action, contents[1].review_status) == ("approve", "done")
+    assert (contents[2].moderation_action, contents[2].review_status) == ("review", "claimed")
+    assert contents[2].policy_version == "v1"
+    assert (contents[3].moderation_action, contents[3].policy_version) == ("reject", "v2")
+    assert json.loads(contents[1].moderation_result)["action"] == "approve"
+
+def test_backfill_packs_json_scores() -> None:
+    db = make_session()
+    add_contents(db, 2)
+    db.get(Content, 1).moderation_result = json.dumps({"is_approved": False, "scores": {"nsfw": 0.9}})
+    db.get(Content, 2).moderation_result = json.dumps({"is_approved": False, "scores": {}})
+    db.commit()
+
+    assert backfill_scores(db) == 1
+    content = db.get(Content, 1)
+    assert content.moderation_action == "reject"
+    assert rethreshold(db, engine=make_engine({"default_threshold": 0.95}))["changed"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+import io
+import threading
+
+import pytest
+
+from app.core.exceptions import FileUploadError
+from app.services.storage import LocalBackend, S3Backend, StorageService
+
+class RecordingS3Client:
+    """In-memory stand-in for a boto3 S3 client, recording the calls made."""
+
+    def __init__(self):
+        self.objects = {}
+        self.parts = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, name):
+        with self._lock:
+            self.calls.append(name)
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._record("put_object")
+        self.objects[Key] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._record("create_multipart_upload")
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._record("upload_part")
+        self.parts[PartNumber] = bytes(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._record("complete_multipart_upload")
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(numbers)
+        self.objects[Key] = b"".join(self.parts[number] for number in numbers)
+
+    def delete_object(self, Bucket, Key):
+        self._record("delete_object")
+        self.objects.pop(Key, None)
+
+def test_local_backend_roundtrip(tmp_path) -> None:
+    service = StorageService(LocalBackend(str(tmp_path), chunk_size=1000))
+    payload = bytes(range(256)) * 100
+
+    async def run():
+        url = await service.upload_file(io.BytesIO(payload), "images/a.png")
+        data = await service.read_file("images/a.png")
+        deleted = await service.delete_file("images/a.png")
+        return url, data, deleted, await service.delete_file("images/a.png")
+
+    url, data, deleted, deleted_again = asyncio.run(run())
+    assert url == "/files/images/a.png"
+    assert data == payload
+    assert (deleted, deleted_again) == (True, False)
+    assert list(tmp_path.rglob("*.tmp")) == []
+
+def test_local_backend_rejects_escaping_keys(tmp_path) -> None:
+    backend = LocalBackend(str(tmp_path))
+    for key in ("../outside", "/etc/passwd", ""):
+        with pytest.raises(FileUploadError):
+            backend.path(key)
+
+def test_s3_small_upload_uses_put_object() -> None:
+    client = RecordingS3Client()
+    backend = S3Backend("bucket", part_size=1024, client=client)
+    size = asyncio.run(backend.save("small.bin", b"x" * 1000))
+    assert size == 1000
+    assert client.calls == ["put_object"]
+
+def test_s3_large_upload_streams_multipart() -> None:
+    client = RecordingS3Client()
+    backend = S3Backend("bucket", part_size=1024, concurrency=3, client=client)
+    payload = bytes(range(256)) * 40  # 10 parts
+
+    size = asyncio.run(backend.save("large.bin", io.BytesIO(payload)))
+    assert size == len(payload)
+    assert client.calls.count("upload_part") == 10
+    assert client.calls[0] == "create_multipart_upload"
+    assert client.calls[-1] == "complete_multipart_upload"
+    assert client.objects["large.bin"] == payload
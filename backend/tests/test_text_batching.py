@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.services.text_batching import PadStats, TokenCache, length_bucket, pad_batch
+
+BUCKETS = [32, 64, 128, 256, 512]
+
+def test_length_bucket_picks_smallest_fit() -> None:
+    assert length_bucket(1, BUCKETS) == 32
+    assert length_bucket(32, BUCKETS) == 32
+    assert length_bucket(33, BUCKETS) == 64
+    assert length_bucket(900, BUCKETS) == 512
+
+def test_pad_batch_pads_to_bucket() -> None:
+    input_ids, attention_mask = pad_batch([[5, 6, 7], [8]], pad_to=4, pad_id=0)
+    assert input_ids.tolist() == [[5, 6, 7, 0], [8, 0, 0, 0]]
+    assert attention_mask.tolist() == [[1, 1, 1, 0], [1, 0, 0, 0]]
+    assert input_ids.dtype == np.int64
+
+def test_token_cache_encodes_misses_in_one_batch() -> None:
+    calls = []
+
+    def encode_batch(texts):
+        calls.append(list(texts))
+        return [[len(text)] for text in texts]
+
+    cache = TokenCache(max_entries=2)
+    assert cache.encode_many(["aa", "b", "aa"], encode_batch) == [[2], [1], [2]]
+    assert calls == [["aa", "b"]]
+
+    assert cache.encode_many(["b", "ccc"], encode_batch) == [[1], [3]]
+    assert calls[-1] == ["ccc"]
+    # "aa" was least recently used, so it was evicted
+    cache.encode_many(["aa"], encode_batch)
+    assert calls[-1] == ["aa"]
+    assert len(cache) == 2
+    assert cache.stats()["hits"] == 1
+
+def test_pad_stats_counts_wasted_tokens() -> None:
+    stats = PadStats()
+    _, mask = pad_batch([[1] * 30, [1] * 10], pad_to=32, pad_id=0)
+    stats.record(32, mask)
+    result = stats.stats()
+    assert result["real_tokens"] == 40
+    assert result["pad_tokens"] == 24
+    assert result["batches_by_bucket"] == {32: 1}
@@ -0,0 +1,24 @@
+from app.services import torch_runtime as runtime
+from app.services.torch_runtime import TorchRuntime, plan_threads, server_workers
+
+def test_threads_are_an_even_share_of_the_cpus() -> None:
+    assert plan_threads(16, 4) == 4
+    assert plan_threads(6, 4) == 1
+    assert plan_threads(2, 8) == 1  # Never zero
+    assert plan_threads(16, 4, num_threads=3) == 3
+
+def test_worker_count_comes_from_settings_then_environment(monkeypatch) -> None:
+    monkeypatch.setattr(runtime.settings, "SERVER_WORKERS", None)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert server_workers() == 4
+    monkeypatch.setenv("WEB_CONCURRENCY", "lots")
+    assert server_workers() == 1
+    monkeypatch.setattr(runtime.settings, "SERVER_WORKERS", 3)
+    assert server_workers() == 3
+
+def test_stats_report_the_plan_before_torch_is_configured(monkeypatch) -> None:
+    monkeypatch.setattr(runtime.settings, "SERVER_WORKERS", 2)
+    monkeypatch.setattr(runtime, "available_cpus", lambda: 8)
+    stats = TorchRuntime().stats()
+    assert stats["configured"] is False
+    assert stats["planned_intra_op_threads"] == 4
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from app.core.exceptions import FileUploadError
+from app.core.uploads import MemoryviewReader, UploadBufferPool, read_upload
+
+def make_upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="upload.bin")
+
+@pytest.mark.parametrize("size", [0, 1, 999, 1000])
+def test_read_upload_accepts_up_to_the_limit(size) -> None:
+    data = bytes(range(256)) * 4
+    data = data[:size]
+    buffer = bytearray(1000)
+    hasher = hashlib.sha256()
+    view = asyncio.run(read_upload(make_upload(data), buffer, max_size=1000, chunk_size=64, hasher=hasher))
+    assert bytes(view) == data
+    assert view.obj is buffer  # No copy: the view is over the pooled buffer
+    assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+
+def test_read_upload_rejects_oversize_without_reading_it_all() -> None:
+    upload = make_upload(b"x" * 10_000)
+    with pytest.raises(FileUploadError) as error:
+        asyncio.run(read_upload(upload, bytearray(1000), max_size=1000, chunk_size=300))
+    assert error.value.status_code == 400
+    assert "1000 bytes" in error.value.detail
+    assert upload.file.tell() == 1001
+
+def test_buffer_pool_reuses_buffers_up_to_its_size() -> None:
+    pool = UploadBufferPool(buffer_size=16, max_buffers=1)
+
+    async def main():
+        async with pool.acquire() as first:
+            async with pool.acquire() as second:
+                assert first is not second
+                # Beyond the pool, buffers start empty and grow to the upload
+                assert (len(first), len(second)) == (16, 0)
+                view = await read_upload(make_upload(b"abc"), second, max_size=16, chunk_size=2)
+                assert bytes(view) == b"abc" and len(second) == 3
+        async with pool.acquire() as again:
+            # One buffer kept; the extra concurrent one was discarded
+            return first, again
+
+    first, again = asyncio.run(main())
+    assert again is first
+
+def test_buffer_is_returned_when_the_reader_fails() -> None:
+    pool = UploadBufferPool(buffer_size=8, max_buffers=2)
+
+    async def main():
+        with pytest.raises(FileUploadError):
+            async with pool.acquire() as buffer:
+                await read_upload(make_upload(b"x" * 9), buffer, max_size=8)
+        async with pool.acquire() as reused:
+            return buffer, reused
+
+    buffer, reused = asyncio.run(main())
+    assert reused is buffer
+
+def test_memoryview_reader_reads_and_seeks() -> None:
+    reader = MemoryviewReader(memoryview(b"0123456789"))
+    assert reader.read(3) == b"012"
+    assert reader.seek(-2, io.SEEK_END) == 8
+    assert reader.read() == b"89"
+    assert reader.read(1) == b""
+    assert reader.seek(-4, io.SEEK_CUR) == 6
+    assert reader.tell() == 6
+    assert reader.seek(-100) == 0
+    with pytest.raises(ValueError):
+        reader.seek(0, 7)
+
+def test_memoryview_reader_opens_images_from_a_buffer_slice() -> None:
+    encoded = io.BytesIO()
+    Image.new("RGB", (5, 4), (1, 2, 3)).save(encoded, "PNG")
+    buffer = bytearray(1024)
+    data = encoded.getvalue()
+    buffer[:len(data)] = data
+    with Image.open(MemoryviewReader(memoryview(buffer)[:len(data)])) as image:
+        assert (image.size, image.getpixel((0, 0))) == ((5, 4), (1, 2, 3))
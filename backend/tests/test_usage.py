@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import UsageCounter, User
+from app.models.base import Base
+from app.services.usage import UsageMeter
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    db.add_all([User(id=1, email="a@example.com", hashed_password="x"),
+                User(id=2, email="b@example.com", hashed_password="x")])
+    db.commit()
+    db.close()
+    return session_factory
+
+def test_counts_from_many_threads_are_upserted_in_one_row_per_user_and_day() -> None:
+    session_factory = make_session_factory()
+    meter = UsageMeter(shards=4, session_factory=session_factory, default_quotas={})
+
+    def work():
+        for _ in range(500):
+            meter.add(1, texts=1, tokens=10, model_seconds=0.001)
+        meter.add(2, images=1)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert meter.usage(1)["texts"] == 4000  # Unflushed counts are visible too
+
+    async def flush_twice():
+        await meter.flush()
+        meter.add(1, texts=5)
+        await meter.flush()
+
+    asyncio.run(flush_twice())
+
+    db = session_factory()
+    rows = {row.user_id: row for row in db.query(UsageCounter).all()}
+    assert rows[1].texts == 4005 and rows[1].tokens == 40000
+    assert abs(rows[1].model_seconds - 4.0) < 1e-6
+    assert rows[2].images == 8
+    db.close()
+    assert meter.usage(1)["texts"] == 4005  # Flushed totals are not counted twice
+    assert meter.stats()["flushes"] == 2
+
+def test_quotas_are_checked_without_the_database() -> None:
+    session_factory = make_session_factory()
+    meter = UsageMeter(session_factory=session_factory, default_quotas={"texts": 10})
+
+    async def scenario():
+        await meter.flush()
+        db = session_factory()
+        meter.set_quota(db, 2, {"images": 1})
+        db.close()
+
+        meter.add(1, texts=9)
+        assert meter.exceeded(1) == []
+        meter.add(1, texts=1)
+        assert meter.exceeded(1) == ["texts"]
+
+        meter.add(2, images=1)
+        assert meter.exceeded(2) == ["images"]
+        assert meter.quota(2) == {"texts": 10, "images": 1}
+
+        # Another worker's meter sees both at its next flush
+        other = UsageMeter(session_factory=session_factory, default_quotas={"texts": 10})
+        await meter.flush()
+        await other.flush()
+        assert other.exceeded(1) == ["texts"] and other.exceeded(2) == ["images"]
+
+    asyncio.run(scenario())
+
+def test_daily_usage_includes_unflushed_counts() -> None:
+    session_factory = make_session_factory()
+    meter = UsageMeter(session_factory=session_factory, default_quotas={})
+
+    async def scenario():
+        meter.add(1, texts=3)
+        await meter.flush()
+        meter.add(1, texts=2)
+
+    asyncio.run(scenario())
+    db = session_factory()
+    points = meter.daily(db, 1, 3)
+    db.close()
+    assert [point["texts"] for point in points] == [0, 0, 5]
+
+def test_threads_spread_over_shards_and_users_can_be_listed_while_counting() -> None:
+    meter = UsageMeter(shards=4, session_factory=make_session_factory(), default_quotas={})
+    shards = []
+    listed = []
+    start = threading.Barrier(9)
+
+    def work(offset):
+        start.wait()
+        shards.append(meter._shard())
+        for i in range(2000):
+            meter.add(offset * 10_000 + i, texts=1)
+
+    def read():
+        start.wait()
+        for _ in range(200):
+            listed.append(len(meter.users()))
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)] + [threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(listed) == 200 and listed == sorted(listed)
+    assert len(meter.users()) == 16_000
+    # Eight threads over four shards: two per shard, assigned round robin
+    assert sorted(shards.count(shard) for shard in set(shards)) == [2, 2, 2, 2]